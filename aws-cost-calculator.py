@@ -54,12 +54,15 @@ def calculate_ecs_cost(vcpu, memory_gb, hours_per_month):
     memory_cost = memory_gb * PRICING['fargate_memory'] * hours_per_month
     return vcpu_cost + memory_cost
 
-def calculate_workspace_cost(num_students, avg_hours_per_day, warm_pool_size=3):
+def calculate_workspace_cost(num_students, avg_hours_per_day, warm_pool_size=3, warm_pool_schedule=None):
     """
     Calculate workspace cost with warm pool optimization
     
     Traditional: All students have 24/7 containers
     Optimized: Warm pool + on-demand
+    
+    warm_pool_schedule: optional list of 168 hour-of-week pool sizes (the
+    workspace Lambda's forecast schedule) used instead of a 24/7 warm_pool_size
     """
     hours_per_month = 730
     
@@ -71,11 +74,15 @@ def calculate_workspace_cost(num_students, avg_hours_per_day, warm_pool_size=3):
     )
     
     # Optimized approach
-    # Warm pool (24/7)
+    # Warm pool (24/7, or following the hour-of-week schedule)
+    if warm_pool_schedule:
+        warm_pool_hours = sum(warm_pool_schedule) * hours_per_month / 168
+    else:
+        warm_pool_hours = hours_per_month * warm_pool_size
     warm_pool_cost = calculate_ecs_cost(
         vcpu=1,
         memory_gb=2,
-        hours_per_month=hours_per_month * warm_pool_size
+        hours_per_month=warm_pool_hours
     )
     
     # On-demand (only when students use)
@@ -1,7 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import CustomUser
+from .models import (
+    CustomUser,
+    StudentDatabaseCredentials,
+    StudentDatabaseUsage,
+    TrainerCapacitySnapshot,
+    TrainerLoad,
+    WarmContainer,
+    WorkspaceProvision,
+)
 
 
 @admin.register(CustomUser)
@@ -13,3 +21,59 @@ class CustomUserAdmin(UserAdmin):
     fieldsets = UserAdmin.fieldsets + (
         ("Custom Fields", {"fields": ("role", "name", "track", "profile_image", "assigned_trainer")}),
     )
+
+
+@admin.register(WorkspaceProvision)
+class WorkspaceProvisionAdmin(admin.ModelAdmin):
+    list_display = ["user", "workspace_type", "status", "container_name", "port", "updated_at", "ready_at", "last_activity_at"]
+    list_filter = ["status", "workspace_type"]
+    search_fields = ["user__email", "container_name"]
+    readonly_fields = ["requested_at", "updated_at", "ready_at", "last_activity_at", "last_sampled_at", "stopped_at"]
+
+
+@admin.register(WarmContainer)
+class WarmContainerAdmin(admin.ModelAdmin):
+    list_display = ["container_name", "workspace_type", "status", "port", "assigned_to", "created_at", "assigned_at"]
+    list_filter = ["status", "workspace_type"]
+    search_fields = ["container_name", "assigned_to__email"]
+    readonly_fields = ["created_at", "assigned_at"]
+
+
+@admin.register(TrainerLoad)
+class TrainerLoadAdmin(admin.ModelAdmin):
+    list_display = ["trainer", "track", "student_count", "updated_at"]
+    list_filter = ["track"]
+    search_fields = ["trainer__email"]
+    readonly_fields = ["updated_at"]
+
+
+@admin.register(TrainerCapacitySnapshot)
+class TrainerCapacitySnapshotAdmin(admin.ModelAdmin):
+    list_display = ["trainer", "track", "student_count", "capacity", "taken_at"]
+    list_filter = ["track"]
+    search_fields = ["trainer__email"]
+    date_hierarchy = "taken_at"
+
+
+@admin.register(StudentDatabaseCredentials)
+class StudentDatabaseCredentialsAdmin(admin.ModelAdmin):
+    list_display = ["user", "schema_name", "username", "template_version", "throttled", "throttled_at", "throttle_reason"]
+    list_filter = ["throttled", "template_version"]
+    search_fields = ["user__email", "schema_name", "username"]
+    exclude = ["password", "connection_string"]
+    readonly_fields = ["throttled_at", "created_at", "updated_at"]
+    actions = ["release_throttle"]
+
+    @admin.action(description="Restore normal database limits")
+    def release_throttle(self, request, queryset):
+        from .student_db_usage import release_throttle
+        released = release_throttle(queryset.filter(throttled=True))
+        self.message_user(request, f"Released {released} student(s)")
+
+
+@admin.register(StudentDatabaseUsage)
+class StudentDatabaseUsageAdmin(admin.ModelAdmin):
+    list_display = ["user", "schema_name", "total_bytes", "table_count", "connections", "query_time_ms", "collected_at"]
+    search_fields = ["user__email", "schema_name"]
+    date_hierarchy = "collected_at"
+    readonly_fields = ["collected_at"]
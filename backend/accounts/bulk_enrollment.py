@@ -0,0 +1,242 @@
+"""
+Bulk enrollment for cohort imports
+
+Enrolling a cohort one student at a time (create_user, assign a trainer,
+unlock Project 1, send the welcome email) costs a password hash, a handful of
+queries and an SMTP round trip per student. bulk_enroll() does the same work
+in a fixed number of queries:
+
+- new accounts are inserted with bulk_create and an unusable password,
+- trainers are assigned in one pass of utils.trainer_assignment,
+- Project 1 progress rows are bulk-inserted,
+- welcome emails are queued as 'accounts.welcome_emails' jobs of
+  WELCOME_EMAIL_BATCH_SIZE students; the job sets each password (the slow
+  hash) just before mailing it.
+
+Students that already have an account are enrolled in place and get no
+welcome email. Used by the bulk_enroll management command and the
+students/bulk-enroll/ admin endpoint.
+"""
+import csv
+import json
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from compliance.models import AuditLog
+from curriculum.models import Track
+from curriculum.unlocks import backfill_first_project_unlocks
+from jobs.queue import enqueue
+from utils.trainer_assignment import assign_trainers
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+WELCOME_EMAIL_BATCH_SIZE = 50
+
+
+def read_students(stream, fmt):
+    """
+    Parse student rows from a CSV (header: email,name,track) or JSON Lines file
+
+    Args:
+        stream: text file object
+        fmt: 'csv' or 'jsonl'
+
+    Returns:
+        list: dicts with at least 'email' and 'track'
+    """
+    if fmt == 'csv':
+        return [
+            {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+            for row in csv.DictReader(stream)
+        ]
+    if fmt == 'jsonl':
+        rows = []
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {number} is not valid JSON: {e}")
+        return rows
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _validate(rows, track_codes):
+    """Split rows into (valid, errors); valid rows are normalized and unique by email"""
+    valid = {}
+    errors = []
+
+    for number, row in enumerate(rows, start=1):
+        email = (row.get('email') or '').strip().lower()
+        track = (row.get('track') or '').strip().upper()
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append({'row': number, 'email': email, 'error': 'Invalid email'})
+            continue
+        if track not in track_codes:
+            errors.append({'row': number, 'email': email, 'error': f'Unknown track {track!r}'})
+            continue
+        if email in valid:
+            errors.append({'row': number, 'email': email, 'error': 'Duplicate email in file'})
+            continue
+        valid[email] = {'email': email, 'track': track, 'name': (row.get('name') or '').strip()}
+
+    return list(valid.values()), errors
+
+
+def _unique_usernames(emails):
+    """Username per email (local part, suffixed on collisions, as checkout does)"""
+    bases = {email: email.split('@')[0] for email in emails}
+    taken = set(User.objects.filter(username__in=set(bases.values())).values_list('username', flat=True))
+    for base in set(bases.values()) & taken:
+        taken.update(User.objects.filter(username__startswith=base).values_list('username', flat=True))
+
+    usernames = {}
+    for email, base in bases.items():
+        username, counter = base, 1
+        while username in taken:
+            username = f"{base}{counter}"
+            counter += 1
+        taken.add(username)
+        usernames[email] = username
+    return usernames
+
+
+def bulk_enroll(rows, send_emails=True, dry_run=False, batch_size=500):
+    """
+    Create and enroll students from parsed rows
+
+    Args:
+        rows: dicts with 'email', 'track' and optional 'name'
+        send_emails: queue welcome emails for new accounts
+        dry_run: validate and count without saving anything
+        batch_size: rows per INSERT
+
+    Returns:
+        dict: counts of created/enrolled students, progress rows and queued
+        email jobs, plus per-row errors
+    """
+    track_codes = set(Track.objects.values_list('code', flat=True))
+    students, errors = _validate(rows, track_codes)
+    result = {
+        'created': 0,
+        'enrolled_existing': 0,
+        'progress_unlocked': 0,
+        'email_jobs': 0,
+        'errors': errors,
+    }
+    if not students:
+        return result
+
+    now = timezone.now()
+    emails = [student['email'] for student in students]
+
+    with transaction.atomic():
+        # Emails are stored as typed, so match them case-insensitively
+        existing = {
+            user.email.lower(): user
+            for user in User.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails)
+        }
+
+        for email, user in list(existing.items()):
+            if user.role != 'student':
+                errors.append({'row': None, 'email': email, 'error': f'Existing {user.role} account'})
+        students = [s for s in students if s['email'] not in existing or existing[s['email']].role == 'student']
+
+        usernames = _unique_usernames([s['email'] for s in students if s['email'] not in existing])
+
+        new_users = []
+        for student in students:
+            if student['email'] in existing:
+                continue
+            user = User(
+                email=student['email'],
+                username=usernames[student['email']],
+                name=student['name'],
+                role='student',
+                track=student['track'],
+                enrollment_status='ENROLLED',
+                payment_verified=True,
+                enrolled_at=now,
+            )
+            # Real passwords are set by the welcome email job; hashing here is most of the cost
+            user.set_unusable_password()
+            new_users.append(user)
+
+        updated_users = []
+        for student in students:
+            user = existing.get(student['email'])
+            if user is None:
+                continue
+            user.track = student['track']
+            user.enrollment_status = 'ENROLLED'
+            user.payment_verified = True
+            user.enrolled_at = user.enrolled_at or now
+            updated_users.append(user)
+
+        # Saved below with the rest of the fields, in this transaction
+        assign_trainers(new_users + updated_users, save=False)
+
+        User.objects.bulk_create(new_users, batch_size=batch_size)
+        User.objects.bulk_update(
+            updated_users,
+            ['track', 'enrollment_status', 'payment_verified', 'enrolled_at', 'assigned_trainer'],
+            batch_size=batch_size
+        )
+
+        # bulk_create only returns primary keys on some databases, so look them up
+        enrolled_ids = list(
+            User.objects.filter(email__in=[user.email for user in new_users + updated_users]).values_list('id', flat=True)
+        )
+        new_ids = sorted(
+            User.objects.filter(email__in=[user.email for user in new_users]).values_list('id', flat=True)
+        )
+
+        result['progress_unlocked'] = backfill_first_project_unlocks(
+            User.objects.filter(id__in=enrolled_ids),
+            batch_size=batch_size,
+            include_steps=True
+        )
+
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                user_id=user_id,
+                action='ENROLLMENT',
+                resource='Bulk enrollment',
+                details={'source': 'bulk_enroll'}
+            )
+            for user_id in enrolled_ids
+        ], batch_size=batch_size)
+
+        if send_emails:
+            for start in range(0, len(new_ids), WELCOME_EMAIL_BATCH_SIZE):
+                batch = new_ids[start:start + WELCOME_EMAIL_BATCH_SIZE]
+                enqueue(
+                    'accounts.welcome_emails',
+                    {'user_ids': batch},
+                    idempotency_key=f"welcome-emails:{batch[0]}-{batch[-1]}"
+                )
+                result['email_jobs'] += 1
+
+        result['created'] = len(new_users)
+        result['enrolled_existing'] = len(updated_users)
+
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if not dry_run:
+        logger.info(
+            f"Bulk enrollment: {result['created']} created, {result['enrolled_existing']} existing, "
+            f"{len(errors)} rejected"
+        )
+    return result
@@ -0,0 +1,64 @@
+"""
+Cohort enrollment API views
+"""
+import io
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status as http_status
+
+from .bulk_enrollment import bulk_enroll, read_students
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_enroll_students(request):
+    """
+    Create and enroll a cohort of students
+    Only accessible by admin roles
+
+    Body (multipart):
+    - file: CSV (email,name,track) or JSON Lines file
+    Body (JSON):
+    - students: list of {email, name, track}
+    Optional:
+    - send_emails: queue welcome emails (default: true)
+    - dry_run: validate without saving (default: false)
+    """
+    if request.user.role not in ['admin', 'superadmin']:
+        return Response(
+            {"error": "Permission denied"},
+            status=http_status.HTTP_403_FORBIDDEN
+        )
+
+    upload = request.FILES.get('file')
+    if upload:
+        fmt = 'csv' if upload.name.lower().endswith('.csv') else 'jsonl'
+        try:
+            rows = read_students(io.TextIOWrapper(upload.file, encoding='utf-8', newline=''), fmt)
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+    else:
+        rows = request.data.get('students')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return Response(
+                {"error": "Upload a file or send a students list"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+    def flag(name, default):
+        value = request.data.get(name, default)
+        return value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes')
+
+    result = bulk_enroll(
+        rows,
+        send_emails=flag('send_emails', True),
+        dry_run=flag('dry_run', False)
+    )
+
+    return Response({
+        "success": True,
+        "dry_run": flag('dry_run', False),
+        **result
+    })
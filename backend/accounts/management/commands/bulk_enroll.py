@@ -0,0 +1,65 @@
+"""
+Django management command to enroll a cohort from a CSV or JSON Lines file
+"""
+from django.core.management.base import BaseCommand, CommandError
+from accounts.bulk_enrollment import bulk_enroll, read_students
+
+
+class Command(BaseCommand):
+    help = 'Create and enroll students from a CSV (email,name,track) or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Student file (.csv or .jsonl)')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='File format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--no-email',
+            action='store_true',
+            help='Do not queue welcome emails'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and report without saving anything'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per INSERT statement (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+
+        try:
+            with open(path, newline='', encoding='utf-8') as stream:
+                rows = read_students(stream, fmt)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'📋 Enrolling {len(rows)} students from {path}...')
+
+        result = bulk_enroll(
+            rows,
+            send_emails=not options['no_email'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size']
+        )
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"⚠️  Row {error['row'] or '-'} {error['email']}: {error['error']}"))
+
+        self.stdout.write('\n' + '='*50)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was saved'))
+        self.stdout.write(self.style.SUCCESS(f"✅ New accounts: {result['created']}"))
+        self.stdout.write(self.style.SUCCESS(f"✅ Existing students enrolled: {result['enrolled_existing']}"))
+        self.stdout.write(f"Project 1 unlocked: {result['progress_unlocked']}")
+        self.stdout.write(f"Welcome email jobs queued: {result['email_jobs']}")
+        self.stdout.write(f"Rejected rows: {len(result['errors'])}")
+        self.stdout.write('='*50)
@@ -0,0 +1,55 @@
+"""
+Django management command to record DP student database usage and enforce quotas
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from accounts.student_db_usage import collect_usage
+
+
+class Command(BaseCommand):
+    help = 'Record per-student schema size and query time, and throttle students over their quotas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Collect once and exit instead of looping (e.g. from cron)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=900.0,
+            help='Seconds between collections (default: 900)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('📊 Collecting student database usage')
+        throttled = released = 0
+
+        try:
+            while True:
+                try:
+                    result = collect_usage()
+                    throttled, released = result['throttled'], released + result['released']
+                    if not result['query_stats'] and result['students']:
+                        self.stdout.write(self.style.WARNING(
+                            '⚠️  pg_stat_statements is not installed: only storage quotas are enforced'
+                        ))
+                    self.stdout.write(
+                        f"Recorded {result['students']} student(s), "
+                        f"{result['throttled']} throttled, {result['released']} released, "
+                        f"{result['disconnected']} session(s) disconnected"
+                    )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'❌ Collection failed: {e}'))
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping usage collection...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Throttled now: {throttled}, released: {released}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,59 @@
+"""
+Django management command to keep the workspace warm pool topped up
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from accounts.warm_pool import pool_size, replenish
+from accounts.workspace_pipeline import WORKSPACE_CONFIG
+
+
+class Command(BaseCommand):
+    help = 'Start pre-warmed workspace containers up to WORKSPACE_WARM_POOL_SIZE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Top the pool up once and exit instead of looping'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between checks (default: 60)'
+        )
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            choices=list(WORKSPACE_CONFIG),
+            help='Only maintain this workspace type (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        types = [t for t in (options['types'] or WORKSPACE_CONFIG) if pool_size(t) > 0]
+        if not types:
+            self.stdout.write(self.style.WARNING('Warm pool disabled (WORKSPACE_WARM_POOL_SIZE is 0)'))
+            return
+
+        self.stdout.write(f'🔥 Maintaining warm pool for: {", ".join(types)}')
+        started = 0
+
+        try:
+            while True:
+                for workspace_type in types:
+                    try:
+                        started += replenish(workspace_type)
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f'❌ {workspace_type}: {e}'))
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping warm pool maintenance...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Warm containers started: {started}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,41 @@
+"""
+Django management command to provision Postgres schemas for a DP cohort
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from accounts.postgres_provisioning import PostgresProvisioningService
+
+
+class Command(BaseCommand):
+    help = 'Create Postgres schemas for enrolled DP students that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.STUDENT_DB_PROVISION_BATCH_SIZE,
+            help=f'Students per transaction (default: {settings.STUDENT_DB_PROVISION_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Also re-provision students that already have credentials (rotates passwords)'
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        students = User.objects.filter(role='student', track='DP', enrollment_status='ENROLLED')
+        if not options['all']:
+            students = students.filter(db_credentials__isnull=True)
+        students = list(students.order_by('id'))
+
+        self.stdout.write(f'🐘 Provisioning Postgres schemas for {len(students)} DP students...')
+        if not students:
+            return
+
+        credentials = PostgresProvisioningService.provision_schemas(students, batch_size=options['batch_size'])
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Schemas provisioned: {len(credentials)}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,68 @@
+"""
+Django management command to stop idle workspace containers
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accounts.workspace_activity import reap_idle_workspaces
+
+
+class Command(BaseCommand):
+    help = 'Sample workspace activity and stop containers idle past WORKSPACE_IDLE_TIMEOUT_MINUTES (volumes are kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Check once and exit instead of looping'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60.0,
+            help='Seconds between samples (default: 60)'
+        )
+        parser.add_argument(
+            '--idle-minutes',
+            type=int,
+            help=f'Idle timeout in minutes (default: {settings.WORKSPACE_IDLE_TIMEOUT_MINUTES})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report idle workspaces without stopping them'
+        )
+
+    def handle(self, *args, **options):
+        idle_minutes = options['idle_minutes'] or settings.WORKSPACE_IDLE_TIMEOUT_MINUTES
+        self.stdout.write(f'💤 Stopping workspaces idle for more than {idle_minutes} minutes')
+        totals = {'active': 0, 'stopped': 0, 'missing': 0}
+
+        try:
+            while True:
+                try:
+                    counts = reap_idle_workspaces(
+                        idle_minutes=idle_minutes,
+                        dry_run=options['dry_run']
+                    )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'❌ Reaper run failed: {e}'))
+                else:
+                    totals['stopped'] += counts['stopped']
+                    totals['active'] = counts['active']
+                    totals['missing'] = counts['missing']
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping reaper...')
+
+        self.stdout.write('\n' + '='*50)
+        label = 'Would stop' if options['dry_run'] else 'Stopped'
+        self.stdout.write(self.style.SUCCESS(f'✅ {label}: {totals["stopped"]}'))
+        self.stdout.write(f'🟢 Active: {totals["active"]}')
+        if totals['missing']:
+            self.stdout.write(self.style.WARNING(f'⚠️  Missing containers: {totals["missing"]}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,18 @@
+"""
+Django management command to recount trainer load counters
+"""
+from django.core.management.base import BaseCommand
+from utils.trainer_assignment import rebuild_trainer_loads
+
+
+class Command(BaseCommand):
+    help = 'Recount per-track student counts for every trainer from current assignments'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Recounting trainer loads...')
+
+        written = rebuild_trainer_loads()
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Trainer load rows written: {written}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,45 @@
+"""
+Django management command to record trainer capacity snapshots
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from utils.trainer_assignment import take_capacity_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Store per-trainer, per-track utilization for the capacity history endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Take one snapshot and exit instead of looping (e.g. from cron)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=3600.0,
+            help='Seconds between snapshots (default: 3600)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('📸 Recording trainer capacity snapshots')
+        written = 0
+
+        try:
+            while True:
+                try:
+                    written += take_capacity_snapshot()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'❌ Snapshot failed: {e}'))
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping capacity snapshots...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Snapshot rows written: {written}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,37 @@
+"""
+Django management command to upgrade DP student schemas to the current sample-data template
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accounts.models import StudentDatabaseCredentials
+from accounts.postgres_provisioning import PostgresProvisioningService
+from accounts.student_db_template import CURRENT_TEMPLATE_VERSION, TEMPLATE_VERSIONS
+
+
+class Command(BaseCommand):
+    help = 'Copy sample tables added to the template since each student schema was provisioned'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.STUDENT_DB_PROVISION_BATCH_SIZE,
+            help=f'Schemas per transaction (default: {settings.STUDENT_DB_PROVISION_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'🐘 Template version {CURRENT_TEMPLATE_VERSION}:')
+        for step in TEMPLATE_VERSIONS:
+            self.stdout.write(f"   v{step['version']}: {step['description']} ({', '.join(step['tables'])})")
+
+        pending = StudentDatabaseCredentials.objects.filter(template_version__lt=CURRENT_TEMPLATE_VERSION)
+        self.stdout.write(f'Upgrading {pending.count()} student schemas...')
+
+        upgraded = PostgresProvisioningService.upgrade_schemas(
+            pending.order_by('id'),
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Schemas upgraded: {upgraded}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_customuser_jupyter_url_customuser_prefect_url_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkspaceProvision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workspace_type', models.CharField(choices=[('vscode', 'VS Code'), ('superset', 'Superset')], max_length=20)),
+                ('container_name', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('REQUESTED', 'Requested'), ('PULLING', 'Pulling image'), ('STARTING', 'Starting container'), ('HEALTHY', 'Container healthy'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='REQUESTED', max_length=20)),
+                ('url', models.CharField(blank=True, max_length=255)),
+                ('port', models.CharField(blank=True, max_length=10)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ready_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workspace_provisions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'workspace_type'), name='unique_workspace_per_type')],
+            },
+        ),
+    ]
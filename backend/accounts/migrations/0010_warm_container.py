@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_workspace_provision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WarmContainer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workspace_type', models.CharField(choices=[('vscode', 'VS Code'), ('superset', 'Superset')], max_length=20)),
+                ('container_name', models.CharField(max_length=100, unique=True)),
+                ('port', models.CharField(max_length=10)),
+                ('volume_path', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('WARMING', 'Warming up'), ('WARM', 'Warm'), ('ASSIGNED', 'Assigned')], default='WARMING', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('assigned_at', models.DateTimeField(blank=True, null=True)),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['workspace_type', 'status'], name='accounts_wa_workspa_d89eaf_idx')],
+            },
+        ),
+    ]
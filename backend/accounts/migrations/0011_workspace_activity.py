@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_warm_container'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workspaceprovision',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workspaceprovision',
+            name='last_cpu_usage',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspaceprovision',
+            name='last_net_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workspaceprovision',
+            name='last_sampled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workspaceprovision',
+            name='stopped_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='workspaceprovision',
+            name='status',
+            field=models.CharField(choices=[('REQUESTED', 'Requested'), ('PULLING', 'Pulling image'), ('STARTING', 'Starting container'), ('HEALTHY', 'Container healthy'), ('READY', 'Ready'), ('STOPPED', 'Stopped while idle'), ('FAILED', 'Failed')], default='REQUESTED', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='workspaceprovision',
+            index=models.Index(fields=['status', 'last_activity_at'], name='accounts_wo_status_80f8e1_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_loads(apps, schema_editor):
+    """Start the counters from the current assignments"""
+    from django.db.models import Count
+    from django.db.models.functions import Upper
+    
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    TrainerLoad = apps.get_model('accounts', 'TrainerLoad')
+    
+    rows = CustomUser.objects.filter(
+        role='student',
+        assigned_trainer__isnull=False
+    ).exclude(track='').values('assigned_trainer', track_code=Upper('track')).annotate(count=Count('id'))
+    
+    TrainerLoad.objects.bulk_create([
+        TrainerLoad(trainer_id=row['assigned_trainer'], track=row['track_code'], student_count=row['count'])
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_workspace_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainerLoad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('track', models.CharField(max_length=50)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('trainer', models.ForeignKey(limit_choices_to={'role': 'trainer'}, on_delete=django.db.models.deletion.CASCADE, related_name='loads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['track', 'student_count'], name='accounts_tr_track_302e84_idx')],
+                'constraints': [models.UniqueConstraint(fields=('trainer', 'track'), name='unique_trainer_load_per_track')],
+            },
+        ),
+        migrations.RunPython(populate_loads, migrations.RunPython.noop),
+    ]
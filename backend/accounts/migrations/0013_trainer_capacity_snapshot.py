@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_trainer_load'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainerCapacitySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('track', models.CharField(max_length=50)),
+                ('student_count', models.PositiveIntegerField()),
+                ('capacity', models.PositiveIntegerField()),
+                ('taken_at', models.DateTimeField(db_index=True)),
+                ('trainer', models.ForeignKey(limit_choices_to={'role': 'trainer'}, on_delete=django.db.models.deletion.CASCADE, related_name='capacity_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['trainer', 'taken_at'], name='accounts_tr_trainer_8b3570_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_trainer_capacity_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentdatabasecredentials',
+            name='template_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
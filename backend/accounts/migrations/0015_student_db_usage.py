@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_student_db_template_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentdatabasecredentials',
+            name='throttle_reason',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='studentdatabasecredentials',
+            name='throttled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='studentdatabasecredentials',
+            name='throttled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='StudentDatabaseUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(max_length=100)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('table_count', models.PositiveIntegerField(default=0)),
+                ('connections', models.PositiveIntegerField(default=0)),
+                ('calls', models.BigIntegerField(blank=True, null=True)),
+                ('total_exec_time_ms', models.FloatField(blank=True, null=True)),
+                ('query_time_ms', models.FloatField(blank=True, null=True)),
+                ('collected_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='db_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-collected_at'],
+                'indexes': [models.Index(fields=['user', 'collected_at'], name='accounts_st_user_id_c63512_idx')],
+            },
+        ),
+    ]
@@ -134,6 +134,12 @@ class StudentDatabaseCredentials(models.Model):
     username = models.CharField(max_length=100)
     password = models.CharField(max_length=255)  # Should be encrypted
     connection_string = models.TextField()
+    # Version of the sample-data template copied into the schema (0: none)
+    template_version = models.PositiveIntegerField(default=0)
+    # Set by the usage collector while the student is over a quota
+    throttled = models.BooleanField(default=False)
+    throttled_at = models.DateTimeField(null=True, blank=True)
+    throttle_reason = models.CharField(max_length=200, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -141,4 +147,165 @@ class StudentDatabaseCredentials(models.Model):
         verbose_name_plural = 'Student Database Credentials'
     
     def __str__(self):
-        return f"{self.user.email} - {self.schema_name}"
\ No newline at end of file
+        return f"{self.user.email} - {self.schema_name}"
+
+
+class StudentDatabaseUsage(models.Model):
+    """Resource usage of one student's schema and role, recorded by accounts.student_db_usage"""
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='db_usage'
+    )
+    schema_name = models.CharField(max_length=100)
+    total_bytes = models.BigIntegerField(default=0)  # tables, indexes and TOAST
+    table_count = models.PositiveIntegerField(default=0)
+    connections = models.PositiveIntegerField(default=0)
+    # Cumulative pg_stat_statements totals for the role; null when the extension is unavailable
+    calls = models.BigIntegerField(null=True, blank=True)
+    total_exec_time_ms = models.FloatField(null=True, blank=True)
+    # Query time since the previous collection
+    query_time_ms = models.FloatField(null=True, blank=True)
+    collected_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        ordering = ['-collected_at']
+        indexes = [
+            models.Index(fields=['user', 'collected_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.schema_name} {self.total_bytes} bytes at {self.collected_at}"
+
+class WorkspaceProvision(models.Model):
+    """Progress of a student's workspace container through the provisioning pipeline"""
+    STATUS_CHOICES = [
+        ('REQUESTED', 'Requested'),
+        ('PULLING', 'Pulling image'),
+        ('STARTING', 'Starting container'),
+        ('HEALTHY', 'Container healthy'),
+        ('READY', 'Ready'),
+        ('STOPPED', 'Stopped while idle'),
+        ('FAILED', 'Failed'),
+    ]
+    WORKSPACE_TYPE_CHOICES = [
+        ('vscode', 'VS Code'),
+        ('superset', 'Superset'),
+    ]
+    
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='workspace_provisions'
+    )
+    workspace_type = models.CharField(max_length=20, choices=WORKSPACE_TYPE_CHOICES)
+    container_name = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='REQUESTED')
+    url = models.CharField(max_length=255, blank=True)
+    port = models.CharField(max_length=10, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    
+    # Activity tracking for the idle reaper
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    last_net_bytes = models.BigIntegerField(default=0)  # container rx+tx at the last stats sample
+    last_cpu_usage = models.BigIntegerField(default=0)  # cumulative container CPU time (ns) at the last sample
+    last_sampled_at = models.DateTimeField(null=True, blank=True)
+    stopped_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'workspace_type'], name='unique_workspace_per_type'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'last_activity_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.workspace_type} - {self.status}"
+    
+    @property
+    def is_in_progress(self):
+        return self.status not in ('READY', 'STOPPED', 'FAILED')
+
+
+class WarmContainer(models.Model):
+    """Pre-started workspace container waiting in the warm pool"""
+    STATUS_CHOICES = [
+        ('WARMING', 'Warming up'),
+        ('WARM', 'Warm'),
+        ('ASSIGNED', 'Assigned'),
+    ]
+    
+    workspace_type = models.CharField(max_length=20, choices=WorkspaceProvision.WORKSPACE_TYPE_CHOICES)
+    container_name = models.CharField(max_length=100, unique=True)
+    port = models.CharField(max_length=10)
+    volume_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='WARMING')
+    assigned_to = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['workspace_type', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.container_name} ({self.status})"
+
+
+class TrainerLoad(models.Model):
+    """Number of students of one track assigned to a trainer, kept by utils.trainer_assignment"""
+    trainer = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='loads',
+        limit_choices_to={'role': 'trainer'}
+    )
+    track = models.CharField(max_length=50)
+    student_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['trainer', 'track'], name='unique_trainer_load_per_track'),
+        ]
+        indexes = [
+            models.Index(fields=['track', 'student_count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.trainer.email} {self.track}: {self.student_count}"
+
+
+class TrainerCapacitySnapshot(models.Model):
+    """Point-in-time utilization of one trainer for one track, for capacity charts"""
+    trainer = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='capacity_snapshots',
+        limit_choices_to={'role': 'trainer'}
+    )
+    track = models.CharField(max_length=50)
+    student_count = models.PositiveIntegerField()
+    capacity = models.PositiveIntegerField()
+    taken_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['trainer', 'taken_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.trainer.email} {self.track}: {self.student_count}/{self.capacity} at {self.taken_at}"
@@ -1,144 +1,441 @@
 """
 PostgreSQL Schema Provisioning Service
 Creates isolated schemas for Data Professional students
+
+Admin connections to the student database come from a bounded pool
+(STUDENT_DB_POOL_MIN..STUDENT_DB_POOL_MAX) that is opened on first use and
+reused across calls; when every connection is busy, callers wait for one.
+Schema and role names are quoted with psycopg2.sql and passwords are sent as
+query parameters, never formatted into the SQL text. Role passwords are sent
+as SCRAM-SHA-256 verifiers computed here (as libpq's PQencryptPasswordConn
+does), so the plaintext never appears in the server's statement logs.
+
+For cohort onboarding, provision_schemas() sets up many students per
+transaction: each batch of STUDENT_DB_PROVISION_BATCH_SIZE students is one
+round trip to look up existing roles and one to run all of the DDL.
+
+With STUDENT_DB_USE_TEMPLATE, new schemas are preloaded with the DP sample
+tables by copying them server-side from the versioned template schema (see
+student_db_template); PostgresProvisioningService.upgrade_schemas() brings
+existing students up to the current template version.
 """
-import psycopg2
+import base64
+import hashlib
+import hmac
 import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool, sql
 from django.conf import settings
 from django.utils.crypto import get_random_string
 
+from .student_db_template import (
+    clone_statements, ensure_template, existing_tables, template_indexes, template_tables
+)
+
 logger = logging.getLogger(__name__)
 
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Create the admin connection pool on first use"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            _pool = pool.ThreadedConnectionPool(
+                settings.STUDENT_DB_POOL_MIN,
+                settings.STUDENT_DB_POOL_MAX,
+                host=settings.STUDENT_DB_HOST,
+                port=settings.STUDENT_DB_PORT,
+                database=settings.STUDENT_DB_NAME,
+                user=settings.STUDENT_DB_ADMIN_USER,
+                password=settings.STUDENT_DB_ADMIN_PASSWORD
+            )
+            # ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead
+            _pool_slots = threading.BoundedSemaphore(settings.STUDENT_DB_POOL_MAX)
+    return _pool
+
+
+def close_pool():
+    """Close every pooled admin connection (e.g. after settings change in tests)"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = None
+        _pool_slots = None
+
+
+@contextmanager
+def admin_connection():
+    """
+    Borrow a pooled admin connection for one transaction
+
+    Commits when the block succeeds and rolls back if it raises. Connections
+    that were broken by the error are discarded instead of returned to the pool.
+    """
+    connection_pool = _get_pool()
+    slots = _pool_slots
+    slots.acquire()
+    conn = None
+    try:
+        conn = connection_pool.getconn()
+        try:
+            with conn:
+                yield conn
+        finally:
+            connection_pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
+
+SCRAM_ITERATIONS = 4096
+
+
+def scram_sha256_verifier(password, salt=None, iterations=SCRAM_ITERATIONS):
+    """
+    Postgres SCRAM-SHA-256 verifier for a password (the value stored in pg_authid)
+
+    Passwords are expected to be ASCII, as generated by provision_schemas(), so no
+    SASLprep normalization is needed.
+    """
+    salt = salt or os.urandom(16)
+    salted = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    client_key = hmac.new(salted, b'Client Key', hashlib.sha256).digest()
+    stored_key = hashlib.sha256(client_key).digest()
+    server_key = hmac.new(salted, b'Server Key', hashlib.sha256).digest()
+
+    def b64(value):
+        return base64.b64encode(value).decode('ascii')
+
+    return f"SCRAM-SHA-256${iterations}:{b64(salt)}${b64(stored_key)}:{b64(server_key)}"
+
+
+def student_db_names(user_id):
+    """(schema, role) names of a student's database"""
+    return f"dp_student_{user_id}", f"student_{user_id}"
+
+
+def role_limit_statements(username, throttled=False):
+    """
+    Statements that set a student role's connection limit, statement_timeout and work_mem
+
+    Settings made with ALTER ROLE ... SET apply to the role's new sessions.
+    """
+    role = sql.Identifier(username)
+    if throttled:
+        timeout = settings.STUDENT_DB_THROTTLED_STATEMENT_TIMEOUT
+        connection_limit = settings.STUDENT_DB_THROTTLED_CONNECTION_LIMIT
+    else:
+        timeout = settings.STUDENT_DB_STATEMENT_TIMEOUT
+        connection_limit = settings.STUDENT_DB_CONNECTION_LIMIT
+
+    return [
+        sql.SQL("ALTER ROLE {role} CONNECTION LIMIT {limit}").format(role=role, limit=sql.Literal(connection_limit)),
+        sql.SQL("ALTER ROLE {role} SET statement_timeout = {value}").format(role=role, value=sql.Literal(timeout)),
+        sql.SQL("ALTER ROLE {role} SET work_mem = {value}").format(
+            role=role, value=sql.Literal(settings.STUDENT_DB_WORK_MEM)
+        ),
+    ]
+
+
+def apply_role_limits(usernames, throttled=False):
+    """Set the normal (or throttled) limits on many student roles in one transaction"""
+    statements = [statement for username in usernames for statement in role_limit_statements(username, throttled)]
+    if not statements:
+        return
+    with admin_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("; ").join(statements))
+
+
+def terminate_role_sessions(usernames):
+    """
+    Disconnect the open sessions of many student roles
+
+    Role settings only apply to new sessions, so a throttled student's open
+    connections are ended to make the throttled limits take effect now.
+
+    Returns:
+        int: sessions terminated
+    """
+    if not usernames:
+        return 0
+    with admin_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT count(*) FILTER (WHERE pg_terminate_backend(pid))
+                FROM pg_stat_activity
+                WHERE usename = ANY(%s) AND pid <> pg_backend_pid()
+                """,
+                [list(usernames)]
+            )
+            return cursor.fetchone()[0]
+
+
+def _provision_statements(schema_name, username, password, role_exists):
+    """DDL (with the password as a parameter) that creates or refreshes one student's schema"""
+    schema = sql.Identifier(schema_name)
+    role = sql.Identifier(username)
+    role_statement = sql.SQL("ALTER ROLE {role} WITH LOGIN PASSWORD %s") if role_exists else \
+        sql.SQL("CREATE ROLE {role} WITH LOGIN PASSWORD %s")
+
+    statements = [
+        statement.format(schema=schema, role=role)
+        for statement in [
+            sql.SQL("CREATE SCHEMA IF NOT EXISTS {schema}"),
+            role_statement,
+            sql.SQL("GRANT USAGE, CREATE ON SCHEMA {schema} TO {role}"),
+            sql.SQL("GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA {schema} TO {role}"),
+            sql.SQL("GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA {schema} TO {role}"),
+            sql.SQL("ALTER DEFAULT PRIVILEGES IN SCHEMA {schema} GRANT ALL ON TABLES TO {role}"),
+            sql.SQL("ALTER DEFAULT PRIVILEGES IN SCHEMA {schema} GRANT ALL ON SEQUENCES TO {role}"),
+        ]
+    ] + role_limit_statements(username)
+    return sql.SQL("; ").join(statements), [scram_sha256_verifier(password)]
+
+
+def create_schemas(specs, batch_size=None, use_template=None):
+    """
+    Create schemas and login roles in the student database
+
+    Args:
+        specs: list of (schema_name, username, password)
+        batch_size: students per transaction (default: STUDENT_DB_PROVISION_BATCH_SIZE)
+        use_template: copy the sample tables into each schema (default: STUDENT_DB_USE_TEMPLATE)
+
+    Returns:
+        int: template version the schemas were created with (0 without the template)
+
+    A batch either fully succeeds or is rolled back; earlier batches stay committed.
+    """
+    batch_size = batch_size or settings.STUDENT_DB_PROVISION_BATCH_SIZE
+    use_template = settings.STUDENT_DB_USE_TEMPLATE if use_template is None else use_template
+
+    template_version, indexes = 0, {}
+    if use_template:
+        with admin_connection() as conn:
+            template_version = ensure_template(conn)
+            with conn.cursor() as cursor:
+                indexes = template_indexes(cursor)
+    tables = template_tables(0, template_version)
+
+    for start in range(0, len(specs), batch_size):
+        batch = specs[start:start + batch_size]
+        with admin_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT rolname FROM pg_roles WHERE rolname = ANY(%s)",
+                    [[username for _, username, _ in batch]]
+                )
+                existing_roles = {row[0] for row in cursor.fetchall()}
+                present = existing_tables(cursor, [schema_name for schema_name, _, _ in batch]) if tables else {}
+
+                statements, params = [], []
+                for schema_name, username, password in batch:
+                    statement, statement_params = _provision_statements(
+                        schema_name, username, password, username in existing_roles
+                    )
+                    statements.append(statement)
+                    params.extend(statement_params)
+                    if tables:
+                        statements.extend(clone_statements(schema_name, tables, indexes, skip=present[schema_name]))
+                cursor.execute(sql.SQL("; ").join(statements), params)
+
+    return template_version
+
+
+def copy_new_template_tables(schemas, batch_size=None):
+    """
+    Copy the sample tables added since each schema's template version
+
+    Args:
+        schemas: list of (schema_name, template_version)
+        batch_size: schemas per transaction (default: STUDENT_DB_PROVISION_BATCH_SIZE)
+
+    Returns:
+        int: template version the schemas are now at
+    """
+    batch_size = batch_size or settings.STUDENT_DB_PROVISION_BATCH_SIZE
+    with admin_connection() as conn:
+        template_version = ensure_template(conn)
+        with conn.cursor() as cursor:
+            indexes = template_indexes(cursor)
+
+    pending = [(name, version) for name, version in schemas if version < template_version]
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        with admin_connection() as conn:
+            with conn.cursor() as cursor:
+                present = existing_tables(cursor, [name for name, _ in batch])
+                statements = []
+                for schema_name, version in batch:
+                    statements.extend(clone_statements(
+                        schema_name, template_tables(version, template_version), indexes, skip=present[schema_name]
+                    ))
+                if statements:
+                    cursor.execute(sql.SQL("; ").join(statements))
+
+    return template_version
+
 
 class PostgresProvisioningService:
     """Service for provisioning Postgres schemas for DP students"""
-    
+
     @staticmethod
     def provision_schema_for_student(user):
         """
         Create isolated Postgres schema for DP student
-        
+
         Args:
             user: CustomUser instance
-        
+
         Returns:
             dict: Database credentials
         """
         if user.track != 'DP':
             raise ValueError("Postgres schema only for DP track students")
-        
-        schema_name = f"dp_student_{user.id}"
-        username = f"student_{user.id}"
-        password = get_random_string(32)
-        
-        try:
-            # Connect to database as admin
-            conn = psycopg2.connect(
-                host=settings.STUDENT_DB_HOST,
-                port=settings.STUDENT_DB_PORT,
-                database=settings.STUDENT_DB_NAME,
-                user=settings.STUDENT_DB_ADMIN_USER,
-                password=settings.STUDENT_DB_ADMIN_PASSWORD
-            )
-            conn.autocommit = True
-            cursor = conn.cursor()
-            
-            # Create schema
-            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
-            logger.info(f"Created schema {schema_name}")
-            
-            # Create user
-            cursor.execute(f"""
-                DO $$
-                BEGIN
-                    IF NOT EXISTS (SELECT FROM pg_user WHERE usename = '{username}') THEN
-                        CREATE USER {username} WITH PASSWORD '{password}';
-                    END IF;
-                END
-                $$;
-            """)
-            logger.info(f"Created user {username}")
-            
-            # Grant permissions
-            cursor.execute(f"""
-                GRANT USAGE ON SCHEMA {schema_name} TO {username};
-                GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA {schema_name} TO {username};
-                GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA {schema_name} TO {username};
-                ALTER DEFAULT PRIVILEGES IN SCHEMA {schema_name} 
-                    GRANT ALL ON TABLES TO {username};
-                ALTER DEFAULT PRIVILEGES IN SCHEMA {schema_name} 
-                    GRANT ALL ON SEQUENCES TO {username};
-            """)
-            logger.info(f"Granted permissions to {username}")
-            
-            cursor.close()
-            conn.close()
-            
-            # Build connection string
-            connection_string = (
-                f"postgresql://{username}:{password}@"
-                f"{settings.STUDENT_DB_HOST}:{settings.STUDENT_DB_PORT}/"
-                f"{settings.STUDENT_DB_NAME}?options=-c%20search_path={schema_name}"
-            )
-            
-            credentials = {
+
+        return PostgresProvisioningService.provision_schemas([user])[user.id]
+
+    @staticmethod
+    def provision_schemas(users, batch_size=None):
+        """
+        Create isolated Postgres schemas for a cohort of DP students
+
+        Args:
+            users: CustomUser instances (all on the DP track)
+            batch_size: students per transaction (default: STUDENT_DB_PROVISION_BATCH_SIZE)
+
+        Returns:
+            dict: user id -> database credentials
+        """
+        users = list(users)
+        not_dp = [user.email for user in users if user.track != 'DP']
+        if not_dp:
+            raise ValueError(f"Postgres schema only for DP track students: {', '.join(not_dp[:5])}")
+
+        credentials = {}
+        for user in users:
+            schema_name, username = student_db_names(user.id)
+            password = get_random_string(32)
+            credentials[user.id] = {
                 'host': settings.STUDENT_DB_HOST,
                 'port': settings.STUDENT_DB_PORT,
                 'database': settings.STUDENT_DB_NAME,
                 'schema': schema_name,
                 'username': username,
                 'password': password,
-                'connection_string': connection_string
+                'connection_string': (
+                    f"postgresql://{username}:{password}@"
+                    f"{settings.STUDENT_DB_HOST}:{settings.STUDENT_DB_PORT}/"
+                    f"{settings.STUDENT_DB_NAME}?options=-c%20search_path={schema_name}"
+                )
             }
-            
-            # Store credentials securely
-            PostgresProvisioningService._store_credentials(user, credentials)
-            
-            logger.info(f"Provisioned Postgres schema for user {user.email}")
-            
-            return credentials
-            
-        except Exception as e:
-            logger.error(f"Failed to provision Postgres schema: {str(e)}")
+
+        try:
+            template_version = create_schemas(
+                [(creds['schema'], creds['username'], creds['password']) for creds in credentials.values()],
+                batch_size=batch_size
+            )
+        except psycopg2.Error as e:
+            logger.error(f"Failed to provision Postgres schemas: {str(e)}")
             raise
-    
+
+        # Store credentials securely
+        PostgresProvisioningService._store_credentials_bulk(users, credentials, template_version)
+
+        logger.info(f"Provisioned {len(users)} Postgres schemas")
+
+        return credentials
+
     @staticmethod
     def _store_credentials(user, credentials):
         """
         Store database credentials securely
-        
+
         Options:
         1. Encrypted database field
         2. Environment-specific secrets manager
         3. HashiCorp Vault or similar
         """
+        PostgresProvisioningService._store_credentials_bulk([user], {user.id: credentials})
+
+    @staticmethod
+    def _store_credentials_bulk(users, credentials, template_version=0):
+        """Upsert the credentials of many students in one statement per batch"""
         # For now, store in a secure model field
         # In production, use a proper secrets manager
         from .models import StudentDatabaseCredentials
-        
-        StudentDatabaseCredentials.objects.update_or_create(
-            user=user,
-            defaults={
-                'schema_name': credentials['schema'],
-                'username': credentials['username'],
-                'password': credentials['password'],  # Should be encrypted
-                'connection_string': credentials['connection_string']
-            }
+
+        StudentDatabaseCredentials.objects.bulk_create(
+            [
+                StudentDatabaseCredentials(
+                    user=user,
+                    schema_name=credentials[user.id]['schema'],
+                    username=credentials[user.id]['username'],
+                    password=credentials[user.id]['password'],  # Should be encrypted
+                    connection_string=credentials[user.id]['connection_string'],
+                    template_version=template_version
+                )
+                for user in users
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[
+                'schema_name', 'username', 'password', 'connection_string', 'template_version', 'updated_at'
+            ]
         )
-    
+
+    @staticmethod
+    def upgrade_schemas(credentials, batch_size=None):
+        """
+        Bring existing student schemas up to the current template version
+
+        Args:
+            credentials: StudentDatabaseCredentials queryset or list
+            batch_size: schemas per transaction (default: STUDENT_DB_PROVISION_BATCH_SIZE)
+
+        Returns:
+            int: number of schemas upgraded
+        """
+        from .models import StudentDatabaseCredentials
+
+        credentials = list(credentials)
+        template_version = copy_new_template_tables(
+            [(creds.schema_name, creds.template_version) for creds in credentials],
+            batch_size=batch_size
+        )
+
+        upgraded = [creds for creds in credentials if creds.template_version < template_version]
+        for creds in upgraded:
+            creds.template_version = template_version
+        StudentDatabaseCredentials.objects.bulk_update(upgraded, ['template_version'], batch_size=500)
+
+        logger.info(f"Upgraded {len(upgraded)} Postgres schemas to template version {template_version}")
+        return len(upgraded)
+
     @staticmethod
     def get_credentials(user):
         """
         Retrieve database credentials for student
-        
+
         Args:
             user: CustomUser instance
-        
+
         Returns:
             dict: Database credentials
         """
         from .models import StudentDatabaseCredentials
-        
+
         try:
             creds = StudentDatabaseCredentials.objects.get(user=user)
             return {
@@ -152,44 +449,33 @@ class PostgresProvisioningService:
             }
         except StudentDatabaseCredentials.DoesNotExist:
             return None
-    
+
     @staticmethod
     def deprovision_schema(user):
         """
         Remove schema and user for student
-        
+
         Args:
             user: CustomUser instance
         """
-        schema_name = f"dp_student_{user.id}"
-        username = f"student_{user.id}"
-        
+        schema_name, username = student_db_names(user.id)
+
         try:
-            conn = psycopg2.connect(
-                host=settings.STUDENT_DB_HOST,
-                port=settings.STUDENT_DB_PORT,
-                database=settings.STUDENT_DB_NAME,
-                user=settings.STUDENT_DB_ADMIN_USER,
-                password=settings.STUDENT_DB_ADMIN_PASSWORD
-            )
-            conn.autocommit = True
-            cursor = conn.cursor()
-            
-            # Drop schema
-            cursor.execute(f"DROP SCHEMA IF EXISTS {schema_name} CASCADE")
-            
-            # Drop user
-            cursor.execute(f"DROP USER IF EXISTS {username}")
-            
-            cursor.close()
-            conn.close()
-            
+            with admin_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        sql.SQL("DROP SCHEMA IF EXISTS {schema} CASCADE; DROP ROLE IF EXISTS {role}").format(
+                            schema=sql.Identifier(schema_name),
+                            role=sql.Identifier(username)
+                        )
+                    )
+
             # Remove credentials
             from .models import StudentDatabaseCredentials
             StudentDatabaseCredentials.objects.filter(user=user).delete()
-            
+
             logger.info(f"Deprovisioned Postgres schema for user {user.email}")
-            
+
         except Exception as e:
             logger.error(f"Failed to deprovision schema: {str(e)}")
             raise
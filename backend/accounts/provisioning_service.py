@@ -131,55 +131,20 @@ class ProvisioningService:
         """
         Create a CodeServer workspace for FSD student
         
+        Runs the workspace pipeline in the calling thread, so call it from a
+        background job rather than a request.
+        
         Args:
             user: CustomUser instance
         
         Returns:
             str: Workspace URL
         """
+        from .workspace_pipeline import provision_workspace_now
+        
         try:
-            client = docker.from_env()
-            
-            # Container name
-            container_name = f"workspace_{user.id}_fsd"
-            
-            # Check if container already exists
-            try:
-                existing = client.containers.get(container_name)
-                if existing.status == 'running':
-                    port = existing.attrs['NetworkSettings']['Ports']['8080/tcp'][0]['HostPort']
-                    return f"http://localhost:{port}"
-                else:
-                    existing.remove(force=True)
-            except docker.errors.NotFound:
-                pass
-            
-            # Create new container
-            container = client.containers.run(
-                'codercom/code-server:latest',
-                name=container_name,
-                detach=True,
-                environment={
-                    'PASSWORD': f'student_{user.id}_password',  # TODO: Generate secure password
-                },
-                ports={'8080/tcp': None},  # Random host port
-                volumes={
-                    f'workspace_{user.id}_data': {'bind': '/home/coder/project', 'mode': 'rw'}
-                },
-                labels={
-                    'user_id': str(user.id),
-                    'track': 'FSD',
-                    'type': 'codeserver',
-                }
-            )
-            
-            # Get assigned port
-            container.reload()
-            port = container.attrs['NetworkSettings']['Ports']['8080/tcp'][0]['HostPort']
-            workspace_url = f"http://localhost:{port}"
-            
+            workspace_url = provision_workspace_now(user, 'vscode')
             logger.info(f"CodeServer created for user {user.email} at {workspace_url}")
-            
             return workspace_url
             
         except Exception as e:
@@ -191,51 +156,20 @@ class ProvisioningService:
         """
         Create Apache Superset instance for DP student
         
+        Runs the workspace pipeline in the calling thread (including the
+        60-90s Superset initialization), so call it from a background job.
+        
         Args:
             user: CustomUser instance
         
         Returns:
             str: Superset URL
         """
+        from .workspace_pipeline import provision_workspace_now
+        
         try:
-            client = docker.from_env()
-            
-            container_name = f"workspace_{user.id}_dp"
-            
-            # Check if container already exists
-            try:
-                existing = client.containers.get(container_name)
-                if existing.status == 'running':
-                    port = existing.attrs['NetworkSettings']['Ports']['8088/tcp'][0]['HostPort']
-                    return f"http://localhost:{port}"
-                else:
-                    existing.remove(force=True)
-            except docker.errors.NotFound:
-                pass
-            
-            # Create Superset container
-            container = client.containers.run(
-                'apache/superset:latest',
-                name=container_name,
-                detach=True,
-                environment={
-                    'SUPERSET_SECRET_KEY': f'student_{user.id}_secret',
-                },
-                ports={'8088/tcp': None},
-                labels={
-                    'user_id': str(user.id),
-                    'track': 'DP',
-                    'type': 'superset',
-                }
-            )
-            
-            # Get assigned port
-            container.reload()
-            port = container.attrs['NetworkSettings']['Ports']['8088/tcp'][0]['HostPort']
-            superset_url = f"http://localhost:{port}"
-            
+            superset_url = provision_workspace_now(user, 'superset')
             logger.info(f"Superset created for user {user.email} at {superset_url}")
-            
             return superset_url
             
         except Exception as e:
@@ -292,6 +226,17 @@ class ProvisioningService:
             for container in containers:
                 logger.info(f"Removing container {container.name} for user {user.email}")
                 container.remove(force=True)
+
+            # Containers handed out by the warm pool carry pool labels, not user_id
+            removed = {container.name for container in containers}
+            for name in user.workspace_provisions.values_list('container_name', flat=True):
+                if name in removed:
+                    continue
+                try:
+                    client.containers.get(name).remove(force=True)
+                    logger.info(f"Removing container {name} for user {user.email}")
+                except docker.errors.NotFound:
+                    pass
             
             # Clear URLs
             user.workspace_url = ''
@@ -0,0 +1,98 @@
+"""
+Set-based progress summaries for trainer rosters
+
+Reads one StudentProgressSummary row per student. Students without a summary
+row yet (e.g. before rebuild_progress_summaries has run) are computed from one
+grouped aggregation over StudentProgress instead of per-student counts.
+"""
+from django.db.models import Count
+
+
+def _summary_from_row(row):
+    """Convert a track-level StudentProgressSummary row into a roster summary"""
+    if row.status == 'IN_PROGRESS' and row.current_project:
+        current_project = row.current_project.title
+    elif row.status == 'COMPLETED':
+        current_project = 'All Projects Completed'
+    else:
+        current_project = 'Not Started'
+
+    return {
+        'current_project': current_project,
+        'progress': row.current_project_progress,
+        'steps_completed': row.current_steps_completed,
+        'steps_total': row.current_steps_total,
+    }
+
+
+def _compute_summaries(students):
+    """Fallback: derive summaries from raw progress rows in three queries"""
+    from curriculum.models import StudentProgress
+    from curriculum.summaries import compute_current_project, load_track_projects
+
+    tracks = load_track_projects({student.track for student in students})
+
+    completed_counts = {}
+    rows = StudentProgress.objects.filter(
+        student_id__in=[student.id for student in students],
+        step__isnull=False,
+        is_completed=True
+    ).values('student_id', 'project_id').annotate(
+        completed=Count('id')
+    ).order_by()
+    for row in rows:
+        completed_counts.setdefault(row['student_id'], {})[row['project_id']] = row['completed']
+
+    summaries = {}
+    for student in students:
+        if student.track not in tracks:
+            continue
+        _, projects = tracks[student.track]
+        current = compute_current_project(projects, completed_counts.get(student.id, {}))
+        summaries[student.id] = {
+            'current_project': {
+                'NOT_STARTED': 'Not Started',
+                'COMPLETED': 'All Projects Completed',
+            }.get(current['status']) or current['project'].title,
+            'progress': current['progress'],
+            'steps_completed': current['steps_completed'],
+            'steps_total': current['steps_total'],
+        }
+    return summaries
+
+
+def build_progress_summaries(students):
+    """
+    Summarize progress for a list of students
+
+    Args:
+        students: iterable of CustomUser instances
+
+    Returns:
+        dict: {student_id: summary dict} (students without a known track are omitted)
+    """
+    from curriculum.models import StudentProgressSummary
+
+    students = [student for student in students if student.track]
+    if not students:
+        return {}
+
+    track_by_student = {student.id: student.track for student in students}
+
+    summaries = {}
+    rows = StudentProgressSummary.objects.filter(
+        student_id__in=track_by_student,
+        project__isnull=True
+    ).select_related('track', 'current_project')
+    for row in rows:
+        # Ignore rows left over from a track the student has since switched from
+        if row.track.code == track_by_student[row.student_id]:
+            summaries[row.student_id] = _summary_from_row(row)
+
+    missing = [
+        student for student in students
+        if student.id not in summaries
+    ]
+    if missing:
+        summaries.update(_compute_summaries(missing))
+    return summaries
@@ -1,5 +1,4 @@
 from rest_framework import serializers
-from django.db import models
 from .models import CustomUser
 from dj_rest_auth.registration.serializers import SocialLoginSerializer
 from dj_rest_auth.registration.serializers import RegisterSerializer
@@ -86,33 +85,15 @@ class CustomRegisterSerializer(RegisterSerializer):
             user.privacy_accepted_at = timezone.now()
         
         # Auto-assign trainer if user is a student
-        if user.role == 'student':
-            user.assigned_trainer = self._assign_trainer_to_student()
-            
+        if user.role == 'student' and user.track:
+            from utils.trainer_assignment import assign_trainer_to_student
+            assign_trainer_to_student(user, save=False)
+
         user.save()
+
+        # Project 1 is unlocked for every student; materialize it now so
+        # curriculum reads never have to write
+        if user.role == 'student' and user.track:
+            from curriculum.unlocks import unlock_first_project
+            unlock_first_project(user, include_steps=False)
         return user
-    
-    def _assign_trainer_to_student(self):
-        """
-        Auto-assign a trainer to student during signup.
-        Finds trainer with least students (max 20 per trainer).
-        Returns None if no trainers available or all are full.
-        """
-        from django.db.models import Count
-        
-        # Find trainers with < 20 students, ordered by student count
-        available_trainers = CustomUser.objects.filter(
-            role='trainer'
-        ).annotate(
-            num_students=Count('students', filter=models.Q(students__role='student'))
-        ).filter(
-            num_students__lt=20
-        ).order_by('num_students')
-        
-        if available_trainers.exists():
-            trainer = available_trainers.first()
-            logger.info(f"Assigned trainer {trainer.email} (has {trainer.num_students} students)")
-            return trainer
-        else:
-            logger.warning("No available trainers for student assignment")
-            return None
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Usage accounting and quotas for DP student databases
+
+collect_usage() reads, in a few catalog queries for all students at once:
+
+- the size of each student schema (pg_total_relation_size: tables, indexes
+  and TOAST),
+- cumulative query time and calls of each student role from
+  pg_stat_statements, when the extension is installed,
+- open connections per role from pg_stat_activity,
+
+and stores a StudentDatabaseUsage row per student. query_time_ms is the
+query time since the previous collection (the whole total after a
+pg_stat_statements reset). A student's first row with query stats is a
+baseline with query_time_ms 0, so time spent before collection started
+does not count towards the quota.
+
+A student over STUDENT_DB_STORAGE_QUOTA_MB, or over
+STUDENT_DB_QUERY_TIME_QUOTA_SECONDS of query time in the last 24 hours, is
+throttled: their role gets STUDENT_DB_THROTTLED_CONNECTION_LIMIT and
+STUDENT_DB_THROTTLED_STATEMENT_TIMEOUT until a later collection finds them
+back under both quotas. Role settings only apply to new sessions, so newly
+throttled students' open connections are terminated. The throttled limits are re-applied on every
+collection, so re-provisioning a throttled student does not lift them.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import StudentDatabaseCredentials, StudentDatabaseUsage
+from .postgres_provisioning import admin_connection, apply_role_limits, terminate_role_sessions
+
+logger = logging.getLogger(__name__)
+
+QUERY_TIME_WINDOW = timedelta(hours=24)
+
+
+def _read_usage(schema_names, usernames):
+    """
+    Read sizes, query stats and connections from the student database
+
+    Returns:
+        tuple: ({schema: (bytes, tables)}, {role: (calls, exec_time_ms)} or None, {role: connections})
+    """
+    with admin_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT n.nspname,
+                       COALESCE(sum(pg_total_relation_size(c.oid)), 0),
+                       count(c.oid)
+                FROM pg_namespace n
+                LEFT JOIN pg_class c ON c.relnamespace = n.oid AND c.relkind IN ('r', 'p', 'm')
+                WHERE n.nspname = ANY(%s)
+                GROUP BY n.nspname
+                """,
+                [schema_names]
+            )
+            sizes = {schema: (int(size), tables) for schema, size, tables in cursor.fetchall()}
+
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+            query_stats = None
+            if cursor.fetchone():
+                cursor.execute(
+                    """
+                    SELECT r.rolname, sum(s.calls), sum(s.total_exec_time)
+                    FROM pg_stat_statements s
+                    JOIN pg_roles r ON r.oid = s.userid
+                    WHERE r.rolname = ANY(%s)
+                      AND s.dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                    GROUP BY r.rolname
+                    """,
+                    [usernames]
+                )
+                query_stats = {role: (int(calls), float(exec_time)) for role, calls, exec_time in cursor.fetchall()}
+
+            cursor.execute(
+                "SELECT usename, count(*) FROM pg_stat_activity WHERE usename = ANY(%s) GROUP BY usename",
+                [usernames]
+            )
+            connections = dict(cursor.fetchall())
+
+    return sizes, query_stats, connections
+
+
+def _previous_totals(user_ids):
+    """user id -> total_exec_time_ms of their latest usage row"""
+    latest = (
+        StudentDatabaseUsage.objects
+        .filter(user_id__in=user_ids)
+        .values('user_id')
+        .annotate(latest_id=Max('id'))
+        .values_list('latest_id', flat=True)
+    )
+    return dict(
+        StudentDatabaseUsage.objects
+        .filter(id__in=list(latest))
+        .values_list('user_id', 'total_exec_time_ms')
+    )
+
+
+def _quota_violation(usage, window_query_ms):
+    """Reason a student is over quota, or '' when they are not"""
+    storage_quota = settings.STUDENT_DB_STORAGE_QUOTA_MB * 1024 * 1024
+    if usage.total_bytes > storage_quota:
+        return f"Storage {usage.total_bytes // (1024 * 1024)} MB over {settings.STUDENT_DB_STORAGE_QUOTA_MB} MB quota"
+
+    query_quota_ms = settings.STUDENT_DB_QUERY_TIME_QUOTA_SECONDS * 1000
+    if window_query_ms and window_query_ms > query_quota_ms:
+        return (
+            f"Query time {window_query_ms / 1000:.0f}s in 24h over "
+            f"{settings.STUDENT_DB_QUERY_TIME_QUOTA_SECONDS}s quota"
+        )
+    return ''
+
+
+def collect_usage():
+    """
+    Record usage for every provisioned student and throttle or release them
+
+    Returns:
+        dict: students recorded, throttled and released, and whether query
+        time was available
+    """
+    credentials = list(StudentDatabaseCredentials.objects.order_by('id'))
+    result = {'students': 0, 'throttled': 0, 'released': 0, 'disconnected': 0, 'query_stats': False}
+    if not credentials:
+        return result
+
+    sizes, query_stats, connections = _read_usage(
+        [creds.schema_name for creds in credentials],
+        [creds.username for creds in credentials]
+    )
+    previous = _previous_totals([creds.user_id for creds in credentials])
+    now = timezone.now()
+
+    usage_rows = []
+    for creds in credentials:
+        total_bytes, table_count = sizes.get(creds.schema_name, (0, 0))
+        calls = exec_time = query_time = None
+        if query_stats is not None:
+            calls, exec_time = query_stats.get(creds.username, (0, 0.0))
+            last = previous.get(creds.user_id)
+            if last is None:
+                query_time = 0.0
+            else:
+                query_time = exec_time - last if exec_time >= last else exec_time
+        usage_rows.append(StudentDatabaseUsage(
+            user_id=creds.user_id,
+            schema_name=creds.schema_name,
+            total_bytes=total_bytes,
+            table_count=table_count,
+            connections=connections.get(creds.username, 0),
+            calls=calls,
+            total_exec_time_ms=exec_time,
+            query_time_ms=query_time,
+            collected_at=now
+        ))
+    StudentDatabaseUsage.objects.bulk_create(usage_rows, batch_size=500)
+
+    window_query_ms = dict(
+        StudentDatabaseUsage.objects
+        .filter(collected_at__gt=now - QUERY_TIME_WINDOW)
+        .values('user_id')
+        .annotate(total=Sum('query_time_ms'))
+        .values_list('user_id', 'total')
+    )
+
+    throttle, release, newly_throttled = [], [], []
+    for creds, usage in zip(credentials, usage_rows):
+        reason = _quota_violation(usage, window_query_ms.get(creds.user_id))
+        if reason:
+            if not creds.throttled:
+                creds.throttled_at = now
+                newly_throttled.append(creds.username)
+                logger.warning(f"Throttling {creds.username}: {reason}")
+            creds.throttled = True
+            creds.throttle_reason = reason
+            throttle.append(creds)
+        elif creds.throttled:
+            creds.throttled = False
+            creds.throttled_at = None
+            creds.throttle_reason = ''
+            release.append(creds)
+            logger.info(f"Releasing throttle on {creds.username}")
+
+    apply_role_limits([creds.username for creds in throttle], throttled=True)
+    apply_role_limits([creds.username for creds in release])
+    disconnected = terminate_role_sessions(newly_throttled)
+    StudentDatabaseCredentials.objects.bulk_update(
+        throttle + release, ['throttled', 'throttled_at', 'throttle_reason'], batch_size=500
+    )
+
+    result.update(
+        students=len(usage_rows),
+        throttled=len(throttle),
+        released=len(release),
+        disconnected=disconnected,
+        query_stats=query_stats is not None
+    )
+    return result
+
+
+def release_throttle(credentials):
+    """Restore normal limits for the given students now (e.g. from the admin)"""
+    credentials = list(credentials)
+    apply_role_limits([creds.username for creds in credentials])
+    for creds in credentials:
+        creds.throttled = False
+        creds.throttled_at = None
+        creds.throttle_reason = ''
+    StudentDatabaseCredentials.objects.bulk_update(
+        credentials, ['throttled', 'throttled_at', 'throttle_reason'], batch_size=500
+    )
+    return len(credentials)
+
+
+def usage_report():
+    """Latest usage row of each student with their throttle state, largest schemas first"""
+    latest_ids = (
+        StudentDatabaseUsage.objects
+        .values('user_id')
+        .annotate(latest_id=Max('id'))
+        .values_list('latest_id', flat=True)
+    )
+    usages = (
+        StudentDatabaseUsage.objects
+        .filter(id__in=list(latest_ids))
+        .select_related('user', 'user__db_credentials')
+        .order_by('-total_bytes')
+    )
+    since = timezone.now() - QUERY_TIME_WINDOW
+    window_query_ms = dict(
+        StudentDatabaseUsage.objects
+        .filter(collected_at__gt=since)
+        .values('user_id')
+        .annotate(total=Sum('query_time_ms'))
+        .values_list('user_id', 'total')
+    )
+
+    report = []
+    for usage in usages:
+        creds = getattr(usage.user, 'db_credentials', None)
+        report.append({
+            'user_id': usage.user_id,
+            'email': usage.user.email,
+            'schema_name': usage.schema_name,
+            'total_bytes': usage.total_bytes,
+            'table_count': usage.table_count,
+            'connections': usage.connections,
+            'query_time_ms_24h': window_query_ms.get(usage.user_id),
+            'collected_at': usage.collected_at,
+            'throttled': bool(creds and creds.throttled),
+            'throttle_reason': creds.throttle_reason if creds else '',
+        })
+    return report
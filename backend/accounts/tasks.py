@@ -0,0 +1,48 @@
+"""
+Background jobs for account management
+
+bulk_enroll() creates accounts without a usable password and queues
+'accounts.welcome_emails' in batches; the handler sets each password and
+mails it. A student is done once their password is usable, so a retried batch
+only handles the students whose email did not go out.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.utils.crypto import get_random_string
+
+from jobs.queue import job
+
+logger = logging.getLogger(__name__)
+
+
+@job('accounts.welcome_emails')
+def send_welcome_emails(payload):
+    """
+    Set a password for, and send the welcome email to, a batch of bulk-enrolled students
+
+    Args:
+        payload: {'user_ids': [...]}
+    """
+    from utils.email import send_welcome_email
+
+    User = get_user_model()
+    sent = 0
+    failed = []
+
+    for user in User.objects.filter(pk__in=payload['user_ids']).order_by('pk'):
+        if user.has_usable_password():
+            continue
+
+        password = get_random_string(16)
+        if not send_welcome_email(user, password):
+            failed.append(user.email)
+            continue
+
+        user.set_password(password)
+        user.save(update_fields=['password'])
+        sent += 1
+
+    if failed:
+        raise RuntimeError(f"Welcome email failed for {len(failed)} students: {', '.join(failed[:5])}")
+    logger.info(f"Sent {sent} welcome emails")
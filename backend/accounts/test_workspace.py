@@ -4,13 +4,25 @@ Unit tests for workspace provisioning functionality
 from django.test import TestCase
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from accounts.models import CustomUser
+from django.test import override_settings
+from django.utils import timezone
+from datetime import timedelta
+from accounts.models import CustomUser, WarmContainer, WorkspaceProvision
+from accounts.warm_pool import claim_warm_container, replenish
+from accounts.workspace_activity import reap_idle_workspaces
+from accounts.workspace_pipeline import run_provisioning
 from unittest.mock import patch, MagicMock, PropertyMock
 import docker
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import tempfile
 
 
 class WorkspaceProvisioningTestCase(APITestCase):
-    """Test workspace provisioning functionality"""
+    """Test the asynchronous workspace provisioning pipeline"""
     
     def setUp(self):
         """Set up test client and data"""
@@ -20,93 +32,110 @@ class WorkspaceProvisioningTestCase(APITestCase):
             password='TestPass123!@#',
             name='Workspace Test User',
             role='student',
-            username='workspace_user'
+            username='workspace_user',
+            track='FSD'
         )
         self.client.force_authenticate(user=self.user)
         self.workspace_url = '/api/users/workspace/create/'
+        self.status_url = '/api/users/workspace/status/'
+        
+        # Per-user containers instead of the shared development instances
+        env = patch.dict(os.environ, {'USE_SHARED_SUPERSET': 'false', 'DEBUG': 'true'})
+        env.start()
+        self.addCleanup(env.stop)
+        
+        # Run the pipeline inline against a mock Docker client
+        self.docker = MagicMock()
+        for target, kwargs in [
+            ('accounts.workspace_pipeline._submit', {'side_effect': lambda pk: run_provisioning(pk, client=self.docker)}),
+            ('accounts.workspace_pipeline.probe_health', {'return_value': True}),
+            ('accounts.workspace_pipeline.prepare_volume', {'return_value': '/tmp/workspace'}),
+        ]:
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def _container(self, container_status, port):
+        container = MagicMock()
+        container.status = container_status
+        container.attrs = {'HostConfig': {'PortBindings': {'8080/tcp': [{'HostPort': port}]}}}
+        return container
+    
+    def _create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.workspace_url)
     
     @patch('accounts.workspace_views.client')
     def test_create_workspace_success(self, mock_docker_client):
-        """Test successful workspace creation"""
-        # Mock Docker client
-        mock_container = MagicMock()
-        mock_container.status = 'running'
-        mock_container.attrs = {
-            'HostConfig': {
-                'PortBindings': {
-                    '8080/tcp': [{'HostPort': '8081'}]
-                }
-            }
-        }
-        
-        # Mock containers.get to raise NotFound (new workspace)
-        mock_docker_client.containers.get.side_effect = docker.errors.NotFound('Container not found')
-        
-        # Mock containers.run to return mock container
-        mock_docker_client.containers.run.return_value = mock_container
-        
-        response = self.client.post(self.workspace_url)
-        
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertIn('url', response.data)
-        self.assertIn('port', response.data)
-        self.assertIn('msg', response.data)
+        """Test that creation returns immediately and the pipeline reaches READY"""
+        self.docker.containers.get.side_effect = docker.errors.NotFound('Container not found')
+        self.docker.containers.run.return_value = self._container('running', '8081')
+        
+        response = self._create()
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'requested')
+        self.assertEqual(response.data['status_url'], self.status_url)
+        
+        response = self.client.get(self.status_url)
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertTrue(response.data['url'].startswith('http://localhost:'))
+        self.assertEqual(
+            self.docker.containers.run.call_args[1]['name'],
+            f"workspace_{self.user.id}_fsd"
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.workspace_url, response.data['url'])
         
         print(f"✅ Test Passed: Workspace created successfully")
-        print(f"   URL: {response.data.get('url')}")
-        print(f"   Port: {response.data.get('port')}")
     
     @patch('accounts.workspace_views.client')
     def test_get_existing_workspace(self, mock_docker_client):
-        """Test getting existing workspace"""
-        # Mock existing container
-        mock_container = MagicMock()
-        mock_container.status = 'running'
-        mock_container.attrs = {
-            'HostConfig': {
-                'PortBindings': {
-                    '8080/tcp': [{'HostPort': '8082'}]
-                }
-            }
-        }
-        
-        mock_docker_client.containers.get.return_value = mock_container
+        """Test that a running container is reused"""
+        self.docker.containers.get.return_value = self._container('running', '8082')
         
-        response = self.client.post(self.workspace_url)
+        self._create()
+        response = self.client.get(self.status_url)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('url', response.data)
-        self.assertIn('status', response.data)
-        self.assertEqual(response.data['status'], 'running')
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertEqual(response.data['url'], 'http://localhost:8082')
+        self.docker.containers.run.assert_not_called()
         
         print(f"✅ Test Passed: Existing workspace retrieved")
-        print(f"   Status: {response.data.get('status')}")
     
     @patch('accounts.workspace_views.client')
     def test_start_stopped_workspace(self, mock_docker_client):
         """Test starting a stopped workspace"""
-        # Mock stopped container
-        mock_container = MagicMock()
-        mock_container.status = 'exited'
-        mock_container.attrs = {
-            'HostConfig': {
-                'PortBindings': {
-                    '8080/tcp': [{'HostPort': '8083'}]
-                }
-            }
-        }
-        mock_container.start = MagicMock()
+        container = self._container('exited', '8083')
+        container.reload.side_effect = lambda: setattr(container, 'status', 'running')
+        self.docker.containers.get.return_value = container
         
-        mock_docker_client.containers.get.return_value = mock_container
+        self._create()
+        response = self.client.get(self.status_url)
         
-        response = self.client.post(self.workspace_url)
-        
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['status'], 'started')
-        mock_container.start.assert_called_once()
+        self.assertEqual(response.data['status'], 'ready')
+        container.start.assert_called_once()
         
         print(f"✅ Test Passed: Stopped workspace started")
     
+    @patch('accounts.workspace_views.client')
+    def test_request_while_in_progress_is_not_resubmitted(self, mock_docker_client):
+        """Test that repeated clicks join the running provisioning"""
+        with patch('accounts.workspace_pipeline._submit') as mock_submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = self.client.post(self.workspace_url)
+            with self.captureOnCommitCallbacks(execute=True):
+                second = self.client.post(self.workspace_url)
+        
+        self.assertEqual(first.data['provision_id'], second.data['provision_id'])
+        mock_submit.assert_called_once()
+    
+    def test_workspace_status_without_request(self):
+        """Test status before any workspace was requested"""
+        response = self.client.get(self.status_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
     def test_workspace_unauthenticated(self):
         """Test that unauthenticated users cannot create workspaces"""
         self.client.force_authenticate(user=None)
@@ -128,40 +157,19 @@ class WorkspaceProvisioningTestCase(APITestCase):
     
     @patch('accounts.workspace_views.client')
     def test_workspace_image_not_found(self, mock_docker_client):
-        """Test workspace creation when image is not found"""
-        # Mock containers.get to raise NotFound
-        mock_docker_client.containers.get.side_effect = docker.errors.NotFound('Container not found')
-        
-        # Mock containers.run to raise ImageNotFound
-        mock_docker_client.containers.run.side_effect = docker.errors.ImageNotFound('Image not found')
+        """Test that a failed image pull ends in FAILED with the error"""
+        self.docker.containers.get.side_effect = docker.errors.NotFound('Container not found')
+        self.docker.images.get.side_effect = docker.errors.ImageNotFound('Image not found')
+        self.docker.images.pull.side_effect = docker.errors.ImageNotFound('Image not found')
         
-        response = self.client.post(self.workspace_url)
+        self._create()
+        response = self.client.get(self.status_url)
         
-        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.data['status'], 'failed')
         self.assertIn('error', response.data)
+        self.docker.containers.run.assert_not_called()
         
         print(f"✅ Test Passed: Image not found error handled")
-    
-    @patch('accounts.workspace_views.client')
-    def test_workspace_container_naming(self, mock_docker_client):
-        """Test that workspace containers are named correctly"""
-        mock_container = MagicMock()
-        mock_docker_client.containers.get.side_effect = docker.errors.NotFound('Container not found')
-        mock_docker_client.containers.run.return_value = mock_container
-        
-        response = self.client.post(self.workspace_url)
-        
-        # Verify container name includes user ID
-        expected_name = f"workspace_{self.user.id}"
-        
-        # Check if containers.run was called with correct name
-        if mock_docker_client.containers.run.called:
-            call_kwargs = mock_docker_client.containers.run.call_args[1]
-            if 'name' in call_kwargs:
-                self.assertEqual(call_kwargs['name'], expected_name)
-        
-        print(f"✅ Test Passed: Workspace container named correctly")
-        print(f"   Expected name: {expected_name}")
 
 
 class WorkspaceAccessControlTestCase(APITestCase):
@@ -197,7 +205,7 @@ class WorkspaceAccessControlTestCase(APITestCase):
         
         response = self.client.post(self.workspace_url)
         
-        self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_201_CREATED])
+        self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_202_ACCEPTED])
         print(f"✅ Test Passed: Student can create workspace")
     
     @patch('accounts.workspace_views.client')
@@ -211,7 +219,7 @@ class WorkspaceAccessControlTestCase(APITestCase):
         
         response = self.client.post(self.workspace_url)
         
-        self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_201_CREATED])
+        self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_202_ACCEPTED])
         print(f"✅ Test Passed: Trainer can create workspace")
     
     @patch('accounts.workspace_views.client')
@@ -231,12 +239,349 @@ class WorkspaceAccessControlTestCase(APITestCase):
         response2 = self.client.post(self.workspace_url)
         
         # Both should succeed
-        self.assertIn(response1.status_code, [status.HTTP_200_OK, status.HTTP_201_CREATED])
-        self.assertIn(response2.status_code, [status.HTTP_200_OK, status.HTTP_201_CREATED])
+        self.assertIn(response1.status_code, [status.HTTP_200_OK, status.HTTP_202_ACCEPTED])
+        self.assertIn(response2.status_code, [status.HTTP_200_OK, status.HTTP_202_ACCEPTED])
         
         print(f"✅ Test Passed: Workspace isolation maintained")
 
 
+@override_settings(WORKSPACE_WARM_POOL_SIZE={'vscode': 1, 'superset': 0})
+class WarmPoolTestCase(APITestCase):
+    """Test handing out pre-started containers from the warm pool"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email='warm@example.com',
+            password='TestPass123!@#',
+            name='Warm Pool User',
+            role='student',
+            username='warm_user',
+            track='FSD'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.base_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_path, True)
+        env = patch.dict(os.environ, {
+            'USE_SHARED_SUPERSET': 'false', 'DEBUG': 'true', 'WORKSPACE_BASE_PATH': self.base_path
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+        # Replenishing is exercised directly, not from the claim
+        patcher = patch('accounts.warm_pool.schedule_replenish')
+        self.mock_schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.docker = MagicMock()
+        self.warm_container = MagicMock()
+        self.docker.containers.get.side_effect = self._get_container
+
+    def _get_container(self, name):
+        if name.startswith('warm_'):
+            return self.warm_container
+        raise docker.errors.NotFound('Container not found')
+
+    def _warm(self, name='warm_vscode_abc'):
+        volume = os.path.join(self.base_path, 'pool', name)
+        os.makedirs(volume)
+        return WarmContainer.objects.create(
+            workspace_type='vscode', container_name=name, port='9001', volume_path=volume, status='WARM'
+        )
+
+    def test_claim_renames_container_and_links_volume(self):
+        """Test that a claimed container takes over the student's name and its directory becomes theirs"""
+        from accounts.workspace_pipeline import user_volume_path
+
+        warm = self._warm()
+
+        container, port = claim_warm_container(self.docker, self.user, f'workspace_{self.user.id}_fsd', 'vscode')
+
+        self.assertEqual(port, '9001')
+        container.rename.assert_called_once_with(f'workspace_{self.user.id}_fsd')
+        self.assertTrue(os.path.islink(os.path.join(self.base_path, str(self.user.id))))
+        self.assertTrue(os.path.isdir(warm.volume_path))
+        self.assertEqual(user_volume_path(self.user), os.path.realpath(warm.volume_path))
+        warm.refresh_from_db()
+        self.assertEqual(warm.status, 'ASSIGNED')
+        self.assertEqual(warm.assigned_to, self.user)
+        self.mock_schedule.assert_called_once_with('vscode')
+
+    def test_claimed_container_keeps_its_files_across_restarts(self):
+        """Test that stopping and starting a claimed container mounts the directory with the student's files"""
+        from accounts.workspace_pipeline import prepare_volume, user_volume_path
+
+        warm = self._warm()
+        self.warm_container.attrs = {'Mounts': [
+            {'Type': 'bind', 'Source': warm.volume_path, 'Destination': '/home/coder/project'}
+        ]}
+
+        def start():
+            # Like Docker: the bind source is resolved again, and created empty if it is missing
+            for mount in self.warm_container.attrs['Mounts']:
+                os.makedirs(mount['Source'], exist_ok=True)
+                self.mounted = os.listdir(mount['Source'])
+
+        self.warm_container.start.side_effect = start
+
+        container, _ = claim_warm_container(self.docker, self.user, f'workspace_{self.user.id}_fsd', 'vscode')
+        with open(os.path.join(user_volume_path(self.user), 'main.py'), 'w') as f:
+            f.write('print(1)')
+
+        container.stop()
+        container.start()
+
+        self.assertEqual(self.mounted, ['main.py'])
+        self.assertEqual(os.listdir(os.path.join(self.base_path, 'pool')), [warm.container_name])
+        # A container recreated later mounts the same directory
+        with patch('accounts.workspace_pipeline.subprocess.run'):
+            self.assertEqual(
+                os.path.realpath(prepare_volume(user_volume_path(self.user), 'vscode')),
+                os.path.realpath(warm.volume_path)
+            )
+
+    def test_returning_student_keeps_own_volume(self):
+        """Test that students with an existing directory skip the pool"""
+        warm = self._warm()
+        os.makedirs(os.path.join(self.base_path, str(self.user.id)))
+
+        self.assertIsNone(claim_warm_container(self.docker, self.user, 'workspace_x', 'vscode'))
+        warm.refresh_from_db()
+        self.assertEqual(warm.status, 'WARM')
+
+    def test_create_workspace_is_ready_immediately(self):
+        """Test that a warm container makes create_workspace answer READY without a background run"""
+        self._warm()
+
+        with patch('accounts.workspace_views.client', self.docker), \
+                patch('accounts.workspace_pipeline._submit') as mock_submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/users/workspace/create/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertEqual(response.data['url'], 'http://localhost:9001')
+        mock_submit.assert_not_called()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.workspace_url, 'http://localhost:9001')
+
+    @patch('accounts.warm_pool.wait_until_healthy')
+    @patch('accounts.warm_pool.prepare_volume', side_effect=lambda path, workspace_type: path)
+    def test_replenish_starts_missing_containers(self, mock_prepare, mock_wait):
+        """Test that replenish tops the pool up to its target size"""
+        self.docker.containers.list.return_value = []
+
+        self.assertEqual(replenish('vscode', client=self.docker), 1)
+        self.assertEqual(replenish('vscode', client=self.docker), 0)
+
+        warm = WarmContainer.objects.get()
+        self.assertEqual(warm.status, 'WARM')
+        self.docker.containers.run.assert_called_once()
+        self.assertEqual(
+            self.docker.containers.run.call_args[1]['labels'],
+            {'apranova.pool': 'true', 'workspace_type': 'vscode'}
+        )
+
+
+@override_settings(WORKSPACE_IDLE_TIMEOUT_MINUTES=30, WORKSPACE_IDLE_NET_BYTES=1000, WORKSPACE_IDLE_CPU_PERCENT=5.0)
+class WorkspaceReaperTestCase(APITestCase):
+    """Test activity tracking and stopping idle workspaces"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email='idle@example.com',
+            password='TestPass123!@#',
+            name='Idle User',
+            role='student',
+            username='idle_user',
+            track='FSD'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.long_ago = timezone.now() - timedelta(hours=2)
+        self.provision = WorkspaceProvision.objects.create(
+            user=self.user,
+            workspace_type='vscode',
+            container_name=f'workspace_{self.user.id}_fsd',
+            status='READY',
+            last_activity_at=self.long_ago,
+            last_sampled_at=timezone.now() - timedelta(minutes=1),
+            last_net_bytes=5000,
+            last_cpu_usage=10 ** 9,
+        )
+
+        self.docker = MagicMock()
+        self.container = MagicMock()
+        self.docker.containers.get.return_value = self.container
+        self.states = {self.provision.container_name: 'running'}
+        self.docker.containers.list.side_effect = lambda **kwargs: [
+            MagicMock(attrs={'Names': [f'/{name}'], 'State': state}) for name, state in self.states.items()
+        ]
+
+    def _stats(self, net_bytes, cpu_usage):
+        self.docker.api.stats.return_value = {
+            'networks': {'eth0': {'rx_bytes': net_bytes, 'tx_bytes': 0}},
+            'cpu_stats': {'cpu_usage': {'total_usage': cpu_usage}},
+        }
+
+    def test_idle_workspace_is_stopped_not_removed(self):
+        """Test that a workspace without traffic or CPU past the timeout is stopped"""
+        self._stats(5100, 10 ** 9 + 10 ** 6)
+
+        counts = reap_idle_workspaces(client=self.docker)
+
+        self.assertEqual(counts['stopped'], 1)
+        self.container.stop.assert_called_once()
+        self.container.remove.assert_not_called()
+        self.provision.refresh_from_db()
+        self.assertEqual(self.provision.status, 'STOPPED')
+        self.assertIsNotNone(self.provision.stopped_at)
+
+    def test_container_activity_keeps_workspace_running(self):
+        """Test that network traffic since the last sample counts as activity"""
+        self._stats(50000, 10 ** 9)
+
+        counts = reap_idle_workspaces(client=self.docker)
+
+        self.assertEqual(counts, {'active': 1, 'stopped': 0, 'missing': 0})
+        self.container.stop.assert_not_called()
+        self.provision.refresh_from_db()
+        self.assertEqual(self.provision.status, 'READY')
+        self.assertGreater(self.provision.last_activity_at, self.long_ago)
+        self.assertEqual(self.provision.last_net_bytes, 50000)
+
+    def test_heartbeat_keeps_workspace_running(self):
+        """Test that the heartbeat endpoint resets the idle clock"""
+        self._stats(5000, 10 ** 9)
+
+        response = self.client.post('/api/users/workspace/heartbeat/')
+        counts = reap_idle_workspaces(client=self.docker)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(counts['stopped'], 0)
+        self.container.stop.assert_not_called()
+
+    def test_heartbeat_without_running_workspace(self):
+        """Test heartbeat when the workspace is not running"""
+        self.provision.status = 'STOPPED'
+        self.provision.save()
+
+        response = self.client.post('/api/users/workspace/heartbeat/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_warm_pool_containers_are_ignored(self):
+        """Test that containers recorded in the warm pool are never sampled or stopped"""
+        WarmContainer.objects.create(
+            workspace_type='vscode', container_name=self.provision.container_name,
+            port='9001', volume_path='/tmp/pool', status='WARM'
+        )
+
+        counts = reap_idle_workspaces(client=self.docker)
+
+        self.assertEqual(counts, {'active': 0, 'stopped': 0, 'missing': 0})
+        self.docker.api.stats.assert_not_called()
+        self.container.stop.assert_not_called()
+
+    @patch('accounts.workspace_pipeline.probe_health', return_value=True)
+    def test_stopped_workspace_restarts_on_next_create(self, mock_probe):
+        """Test that create_workspace transparently starts a reaped container again"""
+        self.provision.status = 'STOPPED'
+        self.provision.save()
+        self.container.status = 'exited'
+        self.container.reload.side_effect = lambda: setattr(self.container, 'status', 'running')
+        self.container.attrs = {'HostConfig': {'PortBindings': {'8080/tcp': [{'HostPort': '8090'}]}}}
+
+        with patch.dict(os.environ, {'USE_SHARED_SUPERSET': 'false', 'DEBUG': 'true'}), \
+                patch('accounts.workspace_views.client', self.docker), \
+                patch('accounts.workspace_pipeline._submit',
+                      side_effect=lambda pk: run_provisioning(pk, client=self.docker)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/users/workspace/create/')
+
+        self.container.start.assert_called_once()
+        self.docker.containers.run.assert_not_called()
+        self.provision.refresh_from_db()
+        self.assertEqual(self.provision.status, 'READY')
+        self.assertIsNone(self.provision.stopped_at)
+        self.assertGreater(self.provision.last_activity_at, self.long_ago)
+
+
+@override_settings(WORKSPACE_CALLBACK_SECRET='callback-secret')
+class WorkspaceCallbackTestCase(APITestCase):
+    """Test readiness callbacks from the ECS workspace Lambda"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email='ecs@example.com',
+            password='TestPass123!@#',
+            name='ECS User',
+            role='student',
+            username='ecs_user',
+            track='DP'
+        )
+        self.callback_url = '/api/users/workspace/callback/'
+
+    def _post(self, payload, secret='callback-secret'):
+        body = json.dumps(payload)
+        signature = 'sha256=' + hmac.new(secret.encode(), body.encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            self.callback_url, body, content_type='application/json', HTTP_X_WORKSPACE_SIGNATURE=signature
+        )
+
+    def _payload(self, **overrides):
+        payload = {
+            'user_id': str(self.user.id),
+            'workspace_type': 'superset',
+            'task_arn': 'arn:aws:ecs:us-east-1:123456789012:task/workspaces/abc123',
+            'status': 'ready',
+            'url': 'http://10.0.1.5:8088',
+            'error': '',
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_ready_callback_marks_workspace_ready(self):
+        """Test that a signed ready callback is served by the status endpoint"""
+        response = self._post(self._payload())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        provision = WorkspaceProvision.objects.get(user=self.user)
+        self.assertEqual(provision.status, 'READY')
+        self.assertEqual(provision.container_name, 'abc123')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.superset_url, 'http://10.0.1.5:8088')
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/users/workspace/status/')
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertEqual(response.data['url'], 'http://10.0.1.5:8088')
+
+    def test_failed_callback_records_error(self):
+        """Test that a task that never started shows up as failed"""
+        self._post(self._payload(status='failed', url='', error='CannotPullContainerError'))
+
+        provision = WorkspaceProvision.objects.get(user=self.user)
+        self.assertEqual(provision.status, 'FAILED')
+        self.assertEqual(provision.error, 'CannotPullContainerError')
+
+    def test_invalid_signature_is_rejected(self):
+        """Test that unsigned or wrongly signed callbacks change nothing"""
+        response = self._post(self._payload(), secret='wrong')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(WorkspaceProvision.objects.exists())
+
+    @override_settings(WORKSPACE_CALLBACK_SECRET='')
+    def test_callback_disabled_without_secret(self):
+        """Test that callbacks are refused when no secret is configured"""
+        response = self._post(self._payload(), secret='')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class WorkspacePortAllocationTestCase(TestCase):
     """Test workspace port allocation"""
 
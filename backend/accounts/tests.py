@@ -335,3 +335,577 @@ class UserProfileTestCase(APITestCase):
         if 'name' in response.data:
             print(f"   Name: {response.data['name']}")
 
+
+
+class TrainerRosterTestCase(APITestCase):
+    """Test the trainer roster endpoint"""
+    
+    def setUp(self):
+        """Create a trainer, a two-project track and assigned students"""
+        from curriculum.models import Track, Project, ProjectStep
+        
+        self.client = APIClient()
+        self.url = '/api/users/my-students/'
+        self.trainer = CustomUser.objects.create_user(
+            username='rostertrainer@example.com',
+            email='rostertrainer@example.com',
+            password='TestPass123!@#',
+            name='Roster Trainer',
+            role='trainer'
+        )
+        self.client.force_authenticate(user=self.trainer)
+        
+        track = Track.objects.create(code='DP', name='Data Professional', description='Test')
+        self.projects = []
+        for number in (1, 2):
+            project = Project.objects.create(
+                track=track, number=number, title=f'Project {number}', description='Test'
+            )
+            for step_number in (1, 2):
+                ProjectStep.objects.create(
+                    project=project, step_number=step_number,
+                    title=f'Step {step_number}', description='Test'
+                )
+            self.projects.append(project)
+    
+    def _create_students(self, count):
+        return [
+            CustomUser.objects.create_user(
+                username=f'rosterstudent{i}@example.com',
+                email=f'rosterstudent{i}@example.com',
+                password='TestPass123!@#',
+                role='student',
+                track='DP',
+                assigned_trainer=self.trainer
+            )
+            for i in range(count)
+        ]
+    
+    def _complete_steps(self, student, project, count):
+        from curriculum.models import StudentProgress
+        
+        for step in project.steps.all()[:count]:
+            StudentProgress.objects.create(
+                student=student, project=project, step=step, is_completed=True
+            )
+    
+    def test_roster_progress(self):
+        """Test current project and step counts are computed per student"""
+        not_started, in_progress, finished = self._create_students(3)
+        self._complete_steps(in_progress, self.projects[0], 2)
+        self._complete_steps(in_progress, self.projects[1], 1)
+        for project in self.projects:
+            self._complete_steps(finished, project, 2)
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        students = {s['id']: s for s in response.data['students']}
+        self.assertEqual(students[not_started.id]['current_project'], 'Not Started')
+        self.assertEqual(students[in_progress.id]['current_project'], 'Project 2')
+        self.assertEqual(students[in_progress.id]['progress'], 50)
+        self.assertEqual(students[in_progress.id]['workflow_steps'], {'completed': 1, 'total': 2})
+        self.assertEqual(students[finished.id]['current_project'], 'All Projects Completed')
+        self.assertEqual(students[finished.id]['progress'], 100)
+        
+        # Summary table rows produce the same roster
+        from curriculum.summaries import rebuild_summaries
+        rebuild_summaries(CustomUser.objects.filter(role='student'))
+        self.assertEqual(self.client.get(self.url).data, response.data)
+    
+    def test_roster_query_count_is_constant(self):
+        """Test the roster stays at a fixed number of queries for any size"""
+        for student in self._create_students(10):
+            self._complete_steps(student, self.projects[0], 1)
+        
+        # Without summary rows: students, summaries, tracks, projects, grouped counts
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+        
+        from curriculum.summaries import rebuild_summaries
+        rebuild_summaries(CustomUser.objects.filter(role='student'))
+        
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'page': 1, 'page_size': 5})
+    
+    def test_roster_pagination_and_fields(self):
+        """Test page slicing and ?fields= filtering"""
+        self._create_students(3)
+        
+        response = self.client.get(self.url, {'page': 2, 'page_size': 2, 'fields': 'id,email'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['num_pages'], 2)
+        self.assertEqual(len(response.data['students']), 1)
+        self.assertEqual(set(response.data['students'][0]), {'id', 'email'})
+
+
+class BulkEnrollTestCase(APITestCase):
+    """Test cohort imports through the bulk_enroll command and endpoint"""
+    
+    def setUp(self):
+        """Create a one-project track and two trainers"""
+        from curriculum.models import Track, Project, ProjectStep
+        
+        track = Track.objects.create(code='DP', name='Data Professional', description='Test')
+        self.project = Project.objects.create(track=track, number=1, title='Project 1', description='Test')
+        for step_number in (1, 2, 3):
+            ProjectStep.objects.create(
+                project=self.project, step_number=step_number,
+                title=f'Step {step_number}', description='Test'
+            )
+        self.trainers = [
+            CustomUser.objects.create_user(
+                username=f'bulktrainer{i}@example.com',
+                email=f'bulktrainer{i}@example.com',
+                password='TestPass123!@#',
+                role='trainer'
+            )
+            for i in (1, 2)
+        ]
+    
+    def _write_csv(self, count, extra=''):
+        import tempfile
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        handle.write('email,name,track\n')
+        for i in range(count):
+            handle.write(f'cohort{i}@example.com,Student {i},dp\n')
+        handle.write(extra)
+        handle.close()
+        self.addCleanup(lambda: __import__('os').unlink(handle.name))
+        return handle.name
+    
+    def test_command_enrolls_cohort(self):
+        """Test accounts, trainers, Project 1 rows and email jobs for a cohort"""
+        from io import StringIO
+        from django.core.management import call_command
+        from curriculum.models import StudentProgress
+        from jobs.models import Job
+        
+        path = self._write_csv(25, 'not-an-email,Bad,DP\ncohort0@example.com,Dup,DP\nx@example.com,X,ZZ\n')
+        out = StringIO()
+        call_command('bulk_enroll', path, stdout=out)
+        
+        students = CustomUser.objects.filter(role='student')
+        self.assertEqual(students.count(), 25)
+        self.assertTrue(all(s.enrollment_status == 'ENROLLED' and s.track == 'DP' for s in students))
+        self.assertFalse(students.first().has_usable_password())
+        self.assertEqual(students.filter(assigned_trainer=self.trainers[0]).count(), 13)
+        self.assertEqual(students.filter(assigned_trainer=self.trainers[1]).count(), 12)
+        self.assertEqual(StudentProgress.objects.filter(step=None).count(), 25)
+        self.assertEqual(StudentProgress.objects.filter(step__isnull=False).count(), 75)
+        self.assertEqual(Job.objects.filter(name='accounts.welcome_emails').count(), 1)
+        self.assertIn('Rejected rows: 3', out.getvalue())
+    
+    def test_query_count_does_not_grow_with_cohort(self):
+        """Test the import runs a fixed number of queries per welcome email batch"""
+        from accounts.bulk_enrollment import bulk_enroll
+        
+        # Small cohorts, so SQLite's bind variable limit does not split the INSERTs
+        rows = [{'email': f'q{i}@example.com', 'track': 'DP'} for i in range(10)]
+        bulk_enroll(rows[:1])  # creates the trainer load rows
+        with self.assertNumQueries(28):
+            bulk_enroll(rows[1:3])
+        with self.assertNumQueries(28):
+            bulk_enroll(rows[3:])
+    
+    def test_existing_accounts(self):
+        """Test existing students (matched case-insensitively) are enrolled in place and staff accounts are rejected"""
+        from accounts.bulk_enrollment import bulk_enroll
+        
+        student = CustomUser.objects.create_user(
+            username='existing', email='Existing@Example.com', password='TestPass123!@#', role='student'
+        )
+        result = bulk_enroll([
+            {'email': 'EXISTING@example.com', 'track': 'DP'},
+            {'email': 'bulktrainer1@example.com', 'track': 'DP'},
+        ])
+        
+        student.refresh_from_db()
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(result['enrolled_existing'], 1)
+        self.assertEqual(result['email_jobs'], 0)
+        self.assertEqual(len(result['errors']), 1)
+        self.assertEqual(student.enrollment_status, 'ENROLLED')
+        self.assertEqual(student.assigned_trainer, self.trainers[0])
+        self.assertTrue(student.check_password('TestPass123!@#'))
+    
+    def test_welcome_email_job_sets_passwords(self):
+        """Test the email job mails each new student once with a working password"""
+        from accounts.bulk_enrollment import bulk_enroll
+        from jobs.models import Job
+        from jobs.queue import get_handler
+        
+        bulk_enroll([{'email': f'mail{i}@example.com', 'track': 'DP'} for i in range(3)])
+        payload = Job.objects.get(name='accounts.welcome_emails').payload
+        handler = get_handler('accounts.welcome_emails')
+        
+        handler(payload)
+        handler(payload)  # a retried batch does not resend
+        
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertTrue(all(u.has_usable_password() for u in CustomUser.objects.filter(role='student')))
+    
+    def test_endpoint(self):
+        """Test admin-only access and dry runs"""
+        client = APIClient()
+        url = '/api/users/students/bulk-enroll/'
+        client.force_authenticate(user=self.trainers[0])
+        self.assertEqual(client.post(url, {'students': []}, format='json').status_code, status.HTTP_403_FORBIDDEN)
+        
+        admin = CustomUser.objects.create_user(
+            username='bulkadmin', email='bulkadmin@example.com', password='TestPass123!@#', role='admin'
+        )
+        client.force_authenticate(user=admin)
+        students = [{'email': 'api@example.com', 'name': 'API', 'track': 'DP'}]
+        
+        response = client.post(url, {'students': students, 'dry_run': True}, format='json')
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(CustomUser.objects.filter(email='api@example.com').exists())
+        
+        with open(self._write_csv(2)) as upload:
+            response = client.post(url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+
+
+class TrainerAssignmentTestCase(APITestCase):
+    """Test the capacity-aware trainer assignment engine"""
+    
+    def setUp(self):
+        self.general = CustomUser.objects.create_user(
+            username='general', email='general@example.com', password='TestPass123!@#', role='trainer'
+        )
+        self.dp_trainer = CustomUser.objects.create_user(
+            username='dptrainer', email='dptrainer@example.com', password='TestPass123!@#',
+            role='trainer', track='DP'
+        )
+    
+    def _students(self, count, track='DP', prefix='assign'):
+        return [
+            CustomUser.objects.create_user(
+                username=f'{prefix}{track}{i}', email=f'{prefix}{track}{i}@example.com',
+                password='TestPass123!@#', role='student', track=track
+            )
+            for i in range(count)
+        ]
+    
+    def _load(self, trainer, track):
+        from accounts.models import TrainerLoad
+        return TrainerLoad.objects.get(trainer=trainer, track=track).student_count
+    
+    def test_least_loaded_trainer_within_capacity(self):
+        """Test students spread over eligible trainers and stop at capacity"""
+        from django.test import override_settings
+        from utils.trainer_assignment import assign_trainer_to_student, assign_trainers
+        
+        with override_settings(TRAINER_CAPACITY_PER_TRACK=2):
+            dp_students = self._students(5)
+            self.assertEqual(assign_trainers(dp_students), 4)
+            self.assertIsNone(assign_trainer_to_student(self._students(1, prefix='late')[0]))
+            
+            # Only the general trainer takes FSD students
+            fsd_student = self._students(1, track='FSD')[0]
+            self.assertEqual(assign_trainer_to_student(fsd_student), self.general)
+        
+        self.assertEqual(self._load(self.general, 'DP'), 2)
+        self.assertEqual(self._load(self.dp_trainer, 'DP'), 2)
+        self.assertEqual(self._load(self.general, 'FSD'), 1)
+        self.assertIsNone(CustomUser.objects.get(pk=dp_students[4].pk).assigned_trainer)
+    
+    def test_counters_start_from_existing_assignments(self):
+        """Test new load rows count students assigned before the engine existed"""
+        from utils.trainer_assignment import assign_trainer_to_student
+        
+        for student in self._students(3, prefix='old'):
+            student.assigned_trainer = self.general
+            student.save()
+        
+        self.assertEqual(assign_trainer_to_student(self._students(1)[0]), self.dp_trainer)
+        self.assertEqual(self._load(self.general, 'DP'), 3)
+    
+    def test_assign_all_query_count(self):
+        """Test assigning every unassigned student takes a fixed number of queries"""
+        admin = CustomUser.objects.create_user(
+            username='assignadmin', email='assignadmin@example.com', password='TestPass123!@#', role='admin'
+        )
+        self.client.force_authenticate(user=admin)
+        url = '/api/users/trainers/assign-all/'
+        self._students(1, prefix='w')
+        self.client.post(url)  # creates the load rows
+        
+        self._students(2, prefix='a')
+        with self.assertNumQueries(9):
+            response = self.client.post(url)
+        self.assertEqual(response.data['assigned'], 2)
+        
+        self._students(10, prefix='b')
+        with self.assertNumQueries(9):
+            response = self.client.post(url)
+        self.assertEqual(response.data['assigned'], 10)
+        self.assertEqual(self._load(self.general, 'DP') + self._load(self.dp_trainer, 'DP'), 13)
+    
+    def test_reassign_and_rebuild(self):
+        """Test manual moves keep the counters and rebuild repairs drift"""
+        from accounts.models import TrainerLoad
+        from utils.trainer_assignment import assign_trainer_to_student, reassign_student_trainer, rebuild_trainer_loads
+        
+        student = self._students(1)[0]
+        old_trainer = assign_trainer_to_student(student)
+        new_trainer = self.dp_trainer if old_trainer == self.general else self.general
+        reassign_student_trainer(student, new_trainer)
+        
+        self.assertEqual(self._load(old_trainer, 'DP'), 0)
+        self.assertEqual(self._load(new_trainer, 'DP'), 1)
+        
+        TrainerLoad.objects.update(student_count=7)
+        rebuild_trainer_loads()
+        self.assertEqual(self._load(old_trainer, 'DP'), 0)
+        self.assertEqual(self._load(new_trainer, 'DP'), 1)
+
+
+class TrainerCapacityReportTestCase(APITestCase):
+    """Test the trainer capacity report and its history"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.general = CustomUser.objects.create_user(
+            username='capgeneral', email='capgeneral@example.com', password='TestPass123!@#', role='trainer'
+        )
+        self.dp_trainer = CustomUser.objects.create_user(
+            username='capdp', email='capdp@example.com', password='TestPass123!@#', role='trainer', track='DP'
+        )
+        self.admin = CustomUser.objects.create_user(
+            username='capadmin', email='capadmin@example.com', password='TestPass123!@#', role='admin'
+        )
+        for i, (trainer, track) in enumerate([
+            (self.general, 'DP'), (self.general, 'FSD'), (self.general, 'fsd'), (self.dp_trainer, 'DP')
+        ]):
+            CustomUser.objects.create_user(
+                username=f'capstudent{i}', email=f'capstudent{i}@example.com', password='TestPass123!@#',
+                role='student', track=track, assigned_trainer=trainer
+            )
+        self.client.force_authenticate(user=self.admin)
+    
+    def test_report_is_two_queries_and_cached(self):
+        """Test counts come from one grouped query and repeat requests hit the cache"""
+        from utils.trainer_assignment import get_trainer_capacity_report
+        
+        with self.assertNumQueries(2):
+            report = get_trainer_capacity_report()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_trainer_capacity_report(), report)
+        
+        self.assertEqual(report['capgeneral@example.com']['DP']['count'], 1)
+        self.assertEqual(report['capgeneral@example.com']['FSD']['count'], 2)
+        self.assertEqual(report['capgeneral@example.com']['total'], 3)
+        self.assertEqual(report['capdp@example.com']['count'], 1)
+        self.assertEqual(report['capdp@example.com']['available'], 19)
+        
+        response = self.client.get('/api/users/trainers/capacity/')
+        self.assertEqual(response.data['trainers'], report)
+    
+    def test_snapshots_and_history(self):
+        """Test snapshots record every trainer and track and feed the history endpoint"""
+        from io import StringIO
+        from django.core.management import call_command
+        from accounts.models import TrainerCapacitySnapshot
+        
+        call_command('snapshot_trainer_capacity', '--once', stdout=StringIO())
+        self.assertEqual(TrainerCapacitySnapshot.objects.count(), 3)
+        
+        url = '/api/users/trainers/capacity/history/'
+        response = self.client.get(url, {'track': 'fsd'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['trainers']), ['capgeneral@example.com'])
+        self.assertEqual(response.data['trainers']['capgeneral@example.com']['FSD'][0]['count'], 2)
+        
+        response = self.client.get(url, {'trainer_id': self.general.id, 'days': 1})
+        self.assertEqual(list(response.data['trainers']), ['capgeneral@example.com'])
+        for params in ({'trainer_id': 'abc'}, {'days': '-1'}, {'days': 'soon'}, {'days': 10 ** 9}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.client.force_authenticate(user=self.general)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class PostgresProvisioningTestCase(APITestCase):
+    """Test batched student schema provisioning"""
+    
+    def test_scram_verifier_matches_postgres(self):
+        """Verifier is byte-identical to the one Postgres 16 stored for the same salt"""
+        import base64
+        from accounts.postgres_provisioning import scram_sha256_verifier
+        
+        expected = (
+            'SCRAM-SHA-256$4096:hM1rI1ti+aSCcCbEQIdE6g==$5/4pFuyofR6S727N5mWWtvT1CgTztLSPW78f+oiVwes='
+            ':pFti06SIocUR/7KJTlGrWHczjx25t8JMKTFHZ4paHSY='
+        )
+        salt = base64.b64decode('hM1rI1ti+aSCcCbEQIdE6g==')
+        self.assertEqual(scram_sha256_verifier('Secret123abc', salt), expected)
+    
+    def test_provision_schemas_stores_credentials_for_cohort(self):
+        """One create_schemas call for the cohort; re-provisioning updates stored credentials"""
+        from unittest.mock import patch
+        from accounts.models import StudentDatabaseCredentials
+        from accounts.postgres_provisioning import PostgresProvisioningService
+        
+        students = [
+            CustomUser.objects.create(username=f'dp{i}', email=f'dp{i}@example.com', track='DP')
+            for i in range(3)
+        ]
+        
+        with patch('accounts.postgres_provisioning.create_schemas', return_value=2) as create_schemas:
+            credentials = PostgresProvisioningService.provision_schemas(students, batch_size=2)
+            PostgresProvisioningService.provision_schema_for_student(students[0])
+        
+        specs = create_schemas.call_args_list[0].args[0]
+        self.assertEqual([spec[:2] for spec in specs], [
+            (f'dp_student_{user.id}', f'student_{user.id}') for user in students
+        ])
+        self.assertEqual(create_schemas.call_args_list[0].kwargs, {'batch_size': 2})
+        self.assertEqual(StudentDatabaseCredentials.objects.count(), 3)
+        
+        self.assertEqual(
+            set(StudentDatabaseCredentials.objects.values_list('template_version', flat=True)), {2}
+        )
+        
+        stored = StudentDatabaseCredentials.objects.get(user=students[0])
+        self.assertNotEqual(stored.password, credentials[students[0].id]['password'])
+        self.assertEqual(stored.password, create_schemas.call_args_list[1].args[0][0][2])
+        
+        fsd = CustomUser.objects.create(username='fsd', email='fsd@example.com', track='FSD')
+        with self.assertRaises(ValueError):
+            PostgresProvisioningService.provision_schemas(students + [fsd])
+    
+    def test_upgrade_copies_only_tables_added_since_each_version(self):
+        """Students on older template versions get the newer tables; current ones are skipped"""
+        from unittest.mock import patch
+        from accounts.models import StudentDatabaseCredentials
+        from accounts.postgres_provisioning import PostgresProvisioningService
+        from accounts.student_db_template import CURRENT_TEMPLATE_VERSION, template_tables
+        
+        self.assertEqual(template_tables(0, 1), ['customers', 'products', 'orders'])
+        self.assertEqual(template_tables(1, 2), ['web_events'])
+        self.assertEqual(template_tables(CURRENT_TEMPLATE_VERSION), [])
+        
+        credentials = []
+        for i, version in enumerate([0, 1, CURRENT_TEMPLATE_VERSION]):
+            user = CustomUser.objects.create(username=f'up{i}', email=f'up{i}@example.com', track='DP')
+            credentials.append(StudentDatabaseCredentials.objects.create(
+                user=user, schema_name=f'dp_student_{user.id}', username=f'student_{user.id}',
+                password='x', connection_string='', template_version=version
+            ))
+        
+        with patch(
+            'accounts.postgres_provisioning.copy_new_template_tables', return_value=CURRENT_TEMPLATE_VERSION
+        ) as copy_tables:
+            upgraded = PostgresProvisioningService.upgrade_schemas(StudentDatabaseCredentials.objects.order_by('id'))
+        
+        self.assertEqual(upgraded, 2)
+        self.assertEqual(copy_tables.call_args.args[0], [
+            (creds.schema_name, creds.template_version) for creds in credentials
+        ])
+        self.assertEqual(
+            set(StudentDatabaseCredentials.objects.values_list('template_version', flat=True)),
+            {CURRENT_TEMPLATE_VERSION}
+        )
+
+
+class StudentDatabaseUsageTestCase(APITestCase):
+    """Test usage collection and quota throttling for DP student databases"""
+    
+    def setUp(self):
+        from accounts.models import StudentDatabaseCredentials
+        
+        self.students = []
+        for i in range(2):
+            user = CustomUser.objects.create(username=f'use{i}', email=f'use{i}@example.com', track='DP')
+            StudentDatabaseCredentials.objects.create(
+                user=user, schema_name=f'dp_student_{user.id}', username=f'student_{user.id}',
+                password='x', connection_string=''
+            )
+            self.students.append(user)
+    
+    def _collect(self, sizes, query_stats):
+        from unittest.mock import patch
+        from accounts.student_db_usage import collect_usage
+        
+        with patch('accounts.student_db_usage._read_usage', return_value=(sizes, query_stats, {})), \
+                patch('accounts.student_db_usage.apply_role_limits') as apply_limits, \
+                patch('accounts.student_db_usage.terminate_role_sessions', return_value=0) as terminate:
+            result = collect_usage()
+        self.terminate = terminate
+        return result, apply_limits
+    
+    def test_query_time_is_recorded_as_delta_and_over_quota_students_are_throttled(self):
+        """Query time since the first run counts towards the 24h quota; dropping back under it releases"""
+        from django.test import override_settings
+        from accounts.models import StudentDatabaseCredentials, StudentDatabaseUsage
+        
+        first, second = self.students
+        roles = [f'student_{first.id}', f'student_{second.id}']
+        
+        with override_settings(STUDENT_DB_QUERY_TIME_QUOTA_SECONDS=5):
+            self._collect({}, {roles[0]: (10, 4000.0), roles[1]: (5, 1000.0)})
+            # The first collection is a baseline: earlier query time does not count
+            self.assertEqual(
+                set(StudentDatabaseUsage.objects.values_list('query_time_ms', flat=True)), {0.0}
+            )
+            result, apply_limits = self._collect({}, {roles[0]: (20, 11000.0), roles[1]: (6, 1500.0)})
+        
+        latest = StudentDatabaseUsage.objects.filter(user=first).order_by('-id').first()
+        self.assertEqual(latest.query_time_ms, 7000.0)
+        self.assertEqual(result['throttled'], 1)
+        apply_limits.assert_any_call([roles[0]], throttled=True)
+        # Open sessions keep their old settings, so they are ended
+        self.terminate.assert_called_once_with([roles[0]])
+        creds = StudentDatabaseCredentials.objects.get(user=first)
+        self.assertTrue(creds.throttled)
+        self.assertIn('Query time', creds.throttle_reason)
+        self.assertFalse(StudentDatabaseCredentials.objects.get(user=second).throttled)
+        
+        # pg_stat_statements was reset: the new total is the delta
+        StudentDatabaseUsage.objects.filter(user=first).update(collected_at=latest.collected_at.replace(year=2000))
+        with override_settings(STUDENT_DB_QUERY_TIME_QUOTA_SECONDS=5):
+            result, apply_limits = self._collect({}, {roles[0]: (1, 500.0), roles[1]: (6, 1500.0)})
+        
+        latest = StudentDatabaseUsage.objects.filter(user=first).order_by('-id').first()
+        self.assertEqual(latest.query_time_ms, 500.0)
+        self.assertEqual(result['released'], 1)
+        apply_limits.assert_any_call([roles[0]])
+        self.assertFalse(StudentDatabaseCredentials.objects.get(user=first).throttled)
+    
+    def test_storage_quota_without_pg_stat_statements(self):
+        """Schema size alone throttles when query stats are unavailable; the report lists it for admins"""
+        from django.test import override_settings
+        from accounts.models import StudentDatabaseCredentials
+        
+        first, second = self.students
+        sizes = {f'dp_student_{first.id}': (3 * 1024 * 1024, 4), f'dp_student_{second.id}': (1024, 1)}
+        with override_settings(STUDENT_DB_STORAGE_QUOTA_MB=2):
+            result, _ = self._collect(sizes, None)
+        
+        self.assertEqual(
+            result, {'students': 2, 'throttled': 1, 'released': 0, 'disconnected': 0, 'query_stats': False}
+        )
+        self.assertTrue(StudentDatabaseCredentials.objects.get(user=first).throttled)
+        
+        self.client.force_authenticate(user=first)
+        self.assertEqual(self.client.get('/api/users/db-usage/').status_code, status.HTTP_403_FORBIDDEN)
+        
+        admin = CustomUser.objects.create(username='usage-admin', email='usage-admin@example.com', role='admin')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/users/db-usage/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        students = response.data['students']
+        self.assertEqual([row['user_id'] for row in students], [first.id, second.id])
+        self.assertTrue(students[0]['throttled'])
+        self.assertIsNone(students[0]['query_time_ms_24h'])
@@ -1,15 +1,19 @@
 """
 Trainer management API views
 """
+from datetime import timedelta
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status as http_status
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from utils.trainer_assignment import (
+    get_capacity_history,
     get_trainer_capacity_report,
     reassign_student_trainer,
-    assign_trainer_to_student
+    assign_trainers
 )
 
 User = get_user_model()
@@ -36,6 +40,58 @@ def get_trainer_capacity(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_trainer_capacity_history(request):
+    """
+    Get trainer utilization over time from capacity snapshots
+    Only accessible by admin roles
+    
+    Query params:
+    - days: how far back to go (default 30)
+    - trainer_id: only this trainer
+    - track: only this track code
+    """
+    if request.user.role not in ['admin', 'superadmin']:
+        return Response(
+            {"error": "Permission denied"},
+            status=http_status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        days = int(request.query_params.get('days', 30))
+        if days < 0:
+            raise ValueError(days)
+        since = timezone.now() - timedelta(days=days)
+    except (ValueError, OverflowError):
+        return Response(
+            {"error": "days must be a non-negative number"},
+            status=http_status.HTTP_400_BAD_REQUEST
+        )
+    
+    trainer_id = request.query_params.get('trainer_id')
+    if trainer_id:
+        try:
+            trainer_id = int(trainer_id)
+        except ValueError:
+            return Response(
+                {"error": "trainer_id must be a number"},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+    
+    history = get_capacity_history(
+        since,
+        trainer_id=trainer_id,
+        track=request.query_params.get('track')
+    )
+    
+    return Response({
+        "success": True,
+        "days": days,
+        "trainers": history
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_my_students(request):
@@ -134,25 +190,16 @@ def assign_unassigned_students(request):
             status=http_status.HTTP_403_FORBIDDEN
         )
     
-    unassigned = User.objects.filter(
+    unassigned = list(User.objects.filter(
         role='student',
-        assigned_trainer__isnull=True,
-        track__isnull=False
-    )
-    
-    assigned_count = 0
-    failed_count = 0
+        assigned_trainer__isnull=True
+    ).exclude(track=''))
     
-    for student in unassigned:
-        trainer = assign_trainer_to_student(student)
-        if trainer:
-            assigned_count += 1
-        else:
-            failed_count += 1
+    assigned_count = assign_trainers(unassigned)
     
     return Response({
         "success": True,
         "assigned": assigned_count,
-        "failed": failed_count,
-        "total": unassigned.count()
+        "failed": len(unassigned) - assigned_count,
+        "total": len(unassigned)
     })
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views, workspace_views, github_views, trainer_views
+from . import views, workspace_views, github_views, trainer_views, enrollment_views
 
 urlpatterns = [
     path("profile/", views.get_user_profile, name="user-profile"),
@@ -18,6 +18,11 @@ urlpatterns = [
     path("check-email", views.check_email_exists, name="check_email_exists_no_slash"),  # Without trailing slash
     path("workspace/create/", workspace_views.create_workspace, name="create_workspace"),
     path("workspace/create", workspace_views.create_workspace, name="create_workspace_no_slash"),  # Without trailing slash
+    path("workspace/status/", workspace_views.workspace_status, name="workspace_status"),
+    path("workspace/status", workspace_views.workspace_status, name="workspace_status_no_slash"),  # Without trailing slash
+    path("workspace/heartbeat/", workspace_views.workspace_heartbeat, name="workspace_heartbeat"),
+    path("workspace/heartbeat", workspace_views.workspace_heartbeat, name="workspace_heartbeat_no_slash"),  # Without trailing slash
+    path("workspace/callback/", workspace_views.workspace_callback, name="workspace_callback"),
     
     # GitHub OAuth
     path("github/connect/", github_views.github_connect, name="github-connect"),
@@ -32,14 +37,22 @@ urlpatterns = [
     # Database credentials (DP track)
     path("db-credentials/", views.get_db_credentials, name="db-credentials"),
     path("db-credentials", views.get_db_credentials, name="db-credentials-no-slash"),
+    path("db-usage/", views.get_db_usage, name="db-usage"),
+    path("db-usage", views.get_db_usage, name="db-usage-no-slash"),
     
     # Trainer management
     path("trainers/capacity/", trainer_views.get_trainer_capacity, name="trainer-capacity"),
     path("trainers/capacity", trainer_views.get_trainer_capacity, name="trainer-capacity-no-slash"),
+    path("trainers/capacity/history/", trainer_views.get_trainer_capacity_history, name="trainer-capacity-history"),
+    path("trainers/capacity/history", trainer_views.get_trainer_capacity_history, name="trainer-capacity-history-no-slash"),
     path("trainers/my-students/", trainer_views.get_my_students, name="trainer-my-students"),
     path("trainers/my-students", trainer_views.get_my_students, name="trainer-my-students-no-slash"),
     path("trainers/reassign/", trainer_views.reassign_student, name="reassign-student"),
     path("trainers/reassign", trainer_views.reassign_student, name="reassign-student-no-slash"),
     path("trainers/assign-all/", trainer_views.assign_unassigned_students, name="assign-all-students"),
     path("trainers/assign-all", trainer_views.assign_unassigned_students, name="assign-all-students-no-slash"),
+    
+    # Cohort enrollment
+    path("students/bulk-enroll/", enrollment_views.bulk_enroll_students, name="bulk-enroll"),
+    path("students/bulk-enroll", enrollment_views.bulk_enroll_students, name="bulk-enroll-no-slash"),
 ]
@@ -0,0 +1,220 @@
+"""
+Warm pool of pre-started workspace containers
+
+Cold-starting a workspace means pulling an image, creating a container and
+waiting for code-server or Superset to come up. The warm pool does that work
+ahead of time: it keeps WORKSPACE_WARM_POOL_SIZE containers per workspace
+type running and healthy, each bind-mounting its own directory under
+WORKSPACE_BASE_PATH/pool/.
+
+Docker cannot relabel a container or add a mount to a running one, so a
+warm container is handed to a student by
+- claiming its WarmContainer row (SELECT ... FOR UPDATE SKIP LOCKED),
+- renaming the container to the student's workspace name, and
+- pointing the student's workspace directory on the host at the container's
+  pool directory with a symlink.
+
+The pool directory itself never moves: Docker re-resolves a bind mount's
+source path whenever the container starts (after the idle reaper stopped
+it, a daemon restart or a reboot), and would mount a new empty directory in
+place of a moved one. The pool directory is the student's volume from then
+on; user_volume_path() resolves the symlink, so a recreated container
+mounts it too.
+
+Only students without an existing workspace directory get a warm container;
+returning students keep their own files and take the normal path. The pool
+is replenished in the background after each claim and by the
+maintain_warm_pool management command.
+"""
+import logging
+import os
+import uuid
+
+import docker
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import WarmContainer
+from .workspace_pipeline import (
+    ensure_image, get_executor, get_free_port, prepare_volume, probe_health,
+    run_container, user_volume_path, wait_until_healthy, workspace_base_path,
+)
+
+logger = logging.getLogger(__name__)
+
+POOL_LABEL = 'apranova.pool'
+
+
+def pool_size(workspace_type):
+    return settings.WORKSPACE_WARM_POOL_SIZE.get(workspace_type, 0)
+
+
+def _pool_volume_path(container_name):
+    return os.path.join(workspace_base_path(), 'pool', container_name)
+
+
+def claim_warm_container(client, user, container_name, workspace_type):
+    """
+    Hand a warm container to a student
+
+    Args:
+        client: Docker client
+        user: CustomUser instance
+        container_name: the student's workspace container name
+        workspace_type: 'vscode' or 'superset'
+
+    Returns:
+        tuple: (container, port) or None if no warm container could be assigned
+    """
+    user_volume = user_volume_path(user)
+    if os.path.lexists(user_volume):
+        return None
+
+    # A few tries in case pooled containers disappeared behind our back
+    for _ in range(3):
+        with transaction.atomic():
+            warm = WarmContainer.objects.select_for_update(skip_locked=True).filter(
+                workspace_type=workspace_type,
+                status='WARM'
+            ).order_by('created_at').first()
+            if not warm:
+                schedule_replenish(workspace_type)
+                return None
+
+            warm.status = 'ASSIGNED'
+            warm.assigned_to = user
+            warm.assigned_at = timezone.now()
+            warm.save()
+
+        container = None
+        try:
+            container = client.containers.get(warm.container_name)
+            container.rename(container_name)
+            os.symlink(warm.volume_path, user_volume, target_is_directory=True)
+        except (docker.errors.APIError, OSError) as e:
+            logger.warning(f"Could not assign warm container {warm.container_name}: {str(e)}")
+            if container is not None:
+                container.remove(force=True)
+            warm.delete()
+            continue
+
+        logger.info(f"Assigned warm container {warm.container_name} to {user.email} as {container_name}")
+        schedule_replenish(workspace_type)
+        return container, warm.port
+
+    return None
+
+
+def _prune(client, workspace_type):
+    """
+    Drop rows whose containers are gone and remove pool containers without a row
+
+    Runs under the replenish lock, so WARMING rows here were left behind by
+    an interrupted replenish: keep them only if the container answers.
+    """
+    known = set()
+    for warm in WarmContainer.objects.filter(workspace_type=workspace_type, status__in=['WARMING', 'WARM']):
+        try:
+            container = client.containers.get(warm.container_name)
+        except docker.errors.NotFound:
+            warm.delete()
+            continue
+        if container.status in ('exited', 'dead') or (
+                warm.status == 'WARMING' and not probe_health(warm.port, workspace_type)):
+            container.remove(force=True)
+            warm.delete()
+            continue
+        if warm.status == 'WARMING':
+            warm.status = 'WARM'
+            warm.save()
+        known.add(warm.container_name)
+
+    pooled = client.containers.list(
+        all=True,
+        filters={'label': [f'{POOL_LABEL}=true', f'workspace_type={workspace_type}']}
+    )
+    for container in pooled:
+        # Assigned containers keep the pool label but were renamed to workspace_<id>_<track>
+        if container.name.startswith('warm_') and container.name not in known:
+            logger.info(f"Removing orphaned warm container {container.name}")
+            container.remove(force=True)
+
+
+def replenish(workspace_type, client=None):
+    """
+    Start containers until the pool for workspace_type reaches its target size
+
+    Returns:
+        int: Number of containers that became warm
+    """
+    target = pool_size(workspace_type)
+    lock_key = f'warm-pool:replenish:{workspace_type}'
+    # One replenisher per type at a time, across processes when the cache is shared
+    if not cache.add(lock_key, 1, timeout=settings.WORKSPACE_HEALTH_TIMEOUT + 60):
+        return 0
+
+    try:
+        client = client or docker.from_env()
+        _prune(client, workspace_type)
+
+        current = WarmContainer.objects.filter(
+            workspace_type=workspace_type,
+            status__in=['WARMING', 'WARM']
+        ).count()
+        missing = target - current
+        if missing <= 0:
+            return 0
+
+        image_name = ensure_image(client, workspace_type)
+        started = []
+        for _ in range(missing):
+            name = f"warm_{workspace_type}_{uuid.uuid4().hex[:12]}"
+            warm = WarmContainer.objects.create(
+                workspace_type=workspace_type,
+                container_name=name,
+                port=str(get_free_port()),
+                volume_path=prepare_volume(_pool_volume_path(name), workspace_type),
+            )
+            container = run_container(
+                client, workspace_type, image_name,
+                name=name,
+                volume=warm.volume_path,
+                port=warm.port,
+                labels={POOL_LABEL: 'true', 'workspace_type': workspace_type},
+                secret=f"superset_secret_{name}",
+            )
+            started.append((warm, container))
+
+        ready = 0
+        for warm, container in started:
+            try:
+                wait_until_healthy(container, warm.port, workspace_type)
+            except Exception as e:
+                logger.error(f"Warm container {warm.container_name} failed to start: {str(e)}")
+                container.remove(force=True)
+                warm.delete()
+                continue
+            WarmContainer.objects.filter(pk=warm.pk, status='WARMING').update(status='WARM')
+            ready += 1
+
+        logger.info(f"Warm pool {workspace_type}: {ready} of {missing} new containers ready")
+        return ready
+    finally:
+        cache.delete(lock_key)
+
+
+def _replenish_in_thread(workspace_type):
+    try:
+        replenish(workspace_type)
+    except Exception:
+        logger.exception(f"Warm pool replenish for {workspace_type} failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_replenish(workspace_type):
+    """Top the pool up in the provisioning thread pool"""
+    if pool_size(workspace_type) > 0:
+        get_executor().submit(_replenish_in_thread, workspace_type)
@@ -0,0 +1,161 @@
+"""
+Workspace activity tracking and the idle reaper
+
+Containers started by the Docker provisioning path run with an
+"unless-stopped" restart policy and were never stopped, so on a single host
+they pile up until memory runs out. A workspace counts as active when
+- the workspace page sends a heartbeat (record_heartbeat), or
+- its container moved more than WORKSPACE_IDLE_NET_BYTES of network traffic
+  or used more than WORKSPACE_IDLE_CPU_PERCENT of a core since the last
+  stats sample.
+
+reap_idle_workspaces() samples every READY workspace and stops the ones idle
+for WORKSPACE_IDLE_TIMEOUT_MINUTES. Stopping keeps the container and its
+volume; the next create_workspace call finds the stopped container and starts
+it again through the normal pipeline. Warm pool containers are never touched.
+"""
+import logging
+from datetime import timedelta
+
+import docker
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WarmContainer, WorkspaceProvision
+
+logger = logging.getLogger(__name__)
+
+
+def record_heartbeat(user, workspace_type=None):
+    """
+    Mark the user's running workspaces as in use
+
+    Returns:
+        int: Number of workspaces updated
+    """
+    provisions = WorkspaceProvision.objects.filter(user=user, status='READY')
+    if workspace_type:
+        provisions = provisions.filter(workspace_type=workspace_type)
+    return provisions.update(last_activity_at=timezone.now())
+
+
+def read_counters(stats):
+    """
+    Extract cumulative counters from a Docker stats snapshot
+
+    Returns:
+        tuple: (network rx+tx bytes, container CPU time in ns)
+    """
+    net_bytes = sum(
+        iface.get('rx_bytes', 0) + iface.get('tx_bytes', 0)
+        for iface in (stats.get('networks') or {}).values()
+    )
+    cpu_usage = stats.get('cpu_stats', {}).get('cpu_usage', {}).get('total_usage', 0)
+    return net_bytes, cpu_usage
+
+
+def was_active(provision, net_bytes, cpu_usage, now):
+    """True if the counters moved more than the idle thresholds since the last sample"""
+    if provision.last_sampled_at is None:
+        return False  # First sample only sets the baseline
+    if net_bytes < provision.last_net_bytes or cpu_usage < provision.last_cpu_usage:
+        return False  # Counters reset: the container restarted since the last sample
+
+    elapsed = max((now - provision.last_sampled_at).total_seconds(), 1)
+    cpu_percent = (cpu_usage - provision.last_cpu_usage) / (elapsed * 1e9) * 100
+    return (
+        net_bytes - provision.last_net_bytes > settings.WORKSPACE_IDLE_NET_BYTES
+        or cpu_percent > settings.WORKSPACE_IDLE_CPU_PERCENT
+    )
+
+
+def _container_states(client):
+    """Map container name to state with a single list call"""
+    # sparse=True skips the per-container inspect that list() does by default
+    states = {}
+    for container in client.containers.list(all=True, sparse=True):
+        for name in container.attrs.get('Names') or []:
+            states[name.lstrip('/')] = container.attrs.get('State', '')
+    return states
+
+
+def _stop(client, provision_id, cutoff, dry_run):
+    """Stop one workspace if it is still READY and idle since cutoff; True if it was stopped"""
+    with transaction.atomic():
+        # Lock the row so a concurrent create_workspace waits for the stop to finish
+        provisions = WorkspaceProvision.objects.select_for_update().filter(pk=provision_id, status='READY')
+        if cutoff is not None:
+            provisions = provisions.filter(last_activity_at__lt=cutoff)
+        provision = provisions.first()
+        if provision is None:
+            return False
+        if dry_run:
+            return True
+
+        try:
+            client.containers.get(provision.container_name).stop(timeout=10)
+        except docker.errors.NotFound:
+            pass
+        provision.status = 'STOPPED'
+        provision.message = 'Workspace stopped after inactivity; it restarts on the next open'
+        provision.stopped_at = timezone.now()
+        provision.save()
+
+    logger.info(f"Stopped idle workspace {provision.container_name} for {provision.user_id}")
+    return True
+
+
+def reap_idle_workspaces(client=None, idle_minutes=None, dry_run=False):
+    """
+    Sample running workspaces and stop the idle ones
+
+    Args:
+        client: optional Docker client (default: docker.from_env())
+        idle_minutes: idle timeout (default: WORKSPACE_IDLE_TIMEOUT_MINUTES)
+        dry_run: report what would be stopped without stopping anything
+
+    Returns:
+        dict: counts of 'active', 'stopped' and 'missing' (container gone) workspaces
+    """
+    client = client or docker.from_env()
+    idle_minutes = idle_minutes or settings.WORKSPACE_IDLE_TIMEOUT_MINUTES
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=idle_minutes)
+    counts = {'active': 0, 'stopped': 0, 'missing': 0}
+
+    states = _container_states(client)
+    # Pool containers belong to nobody yet; keep them even if a name ever collided
+    pooled = set(
+        WarmContainer.objects.filter(status__in=['WARMING', 'WARM']).values_list('container_name', flat=True)
+    )
+
+    provisions = WorkspaceProvision.objects.filter(status='READY').exclude(container_name__in=pooled)
+    for provision in provisions.iterator():
+        state = states.get(provision.container_name)
+        if state is None:
+            counts['missing'] += 1
+            continue
+
+        if state == 'running':
+            try:
+                stats = client.api.stats(provision.container_name, stream=False, one_shot=True)
+            except docker.errors.APIError as e:
+                logger.warning(f"Could not sample {provision.container_name}: {str(e)}")
+                continue
+
+            net_bytes, cpu_usage = read_counters(stats)
+            fields = {'last_net_bytes': net_bytes, 'last_cpu_usage': cpu_usage, 'last_sampled_at': now}
+            if was_active(provision, net_bytes, cpu_usage, now) or provision.last_activity_at is None:
+                fields['last_activity_at'] = now
+            WorkspaceProvision.objects.filter(pk=provision.pk).update(**fields)
+
+            if fields.get('last_activity_at', provision.last_activity_at) >= cutoff:
+                counts['active'] += 1
+                continue
+
+        # Idle past the timeout, or already stopped behind our back
+        if _stop(client, provision.pk, cutoff if state == 'running' else None, dry_run):
+            counts['stopped'] += 1
+
+    return counts
@@ -0,0 +1,423 @@
+"""
+Workspace provisioning pipeline
+
+Creating a workspace container (pulling the image, starting it and waiting
+for the app inside to answer) takes from seconds to minutes, so it runs in a
+bounded thread pool instead of the request thread. Progress is stored on
+WorkspaceProvision as it moves through the states
+
+    REQUESTED -> PULLING -> STARTING -> HEALTHY -> READY   (or FAILED)
+
+and clients poll GET /api/users/workspace/status/ for it.
+
+The pool lives in the web process, so a restart loses in-flight runs; rows
+left in progress longer than WORKSPACE_PROVISIONING_TIMEOUT count as failed
+and the next create request starts over.
+"""
+import logging
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+import docker
+import requests
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import CustomUser, WorkspaceProvision
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_CONFIG = {
+    'vscode': {
+        'images': ['apra-nova-code-server:latest', 'codercom/code-server:latest'],
+        'container_port': '8080/tcp',
+        'health_path': '/healthz',
+        'track_suffix': 'fsd',
+        'user_url_field': 'workspace_url',
+    },
+    'superset': {
+        'images': ['apache/superset:latest'],
+        'container_port': '8088/tcp',
+        'health_path': '/health',
+        'track_suffix': 'dp',
+        'user_url_field': 'superset_url',
+    },
+}
+
+SUPERSET_INIT_SCRIPT = """#!/bin/bash
+set -e
+
+# Initialize database
+superset db upgrade
+
+# Create admin user (ignore if exists)
+superset fab create-admin \\
+    --username admin \\
+    --firstname Admin \\
+    --lastname User \\
+    --email admin@superset.com \\
+    --password admin || true
+
+# Initialize Superset
+superset init
+
+# Start the server
+superset run -h 0.0.0.0 -p 8088 --with-threads --reload --debugger
+"""
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_free_port():
+    """Find an available port for user container."""
+    s = socket.socket()
+    s.bind(('', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def get_executor():
+    """Return the process-wide provisioning pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.WORKSPACE_PROVISIONING_WORKERS,
+                thread_name_prefix='workspace-provision'
+            )
+    return _executor
+
+
+def workspace_type_for(user):
+    """Superset for Data Professional students, VS Code for everyone else"""
+    return 'superset' if getattr(user, 'track', 'FSD') == 'DP' else 'vscode'
+
+
+def workspace_url(user, port):
+    # Use localhost URL for development
+    if os.getenv("DEBUG", "False").lower() == "true":
+        return f"http://localhost:{port}"
+    return f"http://workspace-{user.id}.apranova.com"
+
+
+def is_stale(provision):
+    """True if an in-progress run has not advanced within the provisioning timeout"""
+    timeout = timedelta(seconds=settings.WORKSPACE_PROVISIONING_TIMEOUT)
+    return provision.is_in_progress and provision.updated_at < timezone.now() - timeout
+
+
+def _set_status(provision, status, message='', **fields):
+    provision.status = status
+    provision.message = message
+    for field, value in fields.items():
+        setattr(provision, field, value)
+    provision.save()
+    logger.info(f"Workspace {provision.container_name}: {status} {message}".rstrip())
+
+
+def _reset(user, workspace_type):
+    provision, _ = WorkspaceProvision.objects.get_or_create(
+        user=user,
+        workspace_type=workspace_type,
+        defaults={'container_name': ''}
+    )
+    provision.container_name = f"workspace_{user.id}_{WORKSPACE_CONFIG[workspace_type]['track_suffix']}"
+    provision.status = 'REQUESTED'
+    provision.message = 'Workspace requested'
+    provision.error = ''
+    provision.ready_at = None
+    # Opening the workspace counts as activity; stats are re-baselined after a (re)start
+    provision.last_activity_at = timezone.now()
+    provision.last_sampled_at = None
+    provision.stopped_at = None
+    provision.save()
+    return provision
+
+
+def _try_warm_start(client, user, provision):
+    """Assign a warm pool container in the request thread; True if the workspace is ready"""
+    from .warm_pool import claim_warm_container
+
+    try:
+        client.containers.get(provision.container_name)
+        return False  # Existing workspace: the pipeline restarts it if needed
+    except docker.errors.NotFound:
+        pass
+
+    claimed = claim_warm_container(client, user, provision.container_name, provision.workspace_type)
+    if not claimed:
+        return False
+
+    _, port = claimed
+    url = workspace_url(user, port)
+    CustomUser.objects.filter(pk=user.pk).update(
+        **{WORKSPACE_CONFIG[provision.workspace_type]['user_url_field']: url}
+    )
+    # Warm containers were health-checked before joining the pool
+    _set_status(provision, 'READY', 'Workspace ready', url=url, port=port, ready_at=timezone.now())
+    return True
+
+
+def request_workspace(user, client=None):
+    """
+    Start provisioning a workspace in the background unless a run is already active
+
+    With a Docker client, a first-time workspace is served from the warm pool
+    in the request itself when a warm container is available.
+
+    Args:
+        user: CustomUser instance
+        client: optional Docker client for the warm pool fast path
+
+    Returns:
+        tuple: (WorkspaceProvision, started) - started is False if a run was in progress
+    """
+    workspace_type = workspace_type_for(user)
+
+    with transaction.atomic():
+        current = WorkspaceProvision.objects.select_for_update().filter(
+            user=user,
+            workspace_type=workspace_type
+        ).first()
+        if current and current.is_in_progress and not is_stale(current):
+            return current, False
+
+        provision = _reset(user, workspace_type)
+
+        if client is not None:
+            try:
+                if _try_warm_start(client, user, provision):
+                    return provision, True
+            except Exception as e:
+                logger.warning(f"Warm pool unavailable, cold-starting workspace: {str(e)}")
+
+        # Only hand the row to the pool once it is committed and visible to the worker thread
+        transaction.on_commit(lambda: _submit(provision.pk))
+
+    return provision, True
+
+
+def _submit(provision_id):
+    get_executor().submit(_run_in_thread, provision_id)
+
+
+def _run_in_thread(provision_id):
+    try:
+        run_provisioning(provision_id)
+    except Exception:
+        logger.exception(f"Workspace provisioning {provision_id} crashed")
+    finally:
+        # Worker threads get their own DB connections; don't leak them
+        close_old_connections()
+
+
+def workspace_base_path():
+    return os.getenv("WORKSPACE_BASE_PATH", str(Path.home() / "apranova_workspaces"))
+
+
+def user_volume_path(user):
+    """
+    A student's workspace directory on the host
+
+    Students who were given a warm pool container have a symlink here to the
+    pool directory that container mounts, so the resolved path is returned:
+    containers created later mount that same directory.
+    """
+    return os.path.realpath(os.path.join(workspace_base_path(), str(user.id)))
+
+
+def prepare_volume(path, workspace_type):
+    """Create a workspace directory on the host, ready to bind-mount"""
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+    # Set permissions for coder user (UID 1000 in code-server container)
+    # Skip on Windows as chown/chmod don't exist
+    if platform.system() != "Windows":
+        subprocess.run(["chown", "-R", "1000:1000", path], check=False)
+        subprocess.run(["chmod", "-R", "755", path], check=False)
+
+    if workspace_type == 'superset':
+        init_script_path = os.path.join(path, "init_superset.sh")
+        with open(init_script_path, "w") as f:
+            f.write(SUPERSET_INIT_SCRIPT)
+        if platform.system() != "Windows":
+            subprocess.run(["chmod", "+x", init_script_path], check=False)
+
+    return path
+
+
+def ensure_image(client, workspace_type):
+    """Return the first available image, pulling the last candidate if none is local"""
+    images = WORKSPACE_CONFIG[workspace_type]['images']
+    for image_name in images:
+        try:
+            client.images.get(image_name)
+            return image_name
+        except docker.errors.ImageNotFound:
+            continue
+
+    image_name = images[-1]
+    repository, tag = image_name.rsplit(':', 1)
+    client.images.pull(repository, tag=tag)
+    return image_name
+
+
+def run_container(client, workspace_type, image_name, name, volume, port, labels, secret):
+    """Start a workspace container with the standard spec for its type"""
+    if workspace_type == 'superset':
+        return client.containers.run(
+            image_name,
+            name=name,
+            detach=True,
+            ports={"8088/tcp": port},
+            environment={
+                "SUPERSET_SECRET_KEY": secret,
+                "SUPERSET_LOAD_EXAMPLES": "yes",
+            },
+            volumes={volume: {"bind": "/app/superset_home", "mode": "rw"}},
+            restart_policy={"Name": "unless-stopped"},
+            command=["/bin/bash", "/app/superset_home/init_superset.sh"],
+            labels=labels,
+        )
+
+    return client.containers.run(
+        image_name,
+        name=name,
+        detach=True,
+        ports={"8080/tcp": port},
+        environment={
+            "PASSWORD": "",  # Clear the password - this disables password authentication
+        },
+        command=["--auth", "none", "--bind-addr", "0.0.0.0:8080", "."],
+        volumes={volume: {"bind": "/home/coder/project", "mode": "rw"}},
+        restart_policy={"Name": "unless-stopped"},
+        labels=labels,
+    )
+
+
+def _run_user_container(client, user, provision, image_name, port):
+    workspace_type = provision.workspace_type
+    labels = {
+        'user_id': str(user.id),
+        'track': 'DP' if workspace_type == 'superset' else 'FSD',
+        'type': 'superset' if workspace_type == 'superset' else 'codeserver',
+    }
+    return run_container(
+        client, workspace_type, image_name,
+        name=provision.container_name,
+        volume=prepare_volume(user_volume_path(user), workspace_type),
+        port=port,
+        labels=labels,
+        secret=f"superset_secret_{user.id}",
+    )
+
+
+def _host_port(container, workspace_type):
+    port_key = WORKSPACE_CONFIG[workspace_type]['container_port']
+    port_bindings = container.attrs['HostConfig']['PortBindings']
+    if port_bindings and port_key in port_bindings:
+        return str(port_bindings[port_key][0]['HostPort'])
+    return port_key.split('/')[0]
+
+
+def probe_health(port, workspace_type):
+    url = f"http://{settings.WORKSPACE_HEALTH_HOST}:{port}{WORKSPACE_CONFIG[workspace_type]['health_path']}"
+    try:
+        return requests.get(url, timeout=2).status_code < 500
+    except requests.RequestException:
+        return False
+
+
+def wait_until_healthy(container, port, workspace_type):
+    deadline = time.monotonic() + settings.WORKSPACE_HEALTH_TIMEOUT
+    while time.monotonic() < deadline:
+        container.reload()
+        if container.status in ('exited', 'dead'):
+            raise RuntimeError(f"Container stopped during startup ({container.status})")
+        if container.status == 'running' and probe_health(port, workspace_type):
+            return
+        time.sleep(settings.WORKSPACE_HEALTH_INTERVAL)
+    raise RuntimeError(f"Workspace did not become healthy within {settings.WORKSPACE_HEALTH_TIMEOUT}s")
+
+
+def run_provisioning(provision_id, client=None):
+    """
+    Drive one WorkspaceProvision through the pipeline, recording each state
+
+    Args:
+        provision_id: WorkspaceProvision primary key
+        client: optional Docker client (default: docker.from_env())
+
+    Returns:
+        WorkspaceProvision: the row in its final READY or FAILED state
+    """
+    provision = WorkspaceProvision.objects.select_related('user').get(pk=provision_id)
+    user = provision.user
+    workspace_type = provision.workspace_type
+
+    try:
+        client = client or docker.from_env()
+
+        try:
+            container = client.containers.get(provision.container_name)
+            port = _host_port(container, workspace_type)
+            if container.status != 'running':
+                # Stopped workspace: keep its volume, just start it again
+                _set_status(provision, 'STARTING', 'Starting existing workspace', port=port)
+                container.start()
+        except docker.errors.NotFound:
+            from .warm_pool import claim_warm_container
+
+            claimed = claim_warm_container(client, user, provision.container_name, workspace_type)
+            if claimed:
+                container, port = claimed
+                _set_status(provision, 'STARTING', 'Assigned a pre-started workspace', port=port)
+            else:
+                _set_status(provision, 'PULLING', 'Pulling workspace image')
+                image_name = ensure_image(client, workspace_type)
+
+                port = str(get_free_port())
+                _set_status(provision, 'STARTING', 'Starting workspace container', port=port)
+                container = _run_user_container(client, user, provision, image_name, port)
+
+        wait_until_healthy(container, port, workspace_type)
+        _set_status(provision, 'HEALTHY', 'Workspace is responding')
+
+        url = workspace_url(user, port)
+        CustomUser.objects.filter(pk=user.pk).update(
+            **{WORKSPACE_CONFIG[workspace_type]['user_url_field']: url}
+        )
+        _set_status(provision, 'READY', 'Workspace ready', url=url, ready_at=timezone.now())
+
+    except Exception as e:
+        logger.error(f"Workspace provisioning failed for {user.email}: {str(e)}")
+        _set_status(provision, 'FAILED', 'Workspace provisioning failed', error=str(e))
+
+    return provision
+
+
+def provision_workspace_now(user, workspace_type, client=None):
+    """
+    Run the pipeline in the calling thread (for background jobs)
+
+    Returns:
+        str: Workspace URL
+
+    Raises:
+        RuntimeError: if provisioning failed
+    """
+    provision = _reset(user, workspace_type)
+    provision = run_provisioning(provision.pk, client=client)
+    if provision.status != 'READY':
+        raise RuntimeError(provision.error or 'Workspace provisioning failed')
+    return provision.url
@@ -1,12 +1,21 @@
 import docker
-import socket
+import hashlib
+import hmac
+import json
 import os
-from pathlib import Path
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import CustomUser, WorkspaceProvision
+from .workspace_activity import record_heartbeat
+from .workspace_pipeline import (
+    WORKSPACE_CONFIG, get_free_port, is_stale, request_workspace, workspace_type_for,
+)
 
 # Only connect to Docker if available (prevents crash on Render)
 try:
@@ -34,14 +43,6 @@ except Exception as e:
     print(f"Docker not available: {e}")
     print("Workspace provisioning will not be available.")
 
-def get_free_port():
-    """Find an available port for user container."""
-    s = socket.socket()
-    s.bind(('', 0))
-    port = s.getsockname()[1]
-    s.close()
-    return port
-
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def create_workspace(request):
@@ -128,179 +129,142 @@ def create_workspace(request):
             status=status.HTTP_503_SERVICE_UNAVAILABLE
         )
     
-    user = request.user
-    
-    # Determine workspace type based on user's track
-    user_track = getattr(user, 'track', 'FSD')  # Default to FSD if no track
-    is_data_professional = user_track == 'DP'
+    # Container work happens in the provisioning pool; poll workspace_status for progress
+    provision, _ = request_workspace(user, client=client)
     
-    # Use different container names for different tracks
-    container_name = f"workspace_{user.id}_{user_track.lower()}"
-    try:
-        # Check if container already exists
-        container = client.containers.get(container_name)
-        container.reload()
+    return Response(
+        _provision_response(provision),
+        status=status.HTTP_202_ACCEPTED if provision.is_in_progress else status.HTTP_200_OK,
+    )
 
-        # Get the port mapping (8080 for VS Code, 8088 for Superset)
-        port_key = '8088/tcp' if is_data_professional else '8080/tcp'
-        port_bindings = container.attrs['HostConfig']['PortBindings']
-        if port_bindings and port_key in port_bindings:
-            port = port_bindings[port_key][0]['HostPort']
-        else:
-            port = "8088" if is_data_professional else "8080"
 
-        # Use localhost URL for development
-        use_localhost = os.getenv("DEBUG", "False").lower() == "true"
-        if use_localhost:
-            url = f"http://localhost:{port}"
-        else:
-            url = f"http://workspace-{user.id}.apranova.com"
+def _provision_response(provision):
+    data = {
+        "provision_id": provision.id,
+        "status": provision.status.lower(),
+        "workspace_type": provision.workspace_type,
+        "url": provision.url,
+        "port": provision.port,
+        "msg": provision.message,
+        "updated_at": provision.updated_at,
+    }
+    if provision.status == 'FAILED':
+        data["error"] = provision.error
+    if provision.is_in_progress:
+        data["status_url"] = "/api/users/workspace/status/"
+        data["poll_after"] = 2  # seconds
+    return data
 
-        if container.status == "running":
-            return Response(
-                {
-                    "url": url, 
-                    "port": port, 
-                    "status": "running",
-                    "workspace_type": "superset" if is_data_professional else "vscode"
-                },
-                status=status.HTTP_200_OK,
-            )
-        else:
-            container.start()
-            return Response(
-                {
-                    "url": url, 
-                    "port": port, 
-                    "status": "started",
-                    "workspace_type": "superset" if is_data_professional else "vscode"
-                },
-                status=status.HTTP_200_OK,
-            )
-    except docker.errors.NotFound:
-        port = get_free_port()
 
-        # Create workspace directory if it doesn't exist
-        workspace_base = os.getenv("WORKSPACE_BASE_PATH", str(Path.home() / "apranova_workspaces"))
-        user_volume = os.path.join(workspace_base, str(user.id))
-        Path(user_volume).mkdir(parents=True, exist_ok=True)
-        
-        # Set permissions for coder user (UID 1000 in code-server container)
-        # Skip on Windows as chown/chmod don't exist
-        import platform
-        if platform.system() != "Windows":
-            import subprocess
-            subprocess.run(["chown", "-R", "1000:1000", user_volume], check=False)
-            subprocess.run(["chmod", "-R", "755", user_volume], check=False)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def workspace_status(request):
+    """Report the progress of the user's workspace provisioning"""
+    provision = WorkspaceProvision.objects.filter(
+        user=request.user,
+        workspace_type=workspace_type_for(request.user)
+    ).first()
+    
+    if not provision:
+        return Response(
+            {"error": "No workspace has been requested"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if is_stale(provision):
+        provision.status = 'FAILED'
+        provision.message = 'Workspace provisioning was interrupted'
+        provision.error = 'Provisioning did not finish in time; request the workspace again'
+        provision.save()
+    
+    return Response(_provision_response(provision), status=status.HTTP_200_OK)
 
-        # Use localhost URL for development
-        use_localhost = os.getenv("DEBUG", "False").lower() == "true"
 
-        try:
-            if is_data_professional:
-                # Apache Superset for Data Professional track
-                image_name = "apache/superset:latest"
-                port_mapping = {"8088/tcp": port}
-                
-                # Create initialization script
-                init_script = """#!/bin/bash
-set -e
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def workspace_heartbeat(request):
+    """Record that the user is working in their workspace (keeps the idle reaper away)"""
+    updated = record_heartbeat(request.user, workspace_type_for(request.user))
+    
+    if not updated:
+        return Response(
+            {"error": "No running workspace"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(
+        {"message": "Heartbeat recorded", "idle_timeout_minutes": settings.WORKSPACE_IDLE_TIMEOUT_MINUTES},
+        status=status.HTTP_200_OK
+    )
 
-# Initialize database
-superset db upgrade
 
-# Create admin user (ignore if exists)
-superset fab create-admin \
-    --username admin \
-    --firstname Admin \
-    --lastname User \
-    --email admin@superset.com \
-    --password admin || true
+# Workspace Lambda state -> WorkspaceProvision status
+CALLBACK_STATUSES = {
+    'ready': 'READY',
+    'failed': 'FAILED',
+    'stopped': 'STOPPED',
+}
 
-# Initialize Superset
-superset init
 
-# Start the server
-superset run -h 0.0.0.0 -p 8088 --with-threads --reload --debugger
-"""
-                
-                # Write init script to user volume
-                init_script_path = os.path.join(user_volume, "init_superset.sh")
-                with open(init_script_path, "w") as f:
-                    f.write(init_script)
-                
-                # Make script executable (skip on Windows)
-                if platform.system() != "Windows":
-                    import subprocess
-                    subprocess.run(["chmod", "+x", init_script_path], check=False)
-                
-                container = client.containers.run(
-                    image_name,
-                    name=container_name,
-                    detach=True,
-                    ports=port_mapping,
-                    environment={
-                        "SUPERSET_SECRET_KEY": f"superset_secret_{user.id}",
-                        "SUPERSET_LOAD_EXAMPLES": "yes",
-                    },
-                    volumes={user_volume: {"bind": "/app/superset_home", "mode": "rw"}},
-                    restart_policy={"Name": "unless-stopped"},
-                    command=["/bin/bash", "/app/superset_home/init_superset.sh"],
-                )
-                
-                workspace_type = "superset"
-                success_msg = "Superset workspace created successfully. Initializing... This may take 60-90 seconds. Default credentials: admin/admin"
-                
-            else:
-                # VS Code (code-server) for Full Stack Development track
-                image_name = "apra-nova-code-server:latest"
-                try:
-                    client.images.get(image_name)
-                except docker.errors.ImageNotFound:
-                    # Use official code-server image as fallback
-                    image_name = "codercom/code-server:latest"
-                    print(f"Custom image not found, using {image_name}")
-                
-                container = client.containers.run(
-                    image_name,
-                    name=container_name,
-                    detach=True,
-                    ports={"8080/tcp": port},
-                    environment={
-                        "PASSWORD": "",  # Clear the password - this disables password authentication
-                    },
-                    command=["--auth", "none", "--bind-addr", "0.0.0.0:8080", "."],
-                    volumes={user_volume: {"bind": "/home/coder/project", "mode": "rw"}},
-                    restart_policy={"Name": "unless-stopped"},
-                )
-                
-                workspace_type = "vscode"
-                success_msg = "VS Code workspace created successfully."
+def verify_callback_signature(request):
+    """Check the X-Workspace-Signature HMAC the workspace Lambda sends"""
+    if not settings.WORKSPACE_CALLBACK_SECRET:
+        return False  # Never accept unsigned workspace URLs
+    
+    expected_signature = 'sha256=' + hmac.new(
+        settings.WORKSPACE_CALLBACK_SECRET.encode(),
+        request.body,
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(request.headers.get('X-Workspace-Signature', ''), expected_signature)
 
-            # Return localhost URL for development
-            if use_localhost:
-                url = f"http://localhost:{port}"
-            else:
-                url = f"http://workspace-{user.id}.apranova.com"
 
-            return Response(
-                {
-                    "url": url, 
-                    "port": port, 
-                    "msg": success_msg,
-                    "workspace_type": workspace_type
-                },
-                status=status.HTTP_201_CREATED,
-            )
-        except docker.errors.ImageNotFound:
-            workspace_name = "Superset" if is_data_professional else "Code-server"
-            return Response(
-                {
-                    "error": f"{workspace_name} image not found",
-                    "message": f"No {workspace_name} image available. Docker will download it automatically on first use.",
-                    "details": f"The official {workspace_name} image will be pulled from Docker Hub."
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+@csrf_exempt
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def workspace_callback(request):
+    """
+    Receive workspace state changes pushed by the ECS workspace Lambda
+    
+    The Lambda answers launches with 202 and reports readiness here once the
+    task's RUNNING event arrives, so the status endpoint can serve it.
+    Authentication is the shared-secret signature.
+    """
+    if not verify_callback_signature(request):
+        return Response({"error": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        payload = json.loads(request.body)
+        new_status = CALLBACK_STATUSES[payload['status']]
+        workspace_type = payload['workspace_type']
+        config = WORKSPACE_CONFIG[workspace_type]
+    except (ValueError, KeyError):
+        return Response({"error": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = CustomUser.objects.filter(pk=payload.get('user_id')).first()
+    if not user:
+        return Response({"error": "Unknown user"}, status=status.HTTP_404_NOT_FOUND)
+    
+    provision, _ = WorkspaceProvision.objects.get_or_create(
+        user=user,
+        workspace_type=workspace_type,
+        defaults={'container_name': ''}
+    )
+    provision.container_name = payload.get('task_arn', '').rsplit('/', 1)[-1]
+    provision.status = new_status
+    provision.error = payload.get('error', '')
+    
+    if new_status == 'READY':
+        provision.url = payload.get('url', '')
+        provision.message = 'Workspace ready'
+        provision.ready_at = timezone.now()
+        provision.last_activity_at = timezone.now()
+        CustomUser.objects.filter(pk=user.pk).update(**{config['user_url_field']: provision.url})
+    elif new_status == 'FAILED':
+        provision.message = 'Workspace provisioning failed'
+    else:
+        provision.message = 'Workspace stopped; it restarts on the next open'
+        provision.stopped_at = timezone.now()
+    provision.save()
+    
+    return Response(_provision_response(provision), status=status.HTTP_200_OK)
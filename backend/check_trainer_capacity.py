@@ -17,7 +17,7 @@ def main():
     print("TRAINER CAPACITY REPORT")
     print("="*60 + "\n")
     
-    report = get_trainer_capacity_report()
+    report = get_trainer_capacity_report(use_cache=False)
     
     if not report:
         print("❌ No trainers found in the system")
@@ -27,12 +27,12 @@ def main():
         if 'track' in data and data['track'] != 'ALL':
             # Track-specific trainer
             print(f"👨‍🏫 {data['name']} ({trainer_email}) - {data['track']} Track")
-            print(f"   Students: {data['count']}/20 ({data['available']} slots available)")
+            print(f"   Students: {data['count']}/{data['capacity']} ({data['available']} slots available)")
         else:
             # General trainer (legacy)
             print(f"👨‍🏫 {data['name']} ({trainer_email}) - All Tracks")
-            print(f"   DP Track:  {data['DP']['count']}/20 students ({data['DP']['available']} slots available)")
-            print(f"   FSD Track: {data['FSD']['count']}/20 students ({data['FSD']['available']} slots available)")
+            print(f"   DP Track:  {data['DP']['count']}/{data['DP']['capacity']} students ({data['DP']['available']} slots available)")
+            print(f"   FSD Track: {data['FSD']['count']}/{data['FSD']['capacity']} students ({data['FSD']['available']} slots available)")
             print(f"   Total:     {data['total']} students")
         print()
     
@@ -1,16 +1,182 @@
 """
 Report Generation Utilities for APROVOVA
 Centralized utilities for generating and managing reports
+
+Large reports (payments, users across all cohorts) should use the streaming
+methods - get_streaming_response(), generate_csv() and generate_jsonl() -
+with a queryset or generator: rows are read in chunks and written one at a
+time, so memory stays flat whatever the report size.
+
+Analytics exports for Superset and Jupyter can be written as Parquet or Arrow
+IPC files (generate_columnar(), write_columnar()). These use pyarrow, which
+is imported only when a columnar format is used.
 """
 
 import os
 import csv
+import gzip
+import hashlib
+import itertools
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Union
 from django.conf import settings
-from django.http import HttpResponse, FileResponse
+from django.db.models import QuerySet
+from django.db.models.query import ModelIterable
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
+
+# Rows fetched per database round trip when streaming a queryset
+STREAM_CHUNK_SIZE = 2000
+
+Rows = Union[QuerySet, Iterable[Dict[str, Any]]]
+
+# Columnar format -> file extension
+COLUMNAR_FORMATS = {
+    'parquet': 'parquet',
+    'arrow': 'arrow',
+}
+
+# Subdirectories of a report directory that hold report files
+REPORT_FORMAT_DIRS = ['csv', 'pdf', 'json', 'jsonl', 'parquet', 'arrow', 'invoices', 'charts']
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer in generators"""
+    
+    def write(self, value):
+        return value
+
+
+class _CountedRows:
+    """Iterable over rows that counts them as they are read"""
+    
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.rows = rows
+        self.count = 0
+    
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def file_checksum(path: Union[str, Path]) -> str:
+    """sha256 of a file, read in 1 MB blocks"""
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as report_file:
+        for block in iter(lambda: report_file.read(1024 * 1024), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def iter_rows(data: Rows, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate report rows as dicts without loading them all
+    
+    Args:
+        data: values() queryset, model queryset (concrete fields are used),
+            generator or list of dicts
+        chunk_size: rows fetched per query for querysets
+        
+    Returns:
+        Iterator of row dicts
+    """
+    if not isinstance(data, QuerySet):
+        yield from data
+        return
+    
+    if data._iterable_class is not ModelIterable:
+        # values() / values_list(named=True) querysets already yield rows
+        for row in data.iterator(chunk_size=chunk_size):
+            yield row if isinstance(row, dict) else row._asdict()
+        return
+    
+    fields = [field.attname for field in data.model._meta.concrete_fields]
+    for obj in data.iterator(chunk_size=chunk_size):
+        yield {field: getattr(obj, field) for field in fields}
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]], fieldnames: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    Yield a CSV document one line at a time
+    
+    Args:
+        rows: row dicts
+        fieldnames: column order (default: keys of the first row)
+        
+    Returns:
+        Iterator of CSV lines, header first
+    """
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(_Echo(), fieldnames=fieldnames or list(row.keys()), extrasaction='ignore')
+            yield writer.writeheader()
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield one JSON document per row (JSON Lines)"""
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+STREAM_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson'),
+}
+
+
+def require_pyarrow():
+    """Import pyarrow, with an install hint when it is missing"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow exports require pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def write_columnar(batches: Iterable[Any], schema: Any, path: Path, format: str) -> int:
+    """
+    Write Arrow record batches to a Parquet or Arrow IPC file
+    
+    The file is written under a temporary name and renamed when complete, so
+    readers scanning the directory never see a partial file.
+    
+    Args:
+        batches: iterable of pyarrow.RecordBatch matching schema
+        schema: pyarrow.Schema of the file
+        path: destination file
+        format: 'parquet' or 'arrow'
+        
+    Returns:
+        Number of rows written
+    """
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported columnar format: {format}")
+    pa = require_pyarrow()
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    rows = 0
+    
+    try:
+        if format == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(str(tmp_path), schema)
+        with writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    os.replace(tmp_path, path)
+    return rows
 
 
 class ReportGenerator:
@@ -51,40 +217,157 @@ class ReportGenerator:
         prefix_str = f"{prefix}_" if prefix else ""
         return f"{prefix_str}{self.report_type}_report_{timestamp}.{format}"
     
-    def generate_csv(self, data: List[Dict[str, Any]], filename: Optional[str] = None) -> str:
+    def _write_stream(self, lines: Iterator[str], format: str, filename: str, compress: bool = False) -> Path:
+        """Write streamed lines to <base_dir>/<format>/<filename> (gzip if compress); returns the path"""
+        directory = self.base_dir / format
+        directory.mkdir(parents=True, exist_ok=True)
+        file_path = directory / filename
+        
+        opener = gzip.open if compress else open
+        with opener(file_path, 'wt', newline='', encoding='utf-8') as report_file:
+            for line in lines:
+                report_file.write(line)
+        
+        return file_path
+    
+    def write_report(self, data: Rows, format: str, filename: Optional[str] = None,
+                     compress: bool = True, fieldnames: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Stream rows to a CSV or JSON Lines file and describe the result
+        
+        Args:
+            data: queryset or generator of row dicts
+            format: 'csv' or 'jsonl'
+            filename: Optional custom filename (".gz" is appended when compressing)
+            compress: gzip the file
+            fieldnames: Optional CSV column order
+            
+        Returns:
+            dict: path, size (bytes on disk), rows and checksum (sha256 of the file)
+        """
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported streaming format: {format}")
+        
+        filename = filename or self._generate_filename(format)
+        if compress:
+            filename += '.gz'
+        
+        stream = STREAM_FORMATS[format][0]
+        rows = _CountedRows(iter_rows(data))
+        lines = stream(rows, fieldnames) if format == 'csv' else stream(rows)
+        file_path = self._write_stream(lines, format, filename, compress=compress)
+        
+        return {
+            'path': str(file_path),
+            'size': file_path.stat().st_size,
+            'rows': rows.count,
+            'checksum': file_checksum(file_path),
+        }
+    
+    def _index(self, file_path: Path, format: str, rows: int = 0) -> str:
+        """Record a file written by a generate_* method in the Report index; returns its path"""
+        from django.utils import timezone
+        from reports.models import Report
+        
+        Report.objects.create(
+            report_type=self.report_type,
+            format=format,
+            params_hash='',
+            status='READY',
+            file_path=str(file_path),
+            size=file_path.stat().st_size,
+            row_count=rows,
+            checksum=file_checksum(file_path),
+            completed_at=timezone.now()
+        )
+        return str(file_path)
+    
+    def generate_csv(self, data: Rows, filename: Optional[str] = None,
+                     fieldnames: Optional[List[str]] = None) -> str:
         """
         Generate CSV report
         
         Args:
-            data: List of dictionaries containing report data
+            data: List of dictionaries, queryset or generator of report rows
+                (rows are written as they are read)
             filename: Optional custom filename
+            fieldnames: Optional column order (default: keys of the first row)
             
         Returns:
             Path to generated CSV file
         """
-        if not data:
-            raise ValueError("No data provided for CSV generation")
-        
         # Generate filename
         if not filename:
             filename = self._generate_filename('csv')
         
-        # Create CSV directory if it doesn't exist
-        csv_dir = self.base_dir / 'csv'
-        csv_dir.mkdir(parents=True, exist_ok=True)
+        rows = _CountedRows(iter_rows(data))
+        file_path = self._write_stream(stream_csv(rows, fieldnames), 'csv', filename)
         
-        # Full file path
-        file_path = csv_dir / filename
+        if file_path.stat().st_size == 0:
+            file_path.unlink()
+            raise ValueError("No data provided for CSV generation")
         
-        # Write CSV file
-        with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-            if data:
-                fieldnames = data[0].keys()
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(data)
+        return self._index(file_path, 'csv', rows.count)
+    
+    def generate_jsonl(self, data: Rows, filename: Optional[str] = None) -> str:
+        """
+        Generate JSON Lines report, one object per row, written as rows are read
         
-        return str(file_path)
+        Args:
+            data: List of dictionaries, queryset or generator of report rows
+            filename: Optional custom filename
+            
+        Returns:
+            Path to generated JSONL file
+        """
+        if not filename:
+            filename = self._generate_filename('jsonl')
+        
+        rows = _CountedRows(iter_rows(data))
+        file_path = self._write_stream(stream_jsonl(rows), 'jsonl', filename)
+        return self._index(file_path, 'jsonl', rows.count)
+    
+    def generate_columnar(self, data: Rows, format: str = 'parquet', filename: Optional[str] = None,
+                          chunk_size: int = STREAM_CHUNK_SIZE) -> str:
+        """
+        Generate a Parquet or Arrow IPC report from row dicts
+        
+        Column types are inferred from the first chunk of rows; for typed
+        exports of whole tables use reports.columnar instead.
+        
+        Args:
+            data: List of dictionaries, queryset or generator of report rows
+            format: 'parquet' or 'arrow'
+            filename: Optional custom filename
+            chunk_size: Rows per record batch
+            
+        Returns:
+            Path to generated file
+        """
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported columnar format: {format}")
+        pa = require_pyarrow()
+        
+        rows = iter_rows(data, chunk_size)
+        first = list(itertools.islice(rows, chunk_size))
+        if not first:
+            raise ValueError(f"No data provided for {format} generation")
+        
+        first_batch = pa.RecordBatch.from_pylist(first)
+        schema = first_batch.schema
+        
+        def batches():
+            yield first_batch
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    return
+                yield pa.RecordBatch.from_pylist(chunk, schema=schema)
+        
+        filename = filename or self._generate_filename(COLUMNAR_FORMATS[format])
+        file_path = self.base_dir / format / filename
+        rows = write_columnar(batches(), schema, file_path, format)
+        return self._index(file_path, format, rows)
     
     def generate_json(self, data: Any, filename: Optional[str] = None) -> str:
         """
@@ -112,7 +395,7 @@ class ReportGenerator:
         with open(file_path, 'w', encoding='utf-8') as jsonfile:
             json.dump(data, jsonfile, indent=2, default=str)
         
-        return str(file_path)
+        return self._index(file_path, 'json', len(data) if isinstance(data, list) else 0)
     
     def get_csv_response(self, data: List[Dict[str, Any]], filename: str) -> HttpResponse:
         """
@@ -153,50 +436,65 @@ class ReportGenerator:
         
         return response
     
+    def get_streaming_response(self, data: Rows, filename: str, format: str = 'csv',
+                               fieldnames: Optional[List[str]] = None,
+                               chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingHttpResponse:
+        """
+        Stream a CSV or JSON Lines download without building it in memory
+        
+        Args:
+            data: queryset (read with .iterator(chunk_size)) or generator of row dicts
+            filename: Filename for download
+            format: 'csv' or 'jsonl'
+            fieldnames: Optional CSV column order
+            chunk_size: rows fetched per query for querysets
+            
+        Returns:
+            StreamingHttpResponse
+        """
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported streaming format: {format}")
+        
+        stream, content_type = STREAM_FORMATS[format]
+        rows = iter_rows(data, chunk_size)
+        lines = stream(rows, fieldnames) if format == 'csv' else stream(rows)
+        
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
     def list_reports(self, format: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        List all reports in the directory
+        List generated reports of this type from the Report index (one query)
         
         Args:
-            format: Optional format filter (csv, pdf, json)
+            format: Optional format filter (csv, jsonl)
             
         Returns:
-            List of report metadata
+            List of report metadata, newest first
         """
-        reports = []
+        from reports.models import Report
         
-        # Determine which directories to scan
+        reports = Report.objects.filter(report_type=self.report_type, status='READY')
         if format:
-            dirs_to_scan = [self.base_dir / format]
-        else:
-            dirs_to_scan = [
-                self.base_dir / 'csv',
-                self.base_dir / 'pdf',
-                self.base_dir / 'json',
-            ]
-        
-        for directory in dirs_to_scan:
-            if directory.exists():
-                for file_path in directory.iterdir():
-                    if file_path.is_file() and not file_path.name.startswith('.'):
-                        stat = file_path.stat()
-                        reports.append({
-                            'name': file_path.name,
-                            'path': str(file_path),
-                            'format': file_path.suffix[1:],
-                            'size': stat.st_size,
-                            'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                        })
-        
-        # Sort by creation time (newest first)
-        reports.sort(key=lambda x: x['created'], reverse=True)
-        
-        return reports
+            reports = reports.filter(format=format)
+        
+        return [
+            {
+                'name': Path(report.file_path).name,
+                'path': report.file_path,
+                'format': report.format,
+                'size': report.size,
+                'rows': report.row_count,
+                'created': report.created_at.isoformat(),
+                'modified': (report.completed_at or report.created_at).isoformat(),
+            }
+            for report in reports.order_by('-created_at')
+        ]
     
     def delete_report(self, filename: str) -> bool:
         """
-        Delete a specific report
+        Delete a specific report: its file and its row in the Report index
         
         Args:
             filename: Name of the file to delete
@@ -204,9 +502,15 @@ class ReportGenerator:
         Returns:
             True if deleted successfully, False otherwise
         """
+        from reports.models import Report
+        from reports.services import delete_reports
+        
         # Search in all format directories
-        for format_dir in ['csv', 'pdf', 'json', 'invoices', 'charts']:
+        for format_dir in REPORT_FORMAT_DIRS:
             file_path = self.base_dir / format_dir / filename
+            indexed = Report.objects.filter(file_path=str(file_path))
+            if indexed.exists():
+                return delete_reports(indexed) > 0
             if file_path.exists():
                 file_path.unlink()
                 return True
@@ -215,7 +519,11 @@ class ReportGenerator:
     
     def cleanup_old_reports(self, days: int = 90) -> int:
         """
-        Delete reports older than specified days
+        Delete reports of this type older than specified days
+        
+        Indexed reports are deleted through the Report table; files in the
+        report directories that have no index row (written by other tools,
+        or before the index existed) are deleted by modification time.
         
         Args:
             days: Number of days to retain reports
@@ -223,55 +531,74 @@ class ReportGenerator:
         Returns:
             Number of reports deleted
         """
+        from reports.services import cleanup_reports
+        
+        return cleanup_reports(days, report_type=self.report_type) + self.sweep_unindexed_files(days)
+    
+    def sweep_unindexed_files(self, days: int = 90) -> int:
+        """
+        Delete files without a Report row whose modification time is older than days
+        
+        Returns:
+            Number of files deleted
+        """
         from datetime import timedelta
+        from reports.models import Report
         
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        indexed = set(
+            Report.objects.filter(file_path__startswith=str(self.base_dir)).values_list('file_path', flat=True)
+        )
         deleted_count = 0
         
-        for format_dir in ['csv', 'pdf', 'json', 'invoices', 'charts']:
+        for format_dir in REPORT_FORMAT_DIRS:
             directory = self.base_dir / format_dir
-            if directory.exists():
-                for file_path in directory.iterdir():
-                    if file_path.is_file() and not file_path.name.startswith('.'):
-                        stat = file_path.stat()
-                        file_date = datetime.fromtimestamp(stat.st_mtime)
-                        
-                        if file_date < cutoff_date:
-                            file_path.unlink()
-                            deleted_count += 1
+            if not directory.exists():
+                continue
+            for file_path in directory.iterdir():
+                if (file_path.is_file() and not file_path.name.startswith('.')
+                        and str(file_path) not in indexed and file_path.stat().st_mtime < cutoff):
+                    file_path.unlink()
+                    deleted_count += 1
         
         return deleted_count
 
 
 # Convenience functions for quick report generation
 
-def generate_user_report(data: List[Dict], format: str = 'csv') -> str:
+def generate_user_report(data: Rows, format: str = 'csv') -> str:
     """Generate user report"""
     generator = ReportGenerator('user')
     if format == 'csv':
         return generator.generate_csv(data)
+    elif format == 'jsonl':
+        return generator.generate_jsonl(data)
     elif format == 'json':
         return generator.generate_json(data)
     else:
         raise ValueError(f"Unsupported format: {format}")
 
 
-def generate_payment_report(data: List[Dict], format: str = 'csv') -> str:
+def generate_payment_report(data: Rows, format: str = 'csv') -> str:
     """Generate payment report"""
     generator = ReportGenerator('payment')
     if format == 'csv':
         return generator.generate_csv(data)
+    elif format == 'jsonl':
+        return generator.generate_jsonl(data)
     elif format == 'json':
         return generator.generate_json(data)
     else:
         raise ValueError(f"Unsupported format: {format}")
 
 
-def generate_batch_report(data: List[Dict], format: str = 'csv') -> str:
+def generate_batch_report(data: Rows, format: str = 'csv') -> str:
     """Generate batch report"""
     generator = ReportGenerator('batch')
     if format == 'csv':
         return generator.generate_csv(data)
+    elif format == 'jsonl':
+        return generator.generate_jsonl(data)
     elif format == 'json':
         return generator.generate_json(data)
     else:
@@ -283,6 +610,8 @@ def generate_analytics_report(data: Any, format: str = 'json') -> str:
     generator = ReportGenerator('analytics')
     if format == 'csv' and isinstance(data, list):
         return generator.generate_csv(data)
+    elif format in COLUMNAR_FORMATS and not isinstance(data, dict):
+        return generator.generate_columnar(data, format)
     elif format == 'json':
         return generator.generate_json(data)
     else:
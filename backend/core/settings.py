@@ -32,6 +32,22 @@ STUDENT_DB_PORT = config("STUDENT_DB_PORT", default="5432")
 STUDENT_DB_NAME = config("STUDENT_DB_NAME", default="apranova_students")
 STUDENT_DB_ADMIN_USER = config("STUDENT_DB_ADMIN_USER", default="postgres")
 STUDENT_DB_ADMIN_PASSWORD = config("STUDENT_DB_ADMIN_PASSWORD", default="")
+# Admin connections kept open for provisioning; callers beyond the max wait for a free one
+STUDENT_DB_POOL_MIN = config("STUDENT_DB_POOL_MIN", default=1, cast=int)
+STUDENT_DB_POOL_MAX = config("STUDENT_DB_POOL_MAX", default=4, cast=int)
+# Students provisioned per transaction in batch mode
+STUDENT_DB_PROVISION_BATCH_SIZE = config("STUDENT_DB_PROVISION_BATCH_SIZE", default=100, cast=int)
+# Preload new schemas with the DP sample tables from the versioned template schema
+STUDENT_DB_USE_TEMPLATE = config("STUDENT_DB_USE_TEMPLATE", default=True, cast=bool)
+# Limits set on every student's Postgres role
+STUDENT_DB_STATEMENT_TIMEOUT = config("STUDENT_DB_STATEMENT_TIMEOUT", default="30s")
+STUDENT_DB_WORK_MEM = config("STUDENT_DB_WORK_MEM", default="16MB")
+STUDENT_DB_CONNECTION_LIMIT = config("STUDENT_DB_CONNECTION_LIMIT", default=5, cast=int)
+# Quotas checked by collect_student_db_usage; students over a quota get the throttled limits
+STUDENT_DB_STORAGE_QUOTA_MB = config("STUDENT_DB_STORAGE_QUOTA_MB", default=500, cast=int)
+STUDENT_DB_QUERY_TIME_QUOTA_SECONDS = config("STUDENT_DB_QUERY_TIME_QUOTA_SECONDS", default=1800, cast=int)  # per 24h
+STUDENT_DB_THROTTLED_STATEMENT_TIMEOUT = config("STUDENT_DB_THROTTLED_STATEMENT_TIMEOUT", default="5s")
+STUDENT_DB_THROTTLED_CONNECTION_LIMIT = config("STUDENT_DB_THROTTLED_CONNECTION_LIMIT", default=1, cast=int)
 
 # GitHub OAuth Settings
 GITHUB_CLIENT_ID = config("GITHUB_CLIENT_ID", default="")
@@ -53,6 +69,42 @@ SLACK_ENABLED = config("SLACK_ENABLED", default=False, cast=bool)
 # Discord Settings
 DISCORD_WEBHOOK_URL = config("DISCORD_WEBHOOK_URL", default="")
 
+# Notification outbox (Slack, Discord, email), sent by the job worker
+NOTIFICATIONS_BATCH_WINDOW = config("NOTIFICATIONS_BATCH_WINDOW", default=2, cast=float)  # seconds to gather a burst into one send
+NOTIFICATIONS_BATCH_SIZE = config("NOTIFICATIONS_BATCH_SIZE", default=200, cast=int)  # notifications claimed per dispatch
+NOTIFICATIONS_MAX_ATTEMPTS = config("NOTIFICATIONS_MAX_ATTEMPTS", default=5, cast=int)
+NOTIFICATIONS_MAX_RATE_LIMIT_WAIT = config("NOTIFICATIONS_MAX_RATE_LIMIT_WAIT", default=5, cast=float)  # longer waits are rescheduled
+NOTIFICATIONS_HTTP_TIMEOUT = config("NOTIFICATIONS_HTTP_TIMEOUT", default=5, cast=float)
+
+# Curriculum catalog cache (seconds); entries are also invalidated on catalog edits
+CURRICULUM_CATALOG_CACHE_TIMEOUT = config("CURRICULUM_CATALOG_CACHE_TIMEOUT", default=86400, cast=int)
+
+# Background jobs (run workers with: python manage.py run_jobs)
+JOBS_MAX_ATTEMPTS = config("JOBS_MAX_ATTEMPTS", default=5, cast=int)
+JOBS_RETRY_BASE_DELAY = config("JOBS_RETRY_BASE_DELAY", default=30, cast=int)  # seconds
+JOBS_RETRY_MAX_DELAY = config("JOBS_RETRY_MAX_DELAY", default=3600, cast=int)  # seconds
+JOBS_LOCK_TIMEOUT = config("JOBS_LOCK_TIMEOUT", default=900, cast=int)  # seconds before a RUNNING job is requeued
+
+# Workspace provisioning pipeline (accounts.workspace_pipeline)
+WORKSPACE_PROVISIONING_WORKERS = config("WORKSPACE_PROVISIONING_WORKERS", default=4, cast=int)  # concurrent container starts per web process
+WORKSPACE_PROVISIONING_TIMEOUT = config("WORKSPACE_PROVISIONING_TIMEOUT", default=600, cast=int)  # seconds before an in-progress run counts as failed
+WORKSPACE_HEALTH_HOST = config("WORKSPACE_HEALTH_HOST", default="localhost")  # host the backend reaches workspace ports on
+WORKSPACE_HEALTH_TIMEOUT = config("WORKSPACE_HEALTH_TIMEOUT", default=180, cast=int)  # Superset needs 60-90s to initialize
+WORKSPACE_HEALTH_INTERVAL = config("WORKSPACE_HEALTH_INTERVAL", default=3, cast=int)
+# Pre-started containers kept per workspace type (see accounts.warm_pool); 0 disables the pool
+WORKSPACE_WARM_POOL_SIZE = {
+    "vscode": config("WORKSPACE_WARM_POOL_VSCODE", default=0, cast=int),
+    "superset": config("WORKSPACE_WARM_POOL_SUPERSET", default=0, cast=int),
+}
+WORKSPACE_IDLE_TIMEOUT_MINUTES = config("WORKSPACE_IDLE_TIMEOUT_MINUTES", default=30, cast=int)  # stop containers idle this long
+WORKSPACE_IDLE_NET_BYTES = config("WORKSPACE_IDLE_NET_BYTES", default=65536, cast=int)  # traffic per sample that still counts as idle
+WORKSPACE_IDLE_CPU_PERCENT = config("WORKSPACE_IDLE_CPU_PERCENT", default=5.0, cast=float)  # % of one core that still counts as idle
+WORKSPACE_CALLBACK_SECRET = config("WORKSPACE_CALLBACK_SECRET", default="")  # signs readiness callbacks from the workspace Lambda
+
+# Students per trainer per track (utils.trainer_assignment)
+TRAINER_CAPACITY_PER_TRACK = config("TRAINER_CAPACITY_PER_TRACK", default=20, cast=int)
+TRAINER_CAPACITY_CACHE_TIMEOUT = config("TRAINER_CAPACITY_CACHE_TIMEOUT", default=60, cast=int)  # seconds the capacity report is cached
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -105,6 +157,9 @@ INSTALLED_APPS = [
     "submissions",
     "support",  # Support ticket system
     "live_sessions",  # Live class sessions
+    "jobs",  # Durable background job queue
+    "reports",  # Background report generation
+    "notifications",  # Slack/Discord/email outbox
     # stripe
     "payments",
 ]
@@ -206,6 +261,12 @@ APROVOVA_USER_REPORTS_DIR = APROVOVA_REPORTS_DIR / "user_reports"
 APROVOVA_PAYMENT_REPORTS_DIR = APROVOVA_REPORTS_DIR / "payment_reports"
 APROVOVA_BATCH_REPORTS_DIR = APROVOVA_REPORTS_DIR / "batch_reports"
 APROVOVA_ANALYTICS_REPORTS_DIR = APROVOVA_REPORTS_DIR / "analytics_reports"
+# Identical report requests within this many seconds reuse the generated file
+REPORT_CACHE_TTL = config("REPORT_CACHE_TTL", default=900, cast=int)
+REPORT_RETENTION_DAYS = config("REPORT_RETENTION_DAYS", default=90, cast=int)
+# Incremental analytics exports skip rows whose cursor is newer than this, so a
+# row written by a transaction that commits late is not passed by the watermark
+REPORT_EXPORT_LAG_SECONDS = config("REPORT_EXPORT_LAG_SECONDS", default=300, cast=int)
 
 # Create APROVOVA directories if they don't exist
 import os
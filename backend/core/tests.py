@@ -0,0 +1,69 @@
+"""
+Tests for the streaming report utilities
+"""
+import csv
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+
+from .report_utils import ReportGenerator, iter_rows
+
+User = get_user_model()
+
+
+class StreamingReportTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            User.objects.create(username=f'report{i}', email=f'report{i}@example.com', track='DP')
+        self.generator = ReportGenerator('user')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.generator.base_dir = Path(self.tmp.name)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_streaming_csv_from_values_queryset(self):
+        users = User.objects.order_by('id').values('email', 'track')
+        response = self.generator.get_streaming_response(users, 'users.csv', chunk_size=2)
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(self._body(response))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], {'email': 'report0@example.com', 'track': 'DP'})
+
+    def test_streaming_jsonl_from_model_queryset(self):
+        response = self.generator.get_streaming_response(User.objects.order_by('id'), 'users.jsonl', format='jsonl')
+
+        lines = self._body(response).splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])['email'], 'report0@example.com')
+
+    def test_queryset_is_read_in_chunks(self):
+        """Rows are fetched with .iterator(), never the whole result cache"""
+        users = User.objects.values('email')
+        with mock.patch.object(type(users), 'iterator', autospec=True, side_effect=lambda qs, chunk_size: iter([])) as iterator:
+            list(iter_rows(users, chunk_size=3))
+        iterator.assert_called_once_with(users, chunk_size=3)
+        self.assertIsNone(users._result_cache)
+
+    def test_generate_files_from_generator(self):
+        rows = ({'n': i, 'square': i * i} for i in range(1000))
+        path = self.generator.generate_csv(rows, filename='squares.csv')
+        with open(path) as f:
+            self.assertEqual(sum(1 for _ in f), 1001)
+
+        path = self.generator.generate_jsonl(User.objects.values('email'), filename='users.jsonl')
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+        with self.assertRaises(ValueError):
+            self.generator.generate_csv(iter([]), filename='empty.csv')
+        self.assertFalse((self.generator.base_dir / 'csv' / 'empty.csv').exists())
@@ -127,5 +127,6 @@ urlpatterns = [
     path("api/compliance/", include("compliance.urls")),
     path("api/support/", include("support.urls")),
     path("api/submissions/", include("submissions.urls")),
+    path("api/reports/", include("reports.urls")),
     path("api/", include("live_sessions.urls")),
 ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Track, Project, ProjectStep, Deliverable, StudentProgress, Submission
+from .models import Track, Project, ProjectStep, Deliverable, StudentProgress, StudentProgressSummary, Submission
 
 
 @admin.register(Track)
@@ -51,6 +51,15 @@ class StudentProgressAdmin(admin.ModelAdmin):
     date_hierarchy = 'completed_at'
 
 
+@admin.register(StudentProgressSummary)
+class StudentProgressSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'track', 'project', 'steps_completed', 'steps_total', 'progress_percentage', 'status', 'updated_at']
+    list_filter = ['track', 'status', 'is_approved']
+    search_fields = ['student__email', 'student__name']
+    raw_id_fields = ['student', 'project', 'current_project']
+    readonly_fields = ['updated_at']
+
+
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
     list_display = ['student', 'deliverable', 'status', 'submitted_at', 'reviewed_by']
@@ -0,0 +1,188 @@
+"""
+Versioned read-through cache for the curriculum catalog
+
+Tracks, projects, steps and deliverables only change when the setup scripts or
+admin edits run, so their serialized tree is cached once per track and merged
+with the requesting student's progress at response time. Any save or delete of
+a catalog model bumps the catalog version (see curriculum.signals), which
+orphans every cached entry at once; orphaned entries expire via the timeout.
+
+Note: QuerySet.update() and bulk_create() bypass signals - call
+bump_catalog_version() after using them on catalog models.
+"""
+import copy
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Track
+from .progress import ProgressSnapshot
+
+VERSION_KEY = 'curriculum:catalog:version'
+
+
+def _timeout():
+    return getattr(settings, 'CURRICULUM_CATALOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def get_catalog_version():
+    """Return the current catalog version, initializing it if the key was evicted"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog entry"""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(VERSION_KEY, version, timeout=None)
+        return version
+
+
+def _index_key(version):
+    return f'curriculum:catalog:{version}:index'
+
+
+def _track_key(version, track_id):
+    return f'curriculum:catalog:{version}:track:{track_id}'
+
+
+def _build_entries(track_ids=None):
+    """Serialize tracks from the database into catalog entries"""
+    from .serializers import TrackSerializer
+
+    tracks = Track.objects.prefetch_related('projects__steps', 'projects__deliverables')
+    if track_ids is not None:
+        tracks = tracks.filter(id__in=track_ids)
+
+    entries = {}
+    for track in tracks:
+        entries[track.id] = {
+            'is_active': track.is_active,
+            'active_project_ids': [p.id for p in track.projects.all() if p.is_active],
+            # No request in context, so progress fields hold their defaults
+            'data': TrackSerializer(track, context={}).data,
+        }
+    return entries
+
+
+def _get_index(version):
+    """Return [(track_id, is_active), ...] ordered like Track.objects.all()"""
+    index = cache.get(_index_key(version))
+    if index is None:
+        index = list(Track.objects.values_list('id', 'is_active'))
+        cache.set(_index_key(version), index, _timeout())
+    return index
+
+
+def get_catalog_entries(track_ids=None):
+    """
+    Return catalog entries for the given tracks (all tracks by default)
+
+    Returns:
+        list: entries in catalog order, each a dict with is_active,
+        active_project_ids and the serialized track under 'data'
+    """
+    version = get_catalog_version()
+    index = _get_index(version)
+    if track_ids is None:
+        track_ids = [track_id for track_id, _ in index]
+    else:
+        wanted = set(track_ids)
+        track_ids = [track_id for track_id, _ in index if track_id in wanted]
+
+    keys = {_track_key(version, track_id): track_id for track_id in track_ids}
+    cached = cache.get_many(list(keys))
+    entries = {keys[key]: entry for key, entry in cached.items()}
+
+    missing = [track_id for track_id in track_ids if track_id not in entries]
+    if missing:
+        built = _build_entries(missing)
+        cache.set_many(
+            {_track_key(version, track_id): entry for track_id, entry in built.items()},
+            _timeout()
+        )
+        entries.update(built)
+
+    return [entries[track_id] for track_id in track_ids if track_id in entries]
+
+
+def _step_totals(entries):
+    """Per-project step totals taken from the catalog instead of the database"""
+    return [
+        (project['id'], entry['data']['id'], len(project['steps']))
+        for entry in entries
+        for project in entry['data']['projects']
+    ]
+
+
+def _overlay_project(project_data, track_id, snapshot):
+    project = SimpleNamespace(id=project_data['id'], number=project_data['number'], track_id=track_id)
+    repo_progress = snapshot.get_repo_progress(project)
+
+    project_data['progress_percentage'] = snapshot.project_percentage(project)
+    project_data['is_unlocked'] = snapshot.is_project_unlocked(project)
+    project_data['github_repo_url'] = repo_progress.github_repo_url if repo_progress else None
+    project_data['github_repo_name'] = repo_progress.github_repo_name if repo_progress else None
+    project_data['github_repo_created'] = repo_progress is not None
+    for step_data in project_data['steps']:
+        step_data['is_completed'] = snapshot.is_step_completed(SimpleNamespace(id=step_data['id']))
+    return project_data
+
+
+def _snapshot_for(user, entries):
+    if not user or not user.is_authenticated:
+        return None
+    return ProgressSnapshot(user, step_totals=_step_totals(entries))
+
+
+def get_tracks_with_progress(user, track_ids=None, active_only=True):
+    """
+    Serialized tracks (TrackSerializer shape) with the user's progress merged in
+    """
+    entries = get_catalog_entries(track_ids)
+    if active_only:
+        entries = [entry for entry in entries if entry['is_active']]
+
+    snapshot = _snapshot_for(user, entries)
+    tracks = []
+    for entry in entries:
+        track_data = copy.deepcopy(entry['data'])
+        if snapshot:
+            for project_data in track_data['projects']:
+                _overlay_project(project_data, track_data['id'], snapshot)
+            track_data['overall_progress'] = snapshot.track_percentage(SimpleNamespace(id=track_data['id']))
+        tracks.append(track_data)
+    return tracks
+
+
+def get_projects_with_progress(user, track_code=None, project_id=None):
+    """
+    Serialized active projects (ProjectSerializer shape) with the user's progress merged in
+    """
+    entries = get_catalog_entries()
+    if track_code:
+        entries = [entry for entry in entries if entry['data']['code'] == track_code]
+
+    snapshot = _snapshot_for(user, entries)
+    projects = []
+    for entry in entries:
+        active_ids = set(entry['active_project_ids'])
+        for project_data in entry['data']['projects']:
+            if project_data['id'] not in active_ids:
+                continue
+            if project_id is not None and project_data['id'] != project_id:
+                continue
+            project_data = copy.deepcopy(project_data)
+            if snapshot:
+                _overlay_project(project_data, entry['data']['id'], snapshot)
+            projects.append(project_data)
+    return projects
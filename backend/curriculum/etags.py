@@ -0,0 +1,73 @@
+"""
+Conditional GET support for curriculum and progress endpoints
+
+The ETag combines the catalog version with a fingerprint of the student's
+progress rows (latest updated_at plus row count, so deletions are noticed).
+Computing it costs one aggregate query; on a match the endpoint answers
+304 Not Modified without rebuilding its payload.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .catalog import get_catalog_version
+from .models import StudentProgress
+
+
+def _fingerprint(queryset):
+    state = queryset.aggregate(latest=Max('updated_at'), rows=Count('id'))
+    latest = state['latest'].isoformat() if state['latest'] else ''
+    return f"{latest}:{state['rows']}"
+
+
+def progress_etag(user, *extra_querysets):
+    """
+    Build a strong ETag for the user's curriculum view
+
+    Args:
+        user: requesting user
+        extra_querysets: other querysets with updated_at the payload depends on
+
+    Returns:
+        str: quoted ETag value
+    """
+    parts = [
+        str(user.pk),
+        user.track or '',
+        str(get_catalog_version()),
+        _fingerprint(StudentProgress.objects.filter(student=user)),
+    ]
+    parts.extend(_fingerprint(queryset) for queryset in extra_querysets)
+    return '"%s"' % hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def conditional_response(request, etag, build_response):
+    """
+    Return 304 when If-None-Match matches etag, otherwise build the response
+
+    Args:
+        request: DRF request
+        etag: quoted ETag for the current state
+        build_response: callable returning the full Response
+
+    Returns:
+        Response: with ETag and a private, revalidate-always Cache-Control
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison: proxies that compress the body may add a W/ prefix
+        etags = {e[2:] if e.startswith('W/') else e for e in parse_etags(if_none_match)}
+        if '*' in etags or etag in etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+    response = build_response()
+    if response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+    return response
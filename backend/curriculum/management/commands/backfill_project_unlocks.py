@@ -0,0 +1,44 @@
+"""
+Django management command to materialize Project 1 unlock records in bulk
+"""
+from django.core.management.base import BaseCommand
+from accounts.models import CustomUser
+from curriculum.unlocks import backfill_first_project_unlocks
+
+
+class Command(BaseCommand):
+    help = 'Create missing Project 1 progress records for all students in one pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--track',
+            type=str,
+            help='Only backfill students of this track code (e.g. DP, FSD)'
+        )
+        parser.add_argument(
+            '--enrolled-only',
+            action='store_true',
+            help='Only backfill students with enrollment_status=ENROLLED'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per INSERT statement (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        students = CustomUser.objects.filter(role='student').exclude(track='')
+
+        if options['track']:
+            students = students.filter(track__iexact=options['track'])
+        if options['enrolled_only']:
+            students = students.filter(enrollment_status='ENROLLED')
+
+        self.stdout.write(f'Backfilling Project 1 unlocks for {students.count()} students...')
+
+        created = backfill_first_project_unlocks(students, batch_size=options['batch_size'])
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'Unlocked Project 1 for {created} students'))
+        self.stdout.write('='*50)
@@ -0,0 +1,37 @@
+"""
+Django management command to rebuild StudentProgressSummary rows in bulk
+"""
+from django.core.management.base import BaseCommand
+from accounts.models import CustomUser
+from curriculum.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized student progress summary table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--track',
+            type=str,
+            help='Only rebuild students of this track code (e.g. DP, FSD)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Students per aggregation query and rows per INSERT (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        students = CustomUser.objects.filter(role='student')
+
+        if options['track']:
+            students = students.filter(track=options['track'])
+
+        self.stdout.write(f'Rebuilding progress summaries for {students.count()} students...')
+
+        written = rebuild_summaries(students, batch_size=options['batch_size'])
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} progress summary rows'))
+        self.stdout.write('='*50)
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curriculum', '0004_add_approval_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentProgressSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('steps_completed', models.IntegerField(default=0)),
+                ('steps_total', models.IntegerField(default=0)),
+                ('progress_percentage', models.IntegerField(default=0)),
+                ('is_approved', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('NOT_STARTED', 'Not Started'), ('IN_PROGRESS', 'In Progress'), ('COMPLETED', 'All Projects Completed')], default='NOT_STARTED', max_length=20)),
+                ('current_project_progress', models.IntegerField(default=0)),
+                ('current_steps_completed', models.IntegerField(default=0)),
+                ('current_steps_total', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('current_project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='curriculum.project')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to='curriculum.project')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to=settings.AUTH_USER_MODEL)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_summaries', to='curriculum.track')),
+            ],
+            options={
+                'verbose_name_plural': 'Student Progress Summaries',
+                'ordering': ['student', 'track', 'project'],
+                'indexes': [models.Index(fields=['student', 'track'], name='curriculum__student_d118d3_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('project__isnull', True)), fields=('student', 'track'), name='unique_track_progress_summary'), models.UniqueConstraint(condition=models.Q(('project__isnull', False)), fields=('student', 'project'), name='unique_project_progress_summary')],
+            },
+        ),
+    ]
@@ -158,6 +158,66 @@ class StudentProgress(models.Model):
         return f"{self.student.email} - {self.project.title}"
 
 
+class StudentProgressSummary(models.Model):
+    """
+    Denormalized progress counters, maintained by curriculum.summaries.
+    One row per (student, track) with project=None, plus one row per (student, project).
+    """
+    STATUS_CHOICES = [
+        ('NOT_STARTED', 'Not Started'),
+        ('IN_PROGRESS', 'In Progress'),
+        ('COMPLETED', 'All Projects Completed'),
+    ]
+    
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='progress_summaries')
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name='progress_summaries')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='progress_summaries')
+    
+    steps_completed = models.IntegerField(default=0)
+    steps_total = models.IntegerField(default=0)
+    progress_percentage = models.IntegerField(default=0)
+    is_approved = models.BooleanField(default=False)
+    
+    # Track-level rows only: where the student currently is
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NOT_STARTED')
+    current_project = models.ForeignKey(
+        Project,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    current_project_progress = models.IntegerField(default=0)
+    current_steps_completed = models.IntegerField(default=0)
+    current_steps_total = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['student', 'track', 'project']
+        verbose_name_plural = 'Student Progress Summaries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'track'],
+                condition=models.Q(project__isnull=True),
+                name='unique_track_progress_summary'
+            ),
+            models.UniqueConstraint(
+                fields=['student', 'project'],
+                condition=models.Q(project__isnull=False),
+                name='unique_project_progress_summary'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['student', 'track']),
+        ]
+    
+    def __str__(self):
+        if self.project_id:
+            return f"{self.student.email} - {self.project.title} ({self.progress_percentage}%)"
+        return f"{self.student.email} - {self.track.name} ({self.progress_percentage}%)"
+
+
 class Submission(models.Model):
     """Student submission for project deliverables"""
     STATUS_CHOICES = [
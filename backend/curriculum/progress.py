@@ -0,0 +1,114 @@
+"""
+Per-request student progress snapshot
+
+Loads everything the curriculum serializers need to know about one student's
+progress in a fixed number of queries, so rendering a whole track tree does
+not issue StudentProgress queries per project or per step.
+"""
+from collections import Counter
+
+from django.db.models import Count
+
+from .models import ProjectStep, StudentProgress
+from .unlocks import is_project_unlocked
+
+
+class ProgressSnapshot:
+    """
+    In-memory view of a student's StudentProgress rows and step totals
+
+    step_totals may be passed as (project_id, track_id, total) tuples, e.g. from
+    the cached catalog, to skip the step count query.
+    """
+
+    def __init__(self, user, step_totals=None):
+        self.user = user
+
+        # Query 1: every progress row for this student, with the project
+        # columns needed for unlock checks
+        rows = StudentProgress.objects.filter(student=user).select_related(
+            'project'
+        ).only(
+            'id', 'project_id', 'step_id', 'is_completed', 'is_approved',
+            'github_repo_url', 'github_repo_name', 'github_repo_created',
+            'project__id', 'project__track_id', 'project__number',
+        ).order_by('project_id', 'step_id')
+
+        self.completed_step_ids = set()
+        self.completed_steps_by_project = Counter()
+        self.completed_steps_by_track = Counter()
+        self.project_progress = {}
+        self.repo_progress = {}
+        self.approved_projects = set()
+
+        for row in rows:
+            if row.step_id is None:
+                self.project_progress[row.project_id] = row
+                if row.is_approved:
+                    self.approved_projects.add((row.project.track_id, row.project.number))
+            elif row.is_completed:
+                self.completed_step_ids.add(row.step_id)
+                self.completed_steps_by_project[row.project_id] += 1
+                self.completed_steps_by_track[row.project.track_id] += 1
+
+            # Project-level row wins over step rows, matching the repo record
+            if row.github_repo_created:
+                current = self.repo_progress.get(row.project_id)
+                if current is None or (row.step_id is None and current.step_id is not None):
+                    self.repo_progress[row.project_id] = row
+
+        # Query 2: step totals per project
+        if step_totals is None:
+            step_totals = ProjectStep.objects.values_list('project_id', 'project__track_id').annotate(
+                total=Count('id')
+            ).order_by()
+
+        self.total_steps_by_project = Counter()
+        self.total_steps_by_track = Counter()
+        for project_id, track_id, total in step_totals:
+            self.total_steps_by_project[project_id] += total
+            self.total_steps_by_track[track_id] += total
+
+    @staticmethod
+    def _percentage(completed, total):
+        if total == 0:
+            return 0
+        return int((completed / total) * 100)
+
+    def is_step_completed(self, step):
+        return step.id in self.completed_step_ids
+
+    def project_percentage(self, project):
+        return self._percentage(
+            self.completed_steps_by_project[project.id],
+            self.total_steps_by_project[project.id]
+        )
+
+    def track_percentage(self, track):
+        return self._percentage(
+            self.completed_steps_by_track[track.id],
+            self.total_steps_by_track[track.id]
+        )
+
+    def is_project_unlocked(self, project):
+        return is_project_unlocked(project, self.project_progress, self.approved_projects)
+
+    def get_repo_progress(self, project):
+        return self.repo_progress.get(project.id)
+
+
+def get_progress_snapshot(context):
+    """
+    Return the ProgressSnapshot for the serializer context's user, building it
+    on first use. Nested serializers share the root context, so the snapshot is
+    loaded once per response.
+    """
+    request = context.get('request')
+    if not request or not request.user.is_authenticated:
+        return None
+
+    snapshot = context.get('progress_snapshot')
+    if snapshot is None or snapshot.user.pk != request.user.pk:
+        snapshot = ProgressSnapshot(request.user)
+        context['progress_snapshot'] = snapshot
+    return snapshot
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Track, Project, ProjectStep, Deliverable, StudentProgress, Submission
+from .progress import get_progress_snapshot
 
 
 class DeliverableSerializer(serializers.ModelSerializer):
@@ -17,13 +18,9 @@ class ProjectStepSerializer(serializers.ModelSerializer):
                   'resources', 'order', 'is_completed']
     
     def get_is_completed(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return StudentProgress.objects.filter(
-                student=request.user,
-                step=obj,
-                is_completed=True
-            ).exists()
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            return snapshot.is_step_completed(obj)
         return False
 
 
@@ -44,91 +41,35 @@ class ProjectSerializer(serializers.ModelSerializer):
                   'github_repo_name', 'github_repo_created']
     
     def get_progress_percentage(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            total_steps = obj.steps.count()
-            if total_steps == 0:
-                return 0
-            completed_steps = StudentProgress.objects.filter(
-                student=request.user,
-                project=obj,
-                step__isnull=False,
-                is_completed=True
-            ).count()
-            return int((completed_steps / total_steps) * 100)
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            return snapshot.project_percentage(obj)
         return 0
     
     def get_is_unlocked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            # Check if student has progress record for this project (means it's unlocked)
-            has_progress = StudentProgress.objects.filter(
-                student=request.user,
-                project=obj,
-                step=None  # Project-level progress
-            ).exists()
-            
-            if has_progress:
-                return True
-            
-            # For Project 1, auto-unlock for all students (regardless of payment status)
-            if obj.number == 1:
-                # Auto-create progress for all authenticated students
-                from django.utils import timezone
-                StudentProgress.objects.get_or_create(
-                    student=request.user,
-                    project=obj,
-                    step=None,
-                    defaults={'started_at': timezone.now()}
-                )
-                return True
-            
-            # Check if previous project is approved
-            previous_project = Project.objects.filter(
-                track=obj.track,
-                number=obj.number - 1
-            ).first()
-            
-            if previous_project:
-                previous_progress = StudentProgress.objects.filter(
-                    student=request.user,
-                    project=previous_project,
-                    step=None,
-                    is_approved=True
-                ).exists()
-                return previous_progress
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            return snapshot.is_project_unlocked(obj)
         return False
     
     def get_github_repo_url(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            progress = StudentProgress.objects.filter(
-                student=request.user,
-                project=obj,
-                github_repo_created=True
-            ).first()
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            progress = snapshot.get_repo_progress(obj)
             return progress.github_repo_url if progress else None
         return None
     
     def get_github_repo_name(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            progress = StudentProgress.objects.filter(
-                student=request.user,
-                project=obj,
-                github_repo_created=True
-            ).first()
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            progress = snapshot.get_repo_progress(obj)
             return progress.github_repo_name if progress else None
         return None
     
     def get_github_repo_created(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return StudentProgress.objects.filter(
-                student=request.user,
-                project=obj,
-                github_repo_created=True
-            ).exists()
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            return snapshot.get_repo_progress(obj) is not None
         return False
 
 
@@ -142,18 +83,9 @@ class TrackSerializer(serializers.ModelSerializer):
                   'projects', 'overall_progress']
     
     def get_overall_progress(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            total_steps = ProjectStep.objects.filter(project__track=obj).count()
-            if total_steps == 0:
-                return 0
-            completed_steps = StudentProgress.objects.filter(
-                student=request.user,
-                project__track=obj,
-                step__isnull=False,
-                is_completed=True
-            ).count()
-            return int((completed_steps / total_steps) * 100)
+        snapshot = get_progress_snapshot(self.context)
+        if snapshot:
+            return snapshot.track_percentage(obj)
         return 0
 
 
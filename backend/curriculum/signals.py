@@ -1,9 +1,9 @@
 """
 Django signals for curriculum events
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Submission, StudentProgress
+from .models import Track, Project, ProjectStep, Deliverable, Submission, StudentProgress
 
 
 @receiver(post_save, sender=Submission)
@@ -44,3 +44,47 @@ def project_start_notification(sender, instance, created, **kwargs):
                 instance.project,
                 instance.github_repo_url
             )
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectStep)
+@receiver(post_save, sender=Deliverable)
+@receiver(post_delete, sender=Track)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ProjectStep)
+@receiver(post_delete, sender=Deliverable)
+def invalidate_curriculum_catalog(sender, instance, **kwargs):
+    """
+    Invalidate the cached curriculum catalog when any catalog model changes
+    """
+    from .catalog import bump_catalog_version
+    
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def rebuild_summaries_for_project(sender, instance, created=True, **kwargs):
+    """
+    Rebuild the track's progress summaries when a project is added or removed
+    """
+    from .summaries import schedule_track_rebuild
+    
+    # post_delete sends no created flag; edits to an existing project leave totals alone
+    if created:
+        schedule_track_rebuild(Track.objects.filter(pk=instance.track_id).values_list('code', flat=True).first())
+
+
+@receiver(post_save, sender=ProjectStep)
+@receiver(post_delete, sender=ProjectStep)
+def rebuild_summaries_for_step(sender, instance, created=True, **kwargs):
+    """
+    Rebuild the track's progress summaries when a step is added or removed
+    """
+    from .summaries import schedule_track_rebuild
+    
+    if created:
+        schedule_track_rebuild(
+            Track.objects.filter(projects=instance.project_id).values_list('code', flat=True).first()
+        )
@@ -0,0 +1,258 @@
+"""
+Maintenance of the denormalized StudentProgressSummary table
+
+Write paths that change a student's step completion or approvals call
+refresh_student_summaries() inside their transaction. Adding or removing a
+project or step changes the totals of every student in its track, so the
+catalog signals call schedule_track_rebuild(), which queues one
+'curriculum.rebuild_summaries' job per track for a burst of edits. The
+rebuild_progress_summaries management command rebuilds every row in bulk.
+"""
+import logging
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+
+from .models import Track, Project, StudentProgress, StudentProgressSummary
+
+logger = logging.getLogger(__name__)
+
+REBUILD_JOB = 'curriculum.rebuild_summaries'
+# Catalog edits usually come in bursts (a project and its steps); wait for the rest
+REBUILD_DELAY = timedelta(seconds=30)
+
+
+def _percentage(completed, total):
+    if total == 0:
+        return 0
+    return int((completed / total) * 100)
+
+
+def compute_current_project(projects, completed_by_project):
+    """
+    Work out where a student is in a track from per-project completed counts
+
+    The current project is the latest unlocked project that the student has
+    started and not finished. A project is unlocked when it is Project 1 or
+    when every step of the previous project is complete.
+
+    Args:
+        projects: projects of one track ordered by number, annotated with total_steps
+        completed_by_project: {project_id: completed_steps}
+
+    Returns:
+        dict: status, project, progress, steps_completed, steps_total
+    """
+    current = None
+    has_started_any_project = False
+    completed_by_number = {}
+    totals_by_number = {}
+
+    for project in projects:
+        completed_by_number[project.number] = completed_by_project.get(project.id, 0)
+        totals_by_number[project.number] = project.total_steps
+
+    for project in projects:
+        total_steps = project.total_steps
+        if total_steps == 0:
+            continue
+
+        completed_steps = completed_by_number[project.number]
+        progress_pct = _percentage(completed_steps, total_steps)
+
+        if progress_pct > 0:
+            has_started_any_project = True
+
+        if project.number == 1:
+            is_unlocked = True
+        else:
+            prev_total = totals_by_number.get(project.number - 1, 0)
+            is_unlocked = prev_total > 0 and completed_by_number[project.number - 1] == prev_total
+
+        if is_unlocked and 0 < progress_pct < 100:
+            current = {
+                'status': 'IN_PROGRESS',
+                'project': project,
+                'progress': progress_pct,
+                'steps_completed': completed_steps,
+                'steps_total': total_steps,
+            }
+
+    if not has_started_any_project:
+        return {'status': 'NOT_STARTED', 'project': None, 'progress': 0, 'steps_completed': 0, 'steps_total': 0}
+    if current:
+        return current
+    return {'status': 'COMPLETED', 'project': None, 'progress': 100, 'steps_completed': 0, 'steps_total': 0}
+
+
+def load_track_projects(track_codes):
+    """
+    Load tracks and their projects with step totals
+
+    Returns:
+        dict: {track_code: (track, [project, ...])} with projects ordered by number
+    """
+    tracks = Track.objects.filter(code__in=track_codes).prefetch_related(
+        Prefetch(
+            'projects',
+            queryset=Project.objects.annotate(total_steps=Count('steps')).order_by('number')
+        )
+    )
+    return {track.code: (track, list(track.projects.all())) for track in tracks}
+
+
+def build_summary_rows(student_id, track, projects, completed_by_project, approved_project_ids):
+    """
+    Build (unsaved) summary rows for one student in one track
+
+    Returns:
+        list: track-level row followed by one row per project
+    """
+    rows = []
+    for project in projects:
+        completed = completed_by_project.get(project.id, 0)
+        rows.append(StudentProgressSummary(
+            student_id=student_id,
+            track=track,
+            project=project,
+            steps_completed=completed,
+            steps_total=project.total_steps,
+            progress_percentage=_percentage(completed, project.total_steps),
+            is_approved=project.id in approved_project_ids,
+        ))
+
+    steps_completed = sum(row.steps_completed for row in rows)
+    steps_total = sum(row.steps_total for row in rows)
+    current = compute_current_project(projects, completed_by_project)
+
+    track_row = StudentProgressSummary(
+        student_id=student_id,
+        track=track,
+        project=None,
+        steps_completed=steps_completed,
+        steps_total=steps_total,
+        progress_percentage=_percentage(steps_completed, steps_total),
+        is_approved=bool(projects) and all(row.is_approved for row in rows),
+        status=current['status'],
+        current_project=current['project'],
+        current_project_progress=current['progress'],
+        current_steps_completed=current['steps_completed'],
+        current_steps_total=current['steps_total'],
+    )
+    return [track_row] + rows
+
+
+def _load_progress_counts(student_ids):
+    """
+    Completed-step counts and approvals for many students in two queries
+
+    Returns:
+        tuple: ({student_id: {project_id: completed}}, {student_id: {project_id, ...}})
+    """
+    completed = {}
+    counts = StudentProgress.objects.filter(
+        student_id__in=student_ids,
+        step__isnull=False,
+        is_completed=True
+    ).values('student_id', 'project_id').annotate(total=Count('id')).order_by()
+    for row in counts:
+        completed.setdefault(row['student_id'], {})[row['project_id']] = row['total']
+
+    approved = {}
+    approvals = StudentProgress.objects.filter(
+        student_id__in=student_ids,
+        step=None,
+        is_approved=True
+    ).values_list('student_id', 'project_id')
+    for student_id, project_id in approvals:
+        approved.setdefault(student_id, set()).add(project_id)
+
+    return completed, approved
+
+
+def refresh_student_summaries(student):
+    """
+    Recompute a student's summary rows for their track
+
+    Locks the student row so concurrent refreshes for the same student are
+    serialized. Call from inside the transaction that changed the progress.
+    """
+    if not student.track:
+        return
+
+    User = get_user_model()
+
+    with transaction.atomic():
+        User.objects.select_for_update().filter(pk=student.pk).first()
+
+        tracks = load_track_projects([student.track])
+        if student.track not in tracks:
+            return
+        track, projects = tracks[student.track]
+
+        completed, approved = _load_progress_counts([student.pk])
+        rows = build_summary_rows(
+            student.pk, track, projects,
+            completed.get(student.pk, {}), approved.get(student.pk, set())
+        )
+
+        StudentProgressSummary.objects.filter(student=student).delete()
+        StudentProgressSummary.objects.bulk_create(rows)
+
+
+def rebuild_summaries(students, batch_size=500):
+    """
+    Rebuild summary rows for many students, a few queries per batch
+
+    Args:
+        students: queryset of students
+        batch_size: rows per INSERT
+
+    Returns:
+        int: Number of summary rows written
+    """
+    track_by_student = dict(students.exclude(track='').values_list('id', 'track'))
+    tracks = load_track_projects(set(track_by_student.values()))
+
+    rows = []
+    student_ids = [student_id for student_id, code in track_by_student.items() if code in tracks]
+    for offset in range(0, len(student_ids), batch_size):
+        chunk = student_ids[offset:offset + batch_size]
+        completed, approved = _load_progress_counts(chunk)
+        for student_id in chunk:
+            track, projects = tracks[track_by_student[student_id]]
+            rows.extend(build_summary_rows(
+                student_id, track, projects,
+                completed.get(student_id, {}), approved.get(student_id, set())
+            ))
+
+    with transaction.atomic():
+        StudentProgressSummary.objects.filter(student__in=students).delete()
+        StudentProgressSummary.objects.bulk_create(rows, batch_size=batch_size)
+
+    logger.info(f"Rebuilt {len(rows)} progress summary rows for {len(student_ids)} students")
+    return len(rows)
+
+
+def schedule_track_rebuild(track_code):
+    """
+    Queue a summary rebuild for every student of a track, once the current transaction commits
+
+    A pending rebuild of the same track is reused, so a burst of catalog edits
+    rebuilds once.
+    """
+    if not track_code:
+        return
+
+    def schedule():
+        if Job.objects.filter(name=REBUILD_JOB, status='PENDING', payload__track=track_code).exists():
+            return
+        enqueue(REBUILD_JOB, {'track': track_code}, run_at=timezone.now() + REBUILD_DELAY)
+
+    transaction.on_commit(schedule)
@@ -0,0 +1,186 @@
+"""
+Background jobs for GitHub webhook events
+
+github_webhook verifies the signature and enqueues pull_request payloads;
+they are applied here by the job worker (python manage.py run_jobs).
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.queue import job
+from utils.slack import notify_pr_created, notify_pr_merged
+
+from .models import StudentProgress
+from .summaries import rebuild_summaries, refresh_student_summaries
+
+logger = logging.getLogger(__name__)
+
+
+@job('curriculum.github_pull_request')
+def process_pull_request_event(payload):
+    """
+    Apply a GitHub pull_request event to the student's progress
+    
+    Args:
+        payload: webhook JSON as delivered by GitHub
+    
+    Returns:
+        dict: Summary of what was processed (logged by the worker)
+    """
+    result = _handle_pull_request(payload)
+    logger.info(f"GitHub pull_request event processed: {result}")
+    return result
+
+
+@job('curriculum.rebuild_summaries')
+def rebuild_track_summaries(payload):
+    """Rebuild the progress summaries of every student in a track after a catalog change"""
+    from django.contrib.auth import get_user_model
+
+    students = get_user_model().objects.filter(role='student', track=payload['track'])
+    return {'rows': rebuild_summaries(students)}
+
+
+def _handle_pull_request(payload):
+    action = payload.get('action')
+    pr_data = payload.get('pull_request', {})
+    repo_data = payload.get('repository', {})
+    
+    # Extract PR details
+    pr_url = pr_data.get('html_url')
+    pr_number = pr_data.get('number')
+    pr_state = pr_data.get('state')
+    pr_merged = pr_data.get('merged', False)
+    repo_full_name = repo_data.get('full_name', '')
+    
+    # Find matching StudentProgress
+    # Repo name format: username/repo-name
+    if '/' in repo_full_name:
+        repo_name = repo_full_name.split('/')[1]
+        
+        progress = StudentProgress.objects.filter(
+            github_repo_name=repo_name,
+            github_repo_created=True
+        ).first()
+        
+        if not progress:
+            return {
+                'message': 'Repository not found in system',
+                'repo': repo_name
+            }
+        
+        student = progress.student
+        project = progress.project
+        
+        # Handle different PR actions
+        if action == 'opened':
+            # PR created
+            progress.github_pr_url = pr_url
+            progress.github_pr_number = pr_number
+            progress.save()
+            
+            # 🤖 AUTO-CREATE SUBMISSION
+            from .models import Submission, Deliverable
+            
+            # Find the first deliverable for this project
+            deliverable = Deliverable.objects.filter(project=project).first()
+            
+            if deliverable:
+                # Check if submission already exists for this PR
+                existing_submission = Submission.objects.filter(
+                    student=student,
+                    deliverable=deliverable,
+                    github_pr_number=pr_number
+                ).first()
+                
+                if not existing_submission:
+                    # Create new submission automatically
+                    submission = Submission.objects.create(
+                        student=student,
+                        deliverable=deliverable,
+                        github_pr_url=pr_url,
+                        github_pr_number=pr_number,
+                        auto_created=True,
+                        status='PENDING',
+                        submission_text=f"Auto-submitted from PR #{pr_number}: {pr_data.get('title', '')}"
+                    )
+                    
+                    # Send Slack notification
+                    notify_pr_created(student, project, pr_url)
+                    
+                    return {
+                        'message': 'PR opened and submission created automatically',
+                        'student': student.get_full_name(),
+                        'project': project.title,
+                        'submission_id': submission.id,
+                        'pr_number': pr_number
+                    }
+            
+            # Fallback if no deliverable found
+            notify_pr_created(student, project, pr_url)
+            
+            return {
+                'message': 'PR opened event processed',
+                'student': student.get_full_name(),
+                'project': project.title
+            }
+        
+        elif action == 'closed' and pr_merged:
+            # PR merged - progress, approval, unlock and summaries change together
+            with transaction.atomic():
+                progress.github_pr_merged = True
+                progress.is_completed = True
+                progress.completed_at = timezone.now()
+                progress.save()
+            
+                # Auto-approve submission if exists
+                from .models import Submission
+                submission = Submission.objects.filter(
+                    student=student,
+                    deliverable__project=project,
+                    status='PENDING'
+                ).first()
+            
+                if submission:
+                    submission.status = 'APPROVED'
+                    submission.feedback = 'Automatically approved - PR merged to main branch'
+                    submission.reviewed_by = student.assigned_trainer
+                    submission.reviewed_at = timezone.now()
+                    submission.save()
+            
+                # Unlock next project
+                next_project = project.__class__.objects.filter(
+                    track=project.track,
+                    number=project.number + 1,
+                    is_active=True
+                ).first()
+            
+                if next_project:
+                    # Create progress entry for next project to unlock it
+                    StudentProgress.objects.get_or_create(
+                        student=student,
+                        project=next_project,
+                        step=None
+                    )
+                
+                refresh_student_summaries(student)
+            
+            # Send Slack notification
+            notify_pr_merged(student, project)
+            
+            return {
+                'message': 'PR merged event processed',
+                'student': student.name,
+                'project': project.title,
+                'submission_approved': submission is not None,
+                'next_project_unlocked': next_project is not None
+            }
+        
+        else:
+            return {
+                'message': f'PR action {action} received but not processed'
+            }
+    
+    return {'message': 'Webhook received'}
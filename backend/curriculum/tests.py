@@ -1,3 +1,335 @@
+from io import StringIO
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.core.cache import cache
+from django.core.management import call_command
+from .models import Track, Project, ProjectStep, Deliverable, StudentProgress, StudentProgressSummary
+from .unlocks import get_unlock_states, unlock_first_project
 
-# Create your tests here.
+User = get_user_model()
+
+
+def build_track(code='DP', projects=3, steps=4):
+    """Create a track with the given number of projects and steps per project"""
+    track = Track.objects.create(code=code, name=f'{code} Track', description='Test track')
+    for number in range(1, projects + 1):
+        project = Project.objects.create(
+            track=track,
+            number=number,
+            title=f'Project {number}',
+            description='Test project',
+            order=number
+        )
+        Deliverable.objects.create(
+            project=project,
+            title='Repository',
+            deliverable_type='GITHUB'
+        )
+        for step_number in range(1, steps + 1):
+            ProjectStep.objects.create(
+                project=project,
+                step_number=step_number,
+                title=f'Step {step_number}',
+                description='Test step',
+                order=step_number
+            )
+    return track
+
+
+class TrackProgressSerializationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.student = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='testpass123',
+            role='student',
+            track='DP'
+        )
+        self.client.force_authenticate(user=self.student)
+
+    def _complete_steps(self, project, count):
+        for step in project.steps.all()[:count]:
+            StudentProgress.objects.create(
+                student=self.student,
+                project=project,
+                step=step,
+                is_completed=True
+            )
+
+    def test_track_progress_fields(self):
+        """Test progress, unlock and repo fields are computed from the snapshot"""
+        track = build_track(projects=3, steps=4)
+        project1 = track.projects.get(number=1)
+        project2 = track.projects.get(number=2)
+        StudentProgress.objects.create(
+            student=self.student,
+            project=project1,
+            step=None,
+            is_approved=True,
+            github_repo_created=True,
+            github_repo_name='dp-project-1',
+            github_repo_url='https://github.com/test/dp-project-1'
+        )
+        self._complete_steps(project1, 4)
+        self._complete_steps(project2, 2)
+
+        response = self.client.get('/api/curriculum/tracks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        track_data = response.data[0]
+        self.assertEqual(track_data['overall_progress'], 50)
+
+        projects = {p['number']: p for p in track_data['projects']}
+        self.assertEqual(projects[1]['progress_percentage'], 100)
+        self.assertEqual(projects[2]['progress_percentage'], 50)
+        self.assertTrue(projects[1]['is_unlocked'])
+        self.assertTrue(projects[2]['is_unlocked'])
+        self.assertFalse(projects[3]['is_unlocked'])
+        self.assertTrue(projects[1]['github_repo_created'])
+        self.assertEqual(projects[1]['github_repo_name'], 'dp-project-1')
+        self.assertIsNone(projects[2]['github_repo_url'])
+
+        completed = [s['is_completed'] for s in projects[2]['steps']]
+        self.assertEqual(completed, [True, True, False, False])
+
+    def test_track_list_query_count_is_constant(self):
+        """Test the track tree renders in the same number of queries at any size"""
+        small = build_track(code='DP', projects=1, steps=1)
+        self._complete_steps(small.projects.get(), 1)
+
+        # Cold catalog: ETag, index, tracks, projects, steps, deliverables, progress rows
+        with self.assertNumQueries(7):
+            self.client.get('/api/curriculum/tracks/')
+
+        large = build_track(code='FSD', projects=6, steps=8)
+        for project in large.projects.all():
+            self._complete_steps(project, 3)
+
+        with self.assertNumQueries(7):
+            self.client.get('/api/curriculum/tracks/')
+
+        # Warm catalog: only the ETag aggregate and the student's progress rows
+        with self.assertNumQueries(2):
+            self.client.get('/api/curriculum/tracks/')
+
+    def test_only_my_progress_prefetches_the_track_tree(self):
+        """Test cached list/retrieve do not set up a prefetch they never use"""
+        from .views import TrackViewSet
+
+        view = TrackViewSet()
+        view.action = 'list'
+        self.assertEqual(view.get_queryset()._prefetch_related_lookups, ())
+        view.action = 'my_progress'
+        self.assertIn('projects__steps', view.get_queryset()._prefetch_related_lookups)
+
+        track = build_track(projects=1, steps=2)
+        self._complete_steps(track.projects.get(), 1)
+        response = self.client.get(f'/api/curriculum/tracks/{track.id}/my_progress/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_catalog_edits_invalidate_cache(self):
+        """Test saving a catalog model is reflected on the next request"""
+        track = build_track(projects=1, steps=1)
+        self.client.get('/api/curriculum/tracks/')
+
+        project = track.projects.get()
+        project.title = 'Renamed Project'
+        project.save()
+        ProjectStep.objects.create(
+            project=project, step_number=2, title='Step 2', description='Test step'
+        )
+
+        response = self.client.get(f'/api/curriculum/projects/{project.id}/')
+        self.assertEqual(response.data['title'], 'Renamed Project')
+        self.assertEqual(len(response.data['steps']), 2)
+
+        response = self.client.get('/api/curriculum/projects/', {'track': 'FSD'})
+        self.assertEqual(response.data, [])
+
+    def test_conditional_get(self):
+        """Test unchanged progress returns 304 and a progress change busts the ETag"""
+        track = build_track(projects=1, steps=2)
+
+        response = self.client.get('/api/curriculum/tracks/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/curriculum/tracks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self._complete_steps(track.projects.get(), 1)
+        response = self.client.get('/api/curriculum/tracks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.get(
+            f'/api/curriculum/tracks/{track.id}/my_progress/',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class UnlockEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.track = build_track(projects=3, steps=2)
+        self.student = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='testpass123',
+            role='student',
+            track='DP'
+        )
+
+    def test_track_list_is_read_only(self):
+        """Test listing tracks never creates progress rows"""
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/curriculum/tracks/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data[0]['projects'][0]['is_unlocked'])
+        self.assertFalse(StudentProgress.objects.filter(student=self.student).exists())
+
+    def test_unlock_states_follow_approvals(self):
+        """Test Project 1 is always open and later projects open after approval"""
+        project1 = self.track.projects.get(number=1)
+        project2 = self.track.projects.get(number=2)
+        project3 = self.track.projects.get(number=3)
+
+        states = get_unlock_states(self.student, self.track)
+        self.assertEqual(states, {project1.id: True, project2.id: False, project3.id: False})
+
+        progress = unlock_first_project(self.student)
+        progress.is_approved = True
+        progress.save()
+
+        states = get_unlock_states(self.student, self.track)
+        self.assertTrue(states[project2.id])
+        self.assertFalse(states[project3.id])
+        self.assertEqual(
+            StudentProgress.objects.filter(student=self.student, step__isnull=False).count(),
+            2
+        )
+
+    def test_backfill_command(self):
+        """Test the backfill command creates one Project 1 row per student"""
+        User.objects.create_user(
+            email='student2@test.com',
+            username='student2',
+            password='testpass123',
+            role='student',
+            track='DP'
+        )
+        unlock_first_project(self.student, include_steps=False)
+
+        out = StringIO()
+        call_command('backfill_project_unlocks', stdout=out)
+        call_command('backfill_project_unlocks', stdout=out)
+
+        project1 = self.track.projects.get(number=1)
+        self.assertEqual(
+            StudentProgress.objects.filter(project=project1, step=None).count(),
+            2
+        )
+
+
+class ProgressSummaryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.track = build_track(projects=2, steps=2)
+        self.student = User.objects.create_user(
+            email='student@test.com',
+            username='student',
+            password='testpass123',
+            role='student',
+            track='DP'
+        )
+        self.client.force_authenticate(user=self.student)
+
+    def _track_summary(self):
+        return StudentProgressSummary.objects.get(student=self.student, project=None)
+
+    def test_mark_step_updates_summary(self):
+        """Test marking steps complete and incomplete keeps the summary in sync"""
+        project1 = self.track.projects.get(number=1)
+        step = project1.steps.first()
+
+        response = self.client.post(
+            '/api/curriculum/progress/mark_step_complete/',
+            {'step_id': step.id, 'project_id': project1.id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        summary = self._track_summary()
+        self.assertEqual(summary.steps_completed, 1)
+        self.assertEqual(summary.steps_total, 4)
+        self.assertEqual(summary.progress_percentage, 25)
+        self.assertEqual(summary.status, 'IN_PROGRESS')
+        self.assertEqual(summary.current_project, project1)
+        project_summary = StudentProgressSummary.objects.get(student=self.student, project=project1)
+        self.assertEqual(project_summary.progress_percentage, 50)
+
+        self.client.post(
+            '/api/curriculum/progress/mark_step_incomplete/',
+            {'step_id': step.id, 'project_id': project1.id},
+            format='json'
+        )
+        summary = self._track_summary()
+        self.assertEqual(summary.steps_completed, 0)
+        self.assertEqual(summary.status, 'NOT_STARTED')
+
+    def test_catalog_changes_rebuild_track_summaries(self):
+        """Test adding or removing steps queues one rebuild of the track's summaries"""
+        from jobs.models import Job
+        from jobs.queue import get_handler
+
+        project1 = self.track.projects.get(number=1)
+        self.client.post(
+            '/api/curriculum/progress/mark_step_complete/',
+            {'step_id': project1.steps.first().id, 'project_id': project1.id},
+            format='json'
+        )
+        self.assertEqual(self._track_summary().steps_total, 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for step_number in (3, 4):
+                ProjectStep.objects.create(
+                    project=project1, step_number=step_number, title=f'Step {step_number}', description='Test'
+                )
+        job = Job.objects.get(name='curriculum.rebuild_summaries')
+        self.assertEqual(job.payload, {'track': 'DP'})
+        get_handler(job.name)(job.payload)
+
+        summary = self._track_summary()
+        self.assertEqual((summary.steps_completed, summary.steps_total), (1, 6))
+        self.assertEqual(StudentProgressSummary.objects.get(student=self.student, project=project1).steps_total, 4)
+
+        job.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track.projects.get(number=2).delete()
+        job = Job.objects.get(name='curriculum.rebuild_summaries')
+        get_handler(job.name)(job.payload)
+        self.assertEqual(self._track_summary().steps_total, 4)
+        self.assertEqual(StudentProgressSummary.objects.filter(student=self.student).count(), 2)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command writes one track row and one row per project"""
+        project2 = self.track.projects.get(number=2)
+        for step in project2.steps.all():
+            StudentProgress.objects.create(
+                student=self.student, project=project2, step=step, is_completed=True
+            )
+
+        call_command('rebuild_progress_summaries', stdout=StringIO())
+
+        self.assertEqual(StudentProgressSummary.objects.filter(student=self.student).count(), 3)
+        summary = self._track_summary()
+        self.assertEqual(summary.steps_completed, 2)
+        self.assertEqual(summary.status, 'COMPLETED')
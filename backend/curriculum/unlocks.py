@@ -0,0 +1,176 @@
+"""
+Project unlock engine
+
+Lock state is derived purely from project-level StudentProgress rows
+(step=None), so read endpoints never need to write. Project 1 unlock records
+are materialized once, at enrollment time or by the
+backfill_project_unlocks management command.
+
+Rules:
+- A project with a project-level progress row is unlocked
+- Project 1 of every track is always unlocked
+- Any other project is unlocked once the previous project is approved
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Project, StudentProgress
+
+logger = logging.getLogger(__name__)
+
+
+def is_project_unlocked(project, unlocked_project_ids, approved_projects):
+    """
+    Evaluate a single project's lock state in memory
+
+    Args:
+        project: Project instance
+        unlocked_project_ids: set of project ids with a project-level progress row
+        approved_projects: set of (track_id, number) pairs the student has had approved
+
+    Returns:
+        bool: True if the project is unlocked
+    """
+    if project.id in unlocked_project_ids:
+        return True
+    if project.number == 1:
+        return True
+    return (project.track_id, project.number - 1) in approved_projects
+
+
+def get_unlock_states(student, track, projects=None):
+    """
+    Compute lock state for every project in a track
+
+    Args:
+        student: CustomUser instance
+        track: Track instance
+        projects: optional pre-fetched projects of the track
+
+    Returns:
+        dict: {project_id: bool}
+    """
+    if projects is None:
+        projects = list(track.projects.all())
+
+    unlocked_project_ids = set()
+    approved_projects = set()
+    rows = StudentProgress.objects.filter(
+        student=student,
+        project__track=track,
+        step=None
+    ).values('project_id', 'project__number', 'is_approved')
+
+    for row in rows:
+        unlocked_project_ids.add(row['project_id'])
+        if row['is_approved']:
+            approved_projects.add((track.id, row['project__number']))
+
+    return {
+        project.id: is_project_unlocked(project, unlocked_project_ids, approved_projects)
+        for project in projects
+    }
+
+
+def unlock_first_project(student, include_steps=True):
+    """
+    Materialize the Project 1 progress records for a newly enrolled student
+
+    Args:
+        student: CustomUser instance with track set
+        include_steps: also create (incomplete) step-level progress rows
+
+    Returns:
+        StudentProgress: Project-level progress row, or None if the track has no Project 1
+    """
+    if not student.track:
+        return None
+
+    first_project = Project.objects.filter(
+        track__code=student.track,
+        number=1
+    ).first()
+
+    if not first_project:
+        logger.warning(f"No Project 1 found for track {student.track}")
+        return None
+
+    with transaction.atomic():
+        progress, _ = StudentProgress.objects.get_or_create(
+            student=student,
+            project=first_project,
+            step=None,
+            defaults={'started_at': timezone.now()}
+        )
+
+        if include_steps:
+            existing_step_ids = set(
+                StudentProgress.objects.filter(
+                    student=student,
+                    project=first_project,
+                    step__isnull=False
+                ).values_list('step_id', flat=True)
+            )
+            StudentProgress.objects.bulk_create([
+                StudentProgress(student=student, project=first_project, step=step)
+                for step in first_project.steps.all()
+                if step.id not in existing_step_ids
+            ], ignore_conflicts=True)
+
+    logger.info(f"Unlocked Project 1 for user {student.email}")
+    return progress
+
+
+def backfill_first_project_unlocks(students, batch_size=500, include_steps=False):
+    """
+    Bulk-create missing Project 1 progress rows
+
+    Args:
+        students: queryset of students with track set
+        batch_size: rows per INSERT
+        include_steps: also create the (incomplete) step-level rows, as
+            unlock_first_project does at enrollment
+
+    Returns:
+        int: Number of project-level progress rows created
+    """
+    first_projects = {
+        project.track.code: project
+        for project in Project.objects.filter(number=1).select_related('track').prefetch_related('steps')
+    }
+
+    already_unlocked = set(
+        StudentProgress.objects.filter(
+            student__in=students,
+            project__in=first_projects.values(),
+            step=None
+        ).values_list('student_id', 'project_id')
+    )
+
+    now = timezone.now()
+    rows = []
+    step_rows = []
+    for student_id, track_code in students.values_list('id', 'track'):
+        project = first_projects.get((track_code or '').upper())
+        if not project:
+            continue
+        if (student_id, project.id) not in already_unlocked:
+            rows.append(StudentProgress(
+                student_id=student_id,
+                project=project,
+                step=None,
+                started_at=now
+            ))
+        if include_steps:
+            step_rows.extend(
+                StudentProgress(student_id=student_id, project=project, step=step)
+                for step in project.steps.all()
+            )
+
+    with transaction.atomic():
+        StudentProgress.objects.bulk_create(rows, batch_size=batch_size)
+        # Step rows are unique per (student, project, step), so existing ones are skipped
+        StudentProgress.objects.bulk_create(step_rows, batch_size=batch_size, ignore_conflicts=True)
+    return len(rows)
@@ -1,13 +1,25 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.utils import timezone
 from .models import Track, Project, ProjectStep, Deliverable, StudentProgress, Submission
 from .serializers import (
     TrackSerializer, ProjectSerializer, ProjectStepSerializer,
     DeliverableSerializer, StudentProgressSerializer, SubmissionSerializer
 )
+from .summaries import refresh_student_summaries
+from .catalog import get_tracks_with_progress, get_projects_with_progress
+from .etags import progress_etag, conditional_response
+
+
+def _parse_pk(pk):
+    try:
+        return int(pk)
+    except (TypeError, ValueError):
+        raise NotFound()
 
 
 class TrackViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,23 +30,55 @@ class TrackViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TrackSerializer
     permission_classes = [IsAuthenticated]
     
+    def get_queryset(self):
+        # list/retrieve are served from the catalog cache; only my_progress loads tracks here
+        queryset = super().get_queryset()
+        if self.action == 'my_progress':
+            queryset = queryset.prefetch_related('projects__steps', 'projects__deliverables')
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """Serve the cached catalog with the student's progress merged in"""
+        return conditional_response(
+            request,
+            progress_etag(request.user),
+            lambda: Response(get_tracks_with_progress(request.user))
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        track_id = _parse_pk(kwargs['pk'])
+        
+        def build_response():
+            tracks = get_tracks_with_progress(request.user, track_ids=[track_id])
+            if not tracks:
+                raise NotFound()
+            return Response(tracks[0])
+        
+        return conditional_response(request, progress_etag(request.user), build_response)
+    
     @action(detail=True, methods=['get'])
     def my_progress(self, request, pk=None):
         """Get student's progress for this track"""
         track = self.get_object()
-        progress = StudentProgress.objects.filter(
-            student=request.user,
-            project__track=track
-        ).select_related('project', 'step')
-        serializer = StudentProgressSerializer(progress, many=True)
-        return Response(serializer.data)
+        
+        def build_response():
+            progress = StudentProgress.objects.filter(
+                student=request.user,
+                project__track=track
+            ).select_related('project', 'step')
+            serializer = StudentProgressSerializer(progress, many=True)
+            return Response(serializer.data)
+        
+        return conditional_response(request, progress_etag(request.user), build_response)
 
 
 class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for viewing projects
     """
-    queryset = Project.objects.filter(is_active=True)
+    queryset = Project.objects.filter(is_active=True).prefetch_related(
+        'steps', 'deliverables'
+    )
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
     
@@ -45,6 +89,17 @@ class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(track__code=track_code)
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        """Serve the cached catalog with the student's progress merged in"""
+        track_code = request.query_params.get('track', None)
+        return Response(get_projects_with_progress(request.user, track_code=track_code))
+    
+    def retrieve(self, request, *args, **kwargs):
+        projects = get_projects_with_progress(request.user, project_id=_parse_pk(kwargs['pk']))
+        if not projects:
+            raise NotFound()
+        return Response(projects[0])
+    
     @action(detail=True, methods=['post'])
     def start_project(self, request, pk=None):
         """
@@ -84,8 +139,20 @@ class StudentProgressViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return StudentProgress.objects.filter(student=self.request.user)
     
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(student=self.request.user)
+        refresh_student_summaries(self.request.user)
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+        refresh_student_summaries(self.request.user)
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_student_summaries(self.request.user)
     
     @action(detail=False, methods=['post'])
     def mark_step_complete(self, request):
@@ -109,15 +176,17 @@ class StudentProgressViewSet(viewsets.ModelViewSet):
             )
         
         # Create or update progress
-        progress, created = StudentProgress.objects.update_or_create(
-            student=request.user,
-            project=project,
-            step=step,
-            defaults={
-                'is_completed': True,
-                'completed_at': timezone.now()
-            }
-        )
+        with transaction.atomic():
+            progress, created = StudentProgress.objects.update_or_create(
+                student=request.user,
+                project=project,
+                step=step,
+                defaults={
+                    'is_completed': True,
+                    'completed_at': timezone.now()
+                }
+            )
+            refresh_student_summaries(request.user)
         
         serializer = self.get_serializer(progress)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -142,7 +211,9 @@ class StudentProgressViewSet(viewsets.ModelViewSet):
             )
             progress.is_completed = False
             progress.completed_at = None
-            progress.save()
+            with transaction.atomic():
+                progress.save()
+                refresh_student_summaries(request.user)
             
             serializer = self.get_serializer(progress)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -217,6 +288,12 @@ def get_current_project(request):
     if user.role != 'student':
         return Response({'error': 'Only students can access this'}, status=status.HTTP_403_FORBIDDEN)
     
+    etag = progress_etag(user, ProjectSubmission.objects.filter(student=user))
+    return conditional_response(request, etag, lambda: _current_project_response(user))
+
+
+def _current_project_response(user):
+    """Build the get_current_project payload"""
     # Find current project (unlocked but not approved)
     current_progress = StudentProgress.objects.filter(
         student=user,
@@ -289,45 +366,48 @@ def approve_project_submission(request, submission_id):
     
     feedback = request.data.get('feedback', '')
     
-    # Update submission
-    submission.status = 'APPROVED'
-    submission.reviewed_at = timezone.now()
-    submission.reviewed_by = user
-    submission.trainer_feedback = feedback
-    submission.save()
-    
-    # Update progress
-    progress = StudentProgress.objects.get(
-        student=submission.student,
-        project=submission.project,
-        step=None
-    )
-    progress.is_approved = True
-    progress.approved_at = timezone.now()
-    progress.approved_by = user
-    progress.trainer_feedback = feedback
-    progress.needs_revision = False
-    progress.completed_at = timezone.now()
-    progress.is_completed = True
-    progress.save()
-    
-    # Unlock next project
-    next_project_number = submission.project.number + 1
-    next_project = Project.objects.filter(
-        track=submission.student.track,
-        number=next_project_number
-    ).first()
+    with transaction.atomic():
+        # Update submission
+        submission.status = 'APPROVED'
+        submission.reviewed_at = timezone.now()
+        submission.reviewed_by = user
+        submission.trainer_feedback = feedback
+        submission.save()
     
-    if next_project:
-        StudentProgress.objects.get_or_create(
+        # Update progress
+        progress = StudentProgress.objects.get(
             student=submission.student,
-            project=next_project,
-            step=None,
-            defaults={'started_at': timezone.now()}
+            project=submission.project,
+            step=None
         )
-        next_unlocked = True
-    else:
-        next_unlocked = False
+        progress.is_approved = True
+        progress.approved_at = timezone.now()
+        progress.approved_by = user
+        progress.trainer_feedback = feedback
+        progress.needs_revision = False
+        progress.completed_at = timezone.now()
+        progress.is_completed = True
+        progress.save()
+    
+        # Unlock next project
+        next_project_number = submission.project.number + 1
+        next_project = Project.objects.filter(
+            track=submission.student.track,
+            number=next_project_number
+        ).first()
+    
+        if next_project:
+            StudentProgress.objects.get_or_create(
+                student=submission.student,
+                project=next_project,
+                step=None,
+                defaults={'started_at': timezone.now()}
+            )
+            next_unlocked = True
+        else:
+            next_unlocked = False
+    
+        refresh_student_summaries(submission.student)
     
     return Response({
         'message': 'Project approved successfully',
@@ -0,0 +1,37 @@
+from django.contrib import admin, messages
+from .models import Job, DeadLetterJob
+from .worker import retry_jobs
+
+
+@admin.action(description='Retry selected jobs')
+def retry_selected_jobs(modeladmin, request, queryset):
+    count = retry_jobs(queryset)
+    modeladmin.message_user(request, f'{count} job(s) requeued', messages.SUCCESS)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'idempotency_key', 'locked_by']
+    readonly_fields = ['attempts', 'locked_at', 'locked_by', 'last_error', 'created_at', 'updated_at', 'completed_at']
+    date_hierarchy = 'created_at'
+    actions = [retry_selected_jobs]
+
+
+@admin.register(DeadLetterJob)
+class DeadLetterJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'attempts', 'idempotency_key', 'updated_at']
+    list_filter = ['name', 'updated_at']
+    search_fields = ['name', 'idempotency_key', 'last_error']
+    readonly_fields = [
+        'name', 'payload', 'idempotency_key', 'status', 'attempts', 'max_attempts', 'run_at',
+        'locked_at', 'locked_by', 'last_error', 'created_at', 'updated_at', 'completed_at'
+    ]
+    actions = [retry_selected_jobs]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(status='DEAD')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,15 @@
+"""
+Jobs App Configuration
+"""
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'Background Jobs'
+
+    def ready(self):
+        # Register @job handlers declared in each app's tasks.py
+        autodiscover_modules('tasks')
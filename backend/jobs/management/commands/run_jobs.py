@@ -0,0 +1,72 @@
+"""
+Django management command to run background job workers
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from jobs.worker import default_worker_id, release_stale_jobs, run_pending_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (webhook side effects, provisioning, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit instead of polling'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty (default: 2)'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='Exit after running this many jobs'
+        )
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        remaining = options['max_jobs']
+        total_succeeded = total_failed = 0
+
+        self.stdout.write(f'🚀 Job worker {worker_id} started')
+
+        try:
+            while remaining is None or remaining > 0:
+                # A long-running worker is not a request, so drop connections past
+                # CONN_MAX_AGE or broken by a database restart ourselves
+                close_old_connections()
+                try:
+                    release_stale_jobs()
+                    succeeded, failed = run_pending_jobs(worker_id, max_jobs=remaining)
+                except DatabaseError:
+                    logger.exception(f"Job worker {worker_id} lost the database, retrying")
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                total_succeeded += succeeded
+                total_failed += failed
+                if remaining is not None:
+                    remaining -= succeeded + failed
+
+                if options['once']:
+                    break
+                if not succeeded and not failed:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Succeeded: {total_succeeded}'))
+        if total_failed:
+            self.stdout.write(self.style.WARNING(f'⚠️  Failed: {total_failed}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,91 @@
+"""
+Job registration and enqueueing
+
+Handlers are plain functions taking the job payload (a JSON-serializable
+dict). Register them in an app's tasks.py so they are discovered at startup:
+
+    from jobs.queue import job
+
+    @job('payments.stripe_event')
+    def process_stripe_event(payload):
+        ...
+
+and enqueue work from request handlers with:
+
+    enqueue('payments.stripe_event', payload, idempotency_key=f"stripe:{event_id}")
+
+A handler signals failure by raising; the worker retries it with exponential
+backoff until max_attempts, then moves it to the dead-letter list in admin.
+Handlers may run more than once, so they must be safe to repeat.
+"""
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def job(name, max_attempts=None):
+    """
+    Register a function as the handler for a job name
+
+    Args:
+        name: unique job name, conventionally '<app>.<action>'
+        max_attempts: default attempt budget for jobs of this type
+    """
+    def decorator(func):
+        if name in _registry and _registry[name]['func'] is not func:
+            raise ValueError(f"Job handler already registered for {name}")
+        _registry[name] = {'func': func, 'max_attempts': max_attempts}
+        return func
+    return decorator
+
+
+def get_handler(name):
+    """Return the registered handler function for a job name, or None"""
+    entry = _registry.get(name)
+    return entry['func'] if entry else None
+
+
+def enqueue(name, payload=None, idempotency_key=None, run_at=None, max_attempts=None):
+    """
+    Persist a job for the workers to pick up
+
+    Args:
+        name: registered job name
+        payload: JSON-serializable dict passed to the handler
+        idempotency_key: optional unique key; repeats return the existing job
+        run_at: earliest time the job may run (default: now)
+        max_attempts: attempt budget (default: handler's, then JOBS_MAX_ATTEMPTS)
+
+    Returns:
+        tuple: (Job, created)
+    """
+    if name not in _registry:
+        raise LookupError(f"No job handler registered for {name}")
+
+    if max_attempts is None:
+        max_attempts = _registry[name]['max_attempts'] or settings.JOBS_MAX_ATTEMPTS
+
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'run_at': run_at or timezone.now(),
+        'max_attempts': max_attempts,
+    }
+
+    if idempotency_key:
+        queued_job, created = Job.objects.get_or_create(
+            idempotency_key=idempotency_key,
+            defaults=fields
+        )
+        if not created:
+            logger.info(f"Job {name} with key {idempotency_key} already queued as #{queued_job.pk}")
+        return queued_job, created
+
+    return Job.objects.create(**fields), True
@@ -0,0 +1,199 @@
+"""
+Tests for the background job queue
+"""
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from curriculum.models import Track, Project, StudentProgress
+from payments.models import Payment
+from .models import Job
+from .queue import enqueue, job
+from .worker import claim_next_job, release_stale_jobs, retry_jobs, run_pending_jobs
+
+calls = []
+
+
+@job('tests.record')
+def record(payload):
+    calls.append(payload)
+
+
+@job('tests.explode')
+def explode(payload):
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_RETRY_BASE_DELAY=10, JOBS_RETRY_MAX_DELAY=60)
+class JobQueueTests(TestCase):
+    """Enqueueing, retries and dead-lettering"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_with_idempotency_key_is_deduplicated(self):
+        first, created = enqueue('tests.record', {'n': 1}, idempotency_key='same')
+        second, created_again = enqueue('tests.record', {'n': 2}, idempotency_key='same')
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_enqueue_unknown_job_raises(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+    def test_worker_runs_due_jobs_only(self):
+        enqueue('tests.record', {'n': 1})
+        enqueue('tests.record', {'n': 2}, run_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(run_pending_jobs('test-worker'), (1, 0))
+        self.assertEqual(calls, [{'n': 1}])
+        self.assertEqual(Job.objects.filter(status='SUCCEEDED').count(), 1)
+        self.assertEqual(Job.objects.filter(status='PENDING').count(), 1)
+
+    def test_failed_job_is_retried_with_backoff(self):
+        queued, _ = enqueue('tests.explode', max_attempts=3)
+
+        self.assertEqual(run_pending_jobs('test-worker'), (0, 1))
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'PENDING')
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('boom', queued.last_error)
+        delay = (queued.run_at - timezone.now()).total_seconds()
+        self.assertTrue(0 < delay <= 10)
+
+        # Not due yet, so the next poll leaves it alone
+        self.assertEqual(run_pending_jobs('test-worker'), (0, 0))
+
+    def test_job_moves_to_dead_letter_after_max_attempts(self):
+        queued, _ = enqueue('tests.explode', max_attempts=2)
+
+        for _ in range(2):
+            Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+            run_pending_jobs('test-worker')
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'DEAD')
+        self.assertEqual(queued.attempts, 2)
+
+        self.assertEqual(retry_jobs(Job.objects.filter(pk=queued.pk)), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'PENDING')
+        self.assertEqual(queued.attempts, 0)
+
+    def test_stale_running_job_is_released(self):
+        queued, _ = enqueue('tests.record', {'n': 1})
+        claimed = claim_next_job('crashed-worker')
+        self.assertEqual(claimed.pk, queued.pk)
+        self.assertIsNone(claim_next_job('other-worker'))
+
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(release_stale_jobs(lock_timeout=60), 1)
+
+        self.assertEqual(run_pending_jobs('other-worker'), (1, 0))
+        self.assertEqual(calls, [{'n': 1}])
+
+    def test_worker_command_survives_database_errors(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import OperationalError
+
+        with patch('jobs.management.commands.run_jobs.run_pending_jobs',
+                   side_effect=[OperationalError('server closed the connection'), (1, 0)]) as run, \
+                patch('jobs.management.commands.run_jobs.close_old_connections') as close, \
+                patch('jobs.management.commands.run_jobs.time.sleep'), \
+                self.assertLogs('jobs.management.commands.run_jobs', 'ERROR'):
+            call_command('run_jobs', '--max-jobs', '1', stdout=StringIO())
+
+        self.assertEqual(run.call_count, 2)
+        self.assertEqual(close.call_count, 2)
+
+
+class WebhookEnqueueTests(TestCase):
+    """Webhooks persist and enqueue instead of doing the work inline"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _stripe_event(self, event_id='evt_1', intent_id='pi_123'):
+        return {
+            'id': event_id,
+            'object': 'event',
+            'type': 'payment_intent.payment_failed',
+            'data': {'object': {'id': intent_id, 'object': 'payment_intent', 'metadata': {}}},
+        }
+
+    def _post_stripe(self, event):
+        body = json.dumps(event)
+        with patch('payments.views.StripeService.verify_webhook_signature', return_value=event):
+            return self.client.post('/api/payments/webhook/', body, content_type='application/json')
+
+    @patch('utils.email.send_payment_failed_email')
+    def test_stripe_webhook_enqueues_once_per_event(self, mock_email):
+        payment = Payment.objects.create(
+            customer_email='buyer@example.com',
+            stripe_payment_intent='pi_123',
+            amount=100,
+            track='DP'
+        )
+        event = self._stripe_event()
+
+        self.assertEqual(self._post_stripe(event).status_code, 200)
+        self.assertEqual(self._post_stripe(event).status_code, 200)
+
+        self.assertEqual(Job.objects.filter(name='payments.stripe_event').count(), 1)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'CREATED')
+
+        run_pending_jobs('test-worker')
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'FAILED')
+        mock_email.assert_called_once()
+
+    def test_stripe_webhook_rejects_bad_signature(self):
+        response = self.client.post('/api/payments/webhook/', '{}', content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+    @patch('curriculum.tasks.notify_pr_merged')
+    def test_github_webhook_processes_merge_in_worker(self, mock_notify):
+        student = CustomUser.objects.create_user(
+            email='student@example.com', username='student', password='pass', role='student', track='DP'
+        )
+        track = Track.objects.create(code='DP', name='Data Professional')
+        project = Project.objects.create(track=track, number=1, title='P1', description='d')
+        progress = StudentProgress.objects.create(
+            student=student, project=project, github_repo_name='p1-repo', github_repo_created=True
+        )
+        payload = {
+            'action': 'closed',
+            'pull_request': {'html_url': 'https://github.com/s/p1-repo/pull/1', 'number': 1, 'merged': True},
+            'repository': {'full_name': 'student/p1-repo'},
+        }
+
+        for _ in range(2):
+            response = self.client.post(
+                '/api/curriculum/webhooks/github/', json.dumps(payload), content_type='application/json',
+                HTTP_X_GITHUB_EVENT='pull_request', HTTP_X_GITHUB_DELIVERY='delivery-1'
+            )
+            self.assertEqual(response.status_code, 202)
+
+        self.assertEqual(Job.objects.count(), 1)
+        progress.refresh_from_db()
+        self.assertFalse(progress.github_pr_merged)
+
+        run_pending_jobs('test-worker')
+
+        progress.refresh_from_db()
+        self.assertTrue(progress.github_pr_merged)
+        mock_notify.assert_called_once()
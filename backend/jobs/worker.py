@@ -0,0 +1,189 @@
+"""
+Database-backed job worker
+
+Workers claim one due job at a time with SELECT ... FOR UPDATE SKIP LOCKED,
+so any number of run_jobs processes can share the queue without handing the
+same job to two of them. The handler runs outside the claiming transaction.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .queue import get_handler
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def retry_delay(attempts):
+    """
+    Backoff before the next attempt: exponential, capped, with jitter
+
+    Args:
+        attempts: attempts made so far (>= 1)
+
+    Returns:
+        timedelta
+    """
+    delay = min(
+        settings.JOBS_RETRY_MAX_DELAY,
+        settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    )
+    # Spread retries of jobs that failed together (e.g. during an outage)
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+
+def claim_next_job(worker_id):
+    """
+    Lock the next due job and mark it RUNNING
+
+    Returns:
+        Job: the claimed job, or None if nothing is due
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        next_job = Job.objects.select_for_update(skip_locked=True).filter(
+            status='PENDING',
+            run_at__lte=now
+        ).order_by('run_at', 'id').first()
+
+        if not next_job:
+            return None
+
+        Job.objects.filter(pk=next_job.pk).update(
+            status='RUNNING',
+            attempts=F('attempts') + 1,
+            locked_at=now,
+            locked_by=worker_id,
+            updated_at=now,
+        )
+
+    next_job.refresh_from_db()
+    return next_job
+
+
+def _record_failure(failed_job, error):
+    now = timezone.now()
+    update = {
+        'locked_at': None,
+        'locked_by': '',
+        'last_error': error[-10000:],
+        'updated_at': now,
+    }
+
+    if failed_job.attempts >= failed_job.max_attempts:
+        update['status'] = 'DEAD'
+        logger.error(f"Job {failed_job} failed {failed_job.attempts} times, moved to dead-letter list")
+    else:
+        update['status'] = 'PENDING'
+        update['run_at'] = now + retry_delay(failed_job.attempts)
+        logger.warning(f"Job {failed_job} failed (attempt {failed_job.attempts}), retrying at {update['run_at']}")
+
+    Job.objects.filter(pk=failed_job.pk).update(**update)
+
+
+def run_job(claimed_job):
+    """
+    Run a claimed job's handler and record the outcome
+
+    Returns:
+        bool: True if the handler succeeded
+    """
+    handler = get_handler(claimed_job.name)
+    if handler is None:
+        _record_failure(claimed_job, f"No job handler registered for {claimed_job.name}")
+        return False
+
+    try:
+        handler(claimed_job.payload)
+    except Exception:
+        _record_failure(claimed_job, traceback.format_exc())
+        return False
+
+    now = timezone.now()
+    Job.objects.filter(pk=claimed_job.pk).update(
+        status='SUCCEEDED',
+        completed_at=now,
+        locked_at=None,
+        locked_by='',
+        last_error='',
+        updated_at=now,
+    )
+    logger.info(f"Job {claimed_job.name} #{claimed_job.pk} succeeded")
+    return True
+
+
+def release_stale_jobs(lock_timeout=None):
+    """
+    Requeue RUNNING jobs whose worker died mid-run
+
+    Args:
+        lock_timeout: seconds after which a RUNNING job counts as abandoned
+
+    Returns:
+        int: Number of jobs released
+    """
+    if lock_timeout is None:
+        lock_timeout = settings.JOBS_LOCK_TIMEOUT
+
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', locked_at__lt=now - timedelta(seconds=lock_timeout))
+    error = 'Worker stopped responding while running this job'
+
+    dead = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='DEAD', locked_at=None, locked_by='', last_error=error, updated_at=now
+    )
+    requeued = stale.update(
+        status='PENDING', run_at=now, locked_at=None, locked_by='', last_error=error, updated_at=now
+    )
+
+    if dead or requeued:
+        logger.warning(f"Released {requeued} stale jobs, {dead} moved to dead-letter list")
+    return dead + requeued
+
+
+def run_pending_jobs(worker_id=None, max_jobs=None):
+    """
+    Run due jobs until the queue is empty or max_jobs have run
+
+    Returns:
+        tuple: (succeeded, failed)
+    """
+    worker_id = worker_id or default_worker_id()
+    succeeded = failed = 0
+
+    while max_jobs is None or succeeded + failed < max_jobs:
+        claimed_job = claim_next_job(worker_id)
+        if not claimed_job:
+            break
+        if run_job(claimed_job):
+            succeeded += 1
+        else:
+            failed += 1
+
+    return succeeded, failed
+
+
+def retry_jobs(queryset):
+    """
+    Put jobs (typically dead-letter ones) back on the queue with a fresh attempt budget
+
+    Returns:
+        int: Number of jobs requeued
+    """
+    now = timezone.now()
+    return queryset.exclude(status='RUNNING').update(
+        status='PENDING', attempts=0, run_at=now, completed_at=None, updated_at=now
+    )
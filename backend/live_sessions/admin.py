@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Session, SessionAttendance
+from .models import Session, SessionAttendance, SessionNotificationDelivery
 
 
 @admin.register(Session)
@@ -65,3 +65,12 @@ class SessionAttendanceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(SessionNotificationDelivery)
+class SessionNotificationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'session', 'action_type', 'status', 'created_at']
+    list_filter = ['action_type', 'notification__status', 'created_at']
+    search_fields = ['student__name', 'student__email', 'session__title']
+    readonly_fields = ['session', 'student', 'action_type', 'notification', 'created_at']
+    list_select_related = ['student', 'session', 'notification']
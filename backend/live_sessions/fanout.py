@@ -0,0 +1,58 @@
+"""
+Session notification fan-out
+
+notify_session_students() renders the session email once, then queues one
+copy per enrolled student in the notification outbox and records a
+SessionNotificationDelivery for each, with two bulk inserts. The request
+returns straight away; the job worker sends the copies over a single SMTP
+connection (see notifications.dispatcher), and each delivery's status follows
+its outbox notification.
+"""
+import logging
+
+from django.db import transaction
+
+from notifications.outbox import email_payload, queue_notifications
+from utils.email import render_session_notification_email
+
+from .models import SessionNotificationDelivery
+
+logger = logging.getLogger(__name__)
+
+
+def notify_session_students(session, action_type):
+    """
+    Queue the session notification email for every enrolled student
+
+    Args:
+        session: Session instance
+        action_type: 'created', 'updated', 'cancelled'
+
+    Returns:
+        int: Number of emails queued
+    """
+    students = [
+        student for student in session.students.only('id', 'email', 'name', 'username')
+        if student.email
+    ]
+    if not students:
+        return 0
+
+    subject, body_for = render_session_notification_email(session, action_type)
+
+    with transaction.atomic():
+        notifications = queue_notifications('email', [
+            email_payload(subject, body_for(student), [student.email]) for student in students
+        ])
+        SessionNotificationDelivery.objects.bulk_create([
+            SessionNotificationDelivery(
+                session=session,
+                student=student,
+                action_type=action_type,
+                notification=notification
+            )
+            for student, notification in zip(students, notifications)
+        ])
+
+    logger.info(f"Queued {len(students)} '{action_type}' emails for session {session.pk}")
+    return len(students)
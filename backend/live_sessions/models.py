@@ -143,3 +143,57 @@ class SessionAttendance(models.Model):
             delta = self.left_at - self.joined_at
             return int(delta.total_seconds() / 60)
         return 0
+
+
+class SessionNotificationDelivery(models.Model):
+    """One student's copy of a session notification email, sent through the notification outbox"""
+    
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    # Delivery status derived from the outbox notification's status
+    DELIVERY_STATUS = {
+        'PENDING': 'QUEUED',
+        'SENDING': 'QUEUED',
+        'SENT': 'SENT',
+        'DEAD': 'FAILED',
+    }
+    
+    session = models.ForeignKey(
+        Session,
+        on_delete=models.CASCADE,
+        related_name='notification_deliveries'
+    )
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='session_notification_deliveries'
+    )
+    action_type = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    notification = models.OneToOneField(
+        'notifications.Notification',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='session_delivery'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['session', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.action_type} notice for {self.session.title} to {self.student.username}"
+    
+    @property
+    def status(self):
+        """QUEUED, SENT or FAILED"""
+        if not self.notification:
+            return 'FAILED'
+        return self.DELIVERY_STATUS[self.notification.status]
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Session, SessionAttendance
+from .models import Session, SessionAttendance, SessionNotificationDelivery
 from accounts.serializers import UserSerializer
 
 
@@ -73,6 +73,22 @@ class SessionAttendanceSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
+class SessionNotificationDeliverySerializer(serializers.ModelSerializer):
+    """A student's copy of a session notification and whether it was delivered"""
+    student_name = serializers.CharField(source='student.name', read_only=True)
+    student_email = serializers.CharField(source='student.email', read_only=True)
+    status = serializers.CharField(read_only=True)
+    error = serializers.CharField(source='notification.last_error', read_only=True, default='')
+    sent_at = serializers.DateTimeField(source='notification.sent_at', read_only=True, default=None)
+    
+    class Meta:
+        model = SessionNotificationDelivery
+        fields = [
+            'id', 'student', 'student_name', 'student_email', 'action_type',
+            'status', 'error', 'sent_at', 'created_at'
+        ]
+
+
 class SessionListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for listing sessions"""
     trainer_name = serializers.CharField(source='trainer.name', read_only=True)
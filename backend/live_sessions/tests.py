@@ -1,3 +1,61 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core import mail
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from notifications.dispatcher import dispatch_pending
+from notifications.models import Notification
+from utils.email import render_session_notification_email
+from .models import SessionNotificationDelivery
+
+
+class SessionNotificationFanOutTests(TestCase):
+    """Session emails are rendered once, queued per student and sent in the background"""
+
+    def setUp(self):
+        self.trainer = CustomUser.objects.create(
+            username='trainer', email='trainer@example.com', name='Trainer', role='trainer'
+        )
+        self.students = [
+            CustomUser.objects.create(
+                username=f'student{i}', email=f'student{i}@example.com', name=f'Student {i}', role='student'
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def test_create_queues_one_email_per_student_and_records_delivery(self):
+        with patch(
+            'live_sessions.fanout.render_session_notification_email', wraps=render_session_notification_email
+        ) as render, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/sessions/', {
+                'title': 'SQL window functions',
+                'scheduled_at': (timezone.now() + timedelta(days=1)).isoformat(),
+                'student_ids': [student.id for student in self.students],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(render.call_count, 1)
+        # Nothing is sent while handling the request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Notification.objects.filter(channel='email', status='PENDING').count(), 3)
+        self.assertEqual(SessionNotificationDelivery.objects.filter(action_type='created').count(), 3)
+
+        with patch('notifications.dispatcher.get_connection', wraps=mail.get_connection) as get_connection:
+            dispatch_pending()
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [s.email for s in self.students])
+        self.assertIn('Dear Student 0,', next(m.body for m in mail.outbox if m.to == ['student0@example.com']))
+
+        session_id = response.data['id']
+        status_response = self.client.get(f'/api/sessions/{session_id}/notification_status/')
+        self.assertEqual(status_response.data['summary'], {'QUEUED': 0, 'SENT': 3, 'FAILED': 0})
 
-# Create your tests here.
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(f'/api/sessions/{session_id}/notification_status/').status_code, 403)
@@ -10,7 +10,8 @@ from .models import Session, SessionAttendance
 from .serializers import (
     SessionSerializer,
     SessionListSerializer,
-    SessionAttendanceSerializer
+    SessionAttendanceSerializer,
+    SessionNotificationDeliverySerializer
 )
 from .google_meet import GoogleMeetService
 import logging
@@ -272,15 +273,40 @@ class SessionViewSet(viewsets.ModelViewSet):
         serializer = SessionListSerializer(queryset, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def notification_status(self, request, pk=None):
+        """Delivery status of the session's notification emails (for trainers)"""
+        session = self.get_object()
+        
+        if request.user.role == 'student':
+            return Response(
+                {'error': 'Only trainers can view notification status'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        deliveries = session.notification_deliveries.select_related('student', 'notification')
+        action_type = request.query_params.get('action_type')
+        if action_type:
+            deliveries = deliveries.filter(action_type=action_type)
+        
+        serializer = SessionNotificationDeliverySerializer(deliveries, many=True)
+        summary = {'QUEUED': 0, 'SENT': 0, 'FAILED': 0}
+        for delivery in serializer.data:
+            summary[delivery['status']] += 1
+        
+        return Response({
+            'summary': summary,
+            'deliveries': serializer.data
+        })
+    
     def _send_session_notifications(self, session, action_type):
-        """Send email and Discord notifications for session"""
+        """Queue email and Discord notifications for session"""
         try:
-            from utils.email import send_session_notification_email
             from utils.discord import send_discord_notification
+            from .fanout import notify_session_students
             
-            # Send email to students
-            for student in session.students.all():
-                send_session_notification_email(student, session, action_type)
+            # Emails are rendered once and sent by the job worker
+            queued = notify_session_students(session, action_type)
             
             # Send Discord notification
             color_map = {
@@ -295,7 +321,7 @@ class SessionViewSet(viewsets.ModelViewSet):
                 fields=[
                     {"name": "Trainer", "value": session.trainer.name, "inline": True},
                     {"name": "Date", "value": session.scheduled_at.strftime('%Y-%m-%d %H:%M'), "inline": True},
-                    {"name": "Students", "value": str(session.students.count()), "inline": True},
+                    {"name": "Students", "value": str(queued), "inline": True},
                 ],
                 color=color_map.get(action_type, 0x3b82f6)
             )
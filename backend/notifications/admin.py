@@ -0,0 +1,24 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+from .models import Notification
+from .outbox import schedule_dispatch
+
+
+@admin.action(description='Retry selected notifications')
+def retry_selected_notifications(modeladmin, request, queryset):
+    count = queryset.exclude(status='SENDING').update(
+        status='PENDING', attempts=0, next_attempt_at=timezone.now(), sent_at=None
+    )
+    if count:
+        schedule_dispatch(timezone.now())
+    modeladmin.message_user(request, f'{count} notification(s) requeued', messages.SUCCESS)
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'channel', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['channel', 'status', 'created_at']
+    search_fields = ['idempotency_key', 'last_error']
+    readonly_fields = ['idempotency_key', 'attempts', 'locked_at', 'last_error', 'created_at', 'sent_at']
+    date_hierarchy = 'created_at'
+    actions = [retry_selected_notifications]
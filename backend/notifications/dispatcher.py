@@ -0,0 +1,310 @@
+"""
+Notification dispatcher
+
+dispatch_pending() runs in the job worker. It claims due notifications with
+SELECT ... FOR UPDATE SKIP LOCKED (so several workers never send the same
+row), then per channel:
+
+- Slack and Discord: consecutive notifications are merged into as few webhook
+  posts as the APIs allow (50 blocks per Slack message; 10 embeds and 2000
+  characters of content per Discord message), sent over one pooled
+  requests.Session.
+- Email: every message goes over a single SMTP connection.
+
+A 429 reschedules the rest of that channel's notifications after the
+retry_after the API asked for, without using up an attempt. When a response
+says the rate-limit bucket is empty (X-RateLimit-Remaining: 0), the dispatcher
+waits X-RateLimit-Reset-After before the next post, or reschedules if that is
+longer than NOTIFICATIONS_MAX_RATE_LIMIT_WAIT. Other failures are retried with
+the job queue's backoff until NOTIFICATIONS_MAX_ATTEMPTS; 4xx responses are
+not retried.
+"""
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from jobs.worker import retry_delay
+
+from .models import Notification
+from .outbox import schedule_dispatch
+
+logger = logging.getLogger(__name__)
+
+SLACK_MAX_BLOCKS = 50
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_CONTENT = 2000
+
+_session = None
+
+
+def get_session():
+    """Shared HTTP session, so webhook posts reuse TLS connections"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _session = session
+    return _session
+
+
+def _slack_blocks(payload):
+    return payload.get('blocks') or [
+        {'type': 'section', 'text': {'type': 'mrkdwn', 'text': payload.get('text', '')}}
+    ]
+
+
+def slack_message(notifications):
+    """One Slack webhook payload for consecutive notifications"""
+    if len(notifications) == 1:
+        return notifications[0].payload
+
+    blocks = []
+    for notification in notifications:
+        if blocks:
+            blocks.append({'type': 'divider'})
+        blocks.extend(_slack_blocks(notification.payload))
+    return {
+        'text': '\n'.join(n.payload.get('text', '') for n in notifications),
+        'blocks': blocks,
+    }
+
+
+def discord_message(notifications):
+    """One Discord webhook payload for consecutive notifications"""
+    if len(notifications) == 1:
+        return notifications[0].payload
+
+    return {
+        'content': '\n'.join(n.payload['content'] for n in notifications if n.payload.get('content')),
+        'embeds': [embed for n in notifications for embed in n.payload.get('embeds') or []],
+    }
+
+
+WEBHOOK_CHANNELS = {
+    'slack': {
+        'url': lambda: settings.SLACK_WEBHOOK_URL if settings.SLACK_ENABLED else '',
+        'message': slack_message,
+        'fits': lambda message: len(message.get('blocks') or []) <= SLACK_MAX_BLOCKS,
+    },
+    'discord': {
+        'url': lambda: getattr(settings, 'DISCORD_WEBHOOK_URL', ''),
+        'message': discord_message,
+        'fits': lambda message: (
+            len(message.get('embeds') or []) <= DISCORD_MAX_EMBEDS
+            and len(message.get('content') or '') <= DISCORD_MAX_CONTENT
+        ),
+    },
+}
+
+
+def coalesce(notifications, message, fits):
+    """Split notifications into runs that each fit in one message"""
+    batches = []
+    for notification in notifications:
+        if batches and fits(message(batches[-1] + [notification])):
+            batches[-1].append(notification)
+        else:
+            batches.append([notification])
+    return batches
+
+
+def _retry_after(response):
+    """Seconds a 429 response asks us to wait (Discord puts it in the body, Slack in a header)"""
+    try:
+        return float(response.json()['retry_after'])
+    except (ValueError, TypeError, KeyError):
+        pass
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _bucket_wait(response):
+    """Seconds until the rate-limit bucket refills, when this response emptied it"""
+    if response.headers.get('X-RateLimit-Remaining') != '0':
+        return 0
+    try:
+        return float(response.headers.get('X-RateLimit-Reset-After', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _mark_sent(notifications, results):
+    now = timezone.now()
+    Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+        status='SENT', sent_at=now, locked_at=None, last_error=''
+    )
+    results['sent'] += len(notifications)
+
+
+def _mark_deferred(notifications, seconds, results):
+    Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+        status='PENDING', next_attempt_at=timezone.now() + timedelta(seconds=seconds), locked_at=None
+    )
+    results['deferred'] += len(notifications)
+
+
+def _mark_failed(notifications, error, results, permanent=False):
+    now = timezone.now()
+    for notification in notifications:
+        attempts = notification.attempts + 1
+        update = {'attempts': attempts, 'locked_at': None, 'last_error': error[-10000:]}
+        if permanent or attempts >= settings.NOTIFICATIONS_MAX_ATTEMPTS:
+            update['status'] = 'DEAD'
+            results['dead'] += 1
+        else:
+            update['status'] = 'PENDING'
+            update['next_attempt_at'] = now + retry_delay(attempts)
+            results['retrying'] += 1
+        Notification.objects.filter(id=notification.id).update(**update)
+    logger.warning(f"Failed to send {len(notifications)} {notifications[0].channel} notification(s): {error[:200]}")
+
+
+def send_webhook(channel, notifications, results):
+    """Post notifications to a Slack or Discord webhook, merged into as few messages as possible"""
+    spec = WEBHOOK_CHANNELS[channel]
+    url = spec['url']()
+    if not url:
+        _mark_failed(notifications, f"{channel} webhook not configured", results, permanent=True)
+        return
+
+    batches = coalesce(notifications, spec['message'], spec['fits'])
+    for i, batch in enumerate(batches):
+        rest = [n for later in batches[i + 1:] for n in later]
+        try:
+            response = get_session().post(
+                url, json=spec['message'](batch), timeout=settings.NOTIFICATIONS_HTTP_TIMEOUT
+            )
+        except requests.RequestException as e:
+            _mark_failed(batch, str(e), results)
+            continue
+
+        if response.status_code == 429:
+            wait = _retry_after(response)
+            logger.warning(f"{channel} rate limited, retrying {len(batch) + len(rest)} notification(s) in {wait}s")
+            _mark_deferred(batch + rest, wait, results)
+            return
+        if response.status_code >= 400:
+            _mark_failed(
+                batch, f"HTTP {response.status_code}: {response.text[:500]}", results,
+                permanent=response.status_code < 500
+            )
+            continue
+
+        _mark_sent(batch, results)
+
+        wait = _bucket_wait(response)
+        if wait and rest:
+            if wait > settings.NOTIFICATIONS_MAX_RATE_LIMIT_WAIT:
+                _mark_deferred(rest, wait, results)
+                return
+            time.sleep(wait)
+
+
+def _email_message(payload, connection):
+    message = EmailMultiAlternatives(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=payload.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+        to=payload['to'],
+        connection=connection
+    )
+    if payload.get('html'):
+        message.attach_alternative(payload['html'], 'text/html')
+    return message
+
+
+def send_emails(notifications, results):
+    """Send emails over one SMTP connection, recording each message's outcome"""
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        _mark_failed(notifications, f"SMTP connection failed: {e}", results)
+        return
+
+    sent = []
+    try:
+        for notification in notifications:
+            try:
+                connection.send_messages([_email_message(notification.payload, connection)])
+            except Exception as e:
+                _mark_failed([notification], str(e), results)
+            else:
+                sent.append(notification)
+    finally:
+        connection.close()
+        _mark_sent(sent, results)
+
+
+def release_stale_notifications(lock_timeout=None):
+    """Return SENDING notifications whose worker died to the queue"""
+    if lock_timeout is None:
+        lock_timeout = settings.JOBS_LOCK_TIMEOUT
+    return Notification.objects.filter(
+        status='SENDING', locked_at__lt=timezone.now() - timedelta(seconds=lock_timeout)
+    ).update(status='PENDING', locked_at=None)
+
+
+def claim_notifications(limit):
+    """Mark up to limit due notifications SENDING and return them, oldest first"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        Notification.objects.filter(id__in=ids).update(status='SENDING', locked_at=now)
+    return list(Notification.objects.filter(id__in=ids).order_by('id'))
+
+
+def dispatch_pending(limit=None):
+    """
+    Send due notifications and schedule the next dispatch for whatever is left
+
+    Returns:
+        dict: counts of sent, retrying, deferred (rate limited) and dead notifications
+    """
+    release_stale_notifications()
+    notifications = claim_notifications(limit or settings.NOTIFICATIONS_BATCH_SIZE)
+    results = Counter(sent=0, retrying=0, deferred=0, dead=0)
+
+    by_channel = {}
+    for notification in notifications:
+        by_channel.setdefault(notification.channel, []).append(notification)
+
+    for channel, channel_notifications in by_channel.items():
+        try:
+            if channel == 'email':
+                send_emails(channel_notifications, results)
+            else:
+                send_webhook(channel, channel_notifications, results)
+        except Exception as e:
+            logger.exception(f"Dispatching {channel} notifications failed")
+            still_claimed = list(Notification.objects.filter(
+                id__in=[n.id for n in channel_notifications], status='SENDING'
+            ))
+            if still_claimed:
+                _mark_failed(still_claimed, str(e), results)
+
+    next_due = Notification.objects.filter(status='PENDING').aggregate(next_due=Min('next_attempt_at'))['next_due']
+    if next_due:
+        schedule_dispatch(max(next_due, timezone.now()))
+
+    if notifications:
+        logger.info(f"Dispatched {len(notifications)} notification(s): {dict(results)}")
+    return dict(results)
@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Notification(models.Model):
+    """An outgoing Slack, Discord or email message waiting in the outbox"""
+    CHANNEL_CHOICES = [
+        ('slack', 'Slack'),
+        ('discord', 'Discord'),
+        ('email', 'Email'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('DEAD', 'Dead'),
+    ]
+
+    channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES)
+    # slack: {text, blocks}; discord: {content, embeds}; email: {subject, body, html, to, from_email}
+    payload = models.JSONField(default=dict)
+    # Optional unique key; queueing the same key again returns the existing notification
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['channel', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} notification #{self.pk} ({self.status})"
@@ -0,0 +1,103 @@
+"""
+Notification outbox
+
+Request handlers and signals never talk to Slack, Discord or SMTP directly.
+They write a Notification row (in their own transaction, so a rolled-back
+change sends nothing):
+
+    queue_notification('discord', {'content': ..., 'embeds': [...]})
+    queue_email(subject, body, [user.email], html=html_message)
+
+Work that may run more than once (a retried job, a replayed webhook) passes
+an idempotency_key, so the message is only queued the first time.
+
+and, once that transaction commits, a 'notifications.dispatch' job is
+scheduled NOTIFICATIONS_BATCH_WINDOW seconds out. The job worker then sends
+everything that piled up in the meantime in as few requests as possible; see
+notifications.dispatcher.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import enqueue
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_JOB = 'notifications.dispatch'
+
+
+def schedule_dispatch(run_at=None):
+    """
+    Make sure a dispatch job will run at or before run_at
+
+    A burst of notifications shares one pending job. Two processes may both
+    enqueue one; the second finds nothing left to send.
+    """
+    run_at = run_at or timezone.now() + timedelta(seconds=settings.NOTIFICATIONS_BATCH_WINDOW)
+    if Job.objects.filter(name=DISPATCH_JOB, status='PENDING', run_at__lte=run_at).exists():
+        return
+    enqueue(DISPATCH_JOB, run_at=run_at)
+
+
+def queue_notification(channel, payload, idempotency_key=None):
+    """
+    Add a notification to the outbox
+
+    Args:
+        channel: 'slack', 'discord' or 'email'
+        payload: channel message (see Notification.payload)
+        idempotency_key: optional unique key; repeats return the existing notification
+
+    Returns:
+        Notification
+    """
+    if idempotency_key:
+        notification, created = Notification.objects.get_or_create(
+            idempotency_key=idempotency_key,
+            defaults={'channel': channel, 'payload': payload}
+        )
+        if not created:
+            logger.info(f"Notification with key {idempotency_key} already queued as #{notification.pk}")
+            return notification
+    else:
+        notification = Notification.objects.create(channel=channel, payload=payload)
+    transaction.on_commit(schedule_dispatch)
+    return notification
+
+
+def queue_notifications(channel, payloads):
+    """
+    Add many notifications for one channel to the outbox in a single insert
+
+    Returns:
+        list of Notification, in the order of payloads
+    """
+    notifications = Notification.objects.bulk_create([
+        Notification(channel=channel, payload=payload) for payload in payloads
+    ])
+    if notifications:
+        transaction.on_commit(schedule_dispatch)
+    return notifications
+
+
+def email_payload(subject, body, to, html=None, from_email=None):
+    """Outbox payload for an email (plain text, optionally with an HTML alternative)"""
+    return {
+        'subject': subject,
+        'body': body,
+        'html': html,
+        'to': list(to),
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+    }
+
+
+def queue_email(subject, body, to, html=None, from_email=None, idempotency_key=None):
+    """Add an email to the outbox"""
+    return queue_notification('email', email_payload(subject, body, to, html, from_email), idempotency_key)
@@ -0,0 +1,17 @@
+"""
+Background jobs for the notification outbox
+"""
+from jobs.queue import job
+
+from .dispatcher import dispatch_pending
+
+
+@job('notifications.dispatch')
+def dispatch_notifications(payload):
+    """
+    Send the notifications queued since the last dispatch
+
+    Args:
+        payload: unused; scheduled by notifications.outbox.schedule_dispatch
+    """
+    dispatch_pending()
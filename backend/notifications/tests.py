@@ -0,0 +1,115 @@
+"""
+Tests for the notification outbox and dispatcher
+"""
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from .dispatcher import dispatch_pending
+from .models import Notification
+from .outbox import queue_email, queue_notification
+
+
+def webhook_response(status_code=204, body=None, headers=None):
+    response = MagicMock(status_code=status_code, headers=headers or {}, text='')
+    response.json.return_value = body or {}
+    return response
+
+
+@override_settings(
+    DISCORD_WEBHOOK_URL='https://discord.example/webhook',
+    SLACK_WEBHOOK_URL='https://slack.example/webhook',
+    SLACK_ENABLED=True,
+    NOTIFICATIONS_MAX_ATTEMPTS=2,
+    JOBS_RETRY_BASE_DELAY=10,
+    JOBS_RETRY_MAX_DELAY=60,
+)
+class NotificationDispatchTests(TestCase):
+    """Queueing, coalescing, rate limits and retries"""
+
+    def test_helpers_queue_instead_of_posting(self):
+        from utils.discord import send_discord_notification
+        from utils.slack import send_slack_notification
+
+        with patch('notifications.dispatcher.get_session') as get_session, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(send_slack_notification('hello'))
+            self.assertTrue(send_discord_notification(title='📅 Session Created', fields=[], color=1))
+
+        get_session.assert_not_called()
+        discord = Notification.objects.get(channel='discord')
+        self.assertEqual(discord.payload, {'embeds': [{'title': '📅 Session Created', 'fields': [], 'color': 1}]})
+        # One dispatch job for the burst, a batch window out
+        dispatch = Job.objects.get(name='notifications.dispatch')
+        self.assertGreater(dispatch.run_at, timezone.now())
+
+    def test_burst_is_coalesced_into_one_post_per_channel(self):
+        for i in range(12):
+            queue_notification('discord', {'content': f'ticket {i}', 'embeds': [{'title': str(i)}]})
+        for i in range(2):
+            queue_notification('slack', {'text': f'submission {i}'})
+
+        session = MagicMock()
+        session.post.return_value = webhook_response()
+        with patch('notifications.dispatcher.get_session', return_value=session):
+            results = dispatch_pending()
+
+        self.assertEqual(results['sent'], 14)
+        discord_posts = [c.kwargs['json'] for c in session.post.call_args_list if 'discord' in c.args[0]]
+        self.assertEqual([len(post['embeds']) for post in discord_posts], [10, 2])
+        self.assertEqual(discord_posts[0]['content'].splitlines()[:2], ['ticket 0', 'ticket 1'])
+        slack_posts = [c.kwargs['json'] for c in session.post.call_args_list if 'slack' in c.args[0]]
+        self.assertEqual(len(slack_posts), 1)
+        self.assertEqual([block['type'] for block in slack_posts[0]['blocks']], ['section', 'divider', 'section'])
+        self.assertFalse(Notification.objects.exclude(status='SENT').exists())
+
+    def test_rate_limit_defers_without_using_an_attempt(self):
+        for i in range(12):
+            queue_notification('discord', {'embeds': [{'title': str(i)}]})
+
+        session = MagicMock()
+        session.post.return_value = webhook_response(429, {'retry_after': 30.5})
+        with patch('notifications.dispatcher.get_session', return_value=session):
+            results = dispatch_pending()
+
+        self.assertEqual(session.post.call_count, 1)
+        self.assertEqual(results['deferred'], 12)
+        pending = Notification.objects.filter(status='PENDING')
+        self.assertEqual(pending.count(), 12)
+        self.assertEqual(set(pending.values_list('attempts', flat=True)), {0})
+        next_attempt = pending.first().next_attempt_at
+        self.assertGreater(next_attempt, timezone.now() + timedelta(seconds=29))
+        # The follow-up dispatch waits for the rate limit
+        self.assertTrue(Job.objects.filter(
+            name='notifications.dispatch', status='PENDING', run_at__gte=next_attempt
+        ).exists())
+
+    def test_failures_are_retried_then_dead(self):
+        notification = queue_notification('slack', {'text': 'hi'})
+
+        session = MagicMock()
+        session.post.return_value = webhook_response(502)
+        with patch('notifications.dispatcher.get_session', return_value=session):
+            self.assertEqual(dispatch_pending()['retrying'], 1)
+            Notification.objects.filter(pk=notification.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(dispatch_pending()['dead'], 1)
+
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ('DEAD', 2))
+        self.assertIn('HTTP 502', notification.last_error)
+
+    def test_emails_share_one_connection(self):
+        for i in range(3):
+            queue_email('Subject', 'Body', [f'student{i}@example.com'], html='<p>Body</p>')
+
+        with patch('notifications.dispatcher.get_connection', wraps=mail.get_connection) as get_connection:
+            results = dispatch_pending()
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(results['sent'], 3)
+        self.assertEqual([message.to for message in mail.outbox], [[f'student{i}@example.com'] for i in range(3)])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment, StripeCustomer
+from .models import Payment, StripeCustomer, StripeEvent
 
 
 @admin.register(Payment)
@@ -74,3 +74,19 @@ class StripeCustomerAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # Prevent deletion of customer records
         return False
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'payment_intent_id', 'status', 'attempts', 'stripe_created', 'processed_at']
+    list_filter = ['status', 'event_type', 'stripe_created']
+    search_fields = ['event_id', 'payment_intent_id']
+    readonly_fields = [
+        'event_id', 'event_type', 'payment_intent_id', 'stripe_created', 'payload',
+        'attempts', 'last_error', 'received_at', 'processed_at'
+    ]
+    date_hierarchy = 'stripe_created'
+    
+    def has_delete_permission(self, request, obj=None):
+        # The ledger is what makes webhook processing idempotent
+        return False
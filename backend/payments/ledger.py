@@ -0,0 +1,166 @@
+"""
+Stripe event ledger
+
+Every handled webhook event is recorded once in StripeEvent, keyed by its
+Stripe event id, so redeliveries are answered from a single unique-index
+lookup without touching enrollment or provisioning again.
+
+Events that belong to the same payment intent are applied in Stripe creation
+order: processing an event first applies any earlier, still-unprocessed
+events of that intent, with the intent's ledger rows locked so two workers
+never interleave them. An event that changes the payment status and arrives
+after a newer one for the same intent was applied is marked SKIPPED rather
+than rolling the payment back (e.g. a late payment_intent.succeeded after
+charge.refunded).
+"""
+import logging
+import traceback
+from datetime import datetime, timezone as dt_timezone
+
+import stripe
+from django.db import transaction
+from django.utils import timezone
+
+from .models import StripeEvent
+from .tasks import STRIPE_EVENT_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+DONE_STATUSES = ('PROCESSED', 'SKIPPED')
+
+# Events that set Payment.status; an older one must never overwrite a newer state
+STATUS_EVENT_TYPES = {
+    'payment_intent.succeeded',
+    'payment_intent.payment_failed',
+    'charge.refunded',
+}
+
+
+def get_payment_intent_id(event):
+    """Return the payment intent an event belongs to, or '' if none"""
+    obj = event.get('data', {}).get('object', {})
+    if obj.get('object') == 'payment_intent':
+        return obj.get('id') or ''
+    return obj.get('payment_intent') or ''
+
+
+def record_event(event):
+    """
+    Store a verified event in the ledger
+
+    Args:
+        event: event JSON as delivered by Stripe (dict)
+
+    Returns:
+        tuple: (StripeEvent, created) - created is False for redeliveries
+    """
+    created_ts = event.get('created')
+    stripe_created = (
+        datetime.fromtimestamp(created_ts, tz=dt_timezone.utc) if created_ts else timezone.now()
+    )
+    return StripeEvent.objects.get_or_create(
+        event_id=event['id'],
+        defaults={
+            'event_type': event['type'],
+            'payment_intent_id': get_payment_intent_id(event),
+            'stripe_created': stripe_created,
+            'payload': event,
+        }
+    )
+
+
+def _apply(record, newest_applied):
+    """
+    Run the handler for one locked ledger row
+
+    Returns:
+        Exception: the handler's error, or None on success
+    """
+    record.attempts += 1
+
+    if (record.event_type in STATUS_EVENT_TYPES and newest_applied
+            and record.stripe_created < newest_applied):
+        record.status = 'SKIPPED'
+        record.last_error = 'Superseded by a newer event for the same payment intent'
+        record.processed_at = timezone.now()
+        record.save()
+        logger.info(f"Skipped stale Stripe event {record.event_id} ({record.event_type})")
+        return None
+
+    handler = STRIPE_EVENT_HANDLERS[record.event_type]
+    try:
+        # Savepoint: a failing handler leaves no partial writes behind
+        with transaction.atomic():
+            handler(stripe.Event.construct_from(record.payload, stripe.api_key))
+    except Exception as e:
+        record.status = 'FAILED'
+        record.last_error = traceback.format_exc()[-10000:]
+        record.save()
+        logger.error(f"Stripe event {record.event_id} failed: {str(e)}")
+        return e
+
+    record.status = 'PROCESSED'
+    record.last_error = ''
+    record.processed_at = timezone.now()
+    record.save()
+    logger.info(f"Processed Stripe event {record.event_id} ({record.event_type})")
+    return None
+
+
+def process_event(event_id, force=False):
+    """
+    Apply a recorded event (and any earlier pending events of its payment intent)
+
+    Args:
+        event_id: Stripe event id
+        force: re-run the handler even if the event was already processed
+
+    Returns:
+        str: the event's final ledger status, or None if it is not in the ledger
+
+    Raises:
+        Exception: the first handler error, so the job queue retries later
+    """
+    record = StripeEvent.objects.filter(event_id=event_id).only('id', 'payment_intent_id').first()
+    if record is None:
+        logger.error(f"Stripe event {event_id} not found in ledger")
+        return None
+
+    failure = None
+    with transaction.atomic():
+        if record.payment_intent_id:
+            # Lock the whole intent in a fixed order so concurrent workers queue up
+            rows = list(
+                StripeEvent.objects.select_for_update()
+                .filter(payment_intent_id=record.payment_intent_id)
+                .order_by('stripe_created', 'id')
+            )
+        else:
+            rows = list(StripeEvent.objects.select_for_update().filter(pk=record.pk))
+
+        target = next(row for row in rows if row.pk == record.pk)
+        if target.status in DONE_STATUSES and not force:
+            return target.status
+
+        newest_applied = max(
+            (row.stripe_created for row in rows
+             if row.status == 'PROCESSED' and row.event_type in STATUS_EVENT_TYPES),
+            default=None
+        )
+
+        for row in rows:
+            is_target = row.pk == target.pk
+            if not is_target and row.status in DONE_STATUSES:
+                continue
+
+            failure = _apply(row, newest_applied)
+            if failure:
+                break
+            if row.status == 'PROCESSED' and row.event_type in STATUS_EVENT_TYPES:
+                newest_applied = max(newest_applied or row.stripe_created, row.stripe_created)
+            if is_target:
+                break
+
+    if failure:
+        raise failure
+    return target.status
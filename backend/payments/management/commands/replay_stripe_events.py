@@ -0,0 +1,117 @@
+"""
+Django management command to backfill or replay Stripe events from a JSON dump
+
+Accepts a JSON array of events, a Stripe list response ({"data": [...]}, as
+written by `stripe events list`), or one event per line (JSON Lines).
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.queue import enqueue
+from payments.ledger import DONE_STATUSES, process_event, record_event
+from payments.models import StripeEvent
+from payments.tasks import STRIPE_EVENT_HANDLERS
+
+
+def load_events(path):
+    with open(path) as f:
+        content = f.read().strip()
+
+    if not content:
+        return []
+
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        # JSON Lines
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    if isinstance(data, dict):
+        return data.get('data', [data])
+    return data
+
+
+class Command(BaseCommand):
+    help = 'Record Stripe events from a JSON dump in the ledger and apply them in order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Path to the JSON dump')
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='types',
+            help='Only replay events of this type (repeatable)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-run handlers for events the ledger already processed'
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Queue events for the job workers instead of applying them here'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would be replayed without changing anything'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            events = load_events(options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Could not read {options["path"]}: {e}')
+
+        types = set(options['types'] or STRIPE_EVENT_HANDLERS)
+        events = [
+            event for event in events
+            if event.get('type') in types and event.get('type') in STRIPE_EVENT_HANDLERS
+        ]
+        # Oldest first, so per-intent ordering holds even when enqueueing
+        events.sort(key=lambda event: event.get('created', 0))
+
+        self.stdout.write(f'Replaying {len(events)} Stripe events from {options["path"]}...')
+
+        if options['dry_run']:
+            existing = dict(
+                StripeEvent.objects.filter(
+                    event_id__in=[event['id'] for event in events]
+                ).values_list('event_id', 'status')
+            )
+            for event in events:
+                self.stdout.write(f"  {event['id']} {event['type']} ({existing.get(event['id'], 'new')})")
+            return
+
+        counts = {'applied': 0, 'skipped': 0, 'failed': 0, 'queued': 0}
+        for event in events:
+            stripe_event, created = record_event(event)
+            if stripe_event.status in DONE_STATUSES and not options['force']:
+                counts['skipped'] += 1
+                continue
+
+            if options['enqueue']:
+                enqueue(
+                    'payments.stripe_event',
+                    {'event_id': stripe_event.event_id, 'force': options['force']},
+                    idempotency_key=None if options['force'] else f'stripe:{stripe_event.event_id}'
+                )
+                counts['queued'] += 1
+                continue
+
+            try:
+                process_event(stripe_event.event_id, force=options['force'])
+                counts['applied'] += 1
+            except Exception as e:
+                counts['failed'] += 1
+                self.stdout.write(self.style.ERROR(f'❌ {stripe_event.event_id}: {e}'))
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Applied: {counts["applied"]}'))
+        if counts['queued']:
+            self.stdout.write(f'📬 Queued: {counts["queued"]}')
+        self.stdout.write(f'⏭️  Already processed: {counts["skipped"]}')
+        if counts['failed']:
+            self.stdout.write(self.style.ERROR(f'❌ Failed: {counts["failed"]}'))
+        self.stdout.write('='*50)
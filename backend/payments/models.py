@@ -77,3 +77,34 @@ class StripeCustomer(models.Model):
     
     def __str__(self):
         return f"{self.user.email} - {self.stripe_customer_id}"
+
+
+class StripeEvent(models.Model):
+    """Ledger of received Stripe webhook events, one row per event id"""
+    STATUS_CHOICES = [
+        ('RECEIVED', 'Received'),
+        ('PROCESSED', 'Processed'),
+        ('FAILED', 'Failed'),
+        ('SKIPPED', 'Skipped'),  # Superseded by a newer event for the same payment intent
+    ]
+    
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payment_intent_id = models.CharField(max_length=255, blank=True)
+    stripe_created = models.DateTimeField()  # Event creation time at Stripe, used for ordering
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='RECEIVED')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-stripe_created']
+        indexes = [
+            models.Index(fields=['payment_intent_id', 'stripe_created']),
+            models.Index(fields=['status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_id} - {self.event_type} - {self.status}"
@@ -0,0 +1,477 @@
+"""
+Background jobs for Stripe webhook events
+
+stripe_webhook only verifies the signature, records the event in the
+StripeEvent ledger and enqueues it; the handlers below run in the job worker
+(python manage.py run_jobs) via payments.ledger, which deduplicates events
+and applies them in order per payment intent. A handler that raises is
+retried, so it must tolerate running again for the same event.
+"""
+import logging
+
+import stripe
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from compliance.views import log_audit
+from curriculum.unlocks import unlock_first_project
+from jobs.queue import enqueue, job
+
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+
+class AccountCreationError(Exception):
+    """Creating the account for a paid checkout failed; the event is retried"""
+    
+    def __init__(self, payment_id, message):
+        super().__init__(message)
+        self.payment_id = payment_id
+
+
+def _create_user_from_payment(payment_intent, payment):
+    """
+    Create a user account from payment metadata
+    
+    Args:
+        payment_intent: Stripe PaymentIntent object
+        payment: Payment model instance
+    
+    Returns:
+        CustomUser: Created user instance
+    """
+    from django.utils.crypto import get_random_string
+    
+    User = get_user_model()
+    
+    metadata = payment_intent.get('metadata', {})
+    email = metadata.get('email') or payment.customer_email
+    name = metadata.get('name') or payment.customer_name
+    track = metadata.get('track') or payment.track
+    
+    # Check if user already exists
+    try:
+        user = User.objects.get(email=email)
+        logger.info(f"User {email} already exists, linking payment")
+        return user
+    except User.DoesNotExist:
+        pass
+    
+    # Generate username from email
+    username = email.split('@')[0]
+    base_username = username
+    counter = 1
+    while User.objects.filter(username=username).exists():
+        username = f"{base_username}{counter}"
+        counter += 1
+    
+    # Generate random password
+    password = get_random_string(16)
+    
+    # Create user
+    user = User.objects.create_user(
+        email=email,
+        username=username,
+        password=password,
+        name=name,
+        role='student',
+        track=track,
+        enrollment_status='ENROLLED',
+        payment_verified=True,
+        enrolled_at=timezone.now(),
+        privacy_accepted=True,  # Assumed accepted during checkout
+        privacy_accepted_at=timezone.now(),
+        privacy_version='1.0',
+    )
+    
+    logger.info(f"Created user account for {email}")
+    
+    # Send welcome email with password once the enrollment is committed
+    from utils.email import send_welcome_email
+    transaction.on_commit(lambda: send_welcome_email(user, password))
+    
+    # Auto-assign trainer based on track
+    try:
+        from utils.trainer_assignment import assign_trainer_to_student
+        trainer = assign_trainer_to_student(user)
+        if trainer:
+            logger.info(f"Auto-assigned trainer {trainer.email} to student {user.email}")
+    except Exception as e:
+        logger.error(f"Failed to assign trainer: {str(e)}")
+    
+    return user
+
+
+
+def _enqueue_tool_provisioning(user, payment=None):
+    """Provision tools in their own job so slow Docker/AWS calls retry independently"""
+    enqueue(
+        'payments.provision_tools',
+        {'user_id': user.pk, 'payment_id': payment.pk if payment else None},
+        idempotency_key=f"provision-tools:{user.pk}:{payment.pk if payment else ''}"
+    )
+
+
+def handle_payment_intent_succeeded(event):
+    """Payment successful, enroll student"""
+    User = get_user_model()
+    
+    payment_intent = event['data']['object']
+    metadata = payment_intent.get('metadata', {})
+    is_anonymous = metadata.get('anonymous_checkout') == 'true'
+    
+    # Find payment record
+    payment = Payment.objects.filter(
+        stripe_payment_intent=payment_intent['id']
+    ).first()
+    
+    # If no payment found, try to find by email (for anonymous checkout)
+    if not payment and is_anonymous:
+        email = metadata.get('email')
+        if email:
+            payment = Payment.objects.filter(
+                customer_email=email,
+                status='CREATED'
+            ).order_by('-created_at').first()
+    
+    if payment:
+        # Update payment record
+        payment.stripe_payment_intent = payment_intent['id']
+        payment.status = 'SUCCEEDED'
+        payment.stripe_charge_id = payment_intent.get('latest_charge', '')
+        payment.payment_method = payment_intent.get('payment_method_types', [''])[0]
+        payment.save()
+        
+        # Check if this is anonymous checkout (payment-first flow)
+        if is_anonymous and not payment.user:
+            logger.info(f"Processing anonymous checkout for {metadata.get('email')}")
+            
+            # Create user account
+            try:
+                user = _create_user_from_payment(payment_intent, payment)
+                payment.user = user
+                payment.account_created = True
+                payment.save()
+                
+                logger.info(f"Account created for {user.email}")
+                
+            except Exception as e:
+                logger.error(f"Failed to create account: {str(e)}")
+                # Raise so the job queue retries, and dead-letters the event if it keeps failing;
+                # process_stripe_event records the error on the payment after the rollback
+                raise AccountCreationError(payment.pk, f"Account creation failed: {str(e)}") from e
+        else:
+            user = payment.user
+        
+        if not user:
+            logger.error("No user found for payment")
+            return
+        
+        track_code = metadata.get('track') or payment.track
+        
+        # Update user enrollment
+        user.payment_verified = True
+        user.enrollment_status = 'ENROLLED'
+        user.enrolled_at = timezone.now()
+        
+        if track_code:
+            user.track = track_code
+        
+        user.save()
+        
+        # Auto-assign trainer based on track
+        if not user.assigned_trainer:
+            try:
+                from utils.trainer_assignment import assign_trainer_to_student
+                trainer = assign_trainer_to_student(user)
+                if trainer:
+                    logger.info(f"Auto-assigned trainer {trainer.email} to student {user.email}")
+            except Exception as e:
+                logger.error(f"Failed to assign trainer: {str(e)}")
+        
+        # Log enrollment
+        log_audit(
+            user, 
+            'ENROLLMENT', 
+            f'Enrolled in {track_code} track',
+            {'payment_intent_id': payment_intent['id'], 'amount': str(payment.amount)}
+        )
+        
+        # Provision tools based on track (separate job - user can still access platform meanwhile)
+        if not user.tools_provisioned:
+            _enqueue_tool_provisioning(user, payment)
+        
+        # Initialize first project
+        if user.track:
+            unlock_first_project(user)
+        
+        # Send welcome email (for existing users) and payment confirmation
+        from utils.email import send_welcome_email, send_payment_confirmation_email
+        if not is_anonymous:
+            # Existing user - just send payment confirmation
+            send_payment_confirmation_email(user, payment, idempotency_key=f"stripe:{event['id']}:confirmation")
+        # For anonymous users, welcome email was already sent in _create_user_from_payment
+        
+        # Send Discord notification
+        try:
+            from utils.discord import send_discord_notification
+            send_discord_notification(
+                title="💰 New Enrollment",
+                description=f"**{user.name or user.username}** enrolled in **{track_code}** track",
+                fields=[
+                    {"name": "Email", "value": user.email, "inline": True},
+                    {"name": "Amount", "value": f"${payment.amount}", "inline": True},
+                    {"name": "Payment ID", "value": payment.stripe_payment_intent[:20] + "...", "inline": False}
+                ],
+                color=0x10b981  # Green
+            )
+        except Exception as e:
+            logger.error(f"Failed to send Discord notification: {str(e)}")
+        
+        logger.info(f"Payment succeeded for user {user.email}, enrolled in {track_code}")
+
+
+
+def handle_payment_intent_failed(event):
+    """Payment failed"""
+    payment_intent = event['data']['object']
+    
+    payment = Payment.objects.filter(
+        stripe_payment_intent=payment_intent['id']
+    ).first()
+    
+    if payment:
+        payment.status = 'FAILED'
+        payment.save()
+        
+        logger.warning(f"Payment failed for user {payment.user.email if payment.user else payment.customer_email}")
+        
+        # Send failure notification email
+        from utils.email import send_payment_failed_email
+        email = payment.user.email if payment.user else payment.customer_email
+        if email:
+            send_payment_failed_email(
+                email, payment.amount, payment.track, idempotency_key=f"stripe:{event['id']}:failed"
+            )
+
+
+
+def handle_charge_refunded(event):
+    """Refund processed"""
+    charge = event['data']['object']
+    payment_intent_id = charge.get('payment_intent')
+    
+    if payment_intent_id:
+        payment = Payment.objects.filter(
+            stripe_payment_intent=payment_intent_id
+        ).first()
+        
+        if payment:
+            payment.refunded = True
+            payment.refund_amount = charge['amount_refunded'] / 100
+            payment.refunded_at = timezone.now()
+            payment.status = 'REFUNDED'
+            payment.save()
+            
+            # Update user enrollment status
+            user = payment.user
+            user.enrollment_status = 'WITHDRAWN'
+            user.save()
+            
+            log_audit(
+                user,
+                'ENROLLMENT',
+                'Enrollment refunded',
+                {'payment_intent_id': payment_intent_id, 'refund_amount': payment.refund_amount}
+            )
+            
+            # Send refund notification email
+            from utils.email import send_refund_notification_email
+            send_refund_notification_email(user, payment, idempotency_key=f"stripe:{event['id']}:refund")
+            
+            logger.info(f"Refund processed for user {user.email}")
+
+
+
+def handle_checkout_session_completed(event):
+    """Checkout session completed"""
+    User = get_user_model()
+    
+    session = event['data']['object']
+    payment_intent_id = session.get('payment_intent')
+    metadata = session.get('metadata', {})
+    is_anonymous = metadata.get('anonymous_checkout') == 'true'
+    
+    # For anonymous checkout, create account here
+    if is_anonymous and session.payment_status == 'paid':
+        customer_email = session.customer_details.get('email')
+        customer_name = session.customer_details.get('name')
+        track = metadata.get('track')
+        
+        if customer_email:
+            try:
+                # Check if user exists
+                user = User.objects.filter(email=customer_email).first()
+                
+                if not user:
+                    # Create user account
+                    from django.utils.crypto import get_random_string
+                    
+                    username = customer_email.split('@')[0]
+                    base_username = username
+                    counter = 1
+                    while User.objects.filter(username=username).exists():
+                        username = f"{base_username}{counter}"
+                        counter += 1
+                    
+                    password = get_random_string(16)
+                    
+                    user = User.objects.create_user(
+                        email=customer_email,
+                        username=username,
+                        password=password,
+                        name=customer_name or '',
+                        role='student',
+                        track=track,
+                        enrollment_status='ENROLLED',
+                        payment_verified=True,
+                        enrolled_at=timezone.now(),
+                        privacy_accepted=True,
+                        privacy_accepted_at=timezone.now(),
+                        privacy_version='1.0',
+                    )
+                    
+                    logger.info(f"Created user account for {customer_email}")
+                    
+                    # Create payment record
+                    payment = Payment.objects.create(
+                        user=user,
+                        customer_email=customer_email,
+                        customer_name=customer_name or '',
+                        stripe_payment_intent=payment_intent_id or session['id'],
+                        amount=session['amount_total'] / 100,
+                        currency=session['currency'],
+                        status='SUCCEEDED',
+                        track=track,
+                        account_created=True,
+                    )
+                    
+                    # Provision tools
+                    _enqueue_tool_provisioning(user, payment)
+                    
+                    # Unlock first project
+                    if user.track:
+                        unlock_first_project(user)
+                    
+                    # Log audit
+                    log_audit(
+                        user,
+                        'ENROLLMENT',
+                        f'Enrolled in {track} track via checkout',
+                        {'session_id': session['id'], 'amount': session['amount_total'] / 100}
+                    )
+                    
+                    # Auto-assign trainer based on track
+                    try:
+                        from utils.trainer_assignment import assign_trainer_to_student
+                        trainer = assign_trainer_to_student(user)
+                        if trainer:
+                            logger.info(f"Auto-assigned trainer {trainer.email} to student {user.email}")
+                    except Exception as e:
+                        logger.error(f"Failed to assign trainer: {str(e)}")
+                    
+                    # Send welcome email with password once the enrollment is committed
+                    from utils.email import send_welcome_email
+                    transaction.on_commit(lambda: send_welcome_email(user, password))
+                    
+                    # Send Discord notification
+                    try:
+                        from utils.discord import send_discord_notification
+                        send_discord_notification(
+                            title="💰 New Enrollment (Checkout)",
+                            description=f"**{user.name or user.username}** enrolled in **{track}** track",
+                            fields=[
+                                {"name": "Email", "value": user.email, "inline": True},
+                                {"name": "Amount", "value": f"${session['amount_total'] / 100}", "inline": True},
+                                {"name": "Session ID", "value": session['id'][:20] + "...", "inline": False}
+                            ],
+                            color=0x10b981  # Green
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to send Discord notification: {str(e)}")
+                    
+            except Exception as e:
+                logger.error(f"Failed to create account from checkout: {str(e)}")
+                raise
+    
+    if payment_intent_id:
+        # Payment intent will be handled by payment_intent.succeeded event
+        logger.info(f"Checkout session completed: {session['id']}")
+
+
+
+STRIPE_EVENT_HANDLERS = {
+    'payment_intent.succeeded': handle_payment_intent_succeeded,
+    'payment_intent.payment_failed': handle_payment_intent_failed,
+    'charge.refunded': handle_charge_refunded,
+    'checkout.session.completed': handle_checkout_session_completed,
+}
+
+
+@job('payments.stripe_event')
+def process_stripe_event(payload):
+    """
+    Apply a Stripe event recorded in the StripeEvent ledger
+    
+    Args:
+        payload: {'event_id': ..., 'force': reapply an already processed event (replays)}
+    """
+    from .ledger import process_event
+    
+    try:
+        status = process_event(payload['event_id'], force=payload.get('force', False))
+    except AccountCreationError as e:
+        # The handler's writes were rolled back; keep the error visible on the payment
+        Payment.objects.filter(pk=e.payment_id).update(provisioning_error=str(e))
+        raise
+    logger.info(f"Stripe event {payload['event_id']} is {status}")
+
+
+@job('payments.provision_tools')
+def provision_tools(payload):
+    """
+    Provision the student's workspace tools; raising makes the worker retry
+    
+    Args:
+        payload: {'user_id': ..., 'payment_id': ... or None}
+    """
+    from accounts.provisioning_service import ProvisioningService
+    
+    User = get_user_model()
+    user = User.objects.filter(pk=payload['user_id']).first()
+    if not user or user.tools_provisioned:
+        return
+    
+    payment = None
+    if payload.get('payment_id'):
+        payment = Payment.objects.filter(pk=payload['payment_id']).first()
+    
+    try:
+        ProvisioningService.provision_tools_for_user(user)
+    except Exception as e:
+        logger.error(f"Tool provisioning failed: {str(e)}")
+        if payment:
+            payment.provisioning_error = f"Tool provisioning failed: {str(e)}"
+            payment.save()
+        raise
+    
+    if payment:
+        payment.tools_provisioned = True
+        payment.provisioning_error = ''
+        payment.save()
+    logger.info(f"Tools provisioned for {user.email}")
@@ -4,11 +4,19 @@ Unit tests for payment functionality
 from django.test import TestCase
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from django.core.management import call_command
 from accounts.models import CustomUser
-from payments.models import Payment
+from jobs.models import Job
+from jobs.worker import run_pending_jobs
+from payments.ledger import process_event, record_event
+from payments.models import Payment, StripeEvent
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch, MagicMock
+import json
+import os
 import stripe
+import tempfile
 
 
 class PaymentModelTestCase(TestCase):
@@ -276,3 +284,235 @@ class PaymentHistoryTestCase(APITestCase):
         print(f"✅ Test Passed: Payment status filtering works")
         print(f"   Succeeded: {succeeded_payments.count()}")
         print(f"   Failed: {failed_payments.count()}")
+
+
+@patch('utils.email.send_refund_notification_email')
+@patch('utils.email.send_payment_confirmation_email')
+class StripeEventLedgerTestCase(TestCase):
+    """Test deduplication and per-intent ordering of Stripe events"""
+
+    def setUp(self):
+        """Set up a student with a pending payment"""
+        self.user = CustomUser.objects.create_user(
+            email='ledger@example.com',
+            password='TestPass123!@#',
+            name='Ledger Test User',
+            role='student',
+            track='DP'
+        )
+        self.payment = Payment.objects.create(
+            user=self.user,
+            stripe_payment_intent='pi_ledger',
+            amount=Decimal('99.99'),
+            track='DP'
+        )
+        self.succeeded = {
+            'id': 'evt_succeeded',
+            'object': 'event',
+            'type': 'payment_intent.succeeded',
+            'created': 1700000000,
+            'data': {'object': {
+                'id': 'pi_ledger', 'object': 'payment_intent',
+                'metadata': {'track': 'DP'}, 'payment_method_types': ['card'],
+            }},
+        }
+        self.refunded = {
+            'id': 'evt_refunded',
+            'object': 'event',
+            'type': 'charge.refunded',
+            'created': 1700000100,
+            'data': {'object': {
+                'id': 'ch_ledger', 'object': 'charge',
+                'payment_intent': 'pi_ledger', 'amount_refunded': 9999,
+            }},
+        }
+
+    def _post(self, event):
+        client = APIClient()
+        with patch('payments.views.StripeService.verify_webhook_signature', return_value=event):
+            return client.post('/api/payments/webhook/', json.dumps(event), content_type='application/json')
+
+    def test_duplicate_delivery_is_recorded_once(self, mock_confirmation, mock_refund):
+        """Redelivered events short-circuit on the ledger"""
+        for _ in range(3):
+            self.assertEqual(self._post(self.succeeded).status_code, 200)
+
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.assertEqual(Job.objects.filter(name='payments.stripe_event').count(), 1)
+
+        run_pending_jobs('test-worker')
+        self._post(self.succeeded)
+
+        self.assertEqual(StripeEvent.objects.get().status, 'PROCESSED')
+        mock_confirmation.assert_called_once()
+
+    def test_earlier_event_is_applied_first(self, mock_confirmation, mock_refund):
+        """Processing a later event first applies pending earlier ones of the same intent"""
+        record_event(self.refunded)
+        record_event(self.succeeded)
+
+        self.assertEqual(process_event('evt_refunded'), 'PROCESSED')
+
+        self.assertEqual(StripeEvent.objects.get(event_id='evt_succeeded').status, 'PROCESSED')
+        self.payment.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.payment.status, 'REFUNDED')
+        self.assertEqual(self.user.enrollment_status, 'WITHDRAWN')
+
+        # The succeeded event's own job finds it already processed
+        self.assertEqual(process_event('evt_succeeded'), 'PROCESSED')
+        mock_confirmation.assert_called_once()
+
+    def test_late_older_event_is_skipped(self, mock_confirmation, mock_refund):
+        """An older status event arriving after a newer one does not roll the payment back"""
+        self.payment.status = 'SUCCEEDED'
+        self.payment.save()
+        record_event(self.refunded)
+        process_event('evt_refunded')
+
+        record_event(self.succeeded)
+        self.assertEqual(process_event('evt_succeeded'), 'SKIPPED')
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'REFUNDED')
+        mock_confirmation.assert_not_called()
+
+    def test_replay_command_backfills_from_dump(self, mock_confirmation, mock_refund):
+        """replay_stripe_events records and applies a dump once"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'object': 'list', 'data': [self.refunded, self.succeeded]}, f)
+
+        try:
+            call_command('replay_stripe_events', f.name, stdout=StringIO())
+            call_command('replay_stripe_events', f.name, stdout=StringIO())
+        finally:
+            os.unlink(f.name)
+
+        self.assertEqual(
+            set(StripeEvent.objects.values_list('status', flat=True)),
+            {'PROCESSED'}
+        )
+        mock_confirmation.assert_called_once()
+        mock_refund.assert_called_once()
+
+    def test_forced_replay_reapplies_processed_event_via_queue(self, mock_confirmation, mock_refund):
+        """replay_stripe_events --force --enqueue runs the handler again for a processed event"""
+        record_event(self.succeeded)
+        process_event('evt_succeeded')
+        mock_confirmation.assert_called_once()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump([self.succeeded], f)
+
+        try:
+            call_command('replay_stripe_events', f.name, '--force', '--enqueue', stdout=StringIO())
+        finally:
+            os.unlink(f.name)
+
+        self.assertEqual(Job.objects.get(name='payments.stripe_event').payload['force'], True)
+        run_pending_jobs('test-worker')
+        self.assertEqual(mock_confirmation.call_count, 2)
+
+    def test_failed_account_creation_is_retried(self, mock_confirmation, mock_refund):
+        """An anonymous checkout whose account creation fails raises, so the job is retried"""
+        anonymous = Payment.objects.create(
+            stripe_payment_intent='pi_anonymous', amount=Decimal('99.99'), track='DP',
+            customer_email='new@example.com'
+        )
+        event = dict(self.succeeded, id='evt_anonymous')
+        event['data'] = {'object': {
+            'id': 'pi_anonymous', 'object': 'payment_intent', 'payment_method_types': ['card'],
+            'metadata': {'track': 'DP', 'anonymous_checkout': 'true', 'email': 'new@example.com'},
+        }}
+        self._post(event)
+
+        with patch('payments.tasks._create_user_from_payment', side_effect=RuntimeError('smtp down')):
+            self.assertEqual(run_pending_jobs('test-worker'), (0, 1))
+
+        job = Job.objects.get(name='payments.stripe_event')
+        self.assertEqual((job.status, job.attempts), ('PENDING', 1))
+        self.assertEqual(StripeEvent.objects.get(event_id='evt_anonymous').status, 'FAILED')
+        anonymous.refresh_from_db()
+        self.assertEqual(anonymous.status, 'CREATED')
+        self.assertIn('smtp down', anonymous.provisioning_error)
+
+    def test_welcome_email_waits_for_commit(self, mock_confirmation, mock_refund):
+        """The password email is only sent once the enrollment transaction commits"""
+        Payment.objects.create(
+            stripe_payment_intent='pi_welcome', amount=Decimal('99.99'), track='DP',
+            customer_email='welcome@example.com'
+        )
+        event = dict(self.succeeded, id='evt_welcome')
+        event['data'] = {'object': {
+            'id': 'pi_welcome', 'object': 'payment_intent', 'payment_method_types': ['card'],
+            'metadata': {'track': 'DP', 'anonymous_checkout': 'true', 'email': 'welcome@example.com'},
+        }}
+        record_event(event)
+
+        with patch('utils.email.send_welcome_email') as mock_welcome:
+            with patch('payments.tasks.log_audit', side_effect=RuntimeError('audit down')), \
+                    self.captureOnCommitCallbacks() as callbacks, self.assertRaises(RuntimeError):
+                process_event('evt_welcome')
+            # The rolled-back attempt created no account and queued no email
+            self.assertEqual(callbacks, [])
+            self.assertFalse(CustomUser.objects.filter(email='welcome@example.com').exists())
+
+            with self.captureOnCommitCallbacks() as callbacks:
+                process_event('evt_welcome', force=True)
+            mock_welcome.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        user = CustomUser.objects.get(email='welcome@example.com')
+        mock_welcome.assert_called_once()
+        self.assertEqual(mock_welcome.call_args.args[0], user)
+
+
+class PaymentEmailOutboxTestCase(TestCase):
+    """Test payment emails are written to the notification outbox with the handler's changes"""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email='outbox@example.com',
+            password='TestPass123!@#',
+            name='Outbox Test User',
+            role='student',
+            track='DP'
+        )
+        Payment.objects.create(user=self.user, stripe_payment_intent='pi_outbox', amount=Decimal('99.99'), track='DP')
+        record_event({
+            'id': 'evt_outbox',
+            'object': 'event',
+            'type': 'payment_intent.succeeded',
+            'created': 1700000000,
+            'data': {'object': {
+                'id': 'pi_outbox', 'object': 'payment_intent',
+                'metadata': {'track': 'DP'}, 'payment_method_types': ['card'],
+            }},
+        })
+
+    def test_rolled_back_handler_queues_nothing(self):
+        from django.core import mail
+        from notifications.dispatcher import dispatch_pending
+        from notifications.models import Notification
+        from utils.email import send_payment_confirmation_email
+
+        def confirm_then_fail(*args, **kwargs):
+            send_payment_confirmation_email(*args, **kwargs)
+            raise RuntimeError('handler failed after queueing the email')
+
+        with patch('utils.email.send_payment_confirmation_email', side_effect=confirm_then_fail), \
+                self.assertRaises(RuntimeError):
+            process_event('evt_outbox')
+        self.assertEqual(StripeEvent.objects.get(event_id='evt_outbox').status, 'FAILED')
+        self.assertFalse(Notification.objects.exists())
+
+        # The retry queues the email, a forced replay does not queue it again
+        process_event('evt_outbox')
+        process_event('evt_outbox', force=True)
+        self.assertEqual(Notification.objects.filter(channel='email').count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        dispatch_pending()
+        self.assertEqual([message.to for message in mail.outbox], [['outbox@example.com']])
+        self.assertEqual(mail.outbox[0].subject, 'Payment Confirmation - ApraNova LMS')
@@ -13,82 +13,6 @@ from .stripe_service import StripeService
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
-def _create_user_from_payment(payment_intent, payment):
-    """
-    Create a user account from payment metadata
-    
-    Args:
-        payment_intent: Stripe PaymentIntent object
-        payment: Payment model instance
-    
-    Returns:
-        CustomUser: Created user instance
-    """
-    from django.contrib.auth import get_user_model
-    from django.utils.crypto import get_random_string
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    User = get_user_model()
-    
-    metadata = payment_intent.get('metadata', {})
-    email = metadata.get('email') or payment.customer_email
-    name = metadata.get('name') or payment.customer_name
-    track = metadata.get('track') or payment.track
-    
-    # Check if user already exists
-    try:
-        user = User.objects.get(email=email)
-        logger.info(f"User {email} already exists, linking payment")
-        return user
-    except User.DoesNotExist:
-        pass
-    
-    # Generate username from email
-    username = email.split('@')[0]
-    base_username = username
-    counter = 1
-    while User.objects.filter(username=username).exists():
-        username = f"{base_username}{counter}"
-        counter += 1
-    
-    # Generate random password
-    password = get_random_string(16)
-    
-    # Create user
-    user = User.objects.create_user(
-        email=email,
-        username=username,
-        password=password,
-        name=name,
-        role='student',
-        track=track,
-        enrollment_status='ENROLLED',
-        payment_verified=True,
-        enrolled_at=timezone.now(),
-        privacy_accepted=True,  # Assumed accepted during checkout
-        privacy_accepted_at=timezone.now(),
-        privacy_version='1.0',
-    )
-    
-    logger.info(f"Created user account for {email}")
-    
-    # Send welcome email with password
-    from utils.email import send_welcome_email
-    send_welcome_email(user, password)
-    
-    # Auto-assign trainer based on track
-    try:
-        from utils.trainer_assignment import assign_trainer_to_student
-        trainer = assign_trainer_to_student(user)
-        if trainer:
-            logger.info(f"Auto-assigned trainer {trainer.email} to student {user.email}")
-    except Exception as e:
-        logger.error(f"Failed to assign trainer: {str(e)}")
-    
-    return user
-
-
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def create_payment(request):
@@ -477,28 +401,8 @@ def verify_checkout_session(request):
             # Unlock first project
             if user.track:
                 try:
-                    from curriculum.models import Track, StudentProgress
-                    track_obj = Track.objects.get(code=user.track)
-                    first_project = track_obj.projects.filter(number=1).first()
-                    
-                    if first_project:
-                        # Create progress entry for first project (unlocks it)
-                        StudentProgress.objects.get_or_create(
-                            student=user,
-                            project=first_project,
-                            step=None,
-                            defaults={'started_at': timezone.now()}
-                        )
-                        
-                        # Create progress entries for all steps
-                        for step in first_project.steps.all():
-                            StudentProgress.objects.get_or_create(
-                                student=user,
-                                project=first_project,
-                                step=step
-                            )
-                        
-                        logger.info(f"Unlocked Project 1 for user {user.email}")
+                    from curriculum.unlocks import unlock_first_project
+                    unlock_first_project(user)
                 except Exception as e:
                     logger.error(f"Failed to unlock Project 1: {str(e)}")
         
@@ -584,20 +488,24 @@ def stripe_webhook(request):
     """
     Handle Stripe webhook events
     
+    Only verifies the signature, records the event in the StripeEvent ledger
+    and enqueues it; payments.ledger applies it in the job worker.
+    Redeliveries of an already recorded event id return immediately.
+    
     Supported events:
     - payment_intent.succeeded: Payment successful, enroll student
     - payment_intent.payment_failed: Payment failed
     - charge.refunded: Refund processed
     - checkout.session.completed: Checkout session completed
     """
-    from django.contrib.auth import get_user_model
-    from django.utils import timezone
-    from curriculum.models import Track, Project, StudentProgress
-    from compliance.views import log_audit
+    from django.db import transaction
+    from jobs.queue import enqueue
+    from .ledger import record_event
+    from .tasks import STRIPE_EVENT_HANDLERS
+    import json
     import logging
     
     logger = logging.getLogger(__name__)
-    User = get_user_model()
     
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
@@ -610,348 +518,20 @@ def stripe_webhook(request):
     
     logger.info(f"Received Stripe webhook: {event['type']}")
     
-    # Handle payment_intent.succeeded
-    if event['type'] == 'payment_intent.succeeded':
-        payment_intent = event['data']['object']
-        metadata = payment_intent.get('metadata', {})
-        is_anonymous = metadata.get('anonymous_checkout') == 'true'
-        
-        # Find payment record
-        payment = Payment.objects.filter(
-            stripe_payment_intent=payment_intent['id']
-        ).first()
-        
-        # If no payment found, try to find by email (for anonymous checkout)
-        if not payment and is_anonymous:
-            email = metadata.get('email')
-            if email:
-                payment = Payment.objects.filter(
-                    customer_email=email,
-                    status='CREATED'
-                ).order_by('-created_at').first()
-        
-        if payment:
-            # Update payment record
-            payment.stripe_payment_intent = payment_intent['id']
-            payment.status = 'SUCCEEDED'
-            payment.stripe_charge_id = payment_intent.get('latest_charge', '')
-            payment.payment_method = payment_intent.get('payment_method_types', [''])[0]
-            payment.save()
-            
-            # Check if this is anonymous checkout (payment-first flow)
-            if is_anonymous and not payment.user:
-                logger.info(f"Processing anonymous checkout for {metadata.get('email')}")
-                
-                # Create user account
-                try:
-                    user = _create_user_from_payment(payment_intent, payment)
-                    payment.user = user
-                    payment.account_created = True
-                    payment.save()
-                    
-                    logger.info(f"Account created for {user.email}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to create account: {str(e)}")
-                    payment.provisioning_error = f"Account creation failed: {str(e)}"
-                    payment.save()
-                    # TODO: Send alert to admin
-                    return HttpResponse(status=200)
-            else:
-                user = payment.user
-            
-            if not user:
-                logger.error("No user found for payment")
-                return HttpResponse(status=200)
-            
-            track_code = metadata.get('track') or payment.track
-            
-            # Update user enrollment
-            user.payment_verified = True
-            user.enrollment_status = 'ENROLLED'
-            user.enrolled_at = timezone.now()
-            
-            if track_code:
-                user.track = track_code
-            
-            user.save()
-            
-            # Auto-assign trainer based on track
-            if not user.assigned_trainer:
-                try:
-                    from utils.trainer_assignment import assign_trainer_to_student
-                    trainer = assign_trainer_to_student(user)
-                    if trainer:
-                        logger.info(f"Auto-assigned trainer {trainer.email} to student {user.email}")
-                except Exception as e:
-                    logger.error(f"Failed to assign trainer: {str(e)}")
-            
-            # Log enrollment
-            log_audit(
-                user, 
-                'ENROLLMENT', 
-                f'Enrolled in {track_code} track',
-                {'payment_intent_id': payment_intent['id'], 'amount': payment.amount}
-            )
-            
-            # Provision tools based on track
-            if not user.tools_provisioned:
-                try:
-                    from accounts.provisioning_service import ProvisioningService
-                    ProvisioningService.provision_tools_for_user(user)
-                    payment.tools_provisioned = True
-                    payment.save()
-                    logger.info(f"Tools provisioned for {user.email}")
-                except Exception as e:
-                    logger.error(f"Tool provisioning failed: {str(e)}")
-                    payment.provisioning_error = f"Tool provisioning failed: {str(e)}"
-                    payment.save()
-                    # Continue anyway - user can still access platform
-            
-            # Initialize first project
-            if user.track:
-                try:
-                    track = Track.objects.get(code=user.track)
-                    first_project = track.projects.filter(number=1).first()
-                    
-                    if first_project:
-                        # Create progress entry for first project (unlocks it)
-                        progress, created = StudentProgress.objects.get_or_create(
-                            student=user,
-                            project=first_project,
-                            step=None,
-                            defaults={'started_at': timezone.now()}
-                        )
-                        
-                        # Create progress entries for all steps
-                        for step in first_project.steps.all():
-                            StudentProgress.objects.get_or_create(
-                                student=user,
-                                project=first_project,
-                                step=step
-                            )
-                        
-                        logger.info(f"Unlocked Project 1 for user {user.email}")
-                        
-                except Track.DoesNotExist:
-                    logger.error(f"Track {user.track} not found for user {user.email}")
-            
-            # Send welcome email (for existing users) and payment confirmation
-            from utils.email import send_welcome_email, send_payment_confirmation_email
-            if not is_anonymous:
-                # Existing user - just send payment confirmation
-                send_payment_confirmation_email(user, payment)
-            # For anonymous users, welcome email was already sent in _create_user_from_payment
-            
-            # Send Discord notification
-            try:
-                from utils.discord import send_discord_notification
-                send_discord_notification(
-                    title="💰 New Enrollment",
-                    description=f"**{user.name or user.username}** enrolled in **{track_code}** track",
-                    fields=[
-                        {"name": "Email", "value": user.email, "inline": True},
-                        {"name": "Amount", "value": f"${payment.amount}", "inline": True},
-                        {"name": "Payment ID", "value": payment.stripe_payment_intent[:20] + "...", "inline": False}
-                    ],
-                    color=0x10b981  # Green
-                )
-            except Exception as e:
-                logger.error(f"Failed to send Discord notification: {str(e)}")
-            
-            logger.info(f"Payment succeeded for user {user.email}, enrolled in {track_code}")
-    
-    # Handle payment_intent.payment_failed
-    elif event['type'] == 'payment_intent.payment_failed':
-        payment_intent = event['data']['object']
-        
-        payment = Payment.objects.filter(
-            stripe_payment_intent=payment_intent['id']
-        ).first()
-        
-        if payment:
-            payment.status = 'FAILED'
-            payment.save()
-            
-            logger.warning(f"Payment failed for user {payment.user.email if payment.user else payment.customer_email}")
-            
-            # Send failure notification email
-            from utils.email import send_payment_failed_email
-            email = payment.user.email if payment.user else payment.customer_email
-            if email:
-                send_payment_failed_email(email, payment.amount, payment.track)
+    if event['type'] not in STRIPE_EVENT_HANDLERS:
+        return HttpResponse(status=200)
     
-    # Handle charge.refunded
-    elif event['type'] == 'charge.refunded':
-        charge = event['data']['object']
-        payment_intent_id = charge.get('payment_intent')
-        
-        if payment_intent_id:
-            payment = Payment.objects.filter(
-                stripe_payment_intent=payment_intent_id
-            ).first()
-            
-            if payment:
-                payment.refunded = True
-                payment.refund_amount = charge['amount_refunded'] / 100
-                payment.refunded_at = timezone.now()
-                payment.status = 'REFUNDED'
-                payment.save()
-                
-                # Update user enrollment status
-                user = payment.user
-                user.enrollment_status = 'WITHDRAWN'
-                user.save()
-                
-                log_audit(
-                    user,
-                    'ENROLLMENT',
-                    'Enrollment refunded',
-                    {'payment_intent_id': payment_intent_id, 'refund_amount': payment.refund_amount}
-                )
-                
-                # Send refund notification email
-                from utils.email import send_refund_notification_email
-                send_refund_notification_email(user, payment)
-                
-                logger.info(f"Refund processed for user {user.email}")
-    
-    # Handle checkout.session.completed (if using Checkout)
-    elif event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        payment_intent_id = session.get('payment_intent')
-        metadata = session.get('metadata', {})
-        is_anonymous = metadata.get('anonymous_checkout') == 'true'
-        
-        # For anonymous checkout, create account here
-        if is_anonymous and session.payment_status == 'paid':
-            customer_email = session.customer_details.get('email')
-            customer_name = session.customer_details.get('name')
-            track = metadata.get('track')
-            
-            if customer_email:
-                try:
-                    # Check if user exists
-                    user = User.objects.filter(email=customer_email).first()
-                    
-                    if not user:
-                        # Create user account
-                        from django.utils.crypto import get_random_string
-                        
-                        username = customer_email.split('@')[0]
-                        base_username = username
-                        counter = 1
-                        while User.objects.filter(username=username).exists():
-                            username = f"{base_username}{counter}"
-                            counter += 1
-                        
-                        password = get_random_string(16)
-                        
-                        user = User.objects.create_user(
-                            email=customer_email,
-                            username=username,
-                            password=password,
-                            name=customer_name or '',
-                            role='student',
-                            track=track,
-                            enrollment_status='ENROLLED',
-                            payment_verified=True,
-                            enrolled_at=timezone.now(),
-                            privacy_accepted=True,
-                            privacy_accepted_at=timezone.now(),
-                            privacy_version='1.0',
-                        )
-                        
-                        logger.info(f"Created user account for {customer_email}")
-                        
-                        # Create payment record
-                        Payment.objects.create(
-                            user=user,
-                            customer_email=customer_email,
-                            customer_name=customer_name or '',
-                            stripe_payment_intent=payment_intent_id or session['id'],
-                            amount=session['amount_total'] / 100,
-                            currency=session['currency'],
-                            status='SUCCEEDED',
-                            track=track,
-                            account_created=True,
-                        )
-                        
-                        # Provision tools
-                        try:
-                            from accounts.provisioning_service import ProvisioningService
-                            ProvisioningService.provision_tools_for_user(user)
-                            logger.info(f"Tools provisioned for {user.email}")
-                        except Exception as e:
-                            logger.error(f"Tool provisioning failed: {str(e)}")
-                        
-                        # Unlock first project
-                        if user.track:
-                            try:
-                                track_obj = Track.objects.get(code=user.track)
-                                first_project = track_obj.projects.filter(number=1).first()
-                                
-                                if first_project:
-                                    StudentProgress.objects.get_or_create(
-                                        student=user,
-                                        project=first_project,
-                                        step=None,
-                                        defaults={'started_at': timezone.now()}
-                                    )
-                                    
-                                    for step in first_project.steps.all():
-                                        StudentProgress.objects.get_or_create(
-                                            student=user,
-                                            project=first_project,
-                                            step=step
-                                        )
-                                    
-                                    logger.info(f"Unlocked Project 1 for user {user.email}")
-                            except Track.DoesNotExist:
-                                logger.error(f"Track {user.track} not found")
-                        
-                        # Log audit
-                        log_audit(
-                            user,
-                            'ENROLLMENT',
-                            f'Enrolled in {track} track via checkout',
-                            {'session_id': session['id'], 'amount': session['amount_total'] / 100}
-                        )
-                        
-                        # Auto-assign trainer based on track
-                        try:
-                            from utils.trainer_assignment import assign_trainer_to_student
-                            trainer = assign_trainer_to_student(user)
-                            if trainer:
-                                logger.info(f"Auto-assigned trainer {trainer.email} to student {user.email}")
-                        except Exception as e:
-                            logger.error(f"Failed to assign trainer: {str(e)}")
-                        
-                        # Send welcome email with password
-                        from utils.email import send_welcome_email
-                        send_welcome_email(user, password)
-                        
-                        # Send Discord notification
-                        try:
-                            from utils.discord import send_discord_notification
-                            send_discord_notification(
-                                title="💰 New Enrollment (Checkout)",
-                                description=f"**{user.name or user.username}** enrolled in **{track}** track",
-                                fields=[
-                                    {"name": "Email", "value": user.email, "inline": True},
-                                    {"name": "Amount", "value": f"${session['amount_total'] / 100}", "inline": True},
-                                    {"name": "Session ID", "value": session['id'][:20] + "...", "inline": False}
-                                ],
-                                color=0x10b981  # Green
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to send Discord notification: {str(e)}")
-                        
-                except Exception as e:
-                    logger.error(f"Failed to create account from checkout: {str(e)}")
-        
-        if payment_intent_id:
-            # Payment intent will be handled by payment_intent.succeeded event
-            logger.info(f"Checkout session completed: {session['id']}")
+    # Record and enqueue together so a recorded event is never left unqueued
+    with transaction.atomic():
+        stripe_event, created = record_event(json.loads(payload))
+        if not created:
+            logger.info(f"Duplicate Stripe event {event['id']} ({stripe_event.status}), ignoring")
+            return HttpResponse(status=200)
+        
+        enqueue(
+            'payments.stripe_event',
+            {'event_id': stripe_event.event_id},
+            idempotency_key=f"stripe:{event['id']}"
+        )
     
     return HttpResponse(status=200)
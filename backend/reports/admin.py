@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import Report
+
+
+@admin.register(Report)
+class ReportAdmin(admin.ModelAdmin):
+    list_display = ['id', 'report_type', 'format', 'status', 'row_count', 'size', 'requested_by', 'created_at']
+    list_filter = ['report_type', 'format', 'status', 'created_at']
+    search_fields = ['params_hash', 'checksum', 'file_path']
+    readonly_fields = [
+        'params_hash', 'file_path', 'size', 'row_count', 'checksum', 'error', 'created_at', 'completed_at'
+    ]
+    date_hierarchy = 'created_at'
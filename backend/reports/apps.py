@@ -0,0 +1,10 @@
+"""
+Reports App Configuration
+"""
+from django.apps import AppConfig
+
+
+class ReportsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'reports'
+    verbose_name = 'Reports'
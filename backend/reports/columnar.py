@@ -0,0 +1,239 @@
+"""
+Columnar (Parquet / Arrow IPC) analytics exports
+
+Each entry of EXPORT_SOURCES describes a table: the model, the columns to
+export and a cursor column that only grows when a row is added or changed.
+export_source() reads the queryset in chunks, converts each chunk to an
+Arrow record batch with a schema derived from the model fields (decimals stay
+decimals, datetimes are UTC timestamps, JSON is encoded as text) and writes
+the batches to
+
+    <APROVOVA_ANALYTICS_REPORTS_DIR>/<source>/export_date=YYYY-MM-DD/<file>
+
+so pyarrow.dataset, Superset and Jupyter can read a source directory as one
+partitioned dataset. Incremental exports start after the (cursor, id) pair
+stored in ExportWatermark and only move it once the file is complete, so a
+failed export is simply repeated.
+
+Cursor values are set when a row is saved, not when its transaction commits,
+so a row can become visible with a cursor below rows that were already
+exported. Incremental exports therefore stop REPORT_EXPORT_LAG_SECONDS before
+the current time; rows newer than that are left for a later export, by which
+time their transactions have committed. Rows updated after being exported appear
+again in a later partition; readers keep the latest row per id.
+
+pyarrow (in requirements.txt) is imported when an export runs, not at startup.
+"""
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+
+from compliance.models import AuditLog
+from core.report_utils import COLUMNAR_FORMATS, STREAM_CHUNK_SIZE, require_pyarrow, write_columnar
+from curriculum.models import StudentProgress, Submission
+from payments.models import Payment
+from quizzes.models import QuizAttempt
+
+from .models import ExportWatermark
+
+logger = logging.getLogger(__name__)
+
+EXPORT_SOURCES = {
+    'payments': {
+        'model': Payment,
+        'cursor': 'updated_at',
+        'columns': [
+            'id', 'user', 'amount', 'currency', 'status', 'track', 'payment_method',
+            'refunded', 'refund_amount', 'refunded_at', 'account_created', 'created_at', 'updated_at',
+        ],
+    },
+    'student_progress': {
+        'model': StudentProgress,
+        'cursor': 'updated_at',
+        'columns': [
+            'id', 'student', 'project', 'step', 'is_completed', 'completed_at', 'started_at',
+            'github_pr_merged', 'is_approved', 'approved_at', 'approved_by', 'needs_revision',
+            'created_at', 'updated_at',
+        ],
+    },
+    'submissions': {
+        'model': Submission,
+        'cursor': 'updated_at',
+        'columns': [
+            'id', 'student', 'deliverable', 'status', 'auto_created', 'github_pr_number',
+            'reviewed_by', 'reviewed_at', 'submitted_at', 'updated_at',
+        ],
+    },
+    'quiz_attempts': {
+        # Attempts change until they are submitted, so only submitted ones are exported
+        'model': QuizAttempt,
+        'cursor': 'submitted_at',
+        'filter': {'status': 'SUBMITTED'},
+        'columns': ['id', 'student', 'quiz', 'status', 'score', 'started_at', 'submitted_at'],
+    },
+    'audit_logs': {
+        'model': AuditLog,
+        'cursor': 'timestamp',
+        'columns': ['id', 'user', 'action', 'resource', 'details', 'timestamp'],
+    },
+}
+
+
+def _arrow_type(pa, field):
+    """Arrow type for a model field"""
+    if field.is_relation:
+        return pa.int64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def export_schema(source):
+    """pyarrow.Schema of an export source"""
+    pa = require_pyarrow()
+    config = EXPORT_SOURCES[source]
+    fields = []
+    for name in config['columns']:
+        field = config['model']._meta.get_field(name)
+        fields.append(pa.field(name, _arrow_type(pa, field), nullable=name != 'id'))
+    return pa.schema(fields)
+
+
+def _columns(source):
+    """values_list() names for the export columns (FKs as their *_id column)"""
+    model = EXPORT_SOURCES[source]['model']
+    return [model._meta.get_field(name).attname for name in EXPORT_SOURCES[source]['columns']]
+
+
+def iter_batches(queryset, source, schema, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Read an export queryset in chunks and yield typed record batches
+
+    Yields:
+        (pyarrow.RecordBatch, last row tuple) pairs
+    """
+    pa = require_pyarrow()
+    json_columns = {
+        index for index, name in enumerate(EXPORT_SOURCES[source]['columns'])
+        if isinstance(EXPORT_SOURCES[source]['model']._meta.get_field(name), models.JSONField)
+    }
+
+    chunk = []
+    for row in queryset.values_list(*_columns(source)).iterator(chunk_size=chunk_size):
+        if json_columns:
+            row = tuple(
+                json.dumps(value, default=str) if index in json_columns and value is not None else value
+                for index, value in enumerate(row)
+            )
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield _to_batch(pa, chunk, schema), chunk[-1]
+            chunk = []
+    if chunk:
+        yield _to_batch(pa, chunk, schema), chunk[-1]
+
+
+def _to_batch(pa, rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def export_source(source, format='parquet', incremental=True, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Export one source table to a Parquet or Arrow IPC file
+
+    Args:
+        source: key of EXPORT_SOURCES
+        format: 'parquet' or 'arrow'
+        incremental: only export rows after the stored watermark (and older than
+            REPORT_EXPORT_LAG_SECONDS) and advance it; otherwise write a full
+            snapshot and leave the watermark alone
+        chunk_size: rows per database round trip and record batch
+
+    Returns:
+        dict: path (None when there were no new rows) and rows written
+    """
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"Unknown export source: {source}")
+    if format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported columnar format: {format}")
+
+    config = EXPORT_SOURCES[source]
+    cursor = config['cursor']
+    schema = export_schema(source)
+    cursor_index = config['columns'].index(cursor)
+    id_index = config['columns'].index('id')
+
+    now = datetime.now(dt_timezone.utc)
+    directory = Path(settings.APROVOVA_ANALYTICS_REPORTS_DIR) / source / f"export_date={now:%Y-%m-%d}"
+    kind = 'incremental' if incremental else 'full'
+    path = directory / f"{source}_{kind}_{now:%Y%m%dT%H%M%S%f}.{COLUMNAR_FORMATS[format]}"
+
+    with transaction.atomic():
+        queryset = config['model'].objects.filter(**config.get('filter', {})).filter(**{f'{cursor}__isnull': False})
+
+        watermark = None
+        if incremental:
+            ExportWatermark.objects.get_or_create(source=source)
+            # Serializes concurrent exports of the same source
+            watermark = ExportWatermark.objects.select_for_update().get(source=source)
+            queryset = queryset.filter(
+                **{f'{cursor}__lt': now - timedelta(seconds=settings.REPORT_EXPORT_LAG_SECONDS)}
+            )
+            if watermark.cursor_value is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{cursor}__gt': watermark.cursor_value})
+                    | Q(**{cursor: watermark.cursor_value, 'id__gt': watermark.last_id})
+                )
+
+        last_row = None
+
+        def batches():
+            nonlocal last_row
+            for batch, last_row in iter_batches(queryset.order_by(cursor, 'id'), source, schema, chunk_size):
+                yield batch
+
+        # Peek so an empty export writes no file
+        batch_iter = batches()
+        first = next(batch_iter, None)
+        if first is None:
+            return {'source': source, 'path': None, 'rows': 0}
+
+        def all_batches():
+            yield first
+            yield from batch_iter
+
+        rows = write_columnar(all_batches(), schema, path, format)
+
+        if watermark is not None:
+            watermark.cursor_value = last_row[cursor_index]
+            watermark.last_id = last_row[id_index]
+            watermark.rows_exported += rows
+            watermark.last_file = str(path)
+            watermark.save()
+
+    logger.info(f"Exported {rows} {source} rows to {path}")
+    return {'source': source, 'path': str(path), 'rows': rows}
+
+
+def reset_watermark(source):
+    """Make the next incremental export of a source start from the beginning"""
+    return ExportWatermark.objects.filter(source=source).delete()[0]
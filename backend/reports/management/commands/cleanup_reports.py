@@ -0,0 +1,32 @@
+"""
+Django management command to delete expired reports
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reports.services import cleanup_reports, sweep_unindexed_reports
+
+
+class Command(BaseCommand):
+    help = 'Delete report files and index rows (and unindexed report files) older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.REPORT_RETENTION_DAYS,
+            help=f'Days to keep reports (default: {settings.REPORT_RETENTION_DAYS})'
+        )
+        parser.add_argument(
+            '--type',
+            help='Only clean up this report type'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"🧹 Deleting reports older than {options['days']} days...")
+        deleted = cleanup_reports(options['days'], report_type=options['type'])
+        unindexed = sweep_unindexed_reports(options['days'], report_type=options['type'])
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Reports deleted: {deleted}'))
+        self.stdout.write(f'🗑️  Unindexed files deleted: {unindexed}')
+        self.stdout.write('='*50)
@@ -0,0 +1,68 @@
+"""
+Django management command to export analytics tables as Parquet or Arrow files
+"""
+from django.core.management.base import BaseCommand, CommandError
+from reports.columnar import EXPORT_SOURCES, export_source, reset_watermark
+
+
+class Command(BaseCommand):
+    help = 'Write new payment, progress, submission, quiz and audit rows to Parquet/Arrow partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            action='append',
+            choices=sorted(EXPORT_SOURCES),
+            help='Source table to export (repeatable; default: all)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['parquet', 'arrow'],
+            default='parquet',
+            help='File format (default: parquet)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Export every row as a snapshot instead of rows since the last export'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Forget the last export position so the next incremental export starts over'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows per batch (default: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        sources = options['source'] or sorted(EXPORT_SOURCES)
+        total = 0
+
+        for source in sources:
+            if options['reset']:
+                reset_watermark(source)
+                self.stdout.write(f'↩️  Reset export position for {source}')
+
+            try:
+                result = export_source(
+                    source,
+                    format=options['format'],
+                    incremental=not options['full'],
+                    chunk_size=options['chunk_size']
+                )
+            except ImportError as e:
+                raise CommandError(str(e))
+
+            total += result['rows']
+            if result['path']:
+                self.stdout.write(self.style.SUCCESS(f"✅ {source}: {result['rows']} rows -> {result['path']}"))
+            else:
+                self.stdout.write(f'{source}: no new rows')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(f'✅ Rows exported: {total}'))
+        self.stdout.write('='*50)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_export_watermark'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines'), ('json', 'JSON'), ('parquet', 'Parquet'), ('arrow', 'Arrow IPC')], max_length=10),
+        ),
+    ]
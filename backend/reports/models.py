@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import models
+
+
+class Report(models.Model):
+    """A generated report file, indexed so listing never touches the filesystem"""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+        ('json', 'JSON'),
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC'),
+    ]
+
+    report_type = models.CharField(max_length=50)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    # sha256 of type, format and params; identical requests share a report
+    params_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reports'
+    )
+
+    file_path = models.CharField(max_length=500, blank=True)
+    size = models.PositiveBigIntegerField(default=0)  # bytes on disk (gzip)
+    row_count = models.PositiveIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True)  # sha256 of the file
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['report_type', 'status', 'created_at']),
+            models.Index(fields=['params_hash', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.report_type} {self.format} report #{self.pk} ({self.status})"
+
+
+class ExportWatermark(models.Model):
+    """Position of the last incremental columnar export of a source table"""
+    source = models.CharField(max_length=50, unique=True)
+    # Cursor value and primary key of the last exported row; the next export
+    # reads rows strictly after this pair
+    cursor_value = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    rows_exported = models.PositiveBigIntegerField(default=0)
+    last_file = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} exported up to {self.cursor_value} (#{self.last_id})"
@@ -0,0 +1,190 @@
+"""
+Background report generation
+
+request_report() records a Report and queues 'reports.generate'; a worker
+runs build_report(), which streams the rows into a gzip file and fills in the
+index fields (size, row count, checksum). A request identical to one made
+within REPORT_CACHE_TTL seconds gets that report back instead of a new job.
+Listing and cleanup go through the Report table, which ReportGenerator also
+fills for the files its generate_* methods write; sweep_unindexed_reports()
+removes anything else left in the report directories by age.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.report_utils import ReportGenerator
+from jobs.queue import enqueue
+
+from .models import Report
+from .sources import REPORT_SOURCES, validate_params
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = ('csv', 'jsonl')
+
+
+def params_hash(report_type, format, params):
+    """Stable hash of a report request"""
+    canonical = json.dumps(
+        {'type': report_type, 'format': format, 'params': params},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def request_report(report_type, format='csv', params=None, user=None):
+    """
+    Return a cached report for this request or queue a new one
+
+    Args:
+        report_type: key of REPORT_SOURCES
+        format: 'csv' or 'jsonl'
+        params: filters accepted by the report source
+        user: requesting user
+
+    Returns:
+        tuple: (Report, created) where created is False for a cache hit
+
+    Raises:
+        ValueError: unknown report type, format or filter
+    """
+    if format not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {format}")
+    params = validate_params(report_type, params or {})
+    digest = params_hash(report_type, format, params)
+
+    since = timezone.now() - timedelta(seconds=settings.REPORT_CACHE_TTL)
+    cached = (
+        Report.objects
+        .filter(params_hash=digest, created_at__gte=since)
+        .exclude(status='FAILED')
+        .order_by('-created_at')
+        .first()
+    )
+    if cached and (cached.status != 'READY' or os.path.exists(cached.file_path)):
+        return cached, False
+
+    with transaction.atomic():
+        report = Report.objects.create(
+            report_type=report_type,
+            format=format,
+            params=params,
+            params_hash=digest,
+            requested_by=user,
+        )
+        enqueue('reports.generate', {'report_id': report.id}, idempotency_key=f"report:{report.id}")
+
+    return report, True
+
+
+def build_report(report_id):
+    """
+    Generate the file for a queued report and record it in the index
+
+    Raises whatever the source or writer raised, after marking the report FAILED,
+    so the job is retried.
+    """
+    report = Report.objects.get(pk=report_id)
+    if report.status == 'READY':
+        return report
+
+    report.status = 'RUNNING'
+    report.error = ''
+    report.save(update_fields=['status', 'error'])
+
+    rows, _ = REPORT_SOURCES[report.report_type]
+    generator = ReportGenerator(report.report_type)
+    filename = f"{report.report_type}_report_{report.id}_{report.created_at:%Y%m%d_%H%M%S}.{report.format}"
+
+    try:
+        result = generator.write_report(rows(report.params), report.format, filename=filename, compress=True)
+    except Exception as e:
+        report.status = 'FAILED'
+        report.error = str(e)
+        report.completed_at = timezone.now()
+        report.save(update_fields=['status', 'error', 'completed_at'])
+        raise
+
+    report.file_path = result['path']
+    report.size = result['size']
+    report.row_count = result['rows']
+    report.checksum = result['checksum']
+    report.status = 'READY'
+    report.completed_at = timezone.now()
+    report.save(update_fields=['file_path', 'size', 'row_count', 'checksum', 'status', 'completed_at'])
+
+    logger.info(f"Built {report}: {report.row_count} rows, {report.size} bytes")
+    return report
+
+
+def cleanup_reports(days=None, report_type=None):
+    """
+    Delete reports (files and index rows) older than the retention period
+
+    Args:
+        days: retention in days (default: REPORT_RETENTION_DAYS)
+        report_type: only clean up this report type
+
+    Returns:
+        int: number of reports deleted
+    """
+    days = settings.REPORT_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    reports = Report.objects.filter(created_at__lt=cutoff)
+    if report_type:
+        reports = reports.filter(report_type=report_type)
+    return delete_reports(reports)
+
+
+def delete_reports(reports):
+    """
+    Delete the files and index rows of a queryset of reports
+
+    A report whose file cannot be removed keeps its row, so it is retried later.
+
+    Returns:
+        int: number of reports deleted
+    """
+    ids = []
+    for report_id, file_path in reports.values_list('id', 'file_path'):
+        if file_path:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error deleting report file {file_path}: {e}")
+                continue
+        ids.append(report_id)
+
+    Report.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def sweep_unindexed_reports(days=None, report_type=None):
+    """
+    Delete files in the report directories that have no Report row and are older than the retention period
+
+    Returns:
+        int: number of files deleted
+    """
+    days = settings.REPORT_RETENTION_DAYS if days is None else days
+    report_types = [report_type] if report_type else ['user', 'payment', 'batch', 'analytics']
+
+    deleted = 0
+    swept = set()
+    for name in report_types:
+        generator = ReportGenerator(name)
+        if generator.base_dir in swept:
+            continue
+        swept.add(generator.base_dir)
+        deleted += generator.sweep_unindexed_files(days)
+    return deleted
@@ -0,0 +1,60 @@
+"""
+Row sources for background reports
+
+Each source maps a report type to a function that takes validated params and
+returns a values() queryset, which ReportGenerator streams to disk in chunks.
+"""
+from django.contrib.auth import get_user_model
+
+from payments.models import Payment
+
+
+def user_rows(params):
+    """Users with their enrollment details"""
+    User = get_user_model()
+    users = User.objects.all()
+    for field in ('role', 'track', 'enrollment_status'):
+        if params.get(field):
+            users = users.filter(**{field: params[field]})
+    return users.order_by('id').values(
+        'id', 'email', 'name', 'role', 'track', 'enrollment_status',
+        'payment_verified', 'enrolled_at', 'created_at'
+    )
+
+
+def payment_rows(params):
+    """Payments with the paying customer"""
+    payments = Payment.objects.all()
+    for field in ('status', 'track'):
+        if params.get(field):
+            payments = payments.filter(**{field: params[field]})
+    return payments.order_by('id').values(
+        'id', 'customer_email', 'amount', 'currency', 'status', 'track',
+        'refunded', 'refund_amount', 'created_at'
+    )
+
+
+# report_type -> (row function, accepted filter params)
+REPORT_SOURCES = {
+    'user': (user_rows, {'role', 'track', 'enrollment_status'}),
+    'payment': (payment_rows, {'status', 'track'}),
+}
+
+
+def validate_params(report_type, params):
+    """
+    Check a report request and return its params as a plain dict of strings
+
+    Raises:
+        ValueError: unknown report type or filter
+    """
+    if report_type not in REPORT_SOURCES:
+        raise ValueError(f"Unknown report type: {report_type}")
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+
+    allowed = REPORT_SOURCES[report_type][1]
+    unknown = set(params) - allowed
+    if unknown:
+        raise ValueError(f"Unknown filters for {report_type} report: {', '.join(sorted(unknown))}")
+    return {key: str(value) for key, value in params.items() if value not in (None, '')}
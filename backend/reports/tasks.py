@@ -0,0 +1,17 @@
+"""
+Background jobs for report generation
+"""
+from jobs.queue import job
+
+from .services import build_report
+
+
+@job('reports.generate')
+def generate_report(payload):
+    """
+    Build a report queued by request_report()
+
+    Args:
+        payload: {'report_id': ...}
+    """
+    build_report(payload['report_id'])
@@ -0,0 +1,239 @@
+"""
+Tests for background report generation
+"""
+import csv
+import gzip
+import hashlib
+import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from compliance.models import AuditLog
+from core.report_utils import ReportGenerator
+from jobs.models import Job
+from jobs.worker import run_pending_jobs
+
+from payments.models import Payment
+
+from .columnar import export_source
+from .models import ExportWatermark, Report
+from .services import cleanup_reports, request_report, sweep_unindexed_reports
+
+User = get_user_model()
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(APROVOVA_USER_REPORTS_DIR=Path(self.tmp.name))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(
+            username='reportadmin', email='reportadmin@example.com', password='pass', role='admin'
+        )
+        for i in range(3):
+            User.objects.create(username=f'student{i}', email=f'student{i}@example.com', track='DP')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_report_is_built_in_background_and_indexed(self):
+        response = self.client.post(
+            '/api/reports/', {'type': 'user', 'format': 'csv', 'params': {'role': 'student'}}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        report_id = response.data['report']['id']
+        self.assertEqual(Report.objects.get(pk=report_id).status, 'PENDING')
+
+        run_pending_jobs('test-worker')
+
+        report = Report.objects.get(pk=report_id)
+        self.assertEqual(report.status, 'READY')
+        self.assertEqual(report.row_count, 3)
+        self.assertTrue(report.file_path.endswith('.csv.gz'))
+        with open(report.file_path, 'rb') as report_file:
+            self.assertEqual(hashlib.sha256(report_file.read()).hexdigest(), report.checksum)
+        with gzip.open(report.file_path, 'rt', newline='') as report_file:
+            rows = list(csv.DictReader(report_file))
+        self.assertEqual(sorted(row['email'] for row in rows), [f'student{i}@example.com' for i in range(3)])
+
+        download = self.client.get(f'/api/reports/{report_id}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download['Content-Type'], 'application/gzip')
+        self.assertEqual(download['X-Checksum-SHA256'], report.checksum)
+
+        # Listing reads the index, not the filesystem
+        with self.assertNumQueries(1):
+            listed = ReportGenerator('user').list_reports()
+        self.assertEqual([entry['rows'] for entry in listed], [3])
+
+    def test_identical_request_within_ttl_returns_cached_report(self):
+        first, created = request_report('user', 'jsonl', {'track': 'DP'}, user=self.admin)
+        self.assertTrue(created)
+        again, created = request_report('user', 'jsonl', {'track': 'DP'}, user=self.admin)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(Job.objects.filter(name='reports.generate').count(), 1)
+
+        _, created = request_report('user', 'jsonl', {'track': 'FSD'}, user=self.admin)
+        self.assertTrue(created)
+
+        Report.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        _, created = request_report('user', 'jsonl', {'track': 'DP'}, user=self.admin)
+        self.assertTrue(created)
+
+    def test_invalid_requests_are_rejected(self):
+        response = self.client.post('/api/reports/', {'type': 'secrets'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/reports/', {'type': 'user', 'params': {'password': 'x'}}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        student = User.objects.get(username='student0')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.get('/api/reports/').status_code, 403)
+
+    def test_cleanup_deletes_old_files_and_rows(self):
+        report, _ = request_report('user', 'csv', user=self.admin)
+        run_pending_jobs('test-worker')
+        report.refresh_from_db()
+        Report.objects.filter(pk=report.pk).update(created_at=timezone.now() - timedelta(days=100))
+
+        self.assertEqual(cleanup_reports(90), 1)
+        self.assertFalse(Report.objects.exists())
+        with self.assertRaises(FileNotFoundError):
+            open(report.file_path)
+
+
+    def test_generator_files_are_indexed_and_unindexed_files_swept(self):
+        import os
+
+        generator = ReportGenerator('user')
+        path = generator.generate_csv([{'email': 'a@example.com'}, {'email': 'b@example.com'}])
+
+        listed = generator.list_reports()
+        self.assertEqual([(entry['path'], entry['rows']) for entry in listed], [(path, 2)])
+
+        stray_dir = Path(self.tmp.name) / 'pdf'
+        stray_dir.mkdir()
+        old_stray, new_stray = stray_dir / 'old.pdf', stray_dir / 'new.pdf'
+        old_stray.write_text('x')
+        new_stray.write_text('x')
+        hundred_days_ago = (timezone.now() - timedelta(days=100)).timestamp()
+        for file_path in (old_stray, Path(path)):
+            os.utime(file_path, (hundred_days_ago, hundred_days_ago))
+
+        # Only the old file without an index row goes; the indexed one follows its row's age
+        self.assertEqual(sweep_unindexed_reports(90, report_type='user'), 1)
+        self.assertFalse(old_stray.exists())
+        self.assertTrue(new_stray.exists())
+        self.assertTrue(Path(path).exists())
+
+    def test_delete_report_removes_file_and_index_row(self):
+        generator = ReportGenerator('user')
+        path = generator.generate_csv([{'email': 'a@example.com'}])
+
+        self.assertTrue(generator.delete_report(Path(path).name))
+        self.assertFalse(Path(path).exists())
+        self.assertEqual(generator.list_reports(), [])
+        self.assertFalse(Report.objects.exists())
+        self.assertFalse(generator.delete_report(Path(path).name))
+
+
+@unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+class ColumnarExportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(
+            APROVOVA_ANALYTICS_REPORTS_DIR=Path(self.tmp.name), REPORT_EXPORT_LAG_SECONDS=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create(username='payer', email='payer@example.com', track='DP')
+        for i in range(5):
+            Payment.objects.create(
+                user=self.user, stripe_payment_intent=f'pi_{i}', amount=Decimal('49.99'), status='SUCCEEDED'
+            )
+
+    def test_parquet_export_is_typed_and_incremental(self):
+        import pyarrow.parquet as pq
+
+        result = export_source('payments', 'parquet', chunk_size=2)
+        self.assertEqual(result['rows'], 5)
+        self.assertIn('export_date=', result['path'])
+
+        table = pq.read_table(result['path'])
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.schema.field('amount').type, pyarrow.decimal128(10, 2))
+        self.assertEqual(str(table.schema.field('created_at').type), 'timestamp[us, tz=UTC]')
+        self.assertEqual(table.column('user').to_pylist(), [self.user.id] * 5)
+        self.assertEqual(table.column('amount').to_pylist()[0], Decimal('49.99'))
+
+        # Nothing new: no file, watermark unchanged
+        self.assertEqual(export_source('payments', 'parquet'), {'source': 'payments', 'path': None, 'rows': 0})
+
+        updated = Payment.objects.get(stripe_payment_intent='pi_1')
+        updated.status = 'REFUNDED'
+        updated.save()
+        Payment.objects.create(user=self.user, stripe_payment_intent='pi_new', amount=Decimal('10.00'))
+
+        result = export_source('payments', 'parquet')
+        table = pq.read_table(result['path'])
+        self.assertEqual(
+            sorted(table.column('status').to_pylist()), ['CREATED', 'REFUNDED']
+        )
+        self.assertEqual(ExportWatermark.objects.get(source='payments').rows_exported, 7)
+
+    def test_arrow_export_of_audit_logs_and_full_snapshot(self):
+        AuditLog.objects.create(user=self.user, action='LOGIN', details={'ip': 'x'})
+        AuditLog.objects.create(user=None, action='SIGNUP')
+
+        result = export_source('audit_logs', 'arrow')
+        with pyarrow.memory_map(result['path']) as source:
+            table = pyarrow.ipc.open_file(source).read_all()
+        self.assertEqual(table.column('action').to_pylist(), ['LOGIN', 'SIGNUP'])
+        self.assertEqual(table.column('user').to_pylist(), [self.user.id, None])
+        self.assertEqual(table.column('details').to_pylist()[0], '{"ip": "x"}')
+
+        # A full snapshot re-reads everything and leaves the watermark alone
+        self.assertEqual(export_source('audit_logs', 'arrow', incremental=False)['rows'], 2)
+        self.assertEqual(ExportWatermark.objects.get(source='audit_logs').rows_exported, 2)
+
+    @override_settings(REPORT_EXPORT_LAG_SECONDS=300)
+    def test_incremental_export_waits_for_late_commits(self):
+        import pyarrow.parquet as pq
+
+        Payment.objects.filter(stripe_payment_intent__in=['pi_0', 'pi_1']).update(
+            updated_at=timezone.now() - timedelta(minutes=10)
+        )
+        result = export_source('payments', 'parquet')
+        self.assertEqual(result['rows'], 2)
+
+        # A transaction that saved this row earlier commits only now: its cursor is
+        # below the rows that were skipped, but not below the watermark
+        Payment.objects.filter(stripe_payment_intent='pi_2').update(
+            updated_at=timezone.now() - timedelta(minutes=8)
+        )
+        result = export_source('payments', 'parquet')
+        self.assertEqual(pq.read_table(result['path']).num_rows, 1)
+
+        # Recent rows are not lost, just exported once they are old enough
+        self.assertEqual(export_source('payments', 'parquet')['rows'], 0)
+        with override_settings(REPORT_EXPORT_LAG_SECONDS=0):
+            self.assertEqual(export_source('payments', 'parquet')['rows'], 2)
+        self.assertEqual(ExportWatermark.objects.get(source='payments').rows_exported, 5)
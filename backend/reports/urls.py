@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import reports, report_detail, download_report
+
+urlpatterns = [
+    path("", reports, name="reports"),
+    path("<int:report_id>/", report_detail, name="report-detail"),
+    path("<int:report_id>/download/", download_report, name="report-download"),
+]
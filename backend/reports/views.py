@@ -0,0 +1,144 @@
+"""
+Report API views
+
+Reports are built in the background: POST queues one (or returns a recent
+identical report), GET <id>/ polls its status and <id>/download/ serves the
+gzip file once it is ready.
+"""
+from django.http import FileResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status as http_status
+
+from .models import Report
+from .services import request_report
+
+REPORT_FIELDS = [
+    'id', 'report_type', 'format', 'params', 'status', 'size', 'row_count',
+    'checksum', 'error', 'created_at', 'completed_at'
+]
+
+
+def _is_admin(user):
+    return user.role in ['admin', 'superadmin']
+
+
+def _serialize(report):
+    data = {field: getattr(report, field) for field in REPORT_FIELDS}
+    data['download_url'] = f"/api/reports/{report.id}/download/" if report.status == 'READY' else None
+    return data
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def reports(request):
+    """
+    List indexed reports or request a new one
+    Only accessible by admin roles
+
+    GET query params:
+    - type: report type filter
+    - format: csv or jsonl
+    - limit: max reports to return (default: 50)
+    POST body:
+    - type: 'user' or 'payment'
+    - format: 'csv' or 'jsonl' (default: csv)
+    - params: filters for the report source
+    """
+    if not _is_admin(request.user):
+        return Response(
+            {"error": "Permission denied"},
+            status=http_status.HTTP_403_FORBIDDEN
+        )
+
+    if request.method == 'GET':
+        queryset = Report.objects.all()
+        if request.query_params.get('type'):
+            queryset = queryset.filter(report_type=request.query_params['type'])
+        if request.query_params.get('format'):
+            queryset = queryset.filter(format=request.query_params['format'])
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except ValueError:
+            limit = 50
+
+        return Response({
+            "success": True,
+            "reports": [_serialize(report) for report in queryset.order_by('-created_at')[:limit]]
+        })
+
+    try:
+        report, created = request_report(
+            request.data.get('type'),
+            format=request.data.get('format', 'csv'),
+            params=request.data.get('params') or {},
+            user=request.user
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    return Response(
+        {"success": True, "cached": not created, "report": _serialize(report)},
+        status=http_status.HTTP_202_ACCEPTED if created else http_status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def report_detail(request, report_id):
+    """
+    Get the status of a report
+    Only accessible by admin roles
+    """
+    if not _is_admin(request.user):
+        return Response(
+            {"error": "Permission denied"},
+            status=http_status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        report = Report.objects.get(pk=report_id)
+    except Report.DoesNotExist:
+        return Response({"error": "Report not found"}, status=http_status.HTTP_404_NOT_FOUND)
+
+    return Response({"success": True, "report": _serialize(report)})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_report(request, report_id):
+    """
+    Download a ready report as a gzip file
+    Only accessible by admin roles
+    """
+    if not _is_admin(request.user):
+        return Response(
+            {"error": "Permission denied"},
+            status=http_status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        report = Report.objects.get(pk=report_id)
+    except Report.DoesNotExist:
+        return Response({"error": "Report not found"}, status=http_status.HTTP_404_NOT_FOUND)
+
+    if report.status != 'READY':
+        return Response(
+            {"error": f"Report is {report.status.lower()}"},
+            status=http_status.HTTP_409_CONFLICT
+        )
+
+    try:
+        report_file = open(report.file_path, 'rb')
+    except FileNotFoundError:
+        return Response({"error": "Report file no longer exists"}, status=http_status.HTTP_410_GONE)
+
+    response = FileResponse(
+        report_file,
+        as_attachment=True,
+        filename=report.file_path.rsplit('/', 1)[-1],
+        content_type='application/gzip'
+    )
+    response['X-Checksum-SHA256'] = report.checksum
+    return response
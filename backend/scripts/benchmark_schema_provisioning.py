@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Benchmark student schema provisioning against a local Postgres
+
+Compares the previous approach (a new admin connection and several DDL round
+trips per student) with the pooled, batched create_schemas(), with and
+without copying the sample tables from the template schema. Every schema and
+role the benchmark creates is dropped again (the template schema is kept).
+
+Usage:
+    STUDENT_DB_HOST=localhost STUDENT_DB_NAME=postgres \\
+        python scripts/benchmark_schema_provisioning.py --students 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+import psycopg2
+from psycopg2 import sql
+from django.conf import settings
+from django.utils.crypto import get_random_string
+
+from accounts.postgres_provisioning import admin_connection, close_pool, create_schemas
+from accounts.student_db_template import TEMPLATE_SCHEMA, ensure_template, template_tables
+
+PREFIX = 'bench'
+
+
+def connect():
+    conn = psycopg2.connect(
+        host=settings.STUDENT_DB_HOST,
+        port=settings.STUDENT_DB_PORT,
+        database=settings.STUDENT_DB_NAME,
+        user=settings.STUDENT_DB_ADMIN_USER,
+        password=settings.STUDENT_DB_ADMIN_PASSWORD
+    )
+    conn.autocommit = True
+    return conn
+
+
+def specs(count, run):
+    return [
+        (f"{PREFIX}_{run}_schema_{i}", f"{PREFIX}_{run}_role_{i}", get_random_string(32))
+        for i in range(count)
+    ]
+
+
+def provision_one_by_one(students):
+    """The previous per-student flow: connect, create schema, create role, grant"""
+    for schema_name, username, password in students:
+        conn = connect()
+        cursor = conn.cursor()
+        schema, role = sql.Identifier(schema_name), sql.Identifier(username)
+        cursor.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(schema))
+        cursor.execute(sql.SQL("CREATE ROLE {} WITH LOGIN PASSWORD %s").format(role), [password])
+        cursor.execute(sql.SQL("""
+            GRANT USAGE ON SCHEMA {schema} TO {role};
+            GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA {schema} TO {role};
+            GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA {schema} TO {role};
+            ALTER DEFAULT PRIVILEGES IN SCHEMA {schema} GRANT ALL ON TABLES TO {role};
+            ALTER DEFAULT PRIVILEGES IN SCHEMA {schema} GRANT ALL ON SEQUENCES TO {role};
+        """).format(schema=schema, role=role))
+        cursor.close()
+        conn.close()
+
+
+def cleanup(students):
+    for start in range(0, len(students), 50):
+        with admin_connection() as conn:
+            with conn.cursor() as cursor:
+                for schema_name, username, _ in students[start:start + 50]:
+                    cursor.execute(
+                        sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE; DROP ROLE IF EXISTS {}").format(
+                            sql.Identifier(schema_name), sql.Identifier(username)
+                        )
+                    )
+
+
+def template_rows():
+    with admin_connection() as conn:
+        with conn.cursor() as cursor:
+            total = 0
+            for table in template_tables():
+                cursor.execute(sql.SQL("SELECT count(*) FROM {}.{}").format(
+                    sql.Identifier(TEMPLATE_SCHEMA), sql.Identifier(table)
+                ))
+                total += cursor.fetchone()[0]
+    return total
+
+
+def timed(label, func, students):
+    start = time.perf_counter()
+    func(students)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(students):>5} schemas  {elapsed:7.2f}s  {len(students) / elapsed:8.1f} schemas/s")
+    cleanup(students)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=settings.STUDENT_DB_PROVISION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    print(f"Postgres {settings.STUDENT_DB_HOST}:{settings.STUDENT_DB_PORT}/{settings.STUDENT_DB_NAME}")
+    print('='*70)
+    baseline = timed('connection per student', provision_one_by_one, specs(args.students, 'a'))
+    pooled = timed(
+        f'pooled, batches of {args.batch_size}',
+        lambda students: create_schemas(students, batch_size=args.batch_size, use_template=False),
+        specs(args.students, 'b')
+    )
+    with admin_connection() as conn:
+        template_version = ensure_template(conn)
+    templated = timed(
+        f'pooled + template v{template_version}',
+        lambda students: create_schemas(students, batch_size=args.batch_size, use_template=True),
+        specs(args.students, 'c')
+    )
+    print('='*70)
+    print(f"Speedup: {baseline / pooled:.1f}x (empty schemas)")
+    print(f"With {template_rows()} sample rows per student: {args.students / templated:.1f} schemas/s")
+    close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,49 @@
 """
 Discord notification utilities
 """
-import requests
 from django.conf import settings
 
 
-def send_discord_notification(message, embeds=None):
+def send_discord_notification(message=None, embeds=None, title=None, description=None, fields=None, color=None):
     """
-    Send a message to Discord via webhook
+    Queue a message for the Discord webhook
+    
+    The notification outbox sends it from the job worker, merged with any
+    other Discord messages queued around the same time.
     
     Args:
         message: Plain text message (content)
         embeds: Optional rich formatting embeds (list of embed objects)
+        title, description, fields, color: Shorthand for a single embed
         
     Returns:
-        bool: Success status
+        bool: True if the message was queued
     """
     webhook_url = getattr(settings, 'DISCORD_WEBHOOK_URL', None)
     
     if not webhook_url:
-        print(f"Discord webhook not configured. Message: {message}")
+        print(f"Discord webhook not configured. Message: {message or title}")
         return False
     
     try:
-        payload = {
-            "content": message
-        }
+        from notifications.outbox import queue_notification
+        
+        payload = {}
+        
+        if message:
+            payload["content"] = message
+        
+        if title or description or fields:
+            embed = {"title": title, "description": description, "fields": fields or []}
+            if color is not None:
+                embed["color"] = color
+            embeds = (embeds or []) + [{key: value for key, value in embed.items() if value is not None}]
         
         if embeds:
             payload["embeds"] = embeds
         
-        response = requests.post(
-            webhook_url,
-            json=payload,
-            timeout=5
-        )
-        
-        return response.status_code in [200, 204]
+        queue_notification('discord', payload)
+        return True
         
     except Exception as e:
         print(f"Discord notification error: {e}")
@@ -1,7 +1,7 @@
 """
 Email utility functions for ApraNova LMS
 """
-from django.core.mail import send_mail, EmailMultipleAlternatives
+from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 import logging
@@ -146,7 +146,7 @@ The ApraNova Team
 """
         
         # Send email
-        email = EmailMultipleAlternatives(
+        email = EmailMultiAlternatives(
             subject=subject,
             body=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
@@ -163,18 +163,25 @@ The ApraNova Team
         return False
 
 
-def send_payment_confirmation_email(user, payment):
+def send_payment_confirmation_email(user, payment, idempotency_key=None):
     """
-    Send payment confirmation email
+    Queue payment confirmation email
+    
+    The notification outbox sends it from the job worker once the caller's
+    transaction commits, so a rolled-back or retried payment handler sends
+    nothing twice.
     
     Args:
         user: User instance
         payment: Payment instance
+        idempotency_key: optional outbox key, so a replayed event queues it once
     
     Returns:
-        bool: True if email sent successfully
+        bool: True if the email was queued
     """
     try:
+        from notifications.outbox import queue_email
+        
         track_name = "Data Professional" if payment.track == "DP" else "Full Stack Development"
         
         subject = "Payment Confirmation - ApraNova LMS"
@@ -247,36 +254,32 @@ The ApraNova Team
 </html>
 """
         
-        email = EmailMultipleAlternatives(
-            subject=subject,
-            body=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email]
-        )
-        email.attach_alternative(html_message, "text/html")
-        email.send(fail_silently=False)
+        queue_email(subject, message, [user.email], html=html_message, idempotency_key=idempotency_key)
         
-        logger.info(f"Payment confirmation email sent to {user.email}")
+        logger.info(f"Payment confirmation email queued for {user.email}")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send payment confirmation to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue payment confirmation to {user.email}: {str(e)}")
         return False
 
 
-def send_payment_failed_email(email, amount, track):
+def send_payment_failed_email(email, amount, track, idempotency_key=None):
     """
-    Send payment failed notification
+    Queue payment failed notification (sent by the notification outbox)
     
     Args:
         email: Customer email
         amount: Payment amount
         track: Track code (DP or FSD)
+        idempotency_key: optional outbox key, so a replayed event queues it once
     
     Returns:
-        bool: True if email sent successfully
+        bool: True if the email was queued
     """
     try:
+        from notifications.outbox import queue_email
+        
         track_name = "Data Professional" if track == "DP" else "Full Stack Development"
         
         subject = "Payment Failed - ApraNova LMS"
@@ -306,52 +309,44 @@ Best regards,
 The ApraNova Team
 """
         
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False
-        )
+        queue_email(subject, message, [email], idempotency_key=idempotency_key)
         
-        logger.info(f"Payment failed email sent to {email}")
+        logger.info(f"Payment failed email queued for {email}")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send payment failed email to {email}: {str(e)}")
+        logger.error(f"Failed to queue payment failed email to {email}: {str(e)}")
         return False
 
 
-def send_session_notification_email(user, session, action_type):
+def render_session_notification_email(session, action_type):
     """
-    Send session notification email to student
+    Render a session notification once for any number of students
     
     Args:
-        user: User instance (student)
         session: Session instance
         action_type: 'created', 'updated', 'cancelled'
     
     Returns:
-        bool: True if email sent successfully
+        tuple: (subject, function taking a student and returning their message body)
     """
-    try:
-        action_titles = {
-            'created': 'New Class Session Scheduled',
-            'updated': 'Class Session Updated',
-            'cancelled': 'Class Session Cancelled'
-        }
-        
-        subject = f"{action_titles.get(action_type, 'Class Session')} - ApraNova LMS"
-        
-        message = f"""
+    action_titles = {
+        'created': 'New Class Session Scheduled',
+        'updated': 'Class Session Updated',
+        'cancelled': 'Class Session Cancelled'
+    }
+    
+    subject = f"{action_titles.get(action_type, 'Class Session')} - ApraNova LMS"
+    
+    greeting = f"""
 {action_titles.get(action_type, 'Class Session')}
 
-Dear {user.name or user.username},
-
-"""
-        
-        if action_type == 'cancelled':
-            message += f"""
+Dear """
+    
+    message = ""
+    
+    if action_type == 'cancelled':
+        message += f"""
 The following class session has been cancelled:
 
 Session: {session.title}
@@ -360,8 +355,8 @@ Originally Scheduled: {session.scheduled_at.strftime('%B %d, %Y at %I:%M %p')}
 
 We apologize for any inconvenience. Your trainer will reschedule soon.
 """
-        else:
-            message += f"""
+    else:
+        message += f"""
 Session Details:
 - Title: {session.title}
 - Trainer: {session.trainer.name}
@@ -370,33 +365,51 @@ Session Details:
 - Type: {session.get_session_type_display()}
 
 """
-            if session.description:
-                message += f"Description:\n{session.description}\n\n"
-            
-            if session.agenda:
-                message += f"Agenda:\n{session.agenda}\n\n"
-            
-            if session.meet_link:
-                message += f"Google Meet Link: {session.meet_link}\n\n"
-            
-            message += f"""
+        if session.description:
+            message += f"Description:\n{session.description}\n\n"
+        
+        if session.agenda:
+            message += f"Agenda:\n{session.agenda}\n\n"
+        
+        if session.meet_link:
+            message += f"Google Meet Link: {session.meet_link}\n\n"
+        
+        message += f"""
 To join the session:
 1. Log in to your dashboard at {settings.FRONTEND_URL or 'http://localhost:3000'}
 2. Go to "Sessions" or "Classes"
 3. Click "Join Session" at the scheduled time
 """
-        
-        message += """
+    
+    message += """
 
 If you have any questions, please contact your trainer or support@apranova.com
 
 Best regards,
 The ApraNova Team
 """
+    
+    return subject, lambda user: f"{greeting}{user.name or user.username},\n\n{message}"
+
+
+def send_session_notification_email(user, session, action_type):
+    """
+    Send session notification email to student
+    
+    Args:
+        user: User instance (student)
+        session: Session instance
+        action_type: 'created', 'updated', 'cancelled'
+    
+    Returns:
+        bool: True if email sent successfully
+    """
+    try:
+        subject, body_for = render_session_notification_email(session, action_type)
         
         send_mail(
             subject=subject,
-            message=message,
+            message=body_for(user),
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
             fail_silently=False
@@ -410,18 +423,21 @@ The ApraNova Team
         return False
 
 
-def send_refund_notification_email(user, payment):
+def send_refund_notification_email(user, payment, idempotency_key=None):
     """
-    Send refund notification email
+    Queue refund notification email (sent by the notification outbox)
     
     Args:
         user: User instance
         payment: Payment instance
+        idempotency_key: optional outbox key, so a replayed event queues it once
     
     Returns:
-        bool: True if email sent successfully
+        bool: True if the email was queued
     """
     try:
+        from notifications.outbox import queue_email
+        
         subject = "Refund Processed - ApraNova LMS"
         
         message = f"""
@@ -446,17 +462,11 @@ Best regards,
 The ApraNova Team
 """
         
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False
-        )
+        queue_email(subject, message, [user.email], idempotency_key=idempotency_key)
         
-        logger.info(f"Refund notification email sent to {user.email}")
+        logger.info(f"Refund notification email queued for {user.email}")
         return True
         
     except Exception as e:
-        logger.error(f"Failed to send refund notification to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue refund notification to {user.email}: {str(e)}")
         return False
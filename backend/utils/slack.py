@@ -1,26 +1,30 @@
 """
 Slack notification utilities
 """
-import requests
 from django.conf import settings
 
 
 def send_slack_notification(message, blocks=None):
     """
-    Send a simple message to Slack via webhook
+    Queue a message for the Slack webhook
+    
+    The notification outbox sends it from the job worker, merged with any
+    other Slack messages queued around the same time.
     
     Args:
         message: Plain text message
         blocks: Optional rich formatting blocks
         
     Returns:
-        bool: Success status
+        bool: True if the message was queued
     """
     if not settings.SLACK_ENABLED or not settings.SLACK_WEBHOOK_URL:
         print(f"Slack disabled or not configured. Message: {message}")
         return False
     
     try:
+        from notifications.outbox import queue_notification
+        
         payload = {
             "text": message
         }
@@ -28,13 +32,8 @@ def send_slack_notification(message, blocks=None):
         if blocks:
             payload["blocks"] = blocks
         
-        response = requests.post(
-            settings.SLACK_WEBHOOK_URL,
-            json=payload,
-            timeout=5
-        )
-        
-        return response.status_code == 200
+        queue_notification('slack', payload)
+        return True
         
     except Exception as e:
         print(f"Slack notification error: {e}")
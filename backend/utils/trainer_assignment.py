@@ -1,139 +1,346 @@
 """
 Automatic trainer assignment logic
 Assigns students to trainers based on track and capacity
+
+Every (trainer, track) pair has a TrainerLoad counter, so picking a trainer
+reads a few rows instead of counting students per trainer.
 """
-from django.contrib.auth import get_user_model
+import heapq
 import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from accounts.models import TrainerCapacitySnapshot, TrainerLoad
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+CAPACITY_REPORT_CACHE_KEY = 'trainers:capacity_report'
+
+# Tracks reported for trainers without a track of their own
+GENERAL_TRACKS = ('DP', 'FSD')
+
+
+def _available_loads(track, trainer_ids):
+    """Load rows of the given trainers for a track that still have room, least loaded first"""
+    return TrainerLoad.objects.filter(
+        track=track,
+        trainer_id__in=trainer_ids,
+        student_count__lt=settings.TRAINER_CAPACITY_PER_TRACK
+    ).order_by('student_count', 'trainer_id')
+
+
+def _ensure_loads(tracks):
+    """
+    Make sure every active trainer that can teach a track has a TrainerLoad
+    row for it, counting current assignments for the rows that are new
+
+    Trainers with a track only take students of that track; trainers without
+    one take every track.
+
+    Returns:
+        dict: track -> list of eligible trainer ids
+    """
+    eligible = {track: [] for track in tracks}
+    for trainer_id, trainer_track in User.objects.filter(role='trainer', is_active=True).values_list('id', 'track'):
+        trainer_track = (trainer_track or '').strip().upper()
+        for track in tracks:
+            if not trainer_track or trainer_track == track:
+                eligible[track].append(trainer_id)
+
+    existing = set(
+        TrainerLoad.objects.filter(track__in=tracks).values_list('trainer_id', 'track')
+    )
+    missing = {
+        (trainer_id, track)
+        for track, trainer_ids in eligible.items()
+        for trainer_id in trainer_ids
+        if (trainer_id, track) not in existing
+    }
+
+    if missing:
+        counts = Counter()
+        for trainer_id, track in User.objects.filter(
+            role='student',
+            assigned_trainer__in={trainer_id for trainer_id, _ in missing}
+        ).exclude(track='').values_list('assigned_trainer', 'track'):
+            counts[(trainer_id, track.upper())] += 1
+
+        # Another process may create the same rows first; theirs win
+        TrainerLoad.objects.bulk_create([
+            TrainerLoad(trainer_id=trainer_id, track=track, student_count=counts[(trainer_id, track)])
+            for trainer_id, track in missing
+        ], ignore_conflicts=True)
+
+    return eligible
+
+
+def assign_trainers(students, save=True):
+    """
+    Assign the least-loaded trainer with room to each student
+
+    Load rows are locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    enrollments spread over different trainers instead of queueing on one, and
+    a trainer is never filled past TRAINER_CAPACITY_PER_TRACK. The number of
+    queries depends on the number of tracks, not of students. Students left
+    without a trainer (all trainers full) are picked up later by
+    assign_unassigned_students.
 
-def assign_trainer_to_student(student):
+    Args:
+        students: CustomUser instances with track set (may be unsaved when save=False)
+        save: write assigned_trainer; pass False when the caller saves the
+            students itself in the same transaction
+
+    Returns:
+        int: Number of students assigned
+    """
+    by_track = defaultdict(list)
+    for student in students:
+        if student.assigned_trainer_id:
+            continue  # counted already; use reassign_student_trainer to move them
+        if student.track:
+            by_track[student.track.strip().upper()].append(student)
+        else:
+            logger.warning(f"Student {student.email} has no track assigned")
+
+    if not by_track:
+        return 0
+
+    capacity = settings.TRAINER_CAPACITY_PER_TRACK
+    assigned = []
+    changed_loads = []
+
+    with transaction.atomic():
+        eligible = _ensure_loads(list(by_track))
+
+        for track, group in by_track.items():
+            loads = list(_available_loads(track, eligible[track]).select_for_update(skip_locked=True))
+
+            # Rows held by another enrollment may have room too; wait for them if needed
+            room = sum(capacity - load.student_count for load in loads)
+            if room < len(group):
+                loads += list(
+                    _available_loads(track, eligible[track])
+                    .exclude(pk__in=[load.pk for load in loads])
+                    .select_for_update()
+                )
+
+            heap = [(load.student_count, load.trainer_id, index) for index, load in enumerate(loads)]
+            heapq.heapify(heap)
+            touched = set()
+            for student in group:
+                if not heap:
+                    logger.warning(f"All trainers at capacity for {track}; {student.email} left unassigned")
+                    continue
+                count, trainer_id, index = heapq.heappop(heap)
+                student.assigned_trainer_id = trainer_id
+                assigned.append(student)
+                loads[index].student_count = count + 1
+                touched.add(index)
+                if count + 1 < capacity:
+                    heapq.heappush(heap, (count + 1, trainer_id, index))
+
+            changed_loads.extend(loads[index] for index in touched)
+
+        TrainerLoad.objects.bulk_update(changed_loads, ['student_count'])
+        if save:
+            User.objects.bulk_update(assigned, ['assigned_trainer'])
+        if assigned:
+            invalidate_capacity_report()
+
+    if assigned:
+        # Replace the stale cached relation with the assigned trainer objects
+        trainers = User.objects.in_bulk({student.assigned_trainer_id for student in assigned})
+        for student in assigned:
+            student.assigned_trainer = trainers[student.assigned_trainer_id]
+
+    logger.info(f"Assigned trainers to {len(assigned)} students")
+    return len(assigned)
+
+
+def assign_trainer_to_student(student, save=True):
     """
     Automatically assign a trainer to a student based on their track
-    
-    Logic:
-    - First 20 students of each track → trainer1@apranova.com
-    - Next 20 students of each track → trainer2@apranova.com
-    - Continues with additional trainers if available
-    
+
     Args:
         student: CustomUser instance with role='student' and track set
-    
+        save: write assigned_trainer (see assign_trainers)
+
     Returns:
-        CustomUser: Assigned trainer or None if no trainer available
+        CustomUser: Assigned trainer (the current one if the student has one)
+        or None if no trainer has room
     """
-    if not student.track:
-        logger.warning(f"Student {student.email} has no track assigned")
+    if student.assigned_trainer_id:
+        return student.assigned_trainer
+    if not assign_trainers([student], save=save):
         return None
-    
-    # Get all trainers ordered by email (trainer1, trainer2, etc.)
-    trainers = User.objects.filter(
-        role='trainer',
-        is_active=True
-    ).order_by('email')
-    
-    if not trainers.exists():
-        logger.error("No trainers available in the system")
-        return None
-    
-    # Count students already assigned to each trainer for this specific track
-    track = student.track.upper()
-    
-    for trainer in trainers:
-        # Count students of this track assigned to this trainer
-        student_count = User.objects.filter(
-            assigned_trainer=trainer,
-            track=track,
-            role='student'
-        ).count()
-        
-        # Each trainer can handle 20 students per track
-        if student_count < 20:
-            student.assigned_trainer = trainer
-            student.save()
-            
-            logger.info(
-                f"Assigned student {student.email} ({track}) to trainer "
-                f"{trainer.email} (now has {student_count + 1} {track} students)"
-            )
-            
-            return trainer
-    
-    # If all trainers are at capacity, assign to first trainer anyway
-    # (in production, you might want to create a waiting list instead)
-    first_trainer = trainers.first()
-    student.assigned_trainer = first_trainer
-    student.save()
-    
-    logger.warning(
-        f"All trainers at capacity for {track}. Assigned {student.email} "
-        f"to {first_trainer.email} (over capacity)"
-    )
-    
-    return first_trainer
 
+    trainer = student.assigned_trainer
+    logger.info(f"Assigned student {student.email} ({student.track}) to trainer {trainer.email}")
+    return trainer
+
+
+def rebuild_trainer_loads():
+    """
+    Recount every TrainerLoad row from the current assignments
+
+    The counters follow assignments made through this module; run this
+    (manage.py rebuild_trainer_loads) after students are deleted, change
+    track or are reassigned outside it.
+
+    Returns:
+        int: Number of load rows written
+    """
+    counts = Counter()
+    for trainer_id, track in User.objects.filter(
+        role='student',
+        assigned_trainer__isnull=False
+    ).exclude(track='').values_list('assigned_trainer', 'track'):
+        counts[(trainer_id, track.upper())] += 1
+
+    with transaction.atomic():
+        loads = list(TrainerLoad.objects.select_for_update())
+        for load in loads:
+            load.student_count = counts.pop((load.trainer_id, load.track), 0)
+        TrainerLoad.objects.bulk_update(loads, ['student_count'])
+        TrainerLoad.objects.bulk_create([
+            TrainerLoad(trainer_id=trainer_id, track=track, student_count=count)
+            for (trainer_id, track), count in counts.items()
+        ])
+
+    return len(loads) + len(counts)
+
+
+def invalidate_capacity_report():
+    """Drop the cached capacity report once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(CAPACITY_REPORT_CACHE_KEY))
 
-def get_trainer_capacity_report():
+
+def _capacity_entry(count, capacity):
+    return {'count': count, 'capacity': capacity, 'available': max(0, capacity - count)}
+
+
+def get_trainer_capacity_report(use_cache=True):
     """
     Get a report of trainer capacity by track
     
+    Student counts come from one query grouped by trainer and track; the
+    report is cached for TRAINER_CAPACITY_CACHE_TIMEOUT seconds and dropped
+    whenever this module changes an assignment.
+    
+    Args:
+        use_cache: return the cached report if there is one
+    
     Returns:
         dict: Report with trainer assignments per track
     """
+    if use_cache:
+        report = cache.get(CAPACITY_REPORT_CACHE_KEY)
+        if report is not None:
+            return report
+    
+    capacity = settings.TRAINER_CAPACITY_PER_TRACK
+    counts = Counter()
+    for trainer_id, track, count in User.objects.filter(
+        role='student',
+        assigned_trainer__isnull=False
+    ).exclude(track='').values('assigned_trainer', 'track').annotate(
+        count=Count('id')
+    ).values_list('assigned_trainer', 'track', 'count'):
+        counts[(trainer_id, track.strip().upper())] += count
+    
     trainers = User.objects.filter(role='trainer', is_active=True).order_by('email')
     report = {}
     
     for trainer in trainers:
         if trainer.track and trainer.track.strip():
             # Track-specific trainer
-            student_count = User.objects.filter(
-                assigned_trainer=trainer,
-                track=trainer.track,
-                role='student'
-            ).count()
-            
+            student_count = counts[(trainer.pk, trainer.track.strip().upper())]
             report[trainer.email] = {
                 'name': trainer.name or trainer.username,
                 'track': trainer.track,
-                'count': student_count,
-                'capacity': 20,
-                'available': max(0, 20 - student_count)
+                **_capacity_entry(student_count, capacity)
             }
         else:
             # General trainer (legacy - handles both tracks)
-            dp_count = User.objects.filter(
-                assigned_trainer=trainer,
-                track='DP',
-                role='student'
-            ).count()
-            
-            fsd_count = User.objects.filter(
-                assigned_trainer=trainer,
-                track='FSD',
-                role='student'
-            ).count()
-            
             report[trainer.email] = {
                 'name': trainer.name or trainer.username,
                 'track': 'ALL',
-                'DP': {
-                    'count': dp_count,
-                    'capacity': 20,
-                    'available': max(0, 20 - dp_count)
-                },
-                'FSD': {
-                    'count': fsd_count,
-                    'capacity': 20,
-                    'available': max(0, 20 - fsd_count)
-                },
-                'total': dp_count + fsd_count
+                **{track: _capacity_entry(counts[(trainer.pk, track)], capacity) for track in GENERAL_TRACKS},
+                'total': sum(counts[(trainer.pk, track)] for track in GENERAL_TRACKS)
             }
     
+    cache.set(CAPACITY_REPORT_CACHE_KEY, report, settings.TRAINER_CAPACITY_CACHE_TIMEOUT)
     return report
 
 
+def take_capacity_snapshot():
+    """
+    Store the current per-trainer, per-track utilization as TrainerCapacitySnapshot rows
+    
+    Returns:
+        int: Number of rows written
+    """
+    report = get_trainer_capacity_report(use_cache=False)
+    trainer_ids = dict(User.objects.filter(email__in=list(report)).values_list('email', 'id'))
+    taken_at = timezone.now()
+    
+    rows = []
+    for email, data in report.items():
+        if data['track'] != 'ALL':
+            entries = {data['track'].strip().upper(): data}
+        else:
+            entries = {track: data[track] for track in GENERAL_TRACKS}
+        for track, entry in entries.items():
+            rows.append(TrainerCapacitySnapshot(
+                trainer_id=trainer_ids[email],
+                track=track,
+                student_count=entry['count'],
+                capacity=entry['capacity'],
+                taken_at=taken_at
+            ))
+    
+    TrainerCapacitySnapshot.objects.bulk_create(rows)
+    return len(rows)
+
+
+def get_capacity_history(since, trainer_id=None, track=None):
+    """
+    Utilization over time from stored snapshots (the users table is not read)
+    
+    Args:
+        since: datetime of the oldest snapshot to include
+        trainer_id: optional trainer filter
+        track: optional track code filter
+    
+    Returns:
+        dict: trainer email -> track -> list of {'taken_at', 'count', 'capacity'}
+    """
+    snapshots = TrainerCapacitySnapshot.objects.filter(taken_at__gte=since)
+    if trainer_id:
+        snapshots = snapshots.filter(trainer_id=trainer_id)
+    if track:
+        snapshots = snapshots.filter(track=track.strip().upper())
+    
+    history = defaultdict(lambda: defaultdict(list))
+    for email, track_code, taken_at, count, capacity in snapshots.order_by('taken_at').values_list(
+        'trainer__email', 'track', 'taken_at', 'student_count', 'capacity'
+    ):
+        history[email][track_code].append({
+            'taken_at': taken_at.isoformat(),
+            'count': count,
+            'capacity': capacity,
+        })
+    
+    return {email: dict(tracks) for email, tracks in history.items()}
+
+
 def reassign_student_trainer(student, new_trainer):
     """
     Manually reassign a student to a different trainer
@@ -150,8 +357,29 @@ def reassign_student_trainer(student, new_trainer):
         return False
     
     old_trainer = student.assigned_trainer
-    student.assigned_trainer = new_trainer
-    student.save()
+    track = (student.track or '').strip().upper()
+    
+    with transaction.atomic():
+        student.assigned_trainer = new_trainer
+        student.save()
+        
+        # Manual moves may go over capacity; the counters just follow them
+        if track:
+            if old_trainer:
+                TrainerLoad.objects.filter(
+                    trainer=old_trainer, track=track, student_count__gt=0
+                ).update(student_count=F('student_count') - 1)
+            moved_in = TrainerLoad.objects.filter(
+                trainer=new_trainer, track=track
+            ).update(student_count=F('student_count') + 1)
+            if not moved_in:
+                # First student of this track for the trainer: count from scratch (includes this one)
+                TrainerLoad.objects.get_or_create(trainer=new_trainer, track=track, defaults={
+                    'student_count': User.objects.filter(
+                        role='student', assigned_trainer=new_trainer, track__iexact=track
+                    ).count()
+                })
+        invalidate_capacity_report()
     
     logger.info(
         f"Reassigned {student.email} from "
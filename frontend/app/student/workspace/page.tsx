@@ -11,6 +11,15 @@ import apiClient from "@/lib/apiClient"
 type State = "inactive" | "provisioning" | "ready" | "error"
 type WorkspaceType = "vscode" | "superset"
 
+// Progress shown for each backend provisioning state
+const PROVISIONING_PROGRESS: Record<string, number> = {
+  requested: 10,
+  pulling: 30,
+  starting: 55,
+  healthy: 85,
+  ready: 100,
+}
+
 export default function WorkspacePage() {
   const [state, setState] = React.useState<State>("inactive")
   const [progress, setProgress] = React.useState(0)
@@ -35,26 +44,22 @@ export default function WorkspacePage() {
   }, [])
 
   React.useEffect(() => {
-    let timer: number | undefined
     if (state === "provisioning") {
       setProgress(0)
-      // Superset takes longer to initialize (60-90 seconds)
-      const interval = workspaceType === "superset" ? 1800 : 1200
-      timer = window.setInterval(() => {
-        setProgress((p) => {
-          const next = Math.min(100, p + 10)
-          if (next === 100) {
-            window.clearInterval(timer)
-            setTimeout(() => setState("ready"), 600)
-          }
-          return next
-        })
-      }, interval)
     }
-    return () => {
-      if (timer) window.clearInterval(timer)
+  }, [state])
+
+  // Tell the backend the workspace is in use so the idle reaper leaves it running
+  React.useEffect(() => {
+    if (state !== "ready") return
+    const sendHeartbeat = () => {
+      if (document.visibilityState === "visible") {
+        apiClient.post("/users/workspace/heartbeat/").catch(() => {})
+      }
     }
-  }, [state, workspaceType])
+    const timer = setInterval(sendHeartbeat, 5 * 60 * 1000)
+    return () => clearInterval(timer)
+  }, [state])
 
   return (
     <div className="space-y-8 max-w-4xl mx-auto">
@@ -246,13 +251,24 @@ export default function WorkspacePage() {
                   setState("provisioning");
                   setErrorMessage("");
                   try {
-                    const res = await apiClient.post("/users/workspace/create/");
+                    let res = await apiClient.post("/users/workspace/create/");
+                    
+                    // 202: container is being provisioned in the background - poll until it settles
+                    while (res.data.status_url && !["ready", "failed"].includes(res.data.status)) {
+                      setProgress(PROVISIONING_PROGRESS[res.data.status] ?? 0);
+                      await new Promise((resolve) => setTimeout(resolve, (res.data.poll_after || 2) * 1000));
+                      res = await apiClient.get("/users/workspace/status/");
+                    }
+                    
+                    if (res.data.status === "failed") {
+                      throw { response: { data: { message: res.data.error || res.data.msg } } };
+                    }
+                    
                     const url = res.data.url || "";
                     const type = res.data.workspace_type || workspaceType;
                     setWorkspaceUrl(url);
                     setWorkspaceType(type);
-                    
-                    // Set ready state immediately for shared Superset
+                    setProgress(100);
                     setState("ready");
                     
                     // Auto-open workspace in new tab
@@ -0,0 +1,195 @@
+"""
+Benchmark: monitor_workspaces with 10k workspace records
+
+Runs the workspace manager in-process against moto's DynamoDB and
+CloudWatch mocks and an in-memory ECS stand-in (moto's ECS cannot run
+awsvpc/Fargate tasks), so no AWS account is needed:
+
+    pip install boto3 moto
+    python benchmark_monitor.py --records 10000
+
+Reports
+- the old access pattern (one table.scan with a status filter, no
+  pagination): latency and how many running workspaces it actually saw,
+- the status-index query used now (all pages), and
+- a full monitor_workspaces() run, including batched describe_tasks calls
+  and warm pool maintenance, with the number of ECS calls it made.
+
+moto latencies are not DynamoDB latencies; compare the rows with each other.
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from moto import mock_aws
+
+REGION = 'us-east-1'
+TABLE_NAME = 'benchmark-workspace-state'
+
+
+class FakeECS:
+    """Just enough of the ECS client for the workspace manager, counting calls"""
+
+    def __init__(self):
+        self.tasks = {}
+        self.calls = Counter()
+        self.largest_describe = 0
+
+    def run_task(self, count=1, **kwargs):
+        self.calls['run_task'] += 1
+        assert count <= 10, 'run_task accepts at most 10 tasks'
+        tasks = []
+        for _ in range(count):
+            task_arn = f'arn:aws:ecs:{REGION}:123456789012:task/benchmark/{uuid.uuid4().hex}'
+            task = {
+                'taskArn': task_arn,
+                'lastStatus': 'RUNNING',
+                'attachments': [{
+                    'type': 'ElasticNetworkInterface',
+                    'details': [{'name': 'privateIPv4Address', 'value': '10.0.0.10'}],
+                }],
+            }
+            self.tasks[task_arn] = task
+            tasks.append(task)
+        return {'tasks': tasks, 'failures': []}
+
+    def describe_tasks(self, cluster, tasks):
+        self.calls['describe_tasks'] += 1
+        assert len(tasks) <= 100, 'describe_tasks accepts at most 100 tasks'
+        self.largest_describe = max(self.largest_describe, len(tasks))
+        found = [self.tasks[arn] for arn in tasks if arn in self.tasks]
+        return {'tasks': found, 'failures': [{'arn': arn, 'reason': 'MISSING'} for arn in tasks if arn not in self.tasks]}
+
+    def stop_task(self, cluster, task, reason):
+        self.calls['stop_task'] += 1
+        self.tasks[task]['lastStatus'] = 'STOPPED'
+
+
+def configure_environment():
+    os.environ.update({
+        'AWS_DEFAULT_REGION': REGION,
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'ECS_CLUSTER': 'benchmark',
+        'SUBNETS': 'subnet-12345678',
+        'SECURITY_GROUP': 'sg-12345678',
+        'VSCODE_TASK_DEF': 'workspace-vscode',
+        'SUPERSET_TASK_DEF': 'workspace-superset',
+        'DYNAMODB_TABLE': TABLE_NAME,
+        'WARM_POOL_SIZE': '3',
+        'IDLE_TIMEOUT_MINUTES': '30',
+    })
+
+
+def create_resources():
+    import boto3
+
+    boto3.resource('dynamodb').create_table(
+        TableName=TABLE_NAME,
+        BillingMode='PAY_PER_REQUEST',
+        KeySchema=[
+            {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'task_arn', 'KeyType': 'RANGE'},
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'task_arn', 'AttributeType': 'S'},
+            {'AttributeName': 'status', 'AttributeType': 'S'},
+            {'AttributeName': 'workspace_type', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'StatusTypeIndex',
+            'KeySchema': [
+                {'AttributeName': 'status', 'KeyType': 'HASH'},
+                {'AttributeName': 'workspace_type', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {'ProjectionType': 'ALL'},
+        }],
+    )
+
+
+def seed(manager, records, idle_share, stopped_share):
+    """Create tasks and workspace records: running (some idle) plus stopped history"""
+    stopped = int(records * stopped_share)
+    running = records - stopped
+    idle = int(running * idle_share)
+
+    task_arns = manager.launch_ecs_tasks('benchmark', 'vscode', running)
+    now = datetime.now()
+    with manager.table.batch_writer() as batch:
+        for i, task_arn in enumerate(task_arns):
+            last_activity = now - timedelta(hours=2) if i < idle else now
+            batch.put_item(Item={
+                'user_id': f'user-{i}',
+                'task_arn': task_arn,
+                'workspace_type': 'vscode',
+                'status': 'running',
+                'last_activity': last_activity.isoformat(),
+                'url': f'http://10.0.0.{i % 250}:8080',
+                'created_at': now.isoformat(),
+                # Padding similar to real records, so pages fill up like they would in DynamoDB
+                'notes': 'x' * 200,
+            })
+        for i in range(stopped):
+            batch.put_item(Item={
+                'user_id': f'user-{running + i}',
+                'task_arn': f'arn:aws:ecs:{REGION}:123456789012:task/benchmark/stopped-{i}',
+                'workspace_type': 'superset',
+                'status': 'stopped',
+                'last_activity': (now - timedelta(days=1)).isoformat(),
+                'url': '',
+                'created_at': now.isoformat(),
+                'notes': 'x' * 200,
+            })
+    return running, idle
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--idle-share', type=float, default=0.05, help='Share of running workspaces that are idle')
+    parser.add_argument('--stopped-share', type=float, default=0.2, help='Share of records that are history')
+    args = parser.parse_args()
+
+    configure_environment()
+    with mock_aws():
+        create_resources()
+        import workspace_manager as manager
+        from boto3.dynamodb.conditions import Attr
+        manager.ecs = FakeECS()
+
+        print(f"Seeding {args.records} workspace records...")
+        (running, idle), seconds = timed(lambda: seed(manager, args.records, args.idle_share, args.stopped_share))
+        print(f"  {running} running ({idle} idle), seeded in {seconds:.1f}s\n")
+
+        legacy, legacy_seconds = timed(lambda: manager.table.scan(
+            FilterExpression=Attr('status').eq('running')
+        )['Items'])
+        indexed, indexed_seconds = timed(lambda: list(manager.query_by_status('running')))
+
+        manager.ecs.calls.clear()
+        with contextlib.redirect_stdout(io.StringIO()):  # the Lambda logs every termination
+            result, monitor_seconds = timed(manager.monitor_workspaces)
+
+        print(f"{'access pattern':<34}{'seconds':>10}{'running seen':>15}")
+        print('-' * 59)
+        print(f"{'scan + filter, first page only':<34}{legacy_seconds:>10.3f}{len(legacy):>15}")
+        print(f"{'status index query, all pages':<34}{indexed_seconds:>10.3f}{len(indexed):>15}")
+        print(f"{'monitor_workspaces()':<34}{monitor_seconds:>10.3f}{running:>15}")
+        print(f"\nmonitor result: {result['body']}")
+        print(f"ECS calls: {dict(manager.ecs.calls)} (largest describe_tasks batch {manager.ecs.largest_describe})")
+
+
+if __name__ == '__main__':
+    main()
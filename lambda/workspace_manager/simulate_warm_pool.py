@@ -0,0 +1,140 @@
+"""
+Compare warm pool policies by replaying past workspace launches
+
+Trains the hour-of-week schedule (warm_pool_forecast) on all but the last
+--holdout-weeks of a launch log, then replays the held-out weeks against that
+schedule and against fixed pool sizes. Reports cold starts and the Fargate
+cost of the warm containers (aws-cost-calculator.py pricing).
+
+    # launch log: JSON Lines {"timestamp": "...", "workspace_type": "vscode"}
+    # or CSV rows timestamp,workspace_type (e.g. exported from the state table)
+    python simulate_warm_pool.py --log launches.jsonl
+
+    # or a generated cohort timetable
+    python simulate_warm_pool.py --synthetic-weeks 5
+"""
+import argparse
+import csv
+import importlib.util
+import json
+import math
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import warm_pool_forecast as forecast
+
+# Workspace task size used by aws-cost-calculator.py
+WORKSPACE_VCPU = 1
+WORKSPACE_MEMORY_GB = 2
+
+
+def load_cost_calculator():
+    path = Path(__file__).resolve().parents[2] / 'aws-cost-calculator.py'
+    spec = importlib.util.spec_from_file_location('aws_cost_calculator', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_log(path):
+    """Read (timestamp, workspace_type) launches from JSON Lines or CSV"""
+    launches = []
+    with open(path) as f:
+        if path.endswith('.csv'):
+            for row in csv.reader(f):
+                if row and row[0] != 'timestamp':
+                    launches.append((datetime.fromisoformat(row[0]), row[1]))
+        else:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    launches.append((datetime.fromisoformat(record['timestamp']), record['workspace_type']))
+    return sorted(launches)
+
+
+def synthetic_launches(weeks, seed=7):
+    """
+    Cohort timetable: FSD (vscode) and DP (superset) classes on weekdays at
+    09:00 and 14:00 where most students open their workspace in the first
+    minutes, plus scattered self-study launches that thin out at night
+    """
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5)  # a Monday
+    cohorts = [('vscode', 40), ('superset', 20)]
+    launches = []
+
+    for day in range(weeks * 7):
+        date = start + timedelta(days=day)
+        if date.weekday() < 5:
+            for class_hour in (9, 14):
+                for workspace_type, students in cohorts:
+                    for _ in range(students):
+                        if rng.random() < 0.85:
+                            offset = timedelta(minutes=rng.expovariate(1 / 3))
+                            launches.append((date.replace(hour=class_hour) + offset, workspace_type))
+        for hour in range(24):
+            rate = 2.0 if 8 <= hour < 22 else 0.2
+            for workspace_type, _ in cohorts:
+                for _ in range(_poisson(rng, rate / 2)):
+                    launches.append((date.replace(hour=hour) + timedelta(minutes=rng.uniform(0, 60)), workspace_type))
+
+    return sorted(launches)
+
+
+def _poisson(rng, rate):
+    count, threshold, product = 0, math.exp(-rate), rng.random()
+    while product > threshold:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay workspace launches against warm pool policies')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--log', help='Launch log (.jsonl or .csv)')
+    source.add_argument('--synthetic-weeks', type=int, help='Generate this many weeks of cohort launches')
+    parser.add_argument('--holdout-weeks', type=int, default=1, help='Weeks replayed after training (default: 1)')
+    parser.add_argument('--static', default='0,1,3,5,10', help='Fixed pool sizes to compare (default: 0,1,3,5,10)')
+    parser.add_argument('--quantile', type=float, default=0.9)
+    parser.add_argument('--max-size', type=int, default=40)
+    parser.add_argument('--warmup', type=float, default=3, help='Minutes for a warm container to become ready')
+    parser.add_argument('--prewarm', type=int, default=15, help='Minutes to raise the pool ahead of the next hour')
+    args = parser.parse_args()
+
+    launches = load_log(args.log) if args.log else synthetic_launches(args.synthetic_weeks)
+    if not launches:
+        parser.error('No launches to replay')
+
+    first = forecast.bucket_start(launches[0][0]).replace(hour=0, minute=0)
+    last = launches[-1][0]
+    weeks = max(args.holdout_weeks + 1, int((last - first) / forecast.WEEK) + 1)
+    end = first + weeks * forecast.WEEK
+    split = end - args.holdout_weeks * forecast.WEEK
+
+    schedule = forecast.build_schedule(
+        forecast.demand_buckets(launches), first, split, q=args.quantile, max_size=args.max_size
+    )
+
+    policies = [(f'static {size}', forecast.static_policy(int(size))) for size in args.static.split(',')]
+    policies.append((f'forecast q={args.quantile}', forecast.schedule_policy(schedule, args.prewarm)))
+
+    calculator = load_cost_calculator()
+    replayed = sum(1 for moment, _ in launches if moment >= split)
+    print(f"Trained on {(split - first).days // 7} weeks, replaying {args.holdout_weeks} "
+          f"({replayed} launches)\n")
+    print(f"{'policy':<20}{'type':<10}{'cold starts':>12}{'hit rate':>10}{'warm hours':>12}{'$/month':>10}")
+    print('-' * 74)
+
+    for name, policy in policies:
+        results = forecast.simulate(launches, policy, split, end, warmup_minutes=args.warmup)
+        for workspace_type, result in results.items():
+            monthly_hours = result['container_hours'] / args.holdout_weeks * 730 / 168
+            cost = calculator.calculate_ecs_cost(WORKSPACE_VCPU, WORKSPACE_MEMORY_GB, monthly_hours)
+            print(f"{name:<20}{workspace_type:<10}{result['misses']:>12}{result['hit_rate']:>10.1%}"
+                  f"{result['container_hours']:>12.1f}{cost:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
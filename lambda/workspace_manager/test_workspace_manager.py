@@ -0,0 +1,100 @@
+"""
+Tests for the workspace manager against moto's DynamoDB
+
+    pip install boto3 moto
+    python -m unittest test_workspace_manager
+"""
+import importlib
+import os
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+TABLE_NAME = 'workspace-state-test'
+
+
+@unittest.skipUnless(mock_aws, 'moto is not installed')
+class ClaimWarmContainerTests(unittest.TestCase):
+    """Claimed warm containers become the user's current workspace"""
+
+    def setUp(self):
+        os.environ.update({
+            'AWS_DEFAULT_REGION': 'us-east-1',
+            'AWS_ACCESS_KEY_ID': 'testing',
+            'AWS_SECRET_ACCESS_KEY': 'testing',
+            'ECS_CLUSTER': 'test',
+            'SUBNETS': 'subnet-12345678',
+            'SECURITY_GROUP': 'sg-12345678',
+            'VSCODE_TASK_DEF': 'workspace-vscode',
+            'SUPERSET_TASK_DEF': 'workspace-superset',
+            'DYNAMODB_TABLE': TABLE_NAME,
+        })
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        import boto3
+        boto3.resource('dynamodb').create_table(
+            TableName=TABLE_NAME,
+            BillingMode='PAY_PER_REQUEST',
+            KeySchema=[
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'task_arn', 'KeyType': 'RANGE'},
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'user_id', 'AttributeType': 'S'},
+                {'AttributeName': 'task_arn', 'AttributeType': 'S'},
+                {'AttributeName': 'status', 'AttributeType': 'S'},
+                {'AttributeName': 'workspace_type', 'AttributeType': 'S'},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'StatusTypeIndex',
+                'KeySchema': [
+                    {'AttributeName': 'status', 'KeyType': 'HASH'},
+                    {'AttributeName': 'workspace_type', 'KeyType': 'RANGE'},
+                ],
+                'Projection': {'ProjectionType': 'ALL'},
+            }],
+        )
+
+        # Module-level clients bind to the mock when the module is (re)loaded
+        import workspace_manager
+        self.manager = importlib.reload(workspace_manager)
+
+    def test_claimed_container_wins_over_older_stopped_record(self):
+        now = datetime.now()
+        self.manager.table.put_item(Item={
+            'user_id': 'user-1',
+            'task_arn': 'arn:aws:ecs:us-east-1:123456789012:task/test/stopped',
+            'workspace_type': 'vscode',
+            'status': 'stopped',
+            'url': '',
+            'created_at': (now - timedelta(minutes=10)).isoformat(),
+        })
+        # Warmed before the user's previous workspace was launched
+        self.manager.table.put_item(Item={
+            'user_id': self.manager.WARM_POOL_USER,
+            'task_arn': 'arn:aws:ecs:us-east-1:123456789012:task/test/warm',
+            'workspace_type': 'vscode',
+            'status': 'warm',
+            'url': 'http://10.0.0.1:8080',
+            'created_at': (now - timedelta(hours=1)).isoformat(),
+        })
+
+        claimed = self.manager.claim_warm_container('vscode', 'user-1')
+
+        self.assertEqual(claimed['task_arn'], 'arn:aws:ecs:us-east-1:123456789012:task/test/warm')
+        workspace = self.manager.get_user_workspace('user-1')
+        self.assertEqual(workspace['task_arn'], claimed['task_arn'])
+        self.assertEqual(workspace['status'], 'running')
+        self.assertEqual(workspace['created_at'], workspace['assigned_at'])
+        self.assertEqual(workspace['warmed_at'], (now - timedelta(hours=1)).isoformat())
+        self.assertEqual(list(self.manager.query_by_status('warm', 'vscode')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Warm pool sizing from historical launch demand
+
+Demand is the number of workspace launches per workspace type in short
+buckets (default 5 minutes). A warm container that is claimed is replaced
+right away but takes a few minutes to become ready, so what the pool has to
+absorb is the burst inside one bucket, not the hourly total: thirty students
+opening their workspace at 9:00 need thirty warm containers at 9:00.
+
+For every hour of the week (Monday 00:00 = 0 ... Sunday 23:00 = 167) the
+schedule holds a quantile of the peak bucket seen in that hour across the
+observed weeks, so class hours get a full pool and nights drain to the
+minimum. Pure Python, shared by the Lambda and simulate_warm_pool.py.
+"""
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Tuple
+
+HOURS_PER_WEEK = 168
+WORKSPACE_TYPES = ('vscode', 'superset')
+WEEK = timedelta(days=7)
+
+# (workspace_type, bucket start) -> launches in that bucket
+Buckets = Counter
+Schedule = Dict[str, List[int]]
+
+
+def hour_of_week(moment: datetime) -> int:
+    return moment.weekday() * 24 + moment.hour
+
+
+def bucket_start(moment: datetime, bucket_minutes: int = 5) -> datetime:
+    return moment.replace(
+        minute=moment.minute - moment.minute % bucket_minutes,
+        second=0,
+        microsecond=0
+    )
+
+
+def demand_buckets(launches: Iterable[Tuple[datetime, str]], bucket_minutes: int = 5) -> Buckets:
+    """Count (timestamp, workspace_type) launches per bucket"""
+    buckets = Counter()
+    for moment, workspace_type in launches:
+        buckets[(workspace_type, bucket_start(moment, bucket_minutes))] += 1
+    return buckets
+
+
+def merge_buckets(*sources: Buckets) -> Buckets:
+    """
+    Combine sources that count the same launches (DynamoDB records and
+    CloudWatch metrics) by taking the larger count per bucket, so one source
+    fills the gaps of the other without double counting
+    """
+    merged = Counter()
+    for source in sources:
+        for key, count in source.items():
+            merged[key] = max(merged[key], count)
+    return merged
+
+
+def quantile(values: List[int], q: float) -> int:
+    """Nearest-rank quantile"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_schedule(
+    buckets: Buckets,
+    start: datetime,
+    end: datetime,
+    q: float = 0.9,
+    min_size: int = 0,
+    max_size: int = 10,
+) -> Schedule:
+    """
+    Per-hour-of-week warm pool targets for each workspace type
+
+    Args:
+        buckets: launch counts from demand_buckets / merge_buckets
+        start, end: observed period; hours without launches count as zero demand
+        q: quantile of the weekly peaks to cover (0.9 = all but the busiest weeks)
+        min_size, max_size: bounds for every target
+
+    Returns:
+        dict: workspace_type -> list of HOURS_PER_WEEK targets
+    """
+    weeks = max(1, math.ceil((end - start) / WEEK))
+
+    # Peak bucket per (type, week, hour of week)
+    peaks = {}
+    for (workspace_type, moment), count in buckets.items():
+        if not start <= moment < end:
+            continue
+        key = (workspace_type, int((moment - start) / WEEK), hour_of_week(moment))
+        peaks[key] = max(peaks.get(key, 0), count)
+
+    schedule = {}
+    for workspace_type in WORKSPACE_TYPES:
+        targets = []
+        for hour in range(HOURS_PER_WEEK):
+            samples = [peaks.get((workspace_type, week, hour), 0) for week in range(weeks)]
+            targets.append(min(max_size, max(min_size, quantile(samples, q))))
+        schedule[workspace_type] = targets
+    return schedule
+
+
+def scheduled_target(schedule: Schedule, workspace_type: str, moment: datetime, prewarm_minutes: int = 15) -> int:
+    """Target for now, raised early to the next hour's target so the pool is warm when a class starts"""
+    targets = schedule[workspace_type]
+    upcoming = moment + timedelta(minutes=prewarm_minutes)
+    return max(targets[hour_of_week(moment)], targets[hour_of_week(upcoming)])
+
+
+def static_policy(size: int) -> Callable[[str, datetime], int]:
+    return lambda workspace_type, moment: size
+
+
+def schedule_policy(schedule: Schedule, prewarm_minutes: int = 15) -> Callable[[str, datetime], int]:
+    return lambda workspace_type, moment: scheduled_target(schedule, workspace_type, moment, prewarm_minutes)
+
+
+def simulate(
+    launches: List[Tuple[datetime, str]],
+    policy: Callable[[str, datetime], int],
+    start: datetime,
+    end: datetime,
+    warmup_minutes: float = 3,
+    tick_minutes: float = 5,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Replay launches against a pool policy, the way the Lambda runs it
+
+    Every tick (the monitor schedule) the pool is topped up to, or drained
+    down to, the policy's target; new containers are ready warmup_minutes
+    later. A launch takes a ready container (hit) and starts a replacement,
+    or cold-starts (miss).
+
+    Returns:
+        dict: workspace_type -> {'hits', 'misses', 'hit_rate', 'container_hours'}
+    """
+    results = {}
+    warmup = timedelta(minutes=warmup_minutes)
+    tick = timedelta(minutes=tick_minutes)
+
+    for workspace_type in WORKSPACE_TYPES:
+        arrivals = sorted(moment for moment, kind in launches if kind == workspace_type and start <= moment < end)
+        ready = 0
+        starting = []  # ready-at times of containers still warming up
+        hits = misses = 0
+        container_seconds = 0.0
+        clock = start
+        next_tick = start
+        index = 0
+
+        while clock < end:
+            is_tick = index >= len(arrivals) or next_tick <= arrivals[index]
+            moment = min(next_tick, end) if is_tick else arrivals[index]
+            container_seconds += (ready + len(starting)) * (moment - clock).total_seconds()
+            clock = moment
+            if clock >= end:
+                break
+
+            ready += sum(1 for ready_at in starting if ready_at <= clock)
+            starting = [ready_at for ready_at in starting if ready_at > clock]
+
+            if is_tick:
+                target = policy(workspace_type, clock)
+                missing = target - ready - len(starting)
+                if missing > 0:
+                    starting.extend([clock + warmup] * missing)
+                elif ready > target:
+                    ready = target  # surplus warm containers are stopped
+                next_tick = clock + tick
+            else:
+                if ready:
+                    hits += 1
+                    ready -= 1
+                    starting.append(clock + warmup)  # replacement, as launch_workspace does
+                else:
+                    misses += 1
+                index += 1
+
+        total = hits + misses
+        results[workspace_type] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 1.0,
+            'container_hours': container_seconds / 3600,
+        }
+    return results
@@ -3,10 +3,18 @@ AWS Lambda Function: Workspace Manager
 Handles on-demand workspace provisioning with auto-termination
 """
 import boto3
+import hashlib
+import hmac
 import os
 import json
+import urllib.request
+from boto3.dynamodb.conditions import Key
+from collections import Counter
+from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+import warm_pool_forecast as forecast
 
 # AWS Clients
 ecs = boto3.client('ecs')
@@ -22,6 +30,31 @@ SECURITY_GROUP = os.environ['SECURITY_GROUP']
 TABLE_NAME = os.environ['DYNAMODB_TABLE']
 WARM_POOL_SIZE = int(os.environ.get('WARM_POOL_SIZE', '3'))
 IDLE_TIMEOUT = int(os.environ.get('IDLE_TIMEOUT_MINUTES', '30'))
+STATUS_INDEX = os.environ.get('STATUS_INDEX', 'StatusTypeIndex')
+PROVISIONING_TIMEOUT = int(os.environ.get('PROVISIONING_TIMEOUT_MINUTES', '10'))
+
+# Predictive warm pool sizing (see warm_pool_forecast); WARM_POOL_SIZE applies until a schedule exists
+FORECAST_WEEKS = int(os.environ.get('FORECAST_WEEKS', '4'))
+FORECAST_QUANTILE = float(os.environ.get('FORECAST_QUANTILE', '0.9'))
+WARM_POOL_MIN_SIZE = int(os.environ.get('WARM_POOL_MIN_SIZE', '0'))
+WARM_POOL_MAX_SIZE = int(os.environ.get('WARM_POOL_MAX_SIZE', '10'))
+PREWARM_MINUTES = int(os.environ.get('PREWARM_MINUTES', '15'))
+METRICS_NAMESPACE = 'ApraNova/Workspace'
+
+# Readiness is pushed to the backend (accounts.workspace_views.workspace_callback)
+BACKEND_CALLBACK_URL = os.environ.get('BACKEND_CALLBACK_URL', '')
+CALLBACK_SECRET = os.environ.get('WORKSPACE_CALLBACK_SECRET', '')
+
+# Warm containers are stored under this user_id until a user claims them.
+# Their status is 'pending' while the task starts and 'warm' once it is RUNNING.
+WARM_POOL_USER = 'warm_pool'
+
+# The forecast schedule lives in the state table; it has no status, so it stays out of the status index
+SCHEDULE_KEY = {'user_id': '__config__', 'task_arn': 'warm_pool_schedule'}
+
+# ECS API limits
+DESCRIBE_TASKS_BATCH = 100
+RUN_TASK_MAX_COUNT = 10
 
 # DynamoDB Table
 table = dynamodb.Table(TABLE_NAME)
@@ -32,11 +65,18 @@ def lambda_handler(event, context):
     Main Lambda handler
     
     Actions:
-    - launch: Launch workspace for user
+    - launch: Launch workspace for user (returns 202 while the task starts)
+    - status: Current workspace state for a user
     - monitor: Check and terminate idle workspaces
     - terminate: Manually terminate workspace
     - warm_pool: Maintain warm pool
+    - forecast: Rebuild the hour-of-week warm pool schedule from launch history
+    
+    ECS Task State Change events from EventBridge drive readiness.
     """
+    if event.get('detail-type') == 'ECS Task State Change':
+        return handle_task_state_change(event['detail'])
+    
     action = event.get('action', 'monitor')
     
     print(f"Action: {action}, Event: {json.dumps(event)}")
@@ -44,12 +84,16 @@ def lambda_handler(event, context):
     try:
         if action == 'launch':
             return launch_workspace(event)
+        elif action == 'status':
+            return get_workspace_status(event)
         elif action == 'monitor':
             return monitor_workspaces()
         elif action == 'terminate':
             return terminate_workspace(event)
         elif action == 'warm_pool':
             return maintain_warm_pool()
+        elif action == 'forecast':
+            return update_warm_pool_schedule()
         else:
             return {
                 'statusCode': 400,
@@ -68,10 +112,11 @@ def launch_workspace(event: Dict) -> Dict:
     Launch workspace container for user
     
     Flow:
-    1. Check if user already has running workspace
-    2. Try to assign from warm pool
-    3. If no warm container, launch on-demand
-    4. Return workspace URL
+    1. Check if user already has a running or starting workspace
+    2. Try to assign from warm pool (ready immediately)
+    3. If no warm container, start an on-demand task and answer 202 right
+       away; the task's RUNNING event marks it ready (handle_task_state_change)
+    4. Return workspace URL, or the 'provisioning' state to poll with 'status'
     """
     user_id = event['user_id']
     workspace_type = event.get('workspace_type', 'vscode')  # 'vscode' or 'superset'
@@ -91,21 +136,22 @@ def launch_workspace(event: Dict) -> Dict:
                 'startup_time': 0
             })
         }
+    if existing and existing['status'] == 'provisioning':
+        return _provisioning_response(existing)
     
-    # Try to get warm container
-    warm_container = get_warm_container(workspace_type)
+    # Try to claim a warm container
+    warm_container = claim_warm_container(workspace_type, user_id)
     
     if warm_container:
-        print(f"Assigning warm container to user {user_id}")
-        # Assign warm container to user
-        assign_container_to_user(warm_container, user_id)
+        print(f"Assigned warm container {warm_container['task_arn']} to user {user_id}")
         
         # Launch replacement warm container
-        launch_warm_container(workspace_type)
+        launch_warm_containers(workspace_type, 1)
         
         # Record metrics
         record_metric('WorkspaceLaunchTime', 0, 'Seconds')
-        record_metric('WarmPoolHit', 1, 'Count')
+        record_metric('WarmPoolHit', 1, 'Count', workspace_type=workspace_type)
+        notify_backend(warm_container, 'ready')
         
         return {
             'statusCode': 200,
@@ -117,47 +163,254 @@ def launch_workspace(event: Dict) -> Dict:
                 'source': 'warm_pool'
             })
         }
-    else:
-        print(f"No warm container available, launching on-demand")
-        # Launch on-demand
-        start_time = datetime.now()
-        task_arn = launch_ecs_task(user_id, workspace_type)
-        
-        # Wait for task to be running
-        wait_for_task_running(task_arn)
-        
-        # Get task details
-        task_info = get_task_info(task_arn)
-        url = get_task_url(task_info, workspace_type)
-        
-        startup_time = (datetime.now() - start_time).total_seconds()
-        
-        # Record in DynamoDB
-        table.put_item(Item={
-            'user_id': user_id,
-            'task_arn': task_arn,
-            'workspace_type': workspace_type,
-            'status': 'running',
-            'last_activity': datetime.now().isoformat(),
-            'url': url,
-            'created_at': datetime.now().isoformat(),
-            'ttl': int((datetime.now() + timedelta(days=7)).timestamp())
+    
+    print(f"No warm container available, launching on-demand")
+    task_arn = launch_ecs_task(user_id, workspace_type)
+    
+    # Record in DynamoDB; the RUNNING event fills in the URL
+    now = datetime.now()
+    item = {
+        'user_id': user_id,
+        'task_arn': task_arn,
+        'workspace_type': workspace_type,
+        'status': 'provisioning',
+        'last_activity': now.isoformat(),
+        'url': '',
+        'created_at': now.isoformat(),
+        'ttl': int((now + timedelta(days=7)).timestamp())
+    }
+    table.put_item(Item=item)
+    
+    record_metric('WarmPoolMiss', 1, 'Count', workspace_type=workspace_type)
+    
+    return _provisioning_response(item)
+
+
+def _provisioning_response(item: Dict) -> Dict:
+    return {
+        'statusCode': 202,
+        'body': json.dumps({
+            'status': 'provisioning',
+            'task_arn': item['task_arn'],
+            'source': 'on_demand'
         })
-        
-        # Record metrics
-        record_metric('WorkspaceLaunchTime', startup_time, 'Seconds')
-        record_metric('WarmPoolMiss', 1, 'Count')
-        
+    }
+
+
+def get_workspace_status(event: Dict) -> Dict:
+    """Report a user's current workspace (for callers polling after a 202)"""
+    workspace = get_user_workspace(event['user_id'])
+    if not workspace:
         return {
-            'statusCode': 200,
-            'body': json.dumps({
-                'status': 'ready',
-                'url': url,
-                'task_arn': task_arn,
-                'startup_time': startup_time,
-                'source': 'on_demand'
-            })
+            'statusCode': 404,
+            'body': json.dumps({'error': 'No workspace found'})
         }
+    
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'status': 'ready' if workspace['status'] == 'running' else workspace['status'],
+            'url': workspace.get('url', ''),
+            'task_arn': workspace['task_arn'],
+            'error': workspace.get('stop_reason', '')
+        })
+    }
+
+
+def handle_task_state_change(detail: Dict) -> Dict:
+    """
+    Advance workspace state from an ECS Task State Change event
+    
+    RUNNING marks a provisioning workspace ready (or a pending warm container
+    warm); STOPPED marks a workspace stopped, or failed if it never started.
+    Events can arrive more than once and out of order, so every update is
+    conditional on the state it moves from.
+    """
+    task_arn = detail['taskArn']
+    last_status = detail.get('lastStatus')
+    environment = _task_environment(detail)
+    user_id = environment.get('USER_ID')
+    workspace_type = environment.get('WORKSPACE_TYPE', 'vscode')
+    
+    if not user_id:
+        print(f"Ignoring event for unmanaged task {task_arn}")
+        return {'statusCode': 200, 'body': json.dumps({'status': 'ignored'})}
+    
+    item = {'user_id': user_id, 'task_arn': task_arn, 'workspace_type': workspace_type}
+    
+    if user_id == WARM_POOL_USER:
+        if last_status == 'RUNNING':
+            _promote_warm(item, detail)
+        elif last_status == 'STOPPED':
+            # A claimed container was re-keyed to its user, so this only removes unclaimed ones
+            table.delete_item(Key={'user_id': user_id, 'task_arn': task_arn})
+    elif last_status == 'RUNNING':
+        mark_ready(item, detail)
+    elif last_status == 'STOPPED':
+        reason = detail.get('stoppedReason', 'task_stopped')
+        if not mark_failed(item, reason):
+            try:
+                table.update_item(
+                    Key={'user_id': user_id, 'task_arn': task_arn},
+                    UpdateExpression='SET #status = :stopped, stopped_at = :now, stop_reason = :reason',
+                    ConditionExpression='#status = :running',
+                    ExpressionAttributeNames={'#status': 'status'},
+                    ExpressionAttributeValues={
+                        ':stopped': 'stopped',
+                        ':running': 'running',
+                        ':now': datetime.now().isoformat(),
+                        ':reason': reason
+                    }
+                )
+                notify_backend(item, 'stopped')
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+    
+    return {'statusCode': 200, 'body': json.dumps({'status': last_status})}
+
+
+def _task_environment(detail: Dict) -> Dict:
+    """USER_ID / WORKSPACE_TYPE overrides that launch_ecs_tasks set on the task"""
+    environment = {}
+    for override in detail.get('overrides', {}).get('containerOverrides', []):
+        for variable in override.get('environment', []):
+            environment[variable['name']] = variable['value']
+    return environment
+
+
+def _promote_warm(item: Dict, task: Dict):
+    try:
+        table.update_item(
+            Key={'user_id': item['user_id'], 'task_arn': item['task_arn']},
+            UpdateExpression='SET #status = :warm, #url = :url',
+            ConditionExpression='#status = :pending',
+            ExpressionAttributeNames={'#status': 'status', '#url': 'url'},
+            ExpressionAttributeValues={
+                ':warm': 'warm',
+                ':pending': 'pending',
+                ':url': get_task_url(task, item['workspace_type'])
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def mark_ready(item: Dict, task: Dict) -> bool:
+    """
+    Move a provisioning workspace to running with its URL and tell the backend
+    
+    Returns:
+        bool: False if the workspace was not provisioning (duplicate or late event)
+    """
+    now = datetime.now()
+    url = get_task_url(task, item['workspace_type'])
+    try:
+        response = table.update_item(
+            Key={'user_id': item['user_id'], 'task_arn': item['task_arn']},
+            UpdateExpression='SET #status = :running, #url = :url, ready_at = :now, last_activity = :now',
+            ConditionExpression='#status = :provisioning',
+            ExpressionAttributeNames={'#status': 'status', '#url': 'url'},
+            ExpressionAttributeValues={
+                ':running': 'running',
+                ':provisioning': 'provisioning',
+                ':url': url,
+                ':now': now.isoformat()
+            },
+            ReturnValues='ALL_NEW'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+    
+    workspace = response['Attributes']
+    startup_time = (now - datetime.fromisoformat(workspace['created_at'])).total_seconds()
+    print(f"Workspace ready for user {item['user_id']} after {startup_time:.1f}s: {url}")
+    record_metric('WorkspaceLaunchTime', startup_time, 'Seconds')
+    notify_backend(workspace, 'ready')
+    return True
+
+
+def mark_failed(item: Dict, reason: str) -> bool:
+    """
+    Record that a provisioning workspace never became ready
+    
+    Returns:
+        bool: False if the workspace was not provisioning
+    """
+    try:
+        table.update_item(
+            Key={'user_id': item['user_id'], 'task_arn': item['task_arn']},
+            UpdateExpression='SET #status = :failed, stopped_at = :now, stop_reason = :reason',
+            ConditionExpression='#status = :provisioning',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':failed': 'failed',
+                ':provisioning': 'provisioning',
+                ':now': datetime.now().isoformat(),
+                ':reason': reason
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+    
+    print(f"Workspace for user {item['user_id']} failed to start: {reason}")
+    notify_backend(item, 'failed', error=reason)
+    return True
+
+
+def reconcile_provisioning():
+    """
+    Settle provisioning workspaces whose state change event was missed
+    
+    Runs with the monitor; tasks still starting after PROVISIONING_TIMEOUT
+    are stopped and marked failed.
+    """
+    provisioning = list(query_by_status('provisioning'))
+    tasks = describe_tasks([item['task_arn'] for item in provisioning])
+    cutoff = datetime.now() - timedelta(minutes=PROVISIONING_TIMEOUT)
+    
+    for item in provisioning:
+        task = tasks.get(item['task_arn'])
+        if not task or task['lastStatus'] == 'STOPPED':
+            mark_failed(item, (task or {}).get('stoppedReason', 'task_missing'))
+        elif task['lastStatus'] == 'RUNNING':
+            mark_ready(item, task)
+        elif datetime.fromisoformat(item['created_at']) < cutoff:
+            ecs.stop_task(cluster=CLUSTER_NAME, task=item['task_arn'], reason='provisioning_timeout')
+            mark_failed(item, 'provisioning_timeout')
+
+
+def notify_backend(workspace: Dict, status: str, error: str = ''):
+    """POST a workspace state change to the backend, signed with CALLBACK_SECRET"""
+    if not BACKEND_CALLBACK_URL:
+        return
+    
+    body = json.dumps({
+        'user_id': workspace['user_id'],
+        'workspace_type': workspace['workspace_type'],
+        'task_arn': workspace['task_arn'],
+        'status': status,
+        'url': workspace.get('url', ''),
+        'error': error
+    }).encode()
+    signature = 'sha256=' + hmac.new(CALLBACK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    request = urllib.request.Request(
+        BACKEND_CALLBACK_URL,
+        data=body,
+        headers={'Content-Type': 'application/json', 'X-Workspace-Signature': signature},
+        method='POST'
+    )
+    try:
+        # DynamoDB stays the source of truth; a missed callback is not fatal
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+    except Exception as e:
+        print(f"Error notifying backend: {str(e)}")
 
 
 def monitor_workspaces() -> Dict:
@@ -165,36 +418,45 @@ def monitor_workspaces() -> Dict:
     Monitor all running workspaces and terminate idle ones
     
     Checks:
+    - Task still alive in ECS (one describe_tasks call per 100 workspaces)
     - Last activity timestamp
     - If idle > IDLE_TIMEOUT, terminate
     """
     print("Monitoring workspaces for idle timeout")
     
-    # Get all running workspaces
-    response = table.scan(
-        FilterExpression='#status = :running',
-        ExpressionAttributeNames={'#status': 'status'},
-        ExpressionAttributeValues={':running': 'running'}
-    )
+    # Get all running workspaces (every page of the status index)
+    running = list(query_by_status('running'))
+    tasks = describe_tasks([item['task_arn'] for item in running])
     
     terminated_count = 0
     active_count = 0
+    gone_count = 0
+    now = datetime.now()
     
-    for item in response['Items']:
+    for item in running:
         user_id = item['user_id']
         task_arn = item['task_arn']
-        last_activity = datetime.fromisoformat(item['last_activity'])
-        idle_time = datetime.now() - last_activity
         
-        print(f"User {user_id}: idle for {idle_time.total_seconds() / 60:.1f} minutes")
+        task = tasks.get(task_arn)
+        if not task or task['lastStatus'] == 'STOPPED':
+            # Task ended on its own; just bring the record in line
+            mark_stopped(user_id, task_arn, 'task_stopped')
+            gone_count += 1
+            continue
         
+        idle_time = now - datetime.fromisoformat(item['last_activity'])
         if idle_time > timedelta(minutes=IDLE_TIMEOUT):
-            print(f"Terminating idle workspace for user {user_id}")
-            terminate_workspace({'task_arn': task_arn, 'reason': 'idle_timeout'})
+            print(f"Terminating workspace for user {user_id}: idle for {idle_time.total_seconds() / 60:.1f} minutes")
+            terminate_workspace({'user_id': user_id, 'task_arn': task_arn, 'reason': 'idle_timeout'})
             terminated_count += 1
         else:
             active_count += 1
     
+    print(f"Workspaces: active={active_count}, terminated={terminated_count}, already stopped={gone_count}")
+    
+    # Catch up on task state change events that never arrived
+    reconcile_provisioning()
+    
     # Maintain warm pool
     maintain_warm_pool()
     
@@ -206,7 +468,8 @@ def monitor_workspaces() -> Dict:
         'statusCode': 200,
         'body': json.dumps({
             'active': active_count,
-            'terminated': terminated_count
+            'terminated': terminated_count,
+            'stopped': gone_count
         })
     }
 
@@ -219,7 +482,10 @@ def terminate_workspace(event: Dict) -> Dict:
     1. Stop ECS task
     2. Update DynamoDB status
     3. Record metrics
+    
+    The event needs both user_id and task_arn (the table's key).
     """
+    user_id = event['user_id']
     task_arn = event['task_arn']
     reason = event.get('reason', 'manual')
     
@@ -234,15 +500,7 @@ def terminate_workspace(event: Dict) -> Dict:
         )
         
         # Update DynamoDB
-        table.update_item(
-            Key={'task_arn': task_arn},
-            UpdateExpression='SET #status = :stopped, stopped_at = :now',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':stopped': 'stopped',
-                ':now': datetime.now().isoformat()
-            }
-        )
+        mark_stopped(user_id, task_arn, reason)
         
         print(f"Workspace terminated: {task_arn}")
         
@@ -262,104 +520,283 @@ def maintain_warm_pool() -> Dict:
     """
     Maintain warm pool of ready containers
     
-    Ensures WARM_POOL_SIZE containers are always ready
+    Follows the hour-of-week schedule from update_warm_pool_schedule (or
+    WARM_POOL_SIZE without one): launches missing containers ahead of busy
+    hours and stops surplus warm containers when demand drops.
     """
-    print(f"Maintaining warm pool (target: {WARM_POOL_SIZE})")
+    schedule = load_warm_pool_schedule()
+    now = datetime.now()
     
-    # Count current warm containers
-    warm_vscode = count_warm_containers('vscode')
-    warm_superset = count_warm_containers('superset')
+    refresh_warm_pool()
     
-    print(f"Current warm pool: vscode={warm_vscode}, superset={warm_superset}")
+    result = {}
+    for workspace_type in ('vscode', 'superset'):
+        target = (
+            forecast.scheduled_target(schedule, workspace_type, now, PREWARM_MINUTES)
+            if schedule else WARM_POOL_SIZE
+        )
+        warm = count_by_status('warm', workspace_type)
+        current = warm + count_by_status('pending', workspace_type)
+        
+        launched = []
+        released = 0
+        if current < target:
+            launched = launch_warm_containers(workspace_type, target - current)
+        elif warm > target:
+            released = release_warm_containers(workspace_type, warm - target)
+        
+        print(
+            f"Warm pool {workspace_type}: target {target}, {current} present, "
+            f"{len(launched)} launched, {released} released"
+        )
+        result[f'{workspace_type}_warm'] = current + len(launched) - released
     
-    # Launch missing warm containers
-    vscode_needed = max(0, WARM_POOL_SIZE - warm_vscode)
-    superset_needed = max(0, WARM_POOL_SIZE - warm_superset)
+    return {
+        'statusCode': 200,
+        'body': json.dumps(result)
+    }
+
+
+def release_warm_containers(workspace_type: str, count: int) -> int:
+    """Stop up to count unclaimed warm containers"""
+    released = 0
+    for item in query_by_status('warm', workspace_type):
+        if released >= count:
+            break
+        try:
+            # Conditional so a container claimed meanwhile is left alone
+            table.delete_item(
+                Key={'user_id': item['user_id'], 'task_arn': item['task_arn']},
+                ConditionExpression='#status = :warm',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':warm': 'warm'}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                continue
+            raise
+        ecs.stop_task(cluster=CLUSTER_NAME, task=item['task_arn'], reason='warm_pool_scale_down')
+        released += 1
+    return released
+
+
+def load_warm_pool_schedule() -> Optional[Dict]:
+    """The stored hour-of-week schedule, or None to fall back to WARM_POOL_SIZE"""
+    item = table.get_item(Key=SCHEDULE_KEY).get('Item')
+    if not item:
+        return None
+    return {
+        workspace_type: [int(target) for target in targets]
+        for workspace_type, targets in item['schedule'].items()
+    }
+
+
+def update_warm_pool_schedule() -> Dict:
+    """
+    Rebuild the warm pool schedule from the last FORECAST_WEEKS of launches
+    
+    Launch history comes from the workspace records in DynamoDB (kept for
+    their 7-day TTL) and the WarmPoolHit/WarmPoolMiss metrics in CloudWatch
+    (5-minute data is kept for 63 days).
+    """
+    end = forecast.bucket_start(datetime.now())
+    start = end - timedelta(weeks=FORECAST_WEEKS)
     
-    for _ in range(vscode_needed):
-        launch_warm_container('vscode')
+    buckets = forecast.merge_buckets(
+        forecast.demand_buckets(load_launches(start)),
+        load_metric_buckets(start, end)
+    )
+    schedule = forecast.build_schedule(
+        buckets, start, end,
+        q=FORECAST_QUANTILE,
+        min_size=WARM_POOL_MIN_SIZE,
+        max_size=WARM_POOL_MAX_SIZE
+    )
     
-    for _ in range(superset_needed):
-        launch_warm_container('superset')
+    table.put_item(Item=dict(
+        SCHEDULE_KEY,
+        schedule=schedule,
+        generated_at=datetime.now().isoformat(),
+        weeks=FORECAST_WEEKS,
+        quantile=str(FORECAST_QUANTILE)
+    ))
+    
+    summary = {
+        workspace_type: {
+            'peak': max(targets),
+            'container_hours_per_week': sum(targets)
+        }
+        for workspace_type, targets in schedule.items()
+    }
+    print(f"Warm pool schedule updated: {json.dumps(summary)}")
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
-            'vscode_warm': warm_vscode + vscode_needed,
-            'superset_warm': warm_superset + superset_needed
-        })
+        'body': json.dumps(summary)
     }
 
 
+def load_launches(since: datetime) -> List:
+    """(timestamp, workspace_type) of user launches still recorded in DynamoDB"""
+    launches = []
+    for status in ('provisioning', 'running', 'stopped', 'failed'):
+        for item in query_by_status(status):
+            # Warm containers claimed before created_at was reset on claim kept the pool's; assigned_at is the launch
+            launched_at = datetime.fromisoformat(item.get('assigned_at') or item['created_at'])
+            if launched_at >= since:
+                launches.append((launched_at, item['workspace_type']))
+    return launches
+
+
+def load_metric_buckets(start: datetime, end: datetime) -> Dict:
+    """5-minute launch counts per workspace type from WarmPoolHit + WarmPoolMiss"""
+    queries = []
+    for i, workspace_type in enumerate(forecast.WORKSPACE_TYPES):
+        for metric_name in ('WarmPoolHit', 'WarmPoolMiss'):
+            queries.append({
+                'Id': f'{metric_name.lower()}{i}',
+                'Label': workspace_type,
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': METRICS_NAMESPACE,
+                        'MetricName': metric_name,
+                        'Dimensions': [{'Name': 'WorkspaceType', 'Value': workspace_type}]
+                    },
+                    'Period': 300,
+                    'Stat': 'Sum'
+                }
+            })
+    
+    buckets = Counter()
+    kwargs = {'MetricDataQueries': queries, 'StartTime': start, 'EndTime': end}
+    while True:
+        response = cloudwatch.get_metric_data(**kwargs)
+        for series in response['MetricDataResults']:
+            for timestamp, value in zip(series['Timestamps'], series['Values']):
+                moment = timestamp.replace(tzinfo=None)
+                buckets[(series['Label'], moment)] += int(value)
+        if not response.get('NextToken'):
+            return buckets
+        kwargs['NextToken'] = response['NextToken']
+
+
 # Helper Functions
 
-def launch_ecs_task(user_id: str, workspace_type: str) -> str:
-    """Launch ECS Fargate task"""
+def launch_ecs_tasks(user_id: str, workspace_type: str, count: int = 1) -> List[str]:
+    """Launch ECS Fargate tasks, up to RUN_TASK_MAX_COUNT per run_task call"""
     task_def = VSCODE_TASK_DEF if workspace_type == 'vscode' else SUPERSET_TASK_DEF
+    task_arns = []
     
-    response = ecs.run_task(
-        cluster=CLUSTER_NAME,
-        taskDefinition=task_def,
-        launchType='FARGATE',
-        networkConfiguration={
-            'awsvpcConfiguration': {
-                'subnets': SUBNETS,
-                'securityGroups': [SECURITY_GROUP],
-                'assignPublicIp': 'DISABLED'
-            }
-        },
-        overrides={
-            'containerOverrides': [{
-                'name': 'workspace',
-                'environment': [
-                    {'name': 'USER_ID', 'value': str(user_id)},
-                    {'name': 'WORKSPACE_TYPE', 'value': workspace_type}
-                ]
-            }]
-        },
-        tags=[
-            {'key': 'user_id', 'value': str(user_id)},
-            {'key': 'type', 'value': workspace_type},
-            {'key': 'managed_by', 'value': 'workspace_manager'}
-        ]
-    )
+    while count > 0:
+        batch = min(count, RUN_TASK_MAX_COUNT)
+        response = ecs.run_task(
+            cluster=CLUSTER_NAME,
+            taskDefinition=task_def,
+            launchType='FARGATE',
+            count=batch,
+            networkConfiguration={
+                'awsvpcConfiguration': {
+                    'subnets': SUBNETS,
+                    'securityGroups': [SECURITY_GROUP],
+                    'assignPublicIp': 'DISABLED'
+                }
+            },
+            overrides={
+                'containerOverrides': [{
+                    'name': 'workspace',
+                    'environment': [
+                        {'name': 'USER_ID', 'value': str(user_id)},
+                        {'name': 'WORKSPACE_TYPE', 'value': workspace_type}
+                    ]
+                }]
+            },
+            tags=[
+                {'key': 'user_id', 'value': str(user_id)},
+                {'key': 'type', 'value': workspace_type},
+                {'key': 'managed_by', 'value': 'workspace_manager'}
+            ]
+        )
+        
+        task_arns.extend(task['taskArn'] for task in response['tasks'])
+        if response.get('failures'):
+            # Usually capacity; the next monitor run tries again
+            print(f"run_task failures: {response['failures']}")
+            break
+        count -= batch
     
-    return response['tasks'][0]['taskArn']
+    return task_arns
 
 
-def launch_warm_container(workspace_type: str) -> str:
-    """Launch warm container (not assigned to user)"""
-    return launch_ecs_task('warm_pool', workspace_type)
+def launch_ecs_task(user_id: str, workspace_type: str) -> str:
+    """Launch a single ECS Fargate task"""
+    task_arns = launch_ecs_tasks(user_id, workspace_type, 1)
+    if not task_arns:
+        raise RuntimeError(f"Could not launch {workspace_type} task")
+    return task_arns[0]
+
+
+def launch_warm_containers(workspace_type: str, count: int) -> List[str]:
+    """Launch warm containers (not assigned to a user) and record them as pending"""
+    task_arns = launch_ecs_tasks(WARM_POOL_USER, workspace_type, count)
+    
+    now = datetime.now()
+    with table.batch_writer() as batch:
+        for task_arn in task_arns:
+            batch.put_item(Item={
+                'user_id': WARM_POOL_USER,
+                'task_arn': task_arn,
+                'workspace_type': workspace_type,
+                'status': 'pending',
+                'url': '',
+                'created_at': now.isoformat(),
+                'ttl': int((now + timedelta(days=7)).timestamp())
+            })
+    
+    return task_arns
 
 
-def wait_for_task_running(task_arn: str, timeout: int = 60):
-    """Wait for ECS task to reach RUNNING state"""
-    import time
-    start = time.time()
+def refresh_warm_pool():
+    """Promote started warm tasks to 'warm' and drop the ones that stopped"""
+    pending = list(query_by_status('pending'))
+    warm = list(query_by_status('warm'))
+    tasks = describe_tasks([item['task_arn'] for item in pending + warm])
     
-    while time.time() - start < timeout:
+    for item in pending + warm:
+        task = tasks.get(item['task_arn'])
+        key = {'user_id': item['user_id'], 'task_arn': item['task_arn']}
+        
+        if not task or task['lastStatus'] == 'STOPPED':
+            table.delete_item(Key=key)
+        elif item['status'] == 'pending' and task['lastStatus'] == 'RUNNING':
+            table.update_item(
+                Key=key,
+                UpdateExpression='SET #status = :warm, #url = :url',
+                ConditionExpression='#status = :pending',
+                ExpressionAttributeNames={'#status': 'status', '#url': 'url'},
+                ExpressionAttributeValues={
+                    ':warm': 'warm',
+                    ':pending': 'pending',
+                    ':url': get_task_url(task, item['workspace_type'])
+                }
+            )
+
+
+def describe_tasks(task_arns: List[str]) -> Dict[str, Dict]:
+    """
+    Describe many tasks with one call per DESCRIBE_TASKS_BATCH arns
+    
+    Returns:
+        dict: task_arn -> task; tasks ECS no longer knows about are absent
+    """
+    tasks = {}
+    for i in range(0, len(task_arns), DESCRIBE_TASKS_BATCH):
         response = ecs.describe_tasks(
             cluster=CLUSTER_NAME,
-            tasks=[task_arn]
+            tasks=task_arns[i:i + DESCRIBE_TASKS_BATCH]
         )
-        
-        if response['tasks']:
-            status = response['tasks'][0]['lastStatus']
-            if status == 'RUNNING':
-                return
-        
-        time.sleep(2)
-    
-    raise TimeoutError(f"Task {task_arn} did not reach RUNNING state")
-
-
-def get_task_info(task_arn: str) -> Dict:
-    """Get task details"""
-    response = ecs.describe_tasks(
-        cluster=CLUSTER_NAME,
-        tasks=[task_arn]
-    )
-    return response['tasks'][0]
+        for task in response['tasks']:
+            tasks[task['taskArn']] = task
+    return tasks
 
 
 def get_task_url(task_info: Dict, workspace_type: str) -> str:
@@ -377,75 +814,146 @@ def get_task_url(task_info: Dict, workspace_type: str) -> str:
 
 
 def get_user_workspace(user_id: str) -> Optional[Dict]:
-    """Get user's current workspace"""
-    response = table.query(
-        KeyConditionExpression='user_id = :uid',
-        ExpressionAttributeValues={':uid': user_id},
-        ScanIndexForward=False,
-        Limit=1
-    )
+    """Get user's current workspace (the most recently created one)"""
+    workspaces = list(query_all(
+        KeyConditionExpression=Key('user_id').eq(user_id)
+    ))
     
-    if response['Items']:
-        return response['Items'][0]
+    if workspaces:
+        return max(workspaces, key=lambda item: item.get('created_at', ''))
     return None
 
 
-def get_warm_container(workspace_type: str) -> Optional[Dict]:
-    """Get available warm container"""
-    response = table.scan(
-        FilterExpression='user_id = :warm AND workspace_type = :type AND #status = :running',
-        ExpressionAttributeNames={'#status': 'status'},
-        ExpressionAttributeValues={
-            ':warm': 'warm_pool',
-            ':type': workspace_type,
-            ':running': 'running'
-        },
-        Limit=1
+def query_all(**kwargs) -> Iterator[Dict]:
+    """Yield every item of a query, following LastEvaluatedKey across pages"""
+    while True:
+        response = table.query(**kwargs)
+        yield from response['Items']
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _status_condition(status: str, workspace_type: Optional[str] = None):
+    condition = Key('status').eq(status)
+    if workspace_type:
+        condition = condition & Key('workspace_type').eq(workspace_type)
+    return condition
+
+
+def query_by_status(status: str, workspace_type: Optional[str] = None, **kwargs) -> Iterator[Dict]:
+    """Workspaces in a status (optionally of one type) from the status index"""
+    return query_all(
+        IndexName=STATUS_INDEX,
+        KeyConditionExpression=_status_condition(status, workspace_type),
+        **kwargs
     )
-    
-    if response['Items']:
-        return response['Items'][0]
-    return None
 
 
-def count_warm_containers(workspace_type: str) -> int:
-    """Count warm containers of given type"""
-    response = table.scan(
-        FilterExpression='user_id = :warm AND workspace_type = :type AND #status = :running',
-        ExpressionAttributeNames={'#status': 'status'},
-        ExpressionAttributeValues={
-            ':warm': 'warm_pool',
-            ':type': workspace_type,
-            ':running': 'running'
-        },
-        Select='COUNT'
+def count_by_status(status: str, workspace_type: str) -> int:
+    """Count workspaces in a status across all pages of the status index"""
+    kwargs = {
+        'IndexName': STATUS_INDEX,
+        'KeyConditionExpression': _status_condition(status, workspace_type),
+        'Select': 'COUNT'
+    }
+    count = 0
+    while True:
+        response = table.query(**kwargs)
+        count += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return count
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def claim_warm_container(workspace_type: str, user_id: str) -> Optional[Dict]:
+    """Take a warm container out of the pool for a user, or None if none is left"""
+    # A few candidates in case another invocation claims the first one
+    response = table.query(
+        IndexName=STATUS_INDEX,
+        KeyConditionExpression=_status_condition('warm', workspace_type),
+        Limit=5
     )
-    return response['Count']
+    for container in response['Items']:
+        if assign_container_to_user(container, user_id):
+            return container
+    return None
 
 
-def assign_container_to_user(container: Dict, user_id: str):
-    """Assign warm container to user"""
+def assign_container_to_user(container: Dict, user_id: str) -> bool:
+    """
+    Assign warm container to user
+    
+    user_id is the table's partition key, so the warm record is replaced by a
+    user record in one transaction; the condition makes concurrent claims of
+    the same container fail instead of double-assigning it. The user record
+    is created now (get_user_workspace picks the latest created_at); the
+    pool's creation time is kept as warmed_at.
+    
+    Returns:
+        bool: False if the container was already claimed
+    """
+    now = datetime.now()
+    item = dict(
+        container,
+        user_id=user_id,
+        status='running',
+        last_activity=now.isoformat(),
+        warmed_at=container['created_at'],
+        created_at=now.isoformat(),
+        assigned_at=now.isoformat()
+    )
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=[
+            {
+                'Delete': {
+                    'TableName': TABLE_NAME,
+                    'Key': {'user_id': container['user_id'], 'task_arn': container['task_arn']},
+                    'ConditionExpression': '#status = :warm',
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {':warm': 'warm'}
+                }
+            },
+            {'Put': {'TableName': TABLE_NAME, 'Item': item}}
+        ])
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'TransactionCanceledException':
+            return False
+        raise
+    
+    container.update(item)
+    return True
+
+
+def mark_stopped(user_id: str, task_arn: str, reason: str):
+    """Record that a workspace task is no longer running"""
     table.update_item(
-        Key={'task_arn': container['task_arn']},
-        UpdateExpression='SET user_id = :uid, last_activity = :now',
+        Key={'user_id': user_id, 'task_arn': task_arn},
+        UpdateExpression='SET #status = :stopped, stopped_at = :now, stop_reason = :reason',
+        ExpressionAttributeNames={'#status': 'status'},
         ExpressionAttributeValues={
-            ':uid': user_id,
-            ':now': datetime.now().isoformat()
+            ':stopped': 'stopped',
+            ':now': datetime.now().isoformat(),
+            ':reason': reason
         }
     )
 
 
-def record_metric(metric_name: str, value: float, unit: str):
-    """Record CloudWatch metric"""
+def record_metric(metric_name: str, value: float, unit: str, workspace_type: Optional[str] = None):
+    """Record CloudWatch metric, plus a per-type series when workspace_type is given"""
+    metric = {
+        'MetricName': metric_name,
+        'Value': value,
+        'Unit': unit,
+        'Timestamp': datetime.now()
+    }
+    metric_data = [metric]
+    if workspace_type:
+        metric_data.append(dict(metric, Dimensions=[{'Name': 'WorkspaceType', 'Value': workspace_type}]))
     try:
         cloudwatch.put_metric_data(
-            Namespace='ApraNova/Workspace',
-            MetricData=[{
-                'MetricName': metric_name,
-                'Value': value,
-                'Unit': unit,
-                'Timestamp': datetime.now()
-            }]
+            Namespace=METRICS_NAMESPACE,
+            MetricData=metric_data
         )
     except Exception as e:
         print(f"Error recording metric: {str(e)}")
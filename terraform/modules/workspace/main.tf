@@ -23,9 +23,16 @@ resource "aws_dynamodb_table" "workspace_state" {
     type = "S"
   }
   
+  attribute {
+    name = "workspace_type"
+    type = "S"
+  }
+  
+  # Monitoring and warm pool lookups query by status (and type) instead of scanning
   global_secondary_index {
-    name            = "StatusIndex"
+    name            = "StatusTypeIndex"
     hash_key        = "status"
+    range_key       = "workspace_type"
     projection_type = "ALL"
   }
   
@@ -267,8 +274,15 @@ resource "aws_lambda_function" "workspace_manager" {
       SUBNETS              = join(",", var.private_subnet_ids)
       SECURITY_GROUP       = aws_security_group.workspace.id
       DYNAMODB_TABLE       = aws_dynamodb_table.workspace_state.name
+      STATUS_INDEX         = "StatusTypeIndex"
       WARM_POOL_SIZE       = var.warm_pool_size
       IDLE_TIMEOUT_MINUTES = var.idle_timeout_minutes
+      # Hour-of-week warm pool schedule (WARM_POOL_SIZE until the first forecast)
+      WARM_POOL_MAX_SIZE = var.warm_pool_max_size
+      FORECAST_WEEKS     = 4
+      # Readiness is pushed to the backend instead of polled inside launch
+      BACKEND_CALLBACK_URL      = var.backend_callback_url
+      WORKSPACE_CALLBACK_SECRET = var.workspace_callback_secret
     }
   }
   
@@ -323,10 +337,22 @@ resource "aws_iam_role_policy" "lambda_ecs" {
           "dynamodb:PutItem",
           "dynamodb:GetItem",
           "dynamodb:UpdateItem",
-          "dynamodb:Scan",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Query"
         ]
-        Resource = aws_dynamodb_table.workspace_state.arn
+        Resource = [
+          aws_dynamodb_table.workspace_state.arn,
+          "${aws_dynamodb_table.workspace_state.arn}/index/*"
+        ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "cloudwatch:PutMetricData",
+          "cloudwatch:GetMetricData"
+        ]
+        Resource = "*"
       },
       {
         Effect = "Allow"
@@ -366,6 +392,60 @@ resource "aws_lambda_permission" "eventbridge" {
   source_arn    = aws_cloudwatch_event_rule.monitor_workspaces.arn
 }
 
+# EventBridge Rule for the warm pool forecast (daily)
+resource "aws_cloudwatch_event_rule" "warm_pool_forecast" {
+  name                = "${var.environment}-warm-pool-forecast"
+  description         = "Rebuild the hour-of-week warm pool schedule from launch history"
+  schedule_expression = "cron(30 3 * * ? *)"
+}
+
+resource "aws_cloudwatch_event_target" "warm_pool_forecast" {
+  rule      = aws_cloudwatch_event_rule.warm_pool_forecast.name
+  target_id = "workspace-manager"
+  arn       = aws_lambda_function.workspace_manager.arn
+  
+  input = jsonencode({
+    action = "forecast"
+  })
+}
+
+resource "aws_lambda_permission" "warm_pool_forecast" {
+  statement_id  = "AllowExecutionFromWarmPoolForecast"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.workspace_manager.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.warm_pool_forecast.arn
+}
+
+# EventBridge Rule for task readiness (replaces polling in the launch request)
+resource "aws_cloudwatch_event_rule" "task_state_change" {
+  name        = "${var.environment}-workspace-task-state"
+  description = "Workspace ECS tasks reaching RUNNING or STOPPED"
+  
+  event_pattern = jsonencode({
+    source        = ["aws.ecs"]
+    "detail-type" = ["ECS Task State Change"]
+    detail = {
+      clusterArn = ["arn:aws:ecs:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:cluster/${var.ecs_cluster_name}"]
+      lastStatus = ["RUNNING", "STOPPED"]
+    }
+  })
+}
+
+resource "aws_cloudwatch_event_target" "task_state_change" {
+  rule      = aws_cloudwatch_event_rule.task_state_change.name
+  target_id = "workspace-manager"
+  arn       = aws_lambda_function.workspace_manager.arn
+}
+
+resource "aws_lambda_permission" "task_state_change" {
+  statement_id  = "AllowExecutionFromTaskStateChange"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.workspace_manager.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.task_state_change.arn
+}
+
 # Data sources
 data "aws_region" "current" {}
 data "aws_caller_identity" "current" {}